@@ -45,6 +45,9 @@ class Settings(BaseSettings):
     DEFAULT_CAPTION_STYLE: str = "hormozi"
     DEFAULT_FPS: int = 30
     DEFAULT_VIDEO_BITRATE: str = "10M"
+    DEFAULT_RENDER_BACKEND: Literal["moviepy", "ffmpeg"] = "moviepy"
+    RENDER_PROCESSES: int = 1  # >1: render that many timeline segments in parallel, 0: one per CPU
+    CACHE_INTRO_OUTRO: bool = True  # encode each channel's intro/outro once and reuse it
 
     # --- Derived paths ---
     @property
@@ -67,6 +70,10 @@ class Settings(BaseSettings):
     def temp_dir(self) -> Path:
         return self.MEDIA_DIR / "temp"
 
+    @property
+    def card_cache_dir(self) -> Path:
+        return self.MEDIA_DIR / "cache" / "cards"
+
     def ensure_media_dirs(self) -> None:
         for d in [
             self.voiceovers_dir,
@@ -74,6 +81,7 @@ class Settings(BaseSettings):
             self.thumbnails_dir,
             self.final_videos_dir,
             self.temp_dir,
+            self.card_cache_dir,
         ]:
             d.mkdir(parents=True, exist_ok=True)
 
@@ -19,6 +19,7 @@ class Channel(Base):
     voice_id: Mapped[str | None] = mapped_column(String(100))
     caption_style: Mapped[str] = mapped_column(String(50), default="hormozi")
     thumbnail_style: Mapped[str] = mapped_column(String(50), default="bold")
+    render_backend: Mapped[str | None] = mapped_column(String(20))  # None → DEFAULT_RENDER_BACKEND
     posting_frequency: Mapped[str] = mapped_column(String(50), default="daily")
     optimal_post_times: Mapped[dict | None] = mapped_column(JSONB)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
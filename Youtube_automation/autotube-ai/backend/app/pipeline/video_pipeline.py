@@ -101,6 +101,7 @@ class VideoPipeline:
             niche = channel.niche if channel else "general"
             channel_name = channel.name if channel else "AutoTube AI"
             caption_style = channel.caption_style if channel else "hormozi"
+            render_backend = channel.render_backend if channel else None
             voice_id = channel.voice_id if channel else None
 
             start_step = video.pipeline_step + 1 if video.pipeline_step > 0 else PipelineStep.SCRIPT
@@ -228,6 +229,7 @@ class VideoPipeline:
                         subtitle_entries=caption_result_entries,
                         channel_name=channel_name,
                         caption_style=caption_style,
+                        render_backend=render_backend,
                     )
 
                     assembled = self.video_assembler.assemble_video(components)
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, ConfigDict
 
@@ -10,6 +11,7 @@ class ChannelCreate(BaseModel):
     voice_id: str | None = None
     caption_style: str = "hormozi"
     thumbnail_style: str = "bold"
+    render_backend: Literal["moviepy", "ffmpeg"] | None = None
     posting_frequency: str = "daily"
     optimal_post_times: dict | None = None
 
@@ -21,6 +23,7 @@ class ChannelUpdate(BaseModel):
     voice_id: str | None = None
     caption_style: str | None = None
     thumbnail_style: str | None = None
+    render_backend: Literal["moviepy", "ffmpeg"] | None = None
     posting_frequency: str | None = None
     optimal_post_times: dict | None = None
     is_active: bool | None = None
@@ -36,6 +39,7 @@ class ChannelResponse(BaseModel):
     voice_id: str | None
     caption_style: str
     thumbnail_style: str
+    render_backend: str | None = None
     posting_frequency: str
     optimal_post_times: dict | None
     is_active: bool
@@ -0,0 +1,170 @@
+"""Chunked Renderer — renders a video Timeline in parallel processes and joins the parts.
+
+The main track is split at clip boundaries into segments of similar length.
+Each segment, the intro, the outro and the soundtrack render in their own
+process (with the MoviePy or FFmpeg backend) from a serialized timeline, with
+identical encoder settings and a fixed GOP. The FFmpeg concat demuxer then
+joins them with stream copy, so render time scales with the CPU cores.
+
+A segment ends just before a clip starts fading in; the next segment picks
+up the tail of the outgoing clip, so every crossfade renders whole inside
+one segment.
+
+Intro and outro depend only on the channel name, resolution and frame rate,
+so with CACHE_INTRO_OUTRO each is encoded once into the media cache and
+later videos splice the cached file in.
+
+Workers are separate Python processes rather than multiprocessing children,
+as Celery's prefork workers are daemonic and may not have children.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+
+from loguru import logger
+
+from app.config import settings
+from app.services.video_assembler import Timeline, TimelineCard
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+CARD_CACHE_VERSION = 1  # bump when the intro/outro design changes
+
+
+def render_part(job: dict) -> str:
+    """Render one part of a timeline (worker entry point)."""
+    timeline = Timeline.from_dict(job["timeline"])
+    part, output_path = job["part"], job["output_path"]
+
+    if job["backend"] == "ffmpeg":
+        from app.services.ffmpeg_renderer import FFmpegRenderer
+
+        renderer = FFmpegRenderer()
+        if part == "audio":
+            return renderer.render_audio(timeline, output_path, Path(job["work_dir"]))
+        return renderer.render_part(timeline, part, output_path, Path(job["work_dir"]))
+
+    from app.services.video_assembler import VideoAssembler
+
+    assembler = VideoAssembler()
+    if part == "audio":
+        return assembler.write_audio_mix(timeline, output_path)
+    return assembler.write_video_part(timeline, part, output_path)
+
+
+class ChunkedRenderer:
+    def __init__(self, backend: str = "moviepy", processes: int | None = None, ffmpeg: str = "ffmpeg"):
+        self.backend = backend
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self.ffmpeg = ffmpeg
+
+    def render(self, timeline: Timeline, output_path: str, work_dir: Path) -> str:
+        """Render a timeline to an MP4, one process per part."""
+        work_dir = Path(work_dir)
+        work_dir.mkdir(parents=True, exist_ok=True)
+        # Cards and the soundtrack need no clips or captions
+        bare = replace(timeline, clips=[], captions=[])
+
+        parts = []
+        if timeline.intro:
+            parts.append(("intro", bare))
+        ranges = timeline.split(self.processes)
+        parts += [("main", timeline.segment(start, end)) for start, end in ranges]
+        if timeline.outro:
+            parts.append(("outro", bare))
+
+        paths, jobs, cards = [], [], []
+        for i, (part, part_timeline) in enumerate(parts):
+            cached = self._cached_card(timeline, getattr(timeline, part)) if part != "main" else None
+            if cached and cached.exists():
+                cached.touch()  # keeps it from expiring in cleanup_media_cache
+                paths.append(cached)
+                continue
+            job = self._job(part, part_timeline, work_dir / f"part_{i:03d}_{part}.mp4", work_dir)
+            jobs.append(job)
+            paths.append(Path(job["output_path"]))
+            if cached:
+                cards.append((job, cached))
+        audio_job = self._job("audio", bare, work_dir / "soundtrack.m4a", work_dir)
+
+        logger.info(f"Chunked render ({self.backend}): {len(ranges)} segments of "
+                    f"{timeline.main_duration / len(ranges):.1f}s on {self.processes} processes, "
+                    f"{len(parts) - len(jobs) - len(ranges)} cached cards")
+        with ThreadPoolExecutor(max_workers=self.processes) as pool:
+            # Longest jobs first: the soundtrack, then the segments
+            list(pool.map(self._spawn, [audio_job, *jobs]))
+
+        for job, cached in cards:
+            self._store(Path(job["output_path"]), cached)
+
+        concat_list = work_dir / "parts.txt"
+        concat_list.write_text("".join(f"file '{path}'\n" for path in paths))
+        cmd = [
+            self.ffmpeg, "-y", "-hide_banner", "-nostats",
+            "-f", "concat", "-safe", "0", "-i", str(concat_list),
+            "-i", audio_job["output_path"],
+            "-map", "0:v", "-map", "1:a",
+            "-c", "copy",
+            "-movflags", "+faststart",
+            output_path,
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+        if result.returncode != 0:
+            raise RuntimeError(f"Joining rendered parts failed: {result.stderr[-1500:]}")
+        return output_path
+
+    def _cached_card(self, timeline: Timeline, card: TimelineCard) -> Path | None:
+        """Cache path of an encoded intro/outro, keyed by everything that shapes it."""
+        if not settings.CACHE_INTRO_OUTRO:
+            return None
+        key = json.dumps([
+            CARD_CACHE_VERSION, self.backend, card.animation, card.channel_name, card.duration,
+            timeline.resolution, timeline.fps, settings.DEFAULT_VIDEO_BITRATE,
+        ])
+        digest = hashlib.sha256(key.encode()).hexdigest()[:20]
+        return settings.card_cache_dir / f"{card.animation}_{digest}.mp4"
+
+    @staticmethod
+    def _store(path: Path, cached: Path):
+        """Copy a rendered card into the cache; the rename makes it visible only when complete."""
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        partial = cached.with_name(f"{cached.stem}.{os.getpid()}.partial")
+        try:
+            shutil.copyfile(path, partial)
+            os.replace(partial, cached)
+        except OSError as e:
+            partial.unlink(missing_ok=True)
+            logger.warning(f"Could not cache {cached.name}: {e}")
+
+    def _job(self, part: str, timeline: Timeline, output_path: Path, work_dir: Path) -> dict:
+        return {
+            "backend": self.backend,
+            "part": part,
+            "timeline": timeline.to_dict(),
+            "output_path": str(output_path),
+            "work_dir": str(work_dir),
+        }
+
+    def _spawn(self, job: dict):
+        """Run one job in a fresh Python process (in this one when rendering serially)."""
+        if self.processes == 1:
+            render_part(job)
+            return
+        job_path = Path(job["output_path"]).with_suffix(".json")
+        job_path.write_text(json.dumps(job))
+        result = subprocess.run(
+            [sys.executable, "-m", "app.services.chunked_renderer", str(job_path)],
+            cwd=BACKEND_DIR, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Rendering {Path(job['output_path']).name} failed: {result.stderr[-1500:]}")
+
+
+if __name__ == "__main__":
+    render_part(json.loads(Path(sys.argv[1]).read_text()))
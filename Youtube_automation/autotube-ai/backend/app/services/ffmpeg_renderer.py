@@ -0,0 +1,394 @@
+"""FFmpeg Renderer — renders a video Timeline with a single FFmpeg filtergraph.
+
+The MoviePy path in VideoAssembler composites every frame in Python. This
+backend compiles the same timeline into one filter_complex instead:
+- Ken Burns via zoompan, with the same directions and cubic easing
+- Crossfades between clips via xfade
+- Caption pop-in (scale + alpha fade) and intro/outro animations via overlay
+- Music bed ducked under the voice via sidechaincompress
+Decoding, filtering and encoding then all run in native code on every core.
+Parts of a timeline (intro, a segment of the main track, outro, soundtrack)
+can also be rendered on their own, for ChunkedRenderer.
+"""
+
+import math
+import re
+import subprocess
+from pathlib import Path
+
+from loguru import logger
+
+from app.config import settings
+from app.services.video_assembler import (
+    CAPTION_FADE_IN,
+    CAPTION_FADE_OUT,
+    CAPTION_SCALE_START,
+    CROSSFADE_DURATION,
+    KEN_BURNS_MARGIN,
+    MUSIC_BED_DB,
+    Timeline,
+    TimelineCaption,
+    TimelineCard,
+    gop_params,
+)
+
+# --- Constants ---
+DARK_FRAME_COLOR = "0x0F0F19"  # (15, 15, 25), the MoviePy path's missing-asset frame
+AUDIO_SAMPLE_RATE = 44100
+MUSIC_FADE_IN = 2.0
+MUSIC_FADE_OUT = 3.0
+DUCK_THRESHOLD_RATIO = 0.3      # voice louder than 30% of its RMS counts as speech
+DUCK_RATIO = 20                 # ~10 dB reduction (MUSIC_BED_DB → MUSIC_DUCK_DB) at average speech level
+DUCK_ATTACK_MS = 20
+DUCK_RELEASE_MS = 250
+DEFAULT_DUCK_THRESHOLD = 0.03   # used when the voice level cannot be measured
+
+# FFmpeg expression forms of _ease_in_out_cubic and _ease_out_cubic
+_EASE_IN_OUT = "if(lt({p},0.5),4*pow({p},3),1-pow(2-2*{p},3)/2)"
+_EASE_OUT = "(1-pow(1-{p},3))"
+
+
+def frame_count(seconds: float, fps: int) -> int:
+    """Whole frames covering a duration (at least one)."""
+    return max(1, round(seconds * fps))
+
+
+def ken_burns_filter(
+    motion: str, frames: int, resolution: tuple[int, int], fps: int,
+    first: int = 0, count: int | None = None,
+) -> str:
+    """zoompan equivalent of VideoAssembler._prepare_image_clip_enhanced.
+
+    The input image is pre-scaled by KEN_BURNS_MARGIN, so a zoom of z shows
+    1/z of it and the pans run at zoom KEN_BURNS_MARGIN (exactly one frame).
+    The move spans frames; count of them are output, starting at frame first.
+    """
+    w, h = resolution
+    count = frames - first if count is None else count
+    position = f"(on+{first})" if first else "on"
+    ease = _EASE_IN_OUT.format(p=f"min({position}/{frames},1)")
+    extra = KEN_BURNS_MARGIN - 1.0
+    x, y = "(iw-iw/zoom)/2", "(ih-ih/zoom)/2"
+
+    if motion == "zoom_in":
+        z = f"1+{extra:g}*{ease}"
+    elif motion == "zoom_out":
+        z = f"{KEN_BURNS_MARGIN:g}-{extra:g}*{ease}"
+    else:
+        z = f"{KEN_BURNS_MARGIN:g}"
+        if motion == "pan_left":
+            x = f"(iw-iw/zoom)*(1-{ease})"
+        elif motion == "pan_right":
+            x = f"(iw-iw/zoom)*{ease}"
+        elif motion == "pan_up":
+            y = f"(ih-ih/zoom)*(1-{ease})"
+        else:  # pan_down
+            y = f"(ih-ih/zoom)*{ease}"
+
+    return f"zoompan=z='{z}':x='{x}':y='{y}':d={count}:s={w}x{h}:fps={fps}"
+
+
+def caption_filter(duration: float) -> str:
+    """Pop-in (scale 0.85→1 with ease-out, alpha fade) and fade-out of one caption."""
+    filters = ["format=rgba"]
+    if duration > CAPTION_FADE_IN:
+        progress = _EASE_OUT.format(p=f"t/{CAPTION_FADE_IN:g}")
+        scale = (f"if(lt(t,{CAPTION_FADE_IN:g}),"
+                 f"{CAPTION_SCALE_START:g}+{1.0 - CAPTION_SCALE_START:g}*{progress},1)")
+        filters.append(f"scale=w='trunc(iw*{scale})':h='trunc(ih*{scale})':eval=frame:flags=lanczos")
+        filters.append(f"fade=t=in:st=0:d={CAPTION_FADE_IN:g}:alpha=1")
+    if duration > CAPTION_FADE_OUT:
+        filters.append(f"fade=t=out:st={duration - CAPTION_FADE_OUT:.6f}:d={CAPTION_FADE_OUT:g}:alpha=1")
+    return ",".join(filters)
+
+
+def card_layer_filter(card: TimelineCard) -> str:
+    """Intro fade + zoom (0.7→1) or outro fade + pulse of a card's layer."""
+    if card.animation == "intro":
+        anim_dur = min(1.5, card.duration * 0.8)
+        scale = f"0.7+0.3*{_EASE_OUT.format(p=f'min(t/{anim_dur:g},1)')}"
+        fade = anim_dur
+    else:
+        scale = "1+0.04*sin(2*PI*t)"
+        fade = 1.0
+    return (f"format=rgba,scale=w='trunc(iw*({scale}))':h='trunc(ih*({scale}))'"
+            f":eval=frame:flags=lanczos,fade=t=in:st=0:d={fade:g}:alpha=1")
+
+
+
+
+class _Graph:
+    """Input arguments and filter chains of one filter_complex."""
+
+    def __init__(self):
+        self.inputs: list[str] = []
+        self.chains: list[str] = []
+        self.count = 0
+
+    def add_input(self, *args: str) -> int:
+        self.inputs.extend(args)
+        self.count += 1
+        return self.count - 1
+
+    def compiled(self) -> tuple[list[str], str]:
+        return self.inputs, ";\n".join(self.chains)
+
+
+class FFmpegRenderer:
+    def __init__(self, ffmpeg: str = "ffmpeg"):
+        self.ffmpeg = ffmpeg
+
+    def render(self, timeline: Timeline, output_path: str, work_dir: Path) -> str:
+        """Render a timeline to an MP4 in one FFmpeg invocation."""
+        threshold = self.duck_threshold(timeline) if timeline.music_path else None
+        inputs, graph = self.compile(timeline, threshold)
+        logger.info(f"FFmpeg render: {len(timeline.clips)} clips, "
+                    f"{len(timeline.captions)} captions, {timeline.total_duration:.1f}s")
+        return self._run(inputs, graph, self.output_args(timeline), output_path, work_dir,
+                         timeline.total_duration)
+
+    def render_part(self, timeline: Timeline, part: str, output_path: str, work_dir: Path) -> str:
+        """Render the intro, main track or outro of a timeline to a video-only MP4."""
+        inputs, graph = self.compile_part(timeline, part)
+        duration = getattr(timeline, part).duration if part in ("intro", "outro") else timeline.main_duration
+        args = ["-map", "[vout]", *self.video_args(timeline)]
+        return self._run(inputs, graph, args, output_path, work_dir, duration)
+
+    def render_audio(self, timeline: Timeline, output_path: str, work_dir: Path) -> str:
+        """Render the soundtrack of a timeline (voiceover + ducked music) to AAC."""
+        threshold = self.duck_threshold(timeline) if timeline.music_path else None
+        inputs, graph = self.compile_audio(timeline, threshold)
+        args = ["-map", "[aout]", *self.audio_args()]
+        return self._run(inputs, graph, args, output_path, work_dir, timeline.total_duration)
+
+    def _run(
+        self, inputs: list[str], graph: str, output_args: list[str],
+        output_path: str, work_dir: Path, duration: float,
+    ) -> str:
+        # The graph grows with the caption count, so it goes through a file
+        script_path = Path(work_dir) / f"{Path(output_path).stem}_filtergraph.txt"
+        script_path.write_text(graph)
+
+        cmd = [
+            self.ffmpeg, "-y", "-hide_banner", "-nostats",
+            *inputs,
+            "-filter_complex_script", str(script_path),
+            *output_args,
+            output_path,
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=max(600, 10 * duration))
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg render failed: {result.stderr[-1500:]}")
+        return output_path
+
+    def output_args(self, timeline: Timeline) -> list[str]:
+        """Encoder settings, matching the MoviePy export."""
+        return [
+            "-map", "[vout]", "-map", "[aout]",
+            *self.video_args(timeline),
+            *self.audio_args(),
+            "-movflags", "+faststart",
+        ]
+
+    def video_args(self, timeline: Timeline) -> list[str]:
+        return [
+            "-r", str(timeline.fps),
+            "-c:v", "libx264",
+            "-preset", "medium",
+            "-b:v", settings.DEFAULT_VIDEO_BITRATE,
+            "-pix_fmt", "yuv420p",
+            *gop_params(timeline.fps),
+        ]
+
+    def audio_args(self) -> list[str]:
+        return ["-c:a", "aac", "-ar", str(AUDIO_SAMPLE_RATE)]
+
+    def duck_threshold(self, timeline: Timeline) -> float:
+        """Ducking threshold: 30% of the voice RMS over the whole padded track."""
+        cmd = [self.ffmpeg, "-hide_banner", "-nostats", "-i", timeline.voiceover_path,
+               "-af", "volumedetect", "-f", "null", "-"]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        match = re.search(r"mean_volume:\s*(-?[\d.]+) dB", result.stderr)
+        if result.returncode != 0 or not match:
+            logger.warning("Could not measure voiceover level, using default ducking threshold")
+            return DEFAULT_DUCK_THRESHOLD
+
+        rms = 10 ** (float(match.group(1)) / 20)
+        # Intro and outro silence lower the RMS the MoviePy path measures
+        rms *= math.sqrt(timeline.main_duration / timeline.total_duration)
+        return min(1.0, max(0.001, rms * DUCK_THRESHOLD_RATIO))
+
+    # =========================================================================
+    # FILTERGRAPH COMPILER
+    # =========================================================================
+
+    def compile(self, timeline: Timeline, duck_threshold: float | None = None) -> tuple[list[str], str]:
+        """Compile a timeline into FFmpeg input arguments and a filter_complex graph.
+
+        The graph produces [vout] (intro + main track with captions + outro)
+        and [aout] (voiceover after the intro, over the ducked music bed).
+        """
+        graph = _Graph()
+        parts = []
+        if timeline.intro:
+            parts.append(self._add_card(timeline.intro, graph, timeline.resolution, timeline.fps))
+        parts.append(self._add_main(timeline, graph))
+        if timeline.outro:
+            parts.append(self._add_card(timeline.outro, graph, timeline.resolution, timeline.fps))
+        graph.chains.append(f"{''.join(parts)}concat=n={len(parts)}:v=1:a=0[vout]")
+
+        self._add_audio(timeline, duck_threshold, graph)
+        return graph.compiled()
+
+    def compile_part(self, timeline: Timeline, part: str) -> tuple[list[str], str]:
+        """Compile the intro, main track or outro alone, producing [vout]."""
+        graph = _Graph()
+        if part in ("intro", "outro"):
+            label = self._add_card(getattr(timeline, part), graph, timeline.resolution, timeline.fps)
+        else:
+            label = self._add_main(timeline, graph)
+        graph.chains.append(f"{label}null[vout]")
+        return graph.compiled()
+
+    def compile_audio(self, timeline: Timeline, duck_threshold: float | None = None) -> tuple[list[str], str]:
+        """Compile the soundtrack alone, producing [aout]."""
+        graph = _Graph()
+        self._add_audio(timeline, duck_threshold, graph)
+        return graph.compiled()
+
+    @staticmethod
+    def _normalize(fps: int, resample: bool = True) -> str:
+        """Common frame rate, pixel format and timebase for concat/xfade inputs.
+
+        zoompan and overlay output is already at the frame rate, and the fps
+        filter would drop its last frame (those frames carry no duration).
+        """
+        chain = f"format=yuv420p,setsar=1,settb=1/{fps}"
+        return f"fps={fps},{chain}" if resample else chain
+
+    def _add_main(self, timeline: Timeline, graph: _Graph) -> str:
+        """Visual clips with crossfades, under the captions."""
+        fps = timeline.fps
+        w, h = timeline.resolution
+        normalize = self._normalize(fps)
+
+        # 1. Visual clips. Clip starts are rounded to frames, and each clip runs
+        #    until the next one has faded in, so a segment of the timeline
+        #    renders the same frames as the full track does.
+        starts = timeline.clip_starts()
+        start_frames = [round(start * fps) for start in starts]
+        fade_frames = round(CROSSFADE_DURATION * fps)
+        clips = []
+        for i, clip in enumerate(timeline.clips):
+            first = round(clip.offset * fps)
+            if i + 1 < len(timeline.clips):
+                frames = start_frames[i + 1] + fade_frames - start_frames[i]
+            else:
+                frames = round((starts[i] + clip.duration - clip.offset) * fps) - start_frames[i]
+            frames = max(1, frames)
+
+            label = f"[clip{i}]"
+            if clip.kind == "image":
+                k = graph.add_input("-i", clip.path)
+                move = ken_burns_filter(clip.motion, frame_count(clip.duration, fps), (w, h), fps, first, frames)
+                graph.chains.append(f"[{k}:v]{move},{self._normalize(fps, resample=False)}{label}")
+            elif clip.kind == "video":
+                k = graph.add_input("-stream_loop", "-1", "-t", f"{clip.duration + 1:.3f}", "-i", clip.path)
+                trim = f"trim=start_frame={first}:end_frame={first + frames}" if first else f"trim=end_frame={frames}"
+                graph.chains.append(f"[{k}:v]scale={w}:{h}:force_original_aspect_ratio=increase,"
+                                    f"crop={w}:{h},fps={fps},{trim},"
+                                    f"setpts=PTS-STARTPTS,{normalize}{label}")
+            else:
+                graph.chains.append(f"color=c={DARK_FRAME_COLOR}:s={w}x{h}:r={fps}:d={frames / fps:.6f},"
+                                    f"{normalize}{label}")
+            clips.append((label, frames))
+
+        if not clips:
+            frames = frame_count(timeline.main_duration, fps)
+            graph.chains.append(f"color=c={DARK_FRAME_COLOR}:s={w}x{h}:r={fps}:d={frames / fps:.6f},"
+                                f"{normalize}[clip0]")
+            clips.append(("[clip0]", frames))
+
+        # 2. Crossfades: each clip fades in over the last CROSSFADE_DURATION of the track so far
+        current, length = clips[0]
+        for i, (label, frames) in enumerate(clips[1:], start=1):
+            out = f"[xfade{i}]"
+            graph.chains.append(f"{current}{label}xfade=transition=fade:duration={fade_frames / fps:.6f}"
+                                f":offset={start_frames[i] / fps:.6f}{out}")
+            current, length = out, start_frames[i] + frames
+
+        main_frames = frame_count(timeline.main_duration, fps)
+        pad = ""
+        if length < main_frames:
+            pad = f"tpad=stop_mode=clone:stop={main_frames - length},"
+        graph.chains.append(f"{current}{pad}trim=end_frame={main_frames},setpts=PTS-STARTPTS[track]")
+        current = "[track]"
+
+        # 3. Captions
+        for i, caption in enumerate(timeline.captions):
+            current = self._add_caption(i, caption, current, graph, fps)
+        graph.chains.append(f"{current}{self._normalize(fps, resample=False)}[main]")
+        return "[main]"
+
+    def _add_caption(self, i: int, caption: TimelineCaption, current: str, graph: _Graph, fps: int) -> str:
+        """Overlay one caption, centered horizontally and around its vertical slot."""
+        duration = caption.end - caption.start
+        k = graph.add_input("-loop", "1", "-framerate", str(fps), "-t", f"{duration:.6f}",
+                            "-i", caption.image_path)
+        # A caption that began before this segment joins it mid-animation
+        lead = max(0.0, -caption.start)
+        trim = f",trim=start={lead:.6f}" if lead else ""
+        graph.chains.append(f"[{k}:v]{caption_filter(duration)}{trim},"
+                            f"setpts=PTS-STARTPTS+{caption.start + lead:.6f}/TB[caption{i}]")
+        out = f"[captioned{i}]"
+        graph.chains.append(f"{current}[caption{i}]overlay=x='(W-w)/2':y='{caption.y}+({caption.height}-h)/2'"
+                            f":eof_action=pass{out}")
+        return out
+
+    def _add_card(self, card: TimelineCard, graph: _Graph, resolution: tuple[int, int], fps: int) -> str:
+        """Animate an intro/outro layer over its gradient background."""
+        normalize = self._normalize(fps)
+        label = f"[{card.animation}]"
+        bg = graph.add_input("-loop", "1", "-framerate", str(fps),
+                             "-t", f"{card.duration:.6f}", "-i", card.background_path)
+        if not card.layer_path:
+            graph.chains.append(f"[{bg}:v]{normalize}{label}")
+            return label
+
+        layer = graph.add_input("-loop", "1", "-framerate", str(fps),
+                                "-t", f"{card.duration:.6f}", "-i", card.layer_path)
+        graph.chains.append(f"[{layer}:v]{card_layer_filter(card)}[{card.animation}_layer]")
+
+        # Scale about the frame center, as the MoviePy path scales the full frame
+        x0, y0, x1, y1 = card.layer_box
+        cx, cy = resolution[0] / 2, resolution[1] / 2
+        x = f"{cx:g}+(w/{x1 - x0})*({x0}-{cx:g})"
+        y = f"{cy:g}+(h/{y1 - y0})*({y0}-{cy:g})"
+        graph.chains.append(f"[{bg}:v][{card.animation}_layer]overlay=x='{x}':y='{y}'"
+                            f":eof_action=pass,{self._normalize(fps, resample=False)}{label}")
+        return label
+
+    def _add_audio(self, timeline: Timeline, duck_threshold: float | None, graph: _Graph):
+        """Voiceover delayed past the intro, mixed over the ducked music bed."""
+        total = timeline.total_duration
+        intro_ms = round((timeline.intro.duration if timeline.intro else 0.0) * 1000)
+        audio_format = f"aformat=sample_rates={AUDIO_SAMPLE_RATE}:channel_layouts=stereo"
+
+        voice = graph.add_input("-i", timeline.voiceover_path)
+        graph.chains.append(f"[{voice}:a]{audio_format},adelay=delays={intro_ms}:all=1,"
+                            f"apad,atrim=duration={total:.6f}[voice]")
+
+        if not timeline.music_path:
+            graph.chains.append("[voice]anull[aout]")
+            return
+
+        threshold = duck_threshold or DEFAULT_DUCK_THRESHOLD
+        music = graph.add_input("-stream_loop", "-1", "-t", f"{total:.6f}", "-i", timeline.music_path)
+        graph.chains.append("[voice]asplit=2[voice_mix][voice_key]")
+        graph.chains.append(f"[{music}:a]{audio_format},atrim=duration={total:.6f},"
+                            f"afade=t=in:d={MUSIC_FADE_IN:g},"
+                            f"afade=t=out:st={max(0.0, total - MUSIC_FADE_OUT):.6f}:d={MUSIC_FADE_OUT:g},"
+                            f"volume={MUSIC_BED_DB}dB[bed]")
+        graph.chains.append(f"[bed][voice_key]sidechaincompress=threshold={threshold:.6f}:ratio={DUCK_RATIO}"
+                            f":attack={DUCK_ATTACK_MS}:release={DUCK_RELEASE_MS}[ducked]")
+        graph.chains.append("[voice_mix][ducked]amix=inputs=2:duration=first:normalize=0[aout]")
@@ -7,17 +7,22 @@ Features:
 - Animated intro (fade+zoom) and outro (pulse subscribe CTA)
 - Background music with voice-activity audio ducking
 - Transition sound effects
+- Optional FFmpeg filtergraph backend (see ffmpeg_renderer), selectable per channel
 """
 
+import math
 import random
 import re
+import shutil
 import subprocess
-from dataclasses import dataclass, field
+import uuid
+from dataclasses import asdict, dataclass, field, replace
 from pathlib import Path
 
 import numpy as np
 from loguru import logger
 from moviepy import (
+    AudioArrayClip,
     AudioFileClip,
     ColorClip,
     CompositeVideoClip,
@@ -26,11 +31,12 @@ from moviepy import (
     concatenate_audioclips,
     concatenate_videoclips,
     AudioClip,
+    vfx,
 )
 from PIL import Image, ImageDraw, ImageFilter, ImageFont
-from pydub import AudioSegment
 
 from app.config import settings
+from app.services.audio_ducking import SAMPLE_RATE, decode_audio, duck_and_mix
 from app.services.caption_generator import SubtitleEntry
 from app.utils.file_manager import get_unique_path
 
@@ -43,6 +49,10 @@ INTRO_DURATION = 3.0
 OUTRO_DURATION = 5.0
 MUSIC_DUCK_DB = -18  # dB reduction during speech
 MUSIC_BED_DB = -8    # dB during silence
+KEN_BURNS_MARGIN = 1.20
+KEN_BURNS_DIRECTIONS = ["zoom_in", "zoom_out", "pan_left", "pan_right", "pan_up", "pan_down"]
+RENDER_BACKENDS = ("moviepy", "ffmpeg")
+GOP_SECONDS = 2  # fixed keyframe interval, so separately encoded parts concatenate cleanly
 
 
 @dataclass
@@ -56,6 +66,7 @@ class VideoComponents:
     music_path: str | None = None
     resolution: tuple[int, int] = (1920, 1080)
     fps: int = 30
+    render_backend: str | None = None  # "moviepy" or "ffmpeg", defaults to settings
 
 
 @dataclass
@@ -65,6 +76,123 @@ class AssembledVideo:
     resolution: tuple[int, int]
 
 
+@dataclass
+class TimelineClip:
+    """One segment of the main visual track, before crossfades."""
+    kind: str  # "image", "video" or "color"
+    duration: float
+    path: str | None = None  # image pre-scaled by KEN_BURNS_MARGIN, or source video
+    motion: str | None = None  # Ken Burns direction for images
+    offset: float = 0.0  # seconds into the clip where this timeline picks it up
+
+
+@dataclass
+class TimelineCaption:
+    """A pre-rendered caption image shown over the main track."""
+    image_path: str
+    start: float
+    end: float
+    y: int
+    height: int
+
+
+@dataclass
+class TimelineCard:
+    """Intro or outro: gradient background with an animated RGBA layer."""
+    animation: str  # "intro" or "outro"
+    duration: float
+    background_path: str
+    layer_path: str | None = None  # cropped to its content
+    layer_box: tuple[int, int, int, int] | None = None  # crop box within the frame
+    channel_name: str = ""  # the layer's text, part of the card's cache key
+
+
+@dataclass
+class Timeline:
+    """Everything a renderer needs, with all text and images already rasterized."""
+    resolution: tuple[int, int]
+    fps: int
+    main_duration: float
+    voiceover_path: str
+    clips: list[TimelineClip] = field(default_factory=list)
+    captions: list[TimelineCaption] = field(default_factory=list)
+    intro: TimelineCard | None = None
+    outro: TimelineCard | None = None
+    music_path: str | None = None
+
+    @property
+    def total_duration(self) -> float:
+        intro = self.intro.duration if self.intro else 0.0
+        outro = self.outro.duration if self.outro else 0.0
+        return intro + self.main_duration + outro
+
+    def clip_starts(self) -> list[float]:
+        """Start of each clip on the main track; each overlaps the previous by CROSSFADE_DURATION."""
+        starts, t = [], 0.0
+        for clip in self.clips:
+            starts.append(t)
+            t += clip.duration - clip.offset - CROSSFADE_DURATION
+        return starts
+
+    def split(self, count: int) -> list[tuple[float, float]]:
+        """Cut the main track into up to count ranges of similar length, at clip starts.
+
+        Cuts are rounded down to a frame, so every range is a whole number of
+        frames and each one after the first opens with a crossfade.
+        """
+        cuts = sorted({
+            math.floor(start * self.fps + 1e-6) / self.fps for start in self.clip_starts()[1:]
+        })
+        bounds = [0.0]
+        for i in range(1, count):
+            later = [cut for cut in cuts if bounds[-1] < cut < self.main_duration]
+            if not later:
+                break
+            target = self.main_duration * i / count
+            bounds.append(min(later, key=lambda cut: abs(cut - target)))
+        bounds.append(self.main_duration)
+        return list(zip(bounds, bounds[1:]))
+
+    def segment(self, start: float, end: float) -> "Timeline":
+        """The main track between two times, as a timeline of its own (no intro, outro or audio mix)."""
+        clips = []
+        for clip, clip_start in zip(self.clips, self.clip_starts()):
+            if clip_start >= end or clip_start + clip.duration - clip.offset <= start:
+                continue
+            lead = max(0.0, start - clip_start)
+            clips.append(replace(clip, offset=clip.offset + lead))
+
+        captions = [
+            replace(caption, start=caption.start - start, end=caption.end - start)
+            for caption in self.captions
+            if caption.start < end and caption.end > start
+        ]
+        return replace(
+            self, main_duration=end - start, clips=clips, captions=captions,
+            intro=None, outro=None, music_path=None,
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Timeline":
+        def card(value: dict | None) -> TimelineCard | None:
+            if value is None:
+                return None
+            box = value.get("layer_box")
+            return TimelineCard(**{**value, "layer_box": tuple(box) if box else None})
+
+        return cls(**{
+            **data,
+            "resolution": tuple(data["resolution"]),
+            "clips": [TimelineClip(**clip) for clip in data["clips"]],
+            "captions": [TimelineCaption(**caption) for caption in data["captions"]],
+            "intro": card(data.get("intro")),
+            "outro": card(data.get("outro")),
+        })
+
+
 def _ease_out_cubic(t: float) -> float:
     """Cubic ease-out: fast start, slow end."""
     return 1.0 - (1.0 - t) ** 3
@@ -77,6 +205,11 @@ def _ease_in_out_cubic(t: float) -> float:
     return 1 - (-2 * t + 2) ** 3 / 2
 
 
+def gop_params(fps: int) -> list[str]:
+    """x264 options for a fixed GOP, so separately encoded parts join with stream copy."""
+    return ["-g", str(GOP_SECONDS * fps), "-keyint_min", str(GOP_SECONDS * fps), "-sc_threshold", "0"]
+
+
 def _is_emphasis_word(word: str) -> bool:
     """Detect words that should be highlighted in captions."""
     clean = word.strip(".,!?;:'\"()-")
@@ -105,136 +238,310 @@ class VideoAssembler:
 
     def assemble_video(self, components: VideoComponents) -> AssembledVideo:
         """Assemble a cinematic video from all components."""
+        backend = components.render_backend or settings.DEFAULT_RENDER_BACKEND
+        if backend not in RENDER_BACKENDS:
+            logger.warning(f"Unknown render backend '{backend}', using moviepy")
+            backend = "moviepy"
+
+        renderer = None
+        if settings.RENDER_PROCESSES != 1 or settings.CACHE_INTRO_OUTRO:
+            from app.services.chunked_renderer import ChunkedRenderer
+            renderer = ChunkedRenderer(backend, settings.RENDER_PROCESSES or None)
+        elif backend == "ffmpeg":
+            from app.services.ffmpeg_renderer import FFmpegRenderer
+            renderer = FFmpegRenderer()
+
+        if renderer:
+            try:
+                return self._assemble_with(components, renderer)
+            except Exception as e:
+                logger.error(f"{type(renderer).__name__} failed, rendering with MoviePy: {e}")
+
         resolution = components.resolution
         logger.info(f"Assembling video: {len(components.asset_paths)} assets, "
                      f"{resolution[0]}x{resolution[1]}")
 
-        # 1. Load voiceover — determines total duration
-        voiceover = AudioFileClip(components.voiceover_path)
-        total_duration = voiceover.duration
-        logger.info(f"Voiceover duration: {total_duration:.1f}s")
-
-        # 2. Build visual track with crossfade transitions
-        visual_clip = self._build_visual_track_with_transitions(
-            components.asset_paths,
-            components.asset_types,
-            total_duration,
-            resolution,
-        )
+        work_dir = self._new_work_dir()
+        try:
+            # 1. Lay out clips, captions, intro and outro
+            timeline = self.build_timeline(components, work_dir)
 
-        # 3. Create animated captions overlay
-        caption_clip = None
-        if components.subtitle_entries:
-            caption_clip = self._create_animated_caption_overlay(
-                components.subtitle_entries,
-                total_duration,
-                resolution,
-                style=components.caption_style,
+            # 2. Load voiceover — determines total duration
+            voiceover = AudioFileClip(components.voiceover_path)
+            total_duration = voiceover.duration
+            logger.info(f"Voiceover duration: {total_duration:.1f}s")
+
+            # 3. Visual track with crossfade transitions + animated captions
+            main_video = self._compose_main(timeline)
+
+            # 4. Animated intro and outro
+            intro_clip = self._create_animated_intro(timeline.intro, resolution)
+            outro_clip = self._create_animated_outro(timeline.outro, resolution)
+
+            # 5. Combine intro + main + outro
+            final_video = concatenate_videoclips(
+                [intro_clip, main_video, outro_clip],
+                method="compose",
             )
 
-        # 4. Create animated intro
-        intro_clip = self._create_animated_intro(components.channel_name, resolution)
+            # 6. Build audio mix (voiceover + music with ducking)
+            final_audio = self._build_audio_mix(
+                voiceover,
+                components.music_path,
+                intro_clip.duration,
+                outro_clip.duration,
+                total_duration,
+            )
+            final_video = final_video.with_audio(final_audio)
+
+            # 7. Export
+            output_path = get_unique_path(settings.final_videos_dir, "video", ".mp4")
+
+            logger.info(f"Exporting video to {output_path}...")
+            final_video.write_videofile(
+                str(output_path),
+                fps=self.fps,
+                codec="libx264",
+                audio_codec="aac",
+                bitrate=settings.DEFAULT_VIDEO_BITRATE,
+                preset="medium",
+                threads=4,
+                logger=None,
+            )
 
-        # 5. Create animated outro
-        outro_clip = self._create_animated_outro(components.channel_name, resolution)
+            duration = final_video.duration
 
-        # 6. Composite visual + captions
-        layers = [visual_clip]
-        if caption_clip:
-            layers.append(caption_clip)
+            # Cleanup
+            voiceover.close()
+            final_video.close()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
 
-        main_video = CompositeVideoClip(layers, size=resolution)
-        main_video = main_video.with_duration(total_duration)
+        logger.info(f"Video assembled: {output_path} ({duration:.1f}s)")
 
-        # 7. Combine intro + main + outro
-        final_video = concatenate_videoclips(
-            [intro_clip, main_video, outro_clip],
-            method="compose",
+        return AssembledVideo(
+            video_path=str(output_path),
+            duration_seconds=duration,
+            resolution=resolution,
         )
 
-        # 8. Build audio mix (voiceover + music with ducking)
-        final_audio = self._build_audio_mix(
-            voiceover,
-            components.music_path,
-            intro_clip.duration,
-            outro_clip.duration,
-            total_duration,
+    def _assemble_with(self, components: VideoComponents, renderer) -> AssembledVideo:
+        """Assemble through a timeline renderer (FFmpegRenderer or ChunkedRenderer)."""
+        work_dir = self._new_work_dir()
+        output_path = get_unique_path(settings.final_videos_dir, "video", ".mp4")
+        try:
+            timeline = self.build_timeline(components, work_dir)
+            logger.info(f"Exporting video to {output_path} with {type(renderer).__name__}...")
+            renderer.render(timeline, str(output_path), work_dir)
+        except Exception:
+            Path(output_path).unlink(missing_ok=True)
+            raise
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        duration = timeline.total_duration
+        logger.info(f"Video assembled: {output_path} ({duration:.1f}s)")
+
+        return AssembledVideo(
+            video_path=str(output_path),
+            duration_seconds=duration,
+            resolution=timeline.resolution,
         )
-        final_video = final_video.with_audio(final_audio)
 
-        # 9. Export
-        output_path = get_unique_path(settings.final_videos_dir, "video", ".mp4")
+    def write_video_part(self, timeline: Timeline, part: str, output_path: str) -> str:
+        """Render the intro, main track or outro of a timeline to a video-only MP4.
 
-        logger.info(f"Exporting video to {output_path}...")
-        final_video.write_videofile(
-            str(output_path),
-            fps=self.fps,
+        Used by ChunkedRenderer workers; the encoder settings match the
+        full export plus a fixed GOP, so the parts join with stream copy.
+        """
+        if part == "intro":
+            clip = self._create_animated_intro(timeline.intro, timeline.resolution)
+        elif part == "outro":
+            clip = self._create_animated_outro(timeline.outro, timeline.resolution)
+        else:
+            clip = self._compose_main(timeline)
+
+        # Exactly round(duration * fps) frames, so part lengths add up across the seams
+        frames = max(1, round(clip.duration * timeline.fps))
+        clip = clip.with_duration((frames + 0.5) / timeline.fps)
+        clip.write_videofile(
+            output_path,
+            fps=timeline.fps,
             codec="libx264",
-            audio_codec="aac",
+            audio=False,
             bitrate=settings.DEFAULT_VIDEO_BITRATE,
             preset="medium",
-            threads=4,
+            ffmpeg_params=gop_params(timeline.fps),
             logger=None,
         )
+        clip.close()
+        return output_path
+
+    def write_audio_mix(self, timeline: Timeline, output_path: str) -> str:
+        """Render the full soundtrack of a timeline (voiceover + ducked music) to AAC."""
+        voiceover = AudioFileClip(timeline.voiceover_path)
+        audio = self._build_audio_mix(
+            voiceover,
+            timeline.music_path,
+            timeline.intro.duration if timeline.intro else 0.0,
+            timeline.outro.duration if timeline.outro else 0.0,
+            voiceover.duration,
+        )
+        audio.write_audiofile(output_path, fps=44100, codec="aac", logger=None)
+        voiceover.close()
+        return output_path
 
-        duration = final_video.duration
+    # =========================================================================
+    # TIMELINE (shared by every renderer)
+    # =========================================================================
+
+    def _new_work_dir(self) -> Path:
+        return settings.temp_dir / f"render_{uuid.uuid4().hex[:12]}"
+
+    def build_timeline(self, components: VideoComponents, work_dir: Path) -> Timeline:
+        """Lay out clips, captions, intro and outro, rasterizing every layer into work_dir."""
+        work_dir.mkdir(parents=True, exist_ok=True)
+        resolution = components.resolution
+        w, h = resolution
 
-        # Cleanup
+        voiceover = AudioFileClip(components.voiceover_path)
+        main_duration = voiceover.duration
         voiceover.close()
-        final_video.close()
 
-        logger.info(f"Video assembled: {output_path} ({duration:.1f}s)")
+        # Visual segments, sized exactly like _build_visual_track_with_transitions
+        clips = []
+        n = len(components.asset_paths)
+        segment_duration = (main_duration + CROSSFADE_DURATION * max(0, n - 1)) / max(n, 1)
+        for i, (path, atype) in enumerate(zip(components.asset_paths, components.asset_types)):
+            path = Path(path)
+            if not path.exists():
+                logger.warning(f"Asset not found: {path}, using dark frame")
+                clips.append(TimelineClip(kind="color", duration=segment_duration))
+                continue
 
-        return AssembledVideo(
-            video_path=str(output_path),
-            duration_seconds=duration,
+            if atype == "stock_video":
+                clips.append(TimelineClip(kind="video", duration=segment_duration, path=str(path)))
+                continue
+
+            try:
+                img = Image.open(path).convert("RGB")
+                img = img.resize(
+                    (int(w * KEN_BURNS_MARGIN), int(h * KEN_BURNS_MARGIN)), Image.LANCZOS
+                )
+                scaled_path = work_dir / f"asset_{i:04d}.png"
+                img.save(scaled_path, compress_level=1)
+                clips.append(TimelineClip(
+                    kind="image",
+                    duration=segment_duration,
+                    path=str(scaled_path),
+                    motion=random.choice(KEN_BURNS_DIRECTIONS),
+                ))
+            except Exception as e:
+                logger.error(f"Failed to process asset {path}: {e}")
+                clips.append(TimelineClip(kind="color", duration=segment_duration))
+
+        # Captions, positioned like _create_animated_caption_overlay
+        captions = []
+        for i, entry in enumerate(components.subtitle_entries):
+            if not entry.text or entry.text == "...":
+                continue
+            if entry.end_time - entry.start_time <= 0.05:
+                continue
+            caption_img = self._render_caption_frame_enhanced(
+                entry.text, w, style=components.caption_style
+            )
+            caption_path = work_dir / f"caption_{i:04d}.png"
+            caption_img.save(caption_path, compress_level=1)
+            captions.append(TimelineCaption(
+                image_path=str(caption_path),
+                start=entry.start_time,
+                end=entry.end_time,
+                y=h - 220 if i % 2 == 0 else h - 260,
+                height=caption_img.height,
+            ))
+
+        # Intro and outro share one gradient background
+        background_path = work_dir / "card_background.png"
+        self._create_gradient((10, 10, 26), (26, 26, 62), w, h).save(background_path)
+        cards = {}
+        for animation, duration, layer in [
+            ("intro", INTRO_DURATION, self._render_intro_layer(components.channel_name, resolution)),
+            ("outro", OUTRO_DURATION, self._render_outro_layer(components.channel_name, resolution)),
+        ]:
+            card = TimelineCard(animation=animation, duration=duration,
+                                background_path=str(background_path),
+                                channel_name=components.channel_name)
+            bbox = layer.getbbox()
+            if bbox:
+                layer_path = work_dir / f"{animation}_layer.png"
+                layer.crop(bbox).save(layer_path)
+                card.layer_path = str(layer_path)
+                card.layer_box = bbox
+            cards[animation] = card
+
+        music_path = components.music_path
+        if music_path and not Path(music_path).exists():
+            music_path = None
+
+        return Timeline(
             resolution=resolution,
+            fps=self.fps,
+            main_duration=main_duration,
+            voiceover_path=components.voiceover_path,
+            clips=clips,
+            captions=captions,
+            intro=cards["intro"],
+            outro=cards["outro"],
+            music_path=music_path,
         )
 
     # =========================================================================
     # VISUAL TRACK WITH CROSSFADE TRANSITIONS
     # =========================================================================
 
+    def _compose_main(self, timeline: Timeline) -> CompositeVideoClip:
+        """Main track of a timeline: visual clips with crossfades under the animated captions."""
+        resolution = timeline.resolution
+        layers = [self._build_visual_track_with_transitions(
+            timeline.clips, timeline.main_duration, resolution
+        )]
+        if timeline.captions:
+            layers.append(self._create_animated_caption_overlay(
+                timeline.captions, timeline.main_duration, resolution
+            ))
+        return CompositeVideoClip(layers, size=resolution).with_duration(timeline.main_duration)
+
     def _build_visual_track_with_transitions(
         self,
-        asset_paths: list[str],
-        asset_types: list[str],
+        clips: list[TimelineClip],
         total_duration: float,
         resolution: tuple[int, int],
     ) -> CompositeVideoClip:
         """Build visual track with crossfade transitions between clips."""
-        if not asset_paths:
+        if not clips:
             return ColorClip(size=resolution, color=(15, 15, 25)).with_duration(total_duration)
 
         # Prepare individual clips
         raw_clips = []
-        n = len(asset_paths)
-        # Each segment is slightly longer to account for crossfade overlap
-        overlap_total = CROSSFADE_DURATION * max(0, n - 1)
-        segment_duration = (total_duration + overlap_total) / n
-
-        for path, atype in zip(asset_paths, asset_types):
-            path = Path(path)
-            if not path.exists():
-                logger.warning(f"Asset not found: {path}, using dark frame")
-                raw_clips.append(
-                    ColorClip(size=resolution, color=(15, 15, 25))
-                    .with_duration(segment_duration)
-                )
-                continue
-
+        for timeline_clip in clips:
             try:
-                if atype == "stock_video":
-                    clip = self._prepare_video_clip(str(path), segment_duration, resolution)
+                if timeline_clip.kind == "video":
+                    clip = self._prepare_video_clip(timeline_clip.path, timeline_clip.duration, resolution)
+                elif timeline_clip.kind == "image":
+                    clip = self._prepare_image_clip_enhanced(
+                        timeline_clip.path, timeline_clip.duration, resolution, timeline_clip.motion
+                    )
                 else:
-                    clip = self._prepare_image_clip_enhanced(str(path), segment_duration, resolution)
-                raw_clips.append(clip)
+                    clip = ColorClip(size=resolution, color=(15, 15, 25)).with_duration(timeline_clip.duration)
+                if timeline_clip.offset:
+                    clip = clip.subclipped(timeline_clip.offset)
             except Exception as e:
-                logger.error(f"Failed to process asset {path}: {e}")
-                raw_clips.append(
+                logger.error(f"Failed to process asset {timeline_clip.path}: {e}")
+                clip = (
                     ColorClip(size=resolution, color=(15, 15, 25))
-                    .with_duration(segment_duration)
+                    .with_duration(timeline_clip.duration - timeline_clip.offset)
                 )
+            raw_clips.append(clip)
 
         if len(raw_clips) == 1:
             clip = raw_clips[0]
@@ -244,22 +551,14 @@ class VideoAssembler:
                 clip = clip.with_duration(total_duration)
             return clip
 
-        # Apply crossfade: stagger clips with overlap, apply fade in/out
+        # Apply crossfade: stagger clips with overlap, each clip fading in over the previous one
         composed_clips = []
         current_time = 0.0
 
         for i, clip in enumerate(raw_clips):
             # Fade in (except first clip)
             if i > 0:
-                clip = clip.with_effects([
-                    lambda c, dur=CROSSFADE_DURATION: c.crossfadein(dur)
-                ]) if hasattr(clip, 'crossfadein') else clip
-
-            # Fade out (except last clip)
-            if i < len(raw_clips) - 1:
-                clip = clip.with_effects([
-                    lambda c, dur=CROSSFADE_DURATION: c.crossfadeout(dur)
-                ]) if hasattr(clip, 'crossfadeout') else clip
+                clip = clip.with_effects([vfx.CrossFadeIn(CROSSFADE_DURATION)])
 
             clip = clip.with_start(current_time)
             composed_clips.append(clip)
@@ -296,13 +595,13 @@ class VideoAssembler:
     # =========================================================================
 
     def _prepare_image_clip_enhanced(
-        self, path: str, duration: float, resolution: tuple[int, int]
+        self, path: str, duration: float, resolution: tuple[int, int], direction: str | None = None
     ) -> ImageClip:
         """Ken Burns with easing curves and randomized pan direction."""
         img = Image.open(path).convert("RGB")
 
         # 20% larger for zoom/pan room
-        margin = 1.20
+        margin = KEN_BURNS_MARGIN
         zoom_w = int(resolution[0] * margin)
         zoom_h = int(resolution[1] * margin)
         img = img.resize((zoom_w, zoom_h), Image.LANCZOS)
@@ -311,9 +610,7 @@ class VideoAssembler:
         clip = ImageClip(img_array).with_duration(duration)
 
         # Random direction: zoom_in, zoom_out, pan_left, pan_right, pan_up, pan_down
-        direction = random.choice([
-            "zoom_in", "zoom_out", "pan_left", "pan_right", "pan_up", "pan_down",
-        ])
+        direction = direction or random.choice(KEN_BURNS_DIRECTIONS)
         res_w, res_h = resolution
 
         def ken_burns_enhanced(get_frame, t):
@@ -386,32 +683,21 @@ class VideoAssembler:
 
     def _create_animated_caption_overlay(
         self,
-        entries: list[SubtitleEntry],
+        captions: list[TimelineCaption],
         total_duration: float,
         resolution: tuple[int, int],
-        style: str = "hormozi",
     ) -> CompositeVideoClip:
         """Create animated caption overlay with pop-in, highlighting, and fade-out."""
         clips = []
         w, h = resolution
 
-        for i, entry in enumerate(entries):
-            if not entry.text or entry.text == "...":
-                continue
-
-            duration = entry.end_time - entry.start_time
-            if duration <= 0.05:
-                continue
+        for caption in captions:
+            duration = caption.end - caption.start
 
-            # Render caption frame with word highlighting and background pill
-            caption_img = self._render_caption_frame_enhanced(
-                entry.text, w, style=style
-            )
-            caption_array = np.array(caption_img)
+            # Caption frame rendered by build_timeline, with word highlighting and background pill
+            caption_array = np.array(Image.open(caption.image_path))
             cap_h, cap_w = caption_array.shape[:2]
-
-            # Position: alternate between center-bottom and slightly higher
-            y_pos = h - 220 if i % 2 == 0 else h - 260
+            y_pos = caption.y
 
             # Create the clip with scale pop-in animation
             def make_frame_animated(get_frame, t, dur=duration, arr=caption_array,
@@ -452,7 +738,11 @@ class VideoAssembler:
 
             img_clip = ImageClip(caption_array).with_duration(duration)
             img_clip = img_clip.transform(make_frame_animated)
-            img_clip = img_clip.with_start(entry.start_time)
+            # A caption carried over from the previous segment starts part-way through
+            lead = max(0.0, -caption.start)
+            if lead:
+                img_clip = img_clip.subclipped(lead)
+            img_clip = img_clip.with_start(caption.start + lead)
             img_clip = img_clip.with_position(("center", y_pos))
 
             clips.append(img_clip)
@@ -556,32 +846,15 @@ class VideoAssembler:
     # =========================================================================
 
     def _create_animated_intro(
-        self, channel_name: str, resolution: tuple[int, int], duration: float = INTRO_DURATION
+        self, card: TimelineCard, resolution: tuple[int, int]
     ) -> CompositeVideoClip:
         """Create intro with gradient background and text fade+zoom animation."""
-        w, h = resolution
+        duration = card.duration
 
         # Gradient background (#0a0a1a → #1a1a3e)
-        bg_img = self._create_gradient((10, 10, 26), (26, 26, 62), w, h)
-        bg_clip = ImageClip(np.array(bg_img)).with_duration(duration)
-
-        # Render channel name text
-        font = self._get_font(96)
-        text_img = Image.new("RGBA", resolution, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(text_img)
-        bbox = draw.textbbox((0, 0), channel_name, font=font)
-        text_w, text_h = bbox[2] - bbox[0], bbox[3] - bbox[1]
-        x = (w - text_w) // 2
-        y = (h - text_h) // 2
+        bg_clip = ImageClip(np.array(Image.open(card.background_path).convert("RGB"))).with_duration(duration)
 
-        # Stroke
-        for dx in range(-3, 4):
-            for dy in range(-3, 4):
-                if dx * dx + dy * dy <= 9:
-                    draw.text((x + dx, y + dy), channel_name, font=font, fill=(0, 0, 0, 255))
-        draw.text((x, y), channel_name, font=font, fill=(255, 215, 0, 255))
-
-        text_array = np.array(text_img)
+        text_array = self._card_layer(card, resolution)
         text_clip = ImageClip(text_array).with_duration(duration)
 
         # Animate: fade in (0→1) + zoom (0.7→1.0) over 1.5s with ease-out
@@ -616,50 +889,40 @@ class VideoAssembler:
 
         return CompositeVideoClip([bg_clip, text_clip], size=resolution)
 
+    def _render_intro_layer(self, channel_name: str, resolution: tuple[int, int]) -> Image.Image:
+        """Render the intro's channel name, gold with a black stroke, on a transparent frame."""
+        w, h = resolution
+        font = self._get_font(96)
+        text_img = Image.new("RGBA", resolution, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(text_img)
+        bbox = draw.textbbox((0, 0), channel_name, font=font)
+        text_w, text_h = bbox[2] - bbox[0], bbox[3] - bbox[1]
+        x = (w - text_w) // 2
+        y = (h - text_h) // 2
+
+        # Stroke
+        for dx in range(-3, 4):
+            for dy in range(-3, 4):
+                if dx * dx + dy * dy <= 9:
+                    draw.text((x + dx, y + dy), channel_name, font=font, fill=(0, 0, 0, 255))
+        draw.text((x, y), channel_name, font=font, fill=(255, 215, 0, 255))
+        return text_img
+
     # =========================================================================
     # ANIMATED OUTRO (pulsing subscribe CTA)
     # =========================================================================
 
     def _create_animated_outro(
-        self, channel_name: str, resolution: tuple[int, int], duration: float = OUTRO_DURATION
+        self, card: TimelineCard, resolution: tuple[int, int]
     ) -> CompositeVideoClip:
         """Create outro with pulsing SUBSCRIBE and animated channel name."""
-        w, h = resolution
+        duration = card.duration
         import math
 
         # Gradient background
-        bg_img = self._create_gradient((10, 10, 26), (26, 26, 62), w, h)
-        bg_clip = ImageClip(np.array(bg_img)).with_duration(duration)
-
-        # Render subscribe button
-        sub_img = Image.new("RGBA", resolution, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(sub_img)
-
-        # Red subscribe button
-        btn_w, btn_h = 450, 80
-        btn_x = (w - btn_w) // 2
-        btn_y = h // 2 - 60
-        draw.rounded_rectangle(
-            [btn_x, btn_y, btn_x + btn_w, btn_y + btn_h],
-            radius=12,
-            fill=(255, 0, 0, 255),
-        )
+        bg_clip = ImageClip(np.array(Image.open(card.background_path).convert("RGB"))).with_duration(duration)
 
-        font_sub = self._get_font(44)
-        sub_text = "SUBSCRIBE"
-        text_bbox = draw.textbbox((0, 0), sub_text, font=font_sub)
-        tx = btn_x + (btn_w - (text_bbox[2] - text_bbox[0])) // 2
-        ty = btn_y + (btn_h - (text_bbox[3] - text_bbox[1])) // 2
-        draw.text((tx, ty), sub_text, font=font_sub, fill=(255, 255, 255, 255))
-
-        # Channel name below
-        font_name = self._get_font(40)
-        name_bbox = draw.textbbox((0, 0), channel_name, font=font_name)
-        nx = (w - (name_bbox[2] - name_bbox[0])) // 2
-        draw.text((nx, btn_y + btn_h + 30), channel_name, font=font_name,
-                  fill=(255, 255, 255, 200))
-
-        sub_array = np.array(sub_img)
+        sub_array = self._card_layer(card, resolution)
         sub_clip = ImageClip(sub_array).with_duration(duration)
 
         # Animate: subtle pulse (1.0→1.04→1.0 over 1s cycle) + fade in
@@ -693,6 +956,46 @@ class VideoAssembler:
 
         return CompositeVideoClip([bg_clip, sub_clip], size=resolution)
 
+    def _card_layer(self, card: TimelineCard, resolution: tuple[int, int]) -> np.ndarray:
+        """Full-frame RGBA layer of an intro/outro card, from its cropped image."""
+        layer = Image.new("RGBA", resolution, (0, 0, 0, 0))
+        if card.layer_path:
+            layer.paste(Image.open(card.layer_path).convert("RGBA"), card.layer_box[:2])
+        return np.array(layer)
+
+    def _render_outro_layer(self, channel_name: str, resolution: tuple[int, int]) -> Image.Image:
+        """Render the outro's SUBSCRIBE button and channel name on a transparent frame."""
+        w, h = resolution
+
+        # Render subscribe button
+        sub_img = Image.new("RGBA", resolution, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(sub_img)
+
+        # Red subscribe button
+        btn_w, btn_h = 450, 80
+        btn_x = (w - btn_w) // 2
+        btn_y = h // 2 - 60
+        draw.rounded_rectangle(
+            [btn_x, btn_y, btn_x + btn_w, btn_y + btn_h],
+            radius=12,
+            fill=(255, 0, 0, 255),
+        )
+
+        font_sub = self._get_font(44)
+        sub_text = "SUBSCRIBE"
+        text_bbox = draw.textbbox((0, 0), sub_text, font=font_sub)
+        tx = btn_x + (btn_w - (text_bbox[2] - text_bbox[0])) // 2
+        ty = btn_y + (btn_h - (text_bbox[3] - text_bbox[1])) // 2
+        draw.text((tx, ty), sub_text, font=font_sub, fill=(255, 255, 255, 255))
+
+        # Channel name below
+        font_name = self._get_font(40)
+        name_bbox = draw.textbbox((0, 0), channel_name, font=font_name)
+        nx = (w - (name_bbox[2] - name_bbox[0])) // 2
+        draw.text((nx, btn_y + btn_h + 30), channel_name, font=font_name,
+                  fill=(255, 255, 255, 200))
+        return sub_img
+
     # =========================================================================
     # AUDIO MIXING WITH DUCKING
     # =========================================================================
@@ -719,65 +1022,22 @@ class VideoAssembler:
         if not music_path or not Path(music_path).exists():
             return full_vo
 
-        # Mix with background music using pydub for proper ducking
+        # Mix with background music, ducked under the voice
         try:
-            return self._mix_with_ducking(full_vo, music_path, total)
+            return self._mix_with_ducking(voiceover.filename, music_path, intro_duration, total)
         except Exception as e:
             logger.warning(f"Music mixing failed, using voiceover only: {e}")
             return full_vo
 
     def _mix_with_ducking(
-        self, voiceover_clip: AudioClip, music_path: str, total_duration: float
+        self, voiceover_path: str, music_path: str, intro_duration: float, total_duration: float
     ) -> AudioClip:
         """Mix voiceover with background music, ducking music during speech."""
-        # Export voiceover to temp file for pydub processing
-        temp_vo = settings.temp_dir / "temp_vo_mix.wav"
-        voiceover_clip.write_audiofile(str(temp_vo), fps=44100, logger=None)
-
-        vo_audio = AudioSegment.from_file(str(temp_vo))
-        music = AudioSegment.from_file(music_path)
-
-        # Loop music to match duration
-        target_ms = int(total_duration * 1000)
-        if len(music) < target_ms:
-            loops = (target_ms // len(music)) + 1
-            music = music * loops
-        music = music[:target_ms]
-
-        # Fade in/out on music
-        music = music.fade_in(2000).fade_out(3000)
-
-        # Voice activity detection via RMS energy
-        chunk_ms = 100  # 100ms chunks
-        ducked_music = AudioSegment.empty()
-        rms_threshold = vo_audio.rms * 0.3  # 30% of voice RMS = silence threshold
-
-        for i in range(0, len(music), chunk_ms):
-            music_chunk = music[i:i + chunk_ms]
-            vo_chunk = vo_audio[i:i + chunk_ms] if i < len(vo_audio) else AudioSegment.silent(chunk_ms)
-
-            if vo_chunk.rms > rms_threshold:
-                # Voice present → duck music heavily
-                ducked_music += music_chunk + MUSIC_DUCK_DB
-            else:
-                # Silence → music at bed level
-                ducked_music += music_chunk + MUSIC_BED_DB
-
-        # Mix
-        mixed = vo_audio.overlay(ducked_music)
-
-        # Export mixed audio
-        temp_mixed = settings.temp_dir / "temp_mixed.wav"
-        mixed.export(str(temp_mixed), format="wav")
-
-        # Load back as MoviePy AudioClip
-        result = AudioFileClip(str(temp_mixed))
-
-        # Cleanup temp files
-        temp_vo.unlink(missing_ok=True)
-        temp_mixed.unlink(missing_ok=True)
-
-        return result
+        frames = round(total_duration * SAMPLE_RATE)
+        voice = decode_audio(voiceover_path, frames, offset=round(intro_duration * SAMPLE_RATE))
+        music = decode_audio(music_path, frames, loop=True)
+        mixed = duck_and_mix(voice, music, bed_db=MUSIC_BED_DB, duck_db=MUSIC_DUCK_DB)
+        return AudioArrayClip(mixed, fps=SAMPLE_RATE)
 
     # =========================================================================
     # HELPERS
@@ -41,6 +41,23 @@ def cleanup_old_videos(max_age_days: int = 30) -> int:
     return deleted
 
 
+def cleanup_media_cache(max_age_days: int = 60) -> int:
+    """Delete cached renders not used in max_age_days. Returns count of deleted files."""
+    deleted = 0
+    cutoff = time.time() - (max_age_days * 86400)
+
+    for file_path in settings.card_cache_dir.rglob("*.mp4"):
+        if file_path.stat().st_mtime < cutoff:
+            try:
+                file_path.unlink()
+                deleted += 1
+            except OSError as e:
+                logger.warning(f"Failed to delete {file_path}: {e}")
+
+    logger.info(f"Cleaned up {deleted} cached renders unused for {max_age_days}d")
+    return deleted
+
+
 def get_unique_path(directory: Path, prefix: str, extension: str) -> Path:
     """Generate a unique file path with timestamp."""
     directory.mkdir(parents=True, exist_ok=True)
@@ -51,7 +68,7 @@ def get_unique_path(directory: Path, prefix: str, extension: str) -> Path:
 def get_media_disk_usage() -> dict:
     """Return disk usage in bytes for each media subdirectory."""
     usage = {}
-    for subdir in ["voiceovers", "footage", "thumbnails", "final_videos", "temp"]:
+    for subdir in ["voiceovers", "footage", "thumbnails", "final_videos", "temp", "cache"]:
         path = settings.MEDIA_DIR / subdir
         if path.exists():
             total = sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
@@ -111,14 +111,16 @@ def weekly_content_calendar_task(self):
 @celery_app.task(bind=True, max_retries=1, default_retry_delay=60)
 def weekly_cleanup_task(self):
     """Clean up old temp files and expired media."""
-    from app.utils.file_manager import cleanup_old_videos, cleanup_temp_files
+    from app.utils.file_manager import cleanup_media_cache, cleanup_old_videos, cleanup_temp_files
 
     try:
         temp_deleted = cleanup_temp_files(max_age_hours=24)
         videos_deleted = cleanup_old_videos(max_age_days=30)
+        cached_deleted = cleanup_media_cache(max_age_days=60)
         result = {
             "temp_files_deleted": temp_deleted,
             "old_videos_deleted": videos_deleted,
+            "cached_renders_deleted": cached_deleted,
         }
         logger.info(f"Weekly cleanup: {result}")
         return result
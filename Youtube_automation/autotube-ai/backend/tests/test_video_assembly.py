@@ -99,3 +99,219 @@ class TestValidators:
 
         long = "A " * 60
         assert len(truncate_title(long, 50)) <= 50
+
+
+class TestFFmpegRenderer:
+    def _timeline(self, clips, captions=None, music_path=None):
+        from app.services.video_assembler import Timeline, TimelineCard
+
+        return Timeline(
+            resolution=(1280, 720),
+            fps=30,
+            main_duration=sum(c.duration for c in clips) - 0.4 * (len(clips) - 1),
+            voiceover_path="vo.wav",
+            clips=clips,
+            captions=captions or [],
+            intro=TimelineCard(animation="intro", duration=3.0, background_path="bg.png",
+                               layer_path="intro.png", layer_box=(400, 300, 880, 400)),
+            outro=TimelineCard(animation="outro", duration=5.0, background_path="bg.png"),
+            music_path=music_path,
+        )
+
+    def test_crossfade_offsets(self):
+        """Each xfade starts CROSSFADE_DURATION before the end of the track so far."""
+        from app.services.ffmpeg_renderer import FFmpegRenderer
+        from app.services.video_assembler import TimelineClip
+
+        clips = [TimelineClip(kind="color", duration=5.0) for _ in range(3)]
+        _, graph = FFmpegRenderer().compile(self._timeline(clips))
+
+        assert "xfade=transition=fade:duration=0.400000:offset=4.600000" in graph
+        assert "xfade=transition=fade:duration=0.400000:offset=9.200000" in graph
+        assert "trim=end_frame=426" in graph  # 14.2s main track at 30fps
+        assert "concat=n=3:v=1:a=0[vout]" in graph
+
+    def test_inputs_and_overlays(self):
+        """Images, videos and captions become inputs; missing assets become color sources."""
+        from app.services.ffmpeg_renderer import FFmpegRenderer
+        from app.services.video_assembler import TimelineCaption, TimelineClip
+
+        clips = [
+            TimelineClip(kind="image", duration=4.0, path="a.png", motion="zoom_in"),
+            TimelineClip(kind="video", duration=4.0, path="b.mp4"),
+            TimelineClip(kind="color", duration=4.0),
+        ]
+        captions = [
+            TimelineCaption(image_path=f"c{i}.png", start=i * 2.0, end=i * 2.0 + 1.5, y=500, height=120)
+            for i in range(4)
+        ]
+        inputs, graph = FFmpegRenderer().compile(self._timeline(clips, captions, "music.mp3"))
+
+        # image, video, 4 captions, intro bg + layer, outro bg, voiceover, music
+        assert inputs.count("-i") == 11
+        assert "zoompan=z='1+0.2*" in graph
+        assert "color=c=0x0F0F19" in graph
+        assert graph.count("overlay=") == 5  # 4 captions + intro layer
+        assert "setpts=PTS-STARTPTS+6.000000/TB" in graph
+        assert "sidechaincompress" in graph
+        assert "adelay=delays=3000" in graph
+
+    def test_no_music_passes_voice_through(self):
+        from app.services.ffmpeg_renderer import FFmpegRenderer
+        from app.services.video_assembler import TimelineClip
+
+        _, graph = FFmpegRenderer().compile(self._timeline([TimelineClip(kind="color", duration=10.0)]))
+        assert "xfade" not in graph
+        assert "sidechaincompress" not in graph
+        assert "[voice]anull[aout]" in graph
+
+    def test_ken_burns_expressions(self):
+        """Pans run at full margin zoom; zooms keep the crop centered."""
+        from app.services.ffmpeg_renderer import ken_burns_filter
+
+        pan = ken_burns_filter("pan_left", 90, (1920, 1080), 30)
+        assert pan.startswith("zoompan=z='1.2':x='(iw-iw/zoom)*(1-")
+        assert "min(on/90,1)" in pan
+        assert pan.endswith("d=90:s=1920x1080:fps=30")
+
+        zoom = ken_burns_filter("zoom_out", 90, (1920, 1080), 30)
+        assert "z='1.2-0.2*" in zoom
+        assert "x='(iw-iw/zoom)/2':y='(ih-ih/zoom)/2'" in zoom
+
+
+class TestChunkedTimeline:
+    def _timeline(self):
+        from app.services.video_assembler import Timeline, TimelineCaption, TimelineClip, TimelineCard
+
+        clips = [TimelineClip(kind="image", duration=5.0, path=f"{i}.png", motion="zoom_in") for i in range(6)]
+        return Timeline(
+            resolution=(1280, 720),
+            fps=30,
+            main_duration=28.0,
+            voiceover_path="vo.wav",
+            clips=clips,
+            captions=[TimelineCaption(image_path="c.png", start=8.0, end=10.0, y=500, height=120)],
+            intro=TimelineCard(animation="intro", duration=3.0, background_path="bg.png",
+                               layer_path="intro.png", layer_box=(400, 300, 880, 400)),
+            outro=TimelineCard(animation="outro", duration=5.0, background_path="bg.png"),
+            music_path="music.mp3",
+        )
+
+    def test_split_at_clip_starts(self):
+        """Segments cover the main track, cut on frames at clip starts."""
+        timeline = self._timeline()
+        ranges = timeline.split(3)
+
+        assert ranges[0][0] == 0.0 and ranges[-1][1] == 28.0
+        assert len(ranges) == 3
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+            assert round(start * 30) / 30 == start
+            assert any(abs(start - clip_start) < 1 / 30 for clip_start in timeline.clip_starts())
+
+        # No more segments than clips
+        assert len(timeline.split(100)) == len(timeline.clips)
+
+    def test_segment_starts_with_outgoing_clip(self):
+        """The segment after a cut picks up the previous clip's tail, so the crossfade is whole."""
+        from app.services.ffmpeg_renderer import FFmpegRenderer
+
+        timeline = self._timeline()
+        start, end = 9.2, 18.4  # clip 2 and clip 4 start here
+        segment = timeline.segment(start, end)
+
+        assert [clip.path for clip in segment.clips] == ["1.png", "2.png", "3.png"]
+        assert segment.clips[0].offset == pytest.approx(4.6)
+        assert segment.main_duration == pytest.approx(9.2)
+        assert segment.captions[0].start == pytest.approx(-1.2)
+        assert segment.intro is None and segment.music_path is None
+
+        _, graph = FFmpegRenderer().compile_part(segment, "main")
+        assert "min((on+138)/150,1)" in graph  # Ken Burns picks up where it left off
+        assert "d=12:" in graph  # the 0.4s tail of clip 1
+        assert "xfade=transition=fade:duration=0.400000:offset=0.000000" in graph
+        assert "trim=start=1.200000" in graph  # the caption joins mid-animation
+        assert "trim=end_frame=276" in graph
+
+    def test_card_cache_key(self, tmp_path, monkeypatch):
+        """Cached intros/outros are keyed by channel, resolution, frame rate and backend."""
+        from dataclasses import replace
+
+        from app.config import settings
+        from app.services.chunked_renderer import ChunkedRenderer
+
+        monkeypatch.setattr(settings, "MEDIA_DIR", tmp_path)
+        timeline = self._timeline()
+        renderer = ChunkedRenderer("ffmpeg", 2)
+        path = renderer._cached_card(timeline, timeline.intro)
+
+        assert path.parent == tmp_path / "cache" / "cards"
+        assert path == renderer._cached_card(self._timeline(), self._timeline().intro)
+        assert path != renderer._cached_card(timeline, timeline.outro)
+        assert path != renderer._cached_card(timeline, replace(timeline.intro, channel_name="Other"))
+        assert path != renderer._cached_card(replace(timeline, fps=60), timeline.intro)
+        assert path != ChunkedRenderer("moviepy", 2)._cached_card(timeline, timeline.intro)
+
+        monkeypatch.setattr(settings, "CACHE_INTRO_OUTRO", False)
+        assert renderer._cached_card(timeline, timeline.intro) is None
+
+    def test_round_trip(self):
+        from app.services.video_assembler import Timeline
+
+        timeline = self._timeline().segment(4.6, 13.8)
+        assert Timeline.from_dict(timeline.to_dict()) == timeline
+        assert Timeline.from_dict(self._timeline().to_dict()) == self._timeline()
+
+
+class TestAudioDucking:
+    def _tracks(self, seconds=8.0, rate=8000):
+        """Voice speaks from 3s to 5s; music is a constant 0.1."""
+        import numpy as np
+
+        t = np.arange(int(seconds * rate)) / rate
+        speech = np.sin(2 * np.pi * 200 * t) * 0.5 * ((t >= 3) & (t < 5))
+        voice = np.repeat(speech[:, None], 2, axis=1).astype(np.float32)
+        music = np.full_like(voice, 0.1)
+        return voice, music
+
+    def test_envelope_follows_speech(self):
+        from app.services.audio_ducking import rms_envelope
+
+        voice, _ = self._tracks()
+        envelope, overall = rms_envelope(voice, 8000)
+
+        assert len(envelope) == 800  # one per 10 ms
+        assert envelope[400] == pytest.approx(0.5 / 2 ** 0.5, rel=0.05)
+        assert envelope[200] == 0 and envelope[600] == 0
+        assert overall == pytest.approx(0.5 / 2 ** 0.5 * (2 / 8) ** 0.5, rel=0.05)
+
+    def test_gain_is_smoothed(self):
+        """Attack is fast, release is slow, and neither jumps."""
+        import numpy as np
+
+        from app.services.audio_ducking import smooth_gain
+
+        target = np.array([1.0] * 50 + [0.1] * 100 + [1.0] * 150)
+        gain = smooth_gain(target, hop=0.01, attack=0.02, release=0.25)
+
+        assert gain[49] == 1.0
+        assert gain[60] == pytest.approx(0.1, abs=0.01)  # ducked within ~5 time constants
+        assert 0.3 < gain[175] < 0.8  # still recovering 0.25s after speech
+        assert np.abs(np.diff(gain)).max() < 0.9 * 0.5
+
+    def test_duck_and_mix(self):
+        import numpy as np
+
+        from app.services.audio_ducking import duck_and_mix
+
+        voice, music = self._tracks()
+        mixed = duck_and_mix(voice, music, bed_db=-6, duck_db=-20, sample_rate=8000)
+        assert mixed is music
+
+        ducked = mixed - voice
+        bed, duck = 0.1 * 10 ** (-6 / 20), 0.1 * 10 ** (-20 / 20)
+        assert ducked[0, 0] == 0  # fade in
+        assert ducked[int(2.5 * 8000), 0] == pytest.approx(bed, rel=0.02)
+        assert ducked[int(4.0 * 8000), 0] == pytest.approx(duck, rel=0.02)
+        assert ducked[-1, 0] == pytest.approx(0, abs=1e-4)  # fade out
+        assert np.allclose(ducked[:, 0], ducked[:, 1])
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark the NumPy music ducking engine on long tracks.
+
+Synthesizes a voiceover (speech bursts with pauses) and a music bed, then
+times duck_and_mix for each length, with the gain envelope's largest
+per-millisecond step as a measure of pumping. --legacy-minutes also times
+the previous pydub loop (100 ms chunks, hard gain switches, repeated
+concatenation) on shorter tracks, since it grows quadratically.
+
+Usage:
+    python scripts/benchmark_ducking.py
+    python scripts/benchmark_ducking.py --minutes 10 30 60 --legacy-minutes 1 2 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import numpy as np
+from pydub import AudioSegment
+
+from app.services.audio_ducking import SAMPLE_RATE, duck_and_mix
+from app.services.video_assembler import MUSIC_BED_DB, MUSIC_DUCK_DB
+
+TILE_SECONDS = 30
+
+
+def make_tracks(minutes: float, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """Voice: 180 Hz tone on for 2.2s of every 3s. Music: a looped 30s noise bed."""
+    frames = round(minutes * 60 * SAMPLE_RATE)
+    rng = np.random.default_rng(seed)
+    tile = rng.standard_normal((TILE_SECONDS * SAMPLE_RATE, 2)).astype(np.float32) * 0.1
+    t = np.arange(TILE_SECONDS * SAMPLE_RATE) / SAMPLE_RATE
+    speech = (np.sin(2 * np.pi * 180 * t) * 0.5 * (t % 3 < 2.2)).astype(np.float32)
+
+    voice = np.empty((frames, 2), dtype=np.float32)
+    music = np.empty((frames, 2), dtype=np.float32)
+    for start in range(0, frames, len(tile)):
+        n = min(len(tile), frames - start)
+        voice[start:start + n] = speech[:n, None]
+        music[start:start + n] = tile[:n]
+    return voice, music
+
+
+def legacy_mix(voice: np.ndarray, music: np.ndarray) -> AudioSegment:
+    """The pydub loop VideoAssembler used before the NumPy engine."""
+    def segment(samples):
+        pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+        return AudioSegment(pcm.tobytes(), frame_rate=SAMPLE_RATE, sample_width=2, channels=2)
+
+    vo_audio, music = segment(voice), segment(music).fade_in(2000).fade_out(3000)
+    chunk_ms = 100
+    ducked_music = AudioSegment.empty()
+    rms_threshold = vo_audio.rms * 0.3
+    for i in range(0, len(music), chunk_ms):
+        music_chunk = music[i:i + chunk_ms]
+        vo_chunk = vo_audio[i:i + chunk_ms]
+        if vo_chunk.rms > rms_threshold:
+            ducked_music += music_chunk + MUSIC_DUCK_DB
+        else:
+            ducked_music += music_chunk + MUSIC_BED_DB
+    return vo_audio.overlay(ducked_music)
+
+
+def largest_gain_step_db(voice: np.ndarray, music: np.ndarray, mixed: np.ndarray) -> float:
+    """Largest change of the music gain between consecutive milliseconds, in dB."""
+    ms = SAMPLE_RATE // 1000
+    frames = len(music) // ms * ms
+    ducked = (mixed[:frames] - voice[:frames])[:, 0].reshape(-1, ms)
+    original = music[:frames, 0].reshape(-1, ms)
+    gain = np.sqrt((ducked ** 2).mean(axis=1) / np.maximum((original ** 2).mean(axis=1), 1e-12))
+    gain_db = 20 * np.log10(np.maximum(gain, 1e-6))
+    # Skip the fades, which are deliberate ramps
+    body = gain_db[2000:-3000]
+    return float(np.abs(np.diff(body)).max()) if len(body) > 1 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark music ducking")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[10, 20, 30, 60])
+    parser.add_argument("--legacy-minutes", type=float, nargs="*", default=[1, 2],
+                        help="Track lengths to also time with the old pydub loop")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'engine':<8}{'track':>8}{'time':>10}{'x realtime':>13}{'max step':>11}")
+    for minutes in args.legacy_minutes:
+        voice, music = make_tracks(minutes, args.seed)
+        start = time.perf_counter()
+        mixed = legacy_mix(voice, music)
+        elapsed = time.perf_counter() - start
+        mixed = np.frombuffer(mixed.raw_data, dtype=np.int16).reshape(-1, 2) / 32767
+        step = largest_gain_step_db(voice, music, mixed)
+        print(f"{'pydub':<8}{minutes:>6.0f}m{elapsed:>9.2f}s{minutes * 60 / elapsed:>12.0f}x{step:>8.2f} dB")
+
+    for minutes in args.minutes:
+        voice, music = make_tracks(minutes, args.seed)
+        reference = music[:SAMPLE_RATE * 60].copy()
+        start = time.perf_counter()
+        mixed = duck_and_mix(voice, music, bed_db=MUSIC_BED_DB, duck_db=MUSIC_DUCK_DB)
+        elapsed = time.perf_counter() - start
+        step = largest_gain_step_db(voice[:len(reference)], reference, mixed[:len(reference)])
+        print(f"{'numpy':<8}{minutes:>6.0f}m{elapsed:>9.2f}s{minutes * 60 / elapsed:>12.0f}x{step:>8.2f} dB")
+        del voice, music, mixed
+
+
+if __name__ == "__main__":
+    main()
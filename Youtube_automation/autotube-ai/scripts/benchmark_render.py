@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Render the same synthetic video with the MoviePy and FFmpeg backends and compare.
+
+Generates images, a stock clip, a voiceover, music and captions, renders
+them with each backend (same random seed, so the same Ken Burns moves),
+and reports render time, speed relative to realtime and the SSIM between
+the outputs.
+
+Usage:
+    python scripts/benchmark_render.py --duration 60
+    python scripts/benchmark_render.py --duration 600 --backends ffmpeg --resolution 1920x1080
+    python scripts/benchmark_render.py --duration 300 --processes 8
+"""
+
+import argparse
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.config import settings
+from app.services.caption_generator import SubtitleEntry
+from app.services.chunked_renderer import ChunkedRenderer
+from app.services.ffmpeg_renderer import FFmpegRenderer
+from app.services.video_assembler import VideoAssembler, VideoComponents
+
+WORDS = "the secret never fails every million people miss this one simple trick today".split()
+
+
+def make_media(work: Path, duration: float, assets: int) -> VideoComponents:
+    """Synthetic images, stock clip, voiceover, music and captions."""
+    paths, types = [], []
+    for i in range(assets):
+        if i % 4 == 3:
+            clip = work / f"stock_{i}.mp4"
+            subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi",
+                            "-i", "testsrc2=s=1280x720:r=30:d=4", "-pix_fmt", "yuv420p", str(clip)],
+                           check=True)
+            paths.append(str(clip))
+            types.append("stock_video")
+            continue
+        x = np.linspace(0, 1, 1600)[None, :, None]
+        y = np.linspace(0, 1, 1000)[:, None, None]
+        color = np.array([(i * 70) % 255, (i * 130) % 255, (i * 40 + 90) % 255])
+        img = Image.fromarray(((x * 0.6 + y * 0.4) * color).astype(np.uint8))
+        draw = ImageDraw.Draw(img)
+        for j in range(6):
+            draw.ellipse([200 * j + 50, 150 * (j % 3) + 200, 200 * j + 200, 150 * (j % 3) + 350],
+                         fill=(255, 255, 255))
+        path = work / f"image_{i}.png"
+        img.save(path)
+        paths.append(str(path))
+        types.append("ai_image")
+
+    voiceover = work / "voiceover.wav"
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi",
+                    "-i", f"sine=f=180:d={duration}", "-af",
+                    "volume='if(lt(mod(t,3),2.2),0.5,0)':eval=frame",
+                    "-ac", "1", "-ar", "44100", str(voiceover)], check=True)
+    music = work / "music.wav"
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi",
+                    "-i", "anoisesrc=d=30:c=pink:a=0.2", "-ac", "2", "-ar", "44100", str(music)],
+                   check=True)
+
+    entries = []
+    t, index = 0.0, 1
+    while t + 2.0 < duration:
+        text = " ".join(WORDS[(index + k) % len(WORDS)] for k in range(5))
+        entries.append(SubtitleEntry(index=index, start_time=t, end_time=t + 2.3, text=text))
+        t += 2.5
+        index += 1
+
+    return VideoComponents(
+        voiceover_path=str(voiceover),
+        asset_paths=paths,
+        asset_types=types,
+        subtitle_entries=entries,
+        channel_name="Benchmark Channel",
+        music_path=str(music),
+    )
+
+
+def ssim(a: str, b: str) -> float | None:
+    """Mean SSIM between two videos."""
+    result = subprocess.run(["ffmpeg", "-hide_banner", "-i", a, "-i", b,
+                             "-lavfi", "[0:v][1:v]ssim", "-f", "null", "-"],
+                            capture_output=True, text=True)
+    match = re.search(r"All:([\d.]+)", result.stderr)
+    return float(match.group(1)) if match else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MoviePy vs FFmpeg video rendering")
+    parser.add_argument("--duration", type=float, default=60, help="Voiceover length in seconds")
+    parser.add_argument("--resolution", type=str, default="1920x1080", help="WIDTHxHEIGHT")
+    parser.add_argument("--assets", type=int, default=None, help="Number of assets (default: one per 6s)")
+    parser.add_argument("--backends", nargs="+", default=["moviepy", "ffmpeg"],
+                        choices=["moviepy", "ffmpeg"])
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Render in this many parallel segments (ChunkedRenderer)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help="Keep the rendered videos")
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="render_bench_"))
+    settings.MEDIA_DIR = work / "media"
+    settings.ensure_media_dirs()
+
+    assets = args.assets or max(1, int(args.duration // 6))
+    components = make_media(work, args.duration, assets)
+    components.resolution = tuple(int(v) for v in args.resolution.split("x"))
+    print(f"{args.duration:.0f}s voiceover, {assets} assets, "
+          f"{len(components.subtitle_entries)} captions, {args.resolution}, {args.processes} process(es)")
+
+    assembler = VideoAssembler()
+    results = {}
+    for backend in args.backends:
+        components.render_backend = backend
+        random.seed(args.seed)
+        start = time.perf_counter()
+        # Renderers are called directly so a failure is not hidden by the MoviePy fallback
+        if args.processes > 1:
+            video = assembler._assemble_with(components, ChunkedRenderer(backend, args.processes))
+        elif backend == "ffmpeg":
+            video = assembler._assemble_with(components, FFmpegRenderer())
+        else:
+            video = assembler.assemble_video(components)
+        elapsed = time.perf_counter() - start
+        results[backend] = (video, elapsed)
+
+    print()
+    print(f"{'backend':<10}{'render':>10}{'x realtime':>12}{'size':>10}")
+    for backend, (video, elapsed) in results.items():
+        size_mb = Path(video.video_path).stat().st_size / 1e6
+        print(f"{backend:<10}{elapsed:>9.1f}s{video.duration_seconds / elapsed:>11.2f}x{size_mb:>8.1f}MB")
+
+    if len(results) == 2:
+        moviepy, ffmpeg = results["moviepy"], results["ffmpeg"]
+        print(f"\nSpeedup: {moviepy[1] / ffmpeg[1]:.1f}x")
+        score = ssim(moviepy[0].video_path, ffmpeg[0].video_path)
+        if score is not None:
+            print(f"SSIM (moviepy vs ffmpeg): {score:.3f}")
+
+    if args.keep:
+        print(f"\nOutputs kept in {settings.final_videos_dir}")
+    else:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
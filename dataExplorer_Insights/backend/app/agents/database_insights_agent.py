@@ -3,30 +3,61 @@ Agentic AI Agent using LangGraph for database insights
 Multi-step reasoning for complex analytical queries
 """
 
-from typing import Dict, List, Any, Optional, TypedDict, Annotated
+from typing import Dict, List, Any, Optional, TypedDict, Annotated, Callable, Awaitable
 from langgraph.graph import StateGraph, END
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import HumanMessage, SystemMessage
+import asyncio
 import json
 import logging
+import time
 
 from app.core.config import settings
 from app.services.sql_generator import SQLGenerator
 from app.services.database_manager import DatabaseManager
 from app.services.insights_analyzer import InsightsAnalyzer
+from app.services.result_workspace import ResultWorkspace
+from app.services.federated_executor import FederatedExecutor
+from app.services.query_sampler import QuerySampler
+from app.services.query_cancellation import CancellationToken, QueryCancelledError
+from app.services.schema_encoder import resolve_schema_format
+from app.services.schema_cache import SchemaCache, NON_SQL_DATABASES
+from app.services.column_profiler import ColumnProfiler, columns_for_query, prompt_hints
+from app.services.llm_gateway import LLMGateway, FakeChatModel
 
 logger = logging.getLogger(__name__)
 
+# Receives a workflow step name and details (phase, elapsed_ms) as the run progresses
+ProgressCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+async def _report(progress: ProgressCallback, name: str, details: Dict[str, Any]):
+    """Call a progress callback; its failures never affect the run"""
+    try:
+        await progress(name, details)
+    except Exception as e:
+        logger.warning(f"Progress callback failed at {name}: {str(e)}")
+
 
 class AgentState(TypedDict):
     """State for the agentic workflow"""
     user_query: str
     database_type: str
     connection_params: Dict[str, Any]
+    session_id: Optional[str]
+    workspace_key: Optional[str]
     schema_context: Optional[str]
+    column_profile: Optional[Dict[str, Any]]
     intent: Optional[str]
+    entities: List[str]
+    data_source: str
+    federated: bool
+    sample_percent: Optional[float]
+    sampling: Optional[Dict[str, Any]]
+    cancel_token: Optional[CancellationToken]
+    progress: Optional[ProgressCallback]
     sql_query: Optional[str]
     query_results: Optional[List[Dict]]
     insights: Optional[Dict[str, Any]]
@@ -45,24 +76,43 @@ class DatabaseInsightsAgent:
     def __init__(self):
         """Initialize the agent with LLM and tools"""
         # Initialize LLM
-        if settings.OPENAI_API_KEY:
-            self.llm = ChatOpenAI(
+        if settings.LLM_BACKEND == "fake":
+            llm = FakeChatModel()
+            provider, self.model_name = "fake", "fake"
+        elif settings.OPENAI_API_KEY and settings.LLM_BACKEND in ("auto", "openai"):
+            llm = ChatOpenAI(
                 model=settings.OPENAI_MODEL,
                 temperature=settings.OPENAI_TEMPERATURE,
                 api_key=settings.OPENAI_API_KEY
             )
-        elif settings.ANTHROPIC_API_KEY:
-            self.llm = ChatAnthropic(
+            provider, self.model_name = "openai", settings.OPENAI_MODEL
+        elif settings.ANTHROPIC_API_KEY and settings.LLM_BACKEND in ("auto", "anthropic"):
+            llm = ChatAnthropic(
                 model=settings.ANTHROPIC_MODEL,
                 api_key=settings.ANTHROPIC_API_KEY
             )
+            provider, self.model_name = "anthropic", settings.ANTHROPIC_MODEL
         else:
             raise ValueError("No LLM API key configured")
         
+        # All LLM calls share the gateway's cache, concurrency cap and retries
+        self.llm = LLMGateway(llm, provider, self.model_name)
+        
+        # Schema rendering used in prompts for this model
+        self.schema_format = resolve_schema_format(self.model_name)
+        
         # Initialize tools
         self.sql_generator = SQLGenerator(self.llm)
         self.db_manager = DatabaseManager()
+        self.schema_cache = SchemaCache(self.db_manager)
+        self.column_profiler = (
+            ColumnProfiler(self.db_manager, self.schema_cache)
+            if settings.ENABLE_COLUMN_PROFILING else None
+        )
+        self.federated_executor = FederatedExecutor(self.db_manager)
+        self.query_sampler = QuerySampler()
         self.insights_analyzer = InsightsAnalyzer(self.llm)
+        self.workspace = ResultWorkspace() if settings.ENABLE_FOLLOWUP_WORKSPACE else None
         
         # Build the agent graph
         self.graph = self._build_graph()
@@ -71,21 +121,34 @@ class DatabaseInsightsAgent:
         """Build the LangGraph workflow"""
         workflow = StateGraph(AgentState)
         
-        # Add nodes
-        workflow.add_node("understand_intent", self._understand_intent)
-        workflow.add_node("get_schema", self._get_schema)
-        workflow.add_node("generate_sql", self._generate_sql)
-        workflow.add_node("execute_query", self._execute_query)
-        workflow.add_node("analyze_results", self._analyze_results)
-        workflow.add_node("generate_insights", self._generate_insights)
-        workflow.add_node("create_visualizations", self._create_visualizations)
-        workflow.add_node("handle_error", self._handle_error)
+        # Add nodes; each reports progress when the run has a callback
+        nodes = {
+            "understand_intent": self._understand_intent,
+            "route_query": self._route_query,
+            "get_schema": self._get_schema,
+            "generate_sql": self._generate_sql,
+            "execute_query": self._execute_query,
+            "analyze_results": self._analyze_results,
+            "generate_insights": self._generate_insights,
+            "create_visualizations": self._create_visualizations,
+            "handle_error": self._handle_error
+        }
+        for name, node in nodes.items():
+            workflow.add_node(name, self._with_progress(name, node))
         
         # Set entry point
         workflow.set_entry_point("understand_intent")
         
         # Add edges
-        workflow.add_edge("understand_intent", "get_schema")
+        workflow.add_edge("understand_intent", "route_query")
+        workflow.add_conditional_edges(
+            "route_query",
+            self._should_use_workspace,
+            {
+                "workspace": "generate_sql",
+                "database": "get_schema"
+            }
+        )
         workflow.add_edge("get_schema", "generate_sql")
         workflow.add_conditional_edges(
             "generate_sql",
@@ -101,7 +164,8 @@ class DatabaseInsightsAgent:
             {
                 "analyze": "analyze_results",
                 "error": "handle_error",
-                "retry": "generate_sql"
+                "retry": "generate_sql",
+                "fallback": "get_schema"
             }
         )
         workflow.add_edge("analyze_results", "generate_insights")
@@ -111,10 +175,33 @@ class DatabaseInsightsAgent:
         
         return workflow.compile()
     
+    @staticmethod
+    def _with_progress(name: str, node: Callable[[AgentState], Awaitable[AgentState]]):
+        """Wrap a node to report its start and duration to the run's progress callback"""
+        async def run_node(state: AgentState) -> AgentState:
+            progress = state.get("progress")
+            if progress is None:
+                return await node(state)
+            
+            await _report(progress, name, {"phase": "started"})
+            started = time.perf_counter()
+            state = await node(state)
+            await _report(progress, name, {
+                "phase": "completed",
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                "error": state.get("error")
+            })
+            return state
+        
+        return run_node
+    
     async def _understand_intent(self, state: AgentState) -> AgentState:
         """Step 1: Understand user intent"""
         logger.info(f"Understanding intent for query: {state['user_query']}")
         
+        if self._cancelled(state):
+            return state
+        
         prompt = ChatPromptTemplate.from_messages([
             SystemMessage(content="""You are an expert at understanding database query intentions.
             Classify the user's query into one of these categories:
@@ -136,6 +223,7 @@ class DatabaseInsightsAgent:
         try:
             intent_data = json.loads(response.content)
             state["intent"] = intent_data.get("intent", "custom")
+            state["entities"] = self._flatten_entities(intent_data.get("entities"))
             logger.info(f"Identified intent: {state['intent']}")
         except json.JSONDecodeError:
             state["intent"] = "custom"
@@ -144,15 +232,69 @@ class DatabaseInsightsAgent:
         state["iterations"] = state.get("iterations", 0) + 1
         return state
     
+    @staticmethod
+    def _flatten_entities(entities: Any) -> List[str]:
+        """Flatten the entities reported by the intent step into strings"""
+        if not entities:
+            return []
+        if isinstance(entities, dict):
+            flattened = []
+            for key, value in entities.items():
+                flattened.extend(value if isinstance(value, list) else [value or key])
+            return [str(item) for item in flattened if item]
+        if isinstance(entities, list):
+            return [
+                str(item.get("name", "")) if isinstance(item, dict) else str(item)
+                for item in entities
+                if item
+            ]
+        return [str(entities)]
+    
+    async def _route_query(self, state: AgentState) -> AgentState:
+        """Step 1b: Route follow-ups to the local result workspace when possible"""
+        state["data_source"] = "database"
+        
+        if self.workspace is None:
+            return state
+        
+        table_name = self.workspace.find_covering_result(
+            state.get("workspace_key"),
+            state.get("entities", [])
+        )
+        if table_name:
+            state["data_source"] = "workspace"
+            state["schema_context"] = self.workspace.describe(state["workspace_key"])
+            logger.info(f"Answering follow-up from workspace table {table_name}")
+        
+        return state
+    
     async def _get_schema(self, state: AgentState) -> AgentState:
         """Step 2: Get database schema context"""
         logger.info("Fetching database schema")
         
+        if self._cancelled(state):
+            return state
+        
         try:
-            schema = await self.db_manager.get_schema(
+            schema = await self.schema_cache.get_schema(
                 state["database_type"],
-                state["connection_params"]
+                state["connection_params"],
+                schema_format=self.schema_format
             )
+            
+            if self.column_profiler is not None and self.column_profiler.supports(state["database_type"]):
+                # Use the persisted profile now, refresh it in the background
+                profile = await self.schema_cache.get_profile(
+                    state["database_type"],
+                    state["connection_params"]
+                )
+                self.column_profiler.schedule(state["database_type"], state["connection_params"])
+                state["column_profile"] = profile
+                
+                hints = prompt_hints(profile, state.get("entities"))
+                if hints:
+                    schema = f"{schema}\n\n{hints}"
+            
             state["schema_context"] = schema
             logger.info("Schema fetched successfully")
         except Exception as e:
@@ -165,11 +307,19 @@ class DatabaseInsightsAgent:
         """Step 3: Generate SQL query from natural language"""
         logger.info("Generating SQL query")
         
+        if self._cancelled(state):
+            return state
+        
         try:
+            if state.get("data_source") == "workspace":
+                dialect = self.workspace.dialect
+            else:
+                dialect = state["database_type"]
+            
             sql_query = await self.sql_generator.generate(
                 user_query=state["user_query"],
                 schema=state["schema_context"],
-                database_type=state["database_type"],
+                database_type=dialect,
                 intent=state["intent"]
             )
             state["sql_query"] = sql_query
@@ -184,14 +334,67 @@ class DatabaseInsightsAgent:
         """Step 4: Execute the SQL query"""
         logger.info("Executing SQL query")
         
+        if self._cancelled(state):
+            return state
+        
+        if state.get("data_source") == "workspace":
+            try:
+                results = await asyncio.to_thread(
+                    self.workspace.execute,
+                    state["workspace_key"],
+                    state["sql_query"]
+                )
+                state["query_results"] = results
+                logger.info(f"Workspace query executed, {len(results)} rows returned")
+            except Exception as e:
+                # Fall back to the source database
+                logger.warning(f"Workspace query failed, falling back to database: {str(e)}")
+                state["data_source"] = "database"
+                state["schema_context"] = None
+                state["sql_query"] = None
+            return state
+        
         try:
+            sql_query = state["sql_query"]
+            sampling = None
+            if state.get("sample_percent"):
+                sampling = self.query_sampler.rewrite(
+                    sql_query,
+                    state["database_type"],
+                    state["sample_percent"]
+                )
+                if sampling:
+                    sql_query = sampling["sql"]
+                    logger.info(f"Approximate mode, sampling {sampling['sample_percent']}% of {sampling['base_table']}")
+            
             results = await self.db_manager.execute_query(
-                sql_query=state["sql_query"],
+                sql_query=sql_query,
                 database_type=state["database_type"],
-                connection_params=state["connection_params"]
+                connection_params=state["connection_params"],
+                cancel_token=state.get("cancel_token")
             )
+            
+            if sampling:
+                sampling["confidence_intervals"] = await self.insights_analyzer.compute_confidence_intervals(
+                    results,
+                    sampling
+                )
+                results = self.query_sampler.scale_results(results, sampling)
+                state["sampling"] = sampling
+            
             state["query_results"] = results
             logger.info(f"Query executed successfully, {len(results)} rows returned")
+            
+            if self.workspace is not None and state.get("workspace_key"):
+                await asyncio.to_thread(
+                    self.workspace.store,
+                    state["workspace_key"],
+                    state["user_query"],
+                    state["sql_query"],
+                    results
+                )
+        except QueryCancelledError:
+            self._cancelled(state)
         except Exception as e:
             logger.error(f"Error executing query: {str(e)}")
             state["error"] = f"Query execution error: {str(e)}"
@@ -208,18 +411,75 @@ class DatabaseInsightsAgent:
                 query=state["user_query"],
                 intent=state["intent"]
             )
+            if state.get("sampling"):
+                analysis["confidence_intervals"] = state["sampling"]["confidence_intervals"]
+            if self._should_stream_statistics(state):
+                analysis.update(await self._stream_statistics(state))
             state["insights"] = analysis
             logger.info("Results analyzed successfully")
+        except QueryCancelledError:
+            self._cancelled(state)
         except Exception as e:
             logger.error(f"Error analyzing results: {str(e)}")
             state["error"] = f"Analysis error: {str(e)}"
         
         return state
     
+    @staticmethod
+    def _should_stream_statistics(state: AgentState) -> bool:
+        """
+        Whether the returned rows were capped and the full result can be streamed
+        
+        Federated results are merged from several targets; re-reading one
+        of them would replace the merged statistics with its own.
+        """
+        return (
+            settings.ENABLE_STREAMING_ANALYSIS
+            and len(state["query_results"]) >= settings.MAX_RESULT_ROWS
+            and not state.get("sampling")
+            and not state.get("federated")
+            and state.get("data_source", "database") == "database"
+            and state["database_type"] not in NON_SQL_DATABASES
+        )
+    
+    async def _stream_statistics(self, state: AgentState) -> Dict[str, Any]:
+        """
+        Statistics over the full result of a capped query
+        
+        Re-reads the query in batches and folds them into mergeable
+        summaries. Falls back to the capped rows' statistics on failure.
+        """
+        try:
+            streamed = await self.insights_analyzer.analyze_stream(
+                self.db_manager.stream_query(
+                    state["sql_query"],
+                    state["database_type"],
+                    state["connection_params"],
+                    max_rows=settings.STREAM_MAX_ROWS,
+                    cancel_token=state.get("cancel_token")
+                ),
+                intent=state["intent"]
+            )
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Streaming analysis failed, using the first {settings.MAX_RESULT_ROWS} rows: {str(e)}")
+            return {}
+        
+        return {
+            "statistics": streamed["statistics"],
+            "patterns": streamed["patterns"],
+            "analyzed_rows": streamed["row_count"],
+            "streaming": streamed["streaming"]
+        }
+    
     async def _generate_insights(self, state: AgentState) -> AgentState:
         """Step 6: Generate natural language insights"""
         logger.info("Generating insights")
         
+        if self._cancelled(state):
+            return state
+        
         try:
             insights = await self.insights_analyzer.generate_insights(
                 data=state["query_results"],
@@ -241,7 +501,8 @@ class DatabaseInsightsAgent:
         try:
             viz_configs = await self.insights_analyzer.recommend_visualizations(
                 data=state["query_results"],
-                insights=state["insights"]
+                insights=state["insights"],
+                column_profile=columns_for_query(state.get("column_profile"), state.get("sql_query"))
             )
             state["visualizations"] = viz_configs
             
@@ -256,7 +517,9 @@ class DatabaseInsightsAgent:
                 "metadata": {
                     "rows_returned": len(state["query_results"]),
                     "iterations": state["iterations"],
-                    "database_type": state["database_type"]
+                    "database_type": state["database_type"],
+                    "data_source": state.get("data_source", "database"),
+                    "approximate": self._sampling_metadata(state.get("sampling"))
                 }
             }
             logger.info("Visualization recommendations created")
@@ -266,6 +529,20 @@ class DatabaseInsightsAgent:
         
         return state
     
+    @staticmethod
+    def _sampling_metadata(sampling: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Summarize the sampling plan for the response metadata"""
+        if not sampling:
+            return None
+        return {
+            "sample_percent": sampling["sample_percent"],
+            "method": sampling["method"],
+            "base_table": sampling["base_table"],
+            "executed_sql": sampling["sql"],
+            "scaled_columns": list(sampling["scaled_columns"]),
+            "unscaled_columns": sampling["unscaled_columns"]
+        }
+    
     async def _handle_error(self, state: AgentState) -> AgentState:
         """Handle errors in the workflow"""
         logger.error(f"Handling error: {state.get('error')}")
@@ -278,25 +555,96 @@ class DatabaseInsightsAgent:
         
         return state
     
+    @staticmethod
+    def _cancelled(state: AgentState) -> bool:
+        """Mark the run as failed if the client cancelled it"""
+        token = state.get("cancel_token")
+        if token is None or not token.is_cancelled:
+            return False
+        
+        if not state.get("error"):
+            logger.info(f"Agent run cancelled: {token.reason}")
+            state["error"] = "Request cancelled by client"
+        return True
+    
     def _should_execute_or_error(self, state: AgentState) -> str:
         """Conditional edge: check if SQL was generated successfully"""
         if state.get("error"):
             return "error"
         return "execute"
     
+    def _should_use_workspace(self, state: AgentState) -> str:
+        """Conditional edge: answer from the local workspace or the database"""
+        if state.get("data_source") == "workspace":
+            return "workspace"
+        return "database"
+    
     def _should_analyze_or_error(self, state: AgentState) -> str:
         """Conditional edge: check if query executed successfully"""
+        if state.get("sql_query") is None and not state.get("error"):
+            return "fallback"
+        if self._cancelled(state):
+            return "error"
         if state.get("error"):
             if state["iterations"] < settings.AGENT_MAX_ITERATIONS:
                 return "retry"
             return "error"
         return "analyze"
     
+    def _initial_state(
+        self,
+        user_query: str,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        session_id: Optional[str] = None,
+        sample_percent: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        progress: Optional[ProgressCallback] = None,
+        user_id: Optional[Any] = None,
+        connection_id: Optional[str] = None
+    ) -> AgentState:
+        """Build the initial workflow state"""
+        return {
+            "user_query": user_query,
+            "database_type": database_type,
+            "connection_params": connection_params,
+            "session_id": session_id,
+            "workspace_key": ResultWorkspace.workspace_key(
+                user_id,
+                [connection_id, connection_params.get("connection_version")]
+                if connection_id else [database_type, connection_params],
+                session_id
+            ),
+            "schema_context": None,
+            "column_profile": None,
+            "intent": None,
+            "entities": [],
+            "data_source": "database",
+            "federated": False,
+            "sample_percent": sample_percent,
+            "sampling": None,
+            "cancel_token": cancel_token,
+            "progress": progress,
+            "sql_query": None,
+            "query_results": None,
+            "insights": None,
+            "visualizations": None,
+            "error": None,
+            "iterations": 0,
+            "final_response": None
+        }
+    
     async def run(
         self,
         user_query: str,
         database_type: str,
-        connection_params: Dict[str, Any]
+        connection_params: Dict[str, Any],
+        session_id: Optional[str] = None,
+        sample_percent: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        progress: Optional[ProgressCallback] = None,
+        user_id: Optional[Any] = None,
+        connection_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Run the agentic workflow
@@ -305,29 +653,135 @@ class DatabaseInsightsAgent:
             user_query: Natural language query from user
             database_type: Type of database (postgres, mysql, mssql, sqlite, mongodb)
             connection_params: Database connection parameters
+            session_id: Conversation session for follow-up questions
+            sample_percent: Sample this percentage of the base table (approximate mode)
+            cancel_token: Token cancelled when the client goes away
+            progress: Called when each workflow step starts and completes
+            user_id: User asking; follow-up results are kept per user
+            connection_id: Saved connection the query runs on, if any
             
         Returns:
             Complete response with insights and visualizations
         """
         logger.info(f"Starting agent run for query: {user_query}")
         
-        initial_state: AgentState = {
-            "user_query": user_query,
-            "database_type": database_type,
-            "connection_params": connection_params,
-            "schema_context": None,
-            "intent": None,
-            "sql_query": None,
-            "query_results": None,
-            "insights": None,
-            "visualizations": None,
-            "error": None,
-            "iterations": 0,
-            "final_response": None
-        }
+        initial_state = self._initial_state(
+            user_query,
+            database_type,
+            connection_params,
+            session_id,
+            sample_percent,
+            cancel_token,
+            progress,
+            user_id,
+            connection_id
+        )
         
         # Run the graph
         final_state = await self.graph.ainvoke(initial_state)
         
         logger.info("Agent run completed")
         return final_state["final_response"]
+    
+    async def _sql_for_dialects(
+        self,
+        state: AgentState,
+        database_types: List[str]
+    ) -> Dict[str, str]:
+        """Translate the generated SQL once per distinct target dialect"""
+        sql_by_dialect = {state["database_type"]: state["sql_query"]}
+        
+        for database_type in database_types:
+            if database_type in sql_by_dialect:
+                continue
+            
+            sql_query = self.sql_generator.transpile(
+                state["sql_query"],
+                state["database_type"],
+                database_type
+            )
+            if sql_query is None:
+                sql_query = await self.sql_generator.generate(
+                    user_query=state["user_query"],
+                    schema=state["schema_context"],
+                    database_type=database_type,
+                    intent=state["intent"]
+                )
+            sql_by_dialect[database_type] = sql_query
+        
+        return sql_by_dialect
+    
+    async def run_federated(
+        self,
+        user_query: str,
+        targets: List[Dict[str, Any]],
+        timeout: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the workflow once and execute the query on several connections
+        
+        The SQL is generated from the first target's schema, translated for
+        any other dialects, executed on all targets concurrently and the
+        partial results are merged before analysis.
+        
+        Args:
+            user_query: Natural language query from user
+            targets: Targets with name, database_type and connection_params
+            timeout: Per-target timeout in seconds
+            
+        Returns:
+            Complete response with insights, visualizations and target status
+        """
+        logger.info(f"Starting federated agent run over {len(targets)} targets")
+        
+        primary = targets[0]
+        state = self._initial_state(
+            user_query,
+            primary["database_type"],
+            primary["connection_params"]
+        )
+        state["federated"] = True
+        
+        state = await self._understand_intent(state)
+        state = await self._get_schema(state)
+        if not state.get("error"):
+            state = await self._generate_sql(state)
+        if state.get("error"):
+            state = await self._handle_error(state)
+            return state["final_response"]
+        
+        sql_by_dialect = await self._sql_for_dialects(
+            state,
+            [target["database_type"] for target in targets]
+        )
+        
+        try:
+            federated = await self.federated_executor.execute(
+                sql_by_dialect,
+                targets,
+                timeout
+            )
+        except Exception as e:
+            logger.error(f"Federated execution failed: {str(e)}")
+            state["error"] = f"Query execution error: {str(e)}"
+            state = await self._handle_error(state)
+            return state["final_response"]
+        
+        state["query_results"] = federated["rows"]
+        
+        for step in (self._analyze_results, self._generate_insights, self._create_visualizations):
+            state = await step(state)
+            if state.get("error"):
+                state = await self._handle_error(state)
+                return state["final_response"]
+        
+        state["final_response"]["metadata"]["federated"] = {
+            "targets": federated["targets"],
+            "sql_by_dialect": sql_by_dialect,
+            "reaggregated": federated["reaggregated"],
+            "approximate": federated["approximate"],
+            "warnings": federated["warnings"]
+        }
+        
+        logger.info("Federated agent run completed")
+        return state["final_response"]
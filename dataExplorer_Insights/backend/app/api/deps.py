@@ -2,41 +2,95 @@
 API dependencies
 """
 
+from typing import Dict, Any
+from collections import OrderedDict
+import hashlib
+import time
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 
 from app.core.config import settings
 from app.models.user import User
+from app.services.user_store import UserStore
+from app.services.token_revocation import TokenRevocationList
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+user_store = UserStore()
+revocations = TokenRevocationList()
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
-    """Get current authenticated user"""
-    credentials_exception = HTTPException(
+# Decoded claims by token hash, so each token's signature is verified once
+_claims: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _credentials_exception() -> HTTPException:
+    """401 for any token that cannot be used"""
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        user_id: int = payload.get("user_id")
-        email: str = payload.get("email")
-        
-        if user_id is None or email is None:
-            raise credentials_exception
-            
-    except JWTError:
-        raise credentials_exception
-    
-    # TODO: Fetch user from database
-    # For now, return mock user
-    user = User(id=user_id, email=email, is_active=True)
-    
+
+
+def token_claims(token: str, token_type: str = "access") -> Dict[str, Any]:
+    """
+    Verified claims of a JWT, from the claims cache after the first request
+
+    Args:
+        token: Encoded JWT
+        token_type: Required "type" claim, "access" or "refresh"
+
+    Raises:
+        HTTPException: 401 for invalid, expired or wrong-type tokens
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = _claims.get(key)
+    if payload is None or payload["exp"] <= time.time():
+        _claims.pop(key, None)
+        try:
+            payload = jwt.decode(
+                token,
+                settings.JWT_SECRET_KEY,
+                algorithms=[settings.JWT_ALGORITHM]
+            )
+        except JWTError:
+            raise _credentials_exception()
+
+        if payload.get("user_id") is None or payload.get("email") is None or "exp" not in payload:
+            raise _credentials_exception()
+
+        _claims[key] = payload
+        while len(_claims) > settings.AUTH_CLAIMS_CACHE_SIZE:
+            _claims.popitem(last=False)
+
+    if payload.get("type") != token_type:
+        raise _credentials_exception()
+    return payload
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """Get current authenticated user"""
+    return await user_from_token(token)
+
+
+async def user_from_token(token: str, token_type: str = "access") -> User:
+    """
+    Validate a JWT and return its user (also used by the WebSocket endpoint)
+
+    Claims, revocation and the user record are all answered from memory in
+    the common case: the claims cache, the revocation Bloom filter and the
+    user store's record cache.
+    """
+    payload = token_claims(token, token_type)
+
+    jti = payload.get("jti")
+    if jti is not None and await revocations.is_revoked(jti):
+        raise _credentials_exception()
+
+    user = await user_store.get(payload["user_id"])
+    if user is None or not user.is_active:
+        raise _credentials_exception()
+
     return user
@@ -5,13 +5,17 @@ Authentication endpoints
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr, Field
+from typing import Optional
 from datetime import datetime, timedelta
-from jose import jwt, JWTError
+from jose import jwt
 from passlib.context import CryptContext
 import logging
+import uuid
 
 from app.core.config import settings
 from app.models.user import User, UserCreate, UserLogin
+from app.api.deps import get_current_user, user_from_token, token_claims, user_store, revocations
+from app.services.user_store import UserExists
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -38,7 +42,7 @@ def create_access_token(data: dict) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "type": "access", "jti": uuid.uuid4().hex})
     
     encoded_jwt = jwt.encode(
         to_encode,
@@ -52,7 +56,7 @@ def create_refresh_token(data: dict) -> str:
     """Create JWT refresh token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     
     encoded_jwt = jwt.encode(
         to_encode,
@@ -77,17 +81,16 @@ async def register(user_data: UserCreate):
     """Register new user"""
     logger.info(f"Registering user: {user_data.email}")
     
-    # TODO: Check if user exists in database
-    # For now, create a mock user
-    
     # Hash password
     hashed_password = get_password_hash(user_data.password)
     
-    # Create user (mock)
-    user_id = 1  # Would come from database
+    try:
+        user = await user_store.create(user_data.email, hashed_password, user_data.name)
+    except UserExists:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create tokens
-    token_data = {"user_id": user_id, "email": user_data.email}
+    token_data = {"user_id": user.id, "email": user.email}
     access_token = create_access_token(token_data)
     refresh_token = create_refresh_token(token_data)
     
@@ -105,14 +108,16 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """Login user"""
     logger.info(f"Login attempt: {form_data.username}")
     
-    # TODO: Verify user credentials from database
-    # For now, accept any credentials for demo
+    record = await user_store.get_by_email(form_data.username)
+    if record is None or not verify_password(form_data.password, record["hashed_password"]):
+        raise HTTPException(status_code=401, detail="Incorrect email or password")
+    if not record["is_active"]:
+        raise HTTPException(status_code=401, detail="Account disabled")
     
-    user_id = 1
-    email = form_data.username
+    email = record["email"]
     
     # Create tokens
-    token_data = {"user_id": user_id, "email": email}
+    token_data = {"user_id": record["id"], "email": email}
     access_token = create_access_token(token_data)
     refresh_token = create_refresh_token(token_data)
     
@@ -127,55 +132,61 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(refresh_token: str):
-    """Refresh access token"""
-    try:
-        payload = jwt.decode(
-            refresh_token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        
-        if payload.get("type") != "refresh":
-            raise HTTPException(status_code=401, detail="Invalid token type")
-        
-        user_id = payload.get("user_id")
-        email = payload.get("email")
-        
-        # Create new tokens
-        token_data = {"user_id": user_id, "email": email}
-        new_access_token = create_access_token(token_data)
-        new_refresh_token = create_refresh_token(token_data)
-        
-        return Token(
-            access_token=new_access_token,
-            refresh_token=new_refresh_token,
-            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
-        )
-        
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    """Refresh access token; the refresh token used is revoked (rotation)"""
+    user = await user_from_token(refresh_token, token_type="refresh")
+    payload = token_claims(refresh_token, token_type="refresh")
+    if payload.get("jti"):
+        await revocations.revoke(payload["jti"], payload["exp"])
+    
+    # Create new tokens
+    token_data = {"user_id": user.id, "email": user.email}
+    new_access_token = create_access_token(token_data)
+    new_refresh_token = create_refresh_token(token_data)
+    
+    return Token(
+        access_token=new_access_token,
+        refresh_token=new_refresh_token,
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    )
+
+
+@router.post("/logout")
+async def logout(
+    refresh_token: Optional[str] = None,
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user)
+):
+    """Revoke the access token and, if given, the refresh token"""
+    tokens = [(token, "access")]
+    if refresh_token:
+        tokens.append((refresh_token, "refresh"))
+    
+    for encoded, token_type in tokens:
+        payload = token_claims(encoded, token_type)
+        if payload["user_id"] != current_user.id:
+            raise HTTPException(status_code=403, detail="Token belongs to another user")
+        if payload.get("jti"):
+            await revocations.revoke(payload["jti"], payload["exp"])
+    
+    logger.info(f"User logged out: {current_user.id}")
+    return {"message": "Logged out"}
 
 
 @router.get("/me")
-async def get_current_user_info(token: str = Depends(oauth2_scheme)):
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user info"""
-    try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        
-        user_id = payload.get("user_id")
-        email = payload.get("email")
-        
-        if user_id is None or email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        return {
-            "id": user_id,
-            "email": email
-        }
-        
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    return {
+        "id": current_user.id,
+        "email": current_user.email,
+        "is_active": current_user.is_active,
+        "created_at": current_user.created_at
+    }
+
+
+@router.get("/cache/stats")
+async def get_auth_cache_stats(current_user: User = Depends(get_current_user)):
+    """User cache and token revocation filter statistics"""
+    return {
+        "users": user_store.stats(),
+        "revocations": revocations.stats()
+    }
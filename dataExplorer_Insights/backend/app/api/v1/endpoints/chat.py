@@ -2,30 +2,75 @@
 Chat API endpoints for natural language queries
 """
 
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+import asyncio
 import logging
 
 from app.agents.database_insights_agent import DatabaseInsightsAgent
 from app.services.cache_manager import CacheManager
+from app.services.query_cancellation import CancellationToken, watch_disconnect
+from app.services.admission_controller import AdmissionController, AdmissionRejected
+from app.services.job_queue import JobQueue, JobQueueFull, ProgressCallback
+from app.services.incremental_refresh import IncrementalRefresher
+from app.services.connection_registry import ConnectionRegistry, ConnectionNotFound
+from app.services.query_history import QueryHistory
+from app.services.template_precomputer import TemplatePrecomputer
+from app.services.websocket_manager import manager as ws_manager
 from app.api.deps import get_current_user
 from app.models.user import User
+from app.core.config import settings
+from app.core.serialization import ORJSONResponse
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Initialize agent and cache
+
+async def publish_job_event(job: Dict[str, Any], event: Dict[str, Any]):
+    """Push job status and progress to WebSocket subscribers of the job or its owner"""
+    await ws_manager.publish([f"user:{job['user_id']}", f"job:{job['job_id']}"], event)
+
+
+# Initialize agent, cache and admission control
 agent = DatabaseInsightsAgent()
 cache = CacheManager()
+admission = AdmissionController()
+job_queue = JobQueue(admission, listener=publish_job_event)
+refresher = IncrementalRefresher(agent.db_manager, agent.insights_analyzer, cache)
+registry = ConnectionRegistry(agent.db_manager, agent.schema_cache, agent.column_profiler, cache)
+history = QueryHistory()
+templates = TemplatePrecomputer(agent, registry, admission, cache)
 
 
 class ChatRequest(BaseModel):
     """Chat request model"""
     query: str = Field(..., description="Natural language query", min_length=1)
-    database_type: str = Field(..., description="Database type (postgresql, mysql, mssql, sqlite, mongodb)")
-    connection_params: Dict[str, Any] = Field(..., description="Database connection parameters")
+    database_type: Optional[str] = Field(
+        default=None,
+        description="Database type (postgresql, mysql, mssql, sqlite, mongodb); not needed with connection_id"
+    )
+    connection_params: Dict[str, Any] = Field(default_factory=dict, description="Database connection parameters")
+    connection_id: Optional[str] = Field(
+        default=None,
+        description="Saved connection to query instead of sending database_type and connection_params"
+    )
     use_cache: bool = Field(default=True, description="Whether to use cached results")
+    session_id: Optional[str] = Field(
+        default=None,
+        description="Conversation session id; follow-ups are answered from this session's previous results"
+    )
+    approximate: bool = Field(
+        default=False,
+        description="Run on a sample of the base table and scale aggregates (for very large tables)"
+    )
+    sample_percent: float = Field(
+        default=settings.APPROXIMATE_SAMPLE_PERCENT,
+        description="Percentage of the base table to sample in approximate mode",
+        gt=0,
+        le=100
+    )
     
     class Config:
         json_schema_extra = {
@@ -43,6 +88,41 @@ class ChatRequest(BaseModel):
         }
 
 
+class FederatedTarget(BaseModel):
+    """One connection in a federated query"""
+    name: str = Field(..., description="Label for this target, e.g. shard or region name")
+    database_type: str = Field(..., description="Database type")
+    connection_params: Dict[str, Any] = Field(..., description="Database connection parameters")
+
+
+class FederatedChatRequest(BaseModel):
+    """Federated chat request model"""
+    query: str = Field(..., description="Natural language query", min_length=1)
+    targets: List[FederatedTarget] = Field(..., description="Connections to query", min_length=1)
+    timeout: Optional[int] = Field(default=None, description="Per-target timeout in seconds", ge=1)
+    use_cache: bool = Field(default=True, description="Whether to use cached results")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "query": "What is the total revenue by product category?",
+                "targets": [
+                    {
+                        "name": "eu-west",
+                        "database_type": "postgresql",
+                        "connection_params": {"host": "eu.db.internal", "port": 5432, "database": "sales"}
+                    },
+                    {
+                        "name": "us-east",
+                        "database_type": "postgresql",
+                        "connection_params": {"host": "us.db.internal", "port": 5432, "database": "sales"}
+                    }
+                ],
+                "timeout": 60
+            }
+        }
+
+
 class ChatResponse(BaseModel):
     """Chat response model"""
     query: str
@@ -55,9 +135,141 @@ class ChatResponse(BaseModel):
     cached: bool = False
 
 
+class JobResponse(BaseModel):
+    """Background job status model"""
+    job_id: str
+    status: str
+    description: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    queue_time: Optional[float] = None
+    result: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+
+def _chat_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the chat response from an agent result
+    
+    Returned as a plain dictionary in the ChatResponse shape: result rows are
+    serialized directly by ORJSONResponse instead of being validated and
+    copied by Pydantic.
+    """
+    return {
+        "query": result["query"],
+        "intent": result.get("intent"),
+        "sql_query": result.get("sql_query"),
+        "results": result.get("results", []),
+        "insights": result.get("insights", {}),
+        "visualizations": result.get("visualizations", []),
+        "metadata": result.get("metadata", {}),
+        "cached": False
+    }
+
+
+def _job_response(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job fields exposed by JobResponse"""
+    return {field: job.get(field) for field in JobResponse.model_fields}
+
+
+async def resolve_connection(
+    database_type: Optional[str],
+    connection_params: Dict[str, Any],
+    connection_id: Optional[str],
+    user: User
+) -> Tuple[str, Dict[str, Any]]:
+    """Database type and parameters of a request, looking up saved connections"""
+    if connection_id:
+        try:
+            return await registry.resolve(connection_id, user.id)
+        except ConnectionNotFound:
+            raise HTTPException(status_code=404, detail="Connection not found")
+        except ValueError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    if not database_type:
+        raise HTTPException(status_code=400, detail="Provide connection_id, or database_type and connection_params")
+    return database_type, connection_params
+
+
+async def _resolve_request(request: ChatRequest, user: User):
+    """Fill in the database type and parameters of a saved connection"""
+    request.database_type, request.connection_params = await resolve_connection(
+        request.database_type,
+        request.connection_params,
+        request.connection_id,
+        user
+    )
+
+
+def _record_query(response: Dict[str, Any], request: ChatRequest, user: User) -> Dict[str, Any]:
+    """
+    Add the query to the user's history and its ID to the response metadata
+    
+    Cached responses are shared between users, so every response gets the
+    ID of a history entry owned by the requesting user.
+    """
+    query_id = history.record(
+        user.id,
+        response,
+        request.database_type,
+        request.connection_params,
+        request.connection_id
+    )
+    response["metadata"] = {**(response.get("metadata") or {}), "query_id": query_id}
+    return response
+
+
+async def _precomputed(request: ChatRequest, user: User) -> Optional[Dict[str, Any]]:
+    """Precomputed answer to a template question on a saved connection"""
+    if not request.connection_id or not request.use_cache or request.approximate:
+        return None
+    return await templates.lookup(request.connection_id, request.query, user.id)
+
+
+def _is_template_answer(request: ChatRequest, response: Dict[str, Any]) -> bool:
+    """
+    Whether a live answer can be stored as the connection's template answer
+    
+    Only exact answers from the database qualify; answers from a session's
+    follow-up workspace depend on that conversation's earlier results.
+    """
+    data_source = (response.get("metadata") or {}).get("data_source")
+    return bool(request.connection_id) and not request.approximate and data_source == "database"
+
+
+def _chat_cache_key(request: ChatRequest) -> str:
+    """
+    Cache key for a chat request; saved connections are keyed by ID and
+    version, not credentials, so changing a connection retires its results
+    """
+    if request.connection_id:
+        connection = [request.connection_id, request.connection_params.get("connection_version")]
+    else:
+        connection = request.connection_params
+    return cache.generate_key(
+        request.query,
+        request.database_type,
+        connection,
+        request.session_id,
+        request.sample_percent if request.approximate else None
+    )
+
+
+def _too_many_requests(detail: str, retry_after: int) -> HTTPException:
+    """429 response telling the client when to retry"""
+    return HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(retry_after)}
+    )
+
+
 @router.post("/query", response_model=ChatResponse)
 async def process_natural_language_query(
     request: ChatRequest,
+    http_request: Request,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user)
 ):
@@ -70,51 +282,92 @@ async def process_natural_language_query(
     3. Executes query on specified database
     4. Analyzes results
     5. Generates insights and visualizations
+    
+    If the client disconnects, the agent stops and the running database
+    query is cancelled server-side. Expired results of time-series queries
+    are refreshed from their watermark instead of being recomputed.
     """
     logger.info(f"Processing query from user {current_user.id}: {request.query}")
     
+    cancel_token = CancellationToken()
+    disconnect_watcher = None
+    
     try:
+        await _resolve_request(request, current_user)
+        
+        precomputed = await _precomputed(request, current_user)
+        if precomputed is not None:
+            logger.info("Returning precomputed template result")
+            return ORJSONResponse(_record_query(precomputed, request, current_user))
+        
         # Check cache first
-        cache_key = cache.generate_key(
-            request.query,
-            request.database_type,
-            request.connection_params
-        )
+        cache_key = _chat_cache_key(request)
         
         if request.use_cache:
             cached_result = await cache.get(cache_key)
             if cached_result:
                 logger.info("Returning cached result")
                 cached_result["cached"] = True
-                return cached_result
+                return ORJSONResponse(_record_query(cached_result, request, current_user))
         
-        # Run the agentic workflow
-        result = await agent.run(
-            user_query=request.query,
-            database_type=request.database_type,
-            connection_params=request.connection_params
-        )
+        # Run the agentic workflow, cancelling it if the client goes away
+        disconnect_watcher = asyncio.create_task(watch_disconnect(http_request, cancel_token))
+        async with admission.slot(current_user.id):
+            refreshed = None
+            if request.use_cache:
+                refreshed = await refresher.refresh(
+                    cache_key,
+                    request.database_type,
+                    request.connection_params,
+                    cancel_token
+                )
+            if refreshed is None:
+                result = await agent.run(
+                    user_query=request.query,
+                    database_type=request.database_type,
+                    connection_params=request.connection_params,
+                    session_id=request.session_id,
+                    sample_percent=request.sample_percent if request.approximate else None,
+                    cancel_token=cancel_token,
+                    user_id=current_user.id,
+                    connection_id=request.connection_id
+                )
+        
+        if cancel_token.is_cancelled:
+            logger.info(f"Query from user {current_user.id} cancelled: {cancel_token.reason}")
+            raise HTTPException(status_code=499, detail="Client closed request")
+        
+        if refreshed is not None:
+            logger.info("Returning incrementally refreshed result")
+            background_tasks.add_task(cache.set, cache_key, refreshed)
+            return ORJSONResponse(_record_query(refreshed, request, current_user))
         
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
         
-        response = ChatResponse(
-            query=result["query"],
-            intent=result.get("intent"),
-            sql_query=result.get("sql_query"),
-            results=result.get("results", []),
-            insights=result.get("insights", {}),
-            visualizations=result.get("visualizations", []),
-            metadata=result.get("metadata", {}),
-            cached=False
-        )
+        response = _chat_response(result)
         
         # Cache the result
         if request.use_cache:
             background_tasks.add_task(
                 cache.set,
                 cache_key,
-                response.dict()
+                response
+            )
+            background_tasks.add_task(
+                refresher.save,
+                cache_key,
+                response,
+                request.database_type,
+                request.connection_params
+            )
+        if _is_template_answer(request, response):
+            background_tasks.add_task(
+                templates.save,
+                request.connection_id,
+                request.query,
+                response,
+                current_user.id
             )
         
         # Log query history
@@ -126,14 +379,220 @@ async def process_natural_language_query(
         )
         
         logger.info("Query processed successfully")
-        return response
+        return ORJSONResponse(_record_query(response, request, current_user))
         
+    except AdmissionRejected as e:
+        logger.warning(f"Query from user {current_user.id} rejected: {str(e)}")
+        raise _too_many_requests(str(e), e.retry_after)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to process query: {str(e)}"
         )
+    finally:
+        if disconnect_watcher is not None:
+            disconnect_watcher.cancel()
+
+
+@router.post("/federated", response_model=ChatResponse)
+async def process_federated_query(
+    request: FederatedChatRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Process a natural language query across several connections
+    
+    The SQL is generated once, executed on every target concurrently with a
+    per-target timeout, and the partial results are merged locally. Wall
+    time is bounded by the slowest target rather than the sum.
+    """
+    logger.info(
+        f"Processing federated query from user {current_user.id} "
+        f"over {len(request.targets)} targets: {request.query}"
+    )
+    
+    if len(request.targets) > settings.FEDERATED_MAX_TARGETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.FEDERATED_MAX_TARGETS} targets are supported"
+        )
+    
+    unsupported = {
+        target.database_type for target in request.targets
+        if target.database_type in ("mongodb", "cassandra", "dynamodb")
+    }
+    if unsupported:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Federated queries are not supported for: {', '.join(sorted(unsupported))}"
+        )
+    
+    targets = [target.model_dump() for target in request.targets]
+    
+    try:
+        cache_key = cache.generate_key("federated", request.query, targets)
+        
+        if request.use_cache:
+            cached_result = await cache.get(cache_key)
+            if cached_result:
+                logger.info("Returning cached federated result")
+                cached_result["cached"] = True
+                return ORJSONResponse(cached_result)
+        
+        async with admission.slot(current_user.id):
+            result = await agent.run_federated(
+                user_query=request.query,
+                targets=targets,
+                timeout=request.timeout
+            )
+        
+        if "error" in result:
+            raise HTTPException(status_code=400, detail=result["error"])
+        
+        response = _chat_response(result)
+        
+        if request.use_cache:
+            background_tasks.add_task(
+                cache.set,
+                cache_key,
+                response
+            )
+        
+        logger.info("Federated query processed successfully")
+        return ORJSONResponse(response)
+        
+    except AdmissionRejected as e:
+        logger.warning(f"Federated query from user {current_user.id} rejected: {str(e)}")
+        raise _too_many_requests(str(e), e.retry_after)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing federated query: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to process federated query: {str(e)}"
+        )
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_query_job(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue a natural language query as a background job
+    
+    Poll GET /chat/jobs/{job_id} for the result, or follow status and
+    per-step progress over the WebSocket (topics user:{user_id} and
+    job:{job_id}). Jobs run on a worker pool under the same fair-share
+    limits as interactive queries.
+    """
+    logger.info(f"Queueing job for user {current_user.id}: {request.query}")
+    await _resolve_request(request, current_user)
+    cache_key = _chat_cache_key(request)
+    
+    async def run_job(cancel_token: CancellationToken, progress: ProgressCallback) -> Dict[str, Any]:
+        precomputed = await _precomputed(request, current_user)
+        if precomputed is not None:
+            return _record_query(precomputed, request, current_user)
+        
+        if request.use_cache:
+            cached_result = await cache.get(cache_key)
+            if cached_result:
+                cached_result["cached"] = True
+                return _record_query(cached_result, request, current_user)
+            
+            refreshed = await refresher.refresh(
+                cache_key,
+                request.database_type,
+                request.connection_params,
+                cancel_token
+            )
+            if refreshed is not None:
+                await cache.set(cache_key, refreshed)
+                return _record_query(refreshed, request, current_user)
+        
+        result = await agent.run(
+            user_query=request.query,
+            database_type=request.database_type,
+            connection_params=request.connection_params,
+            session_id=request.session_id,
+            sample_percent=request.sample_percent if request.approximate else None,
+            cancel_token=cancel_token,
+            progress=progress,
+            user_id=current_user.id,
+            connection_id=request.connection_id
+        )
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        
+        response = _chat_response(result)
+        if request.use_cache:
+            await cache.set(cache_key, response)
+            await refresher.save(cache_key, response, request.database_type, request.connection_params)
+        if _is_template_answer(request, response):
+            await templates.save(request.connection_id, request.query, response, current_user.id)
+        await log_query_history(current_user.id, request.query, result)
+        return _record_query(response, request, current_user)
+    
+    try:
+        job = await job_queue.submit(current_user.id, run_job, request.query)
+    except JobQueueFull as e:
+        raise _too_many_requests(str(e), admission.retry_after())
+    
+    return JobResponse(**job)
+
+
+def _get_user_job(job_id: str, user: User) -> Dict[str, Any]:
+    """Look up a job owned by the user"""
+    job = job_queue.get(job_id)
+    if job is None or job["user_id"] != user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_query_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the status and, once completed, the result of a job"""
+    return ORJSONResponse(_job_response(_get_user_job(job_id, current_user)))
+
+
+@router.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_query_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel a queued or running job"""
+    job = _get_user_job(job_id, current_user)
+    if not job_queue.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job is already {job['status']}")
+    return JobResponse(**job)
+
+
+@router.get("/admission/stats")
+async def get_admission_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Concurrency, queue-time and job metrics"""
+    return {
+        "admission": admission.stats(),
+        "jobs": job_queue.stats()
+    }
+
+
+@router.get("/llm/stats")
+async def get_llm_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """LLM call, cache, retry, token and latency metrics"""
+    return agent.llm.stats()
 
 
 @router.post("/streaming")
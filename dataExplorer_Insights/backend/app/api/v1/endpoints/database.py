@@ -4,10 +4,13 @@ Database API endpoints
 
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
 
+from app.core.serialization import ORJSONResponse
 from app.services.database_manager import DatabaseManager
+from app.services.connection_registry import ConnectionNotFound
+from app.api.v1.endpoints.chat import registry, resolve_connection
 from app.api.deps import get_current_user
 from app.models.user import User
 
@@ -19,36 +22,139 @@ db_manager = DatabaseManager()
 
 class ConnectionTestRequest(BaseModel):
     """Database connection test request"""
-    database_type: str = Field(..., description="Database type")
-    connection_params: Dict[str, Any] = Field(..., description="Connection parameters")
+    database_type: Optional[str] = Field(default=None, description="Database type")
+    connection_params: Dict[str, Any] = Field(default_factory=dict, description="Connection parameters")
+    connection_id: Optional[str] = Field(default=None, description="Saved connection")
 
 
 class SchemaRequest(BaseModel):
     """Schema fetch request"""
-    database_type: str
-    connection_params: Dict[str, Any]
+    database_type: Optional[str] = None
+    connection_params: Dict[str, Any] = Field(default_factory=dict)
+    connection_id: Optional[str] = None
 
 
 class TableSampleRequest(BaseModel):
     """Table sample data request"""
-    database_type: str
-    connection_params: Dict[str, Any]
+    database_type: Optional[str] = None
+    connection_params: Dict[str, Any] = Field(default_factory=dict)
+    connection_id: Optional[str] = None
     table_name: str
     limit: int = Field(default=10, ge=1, le=100)
 
 
+class ConnectionCreateRequest(BaseModel):
+    """Saved connection registration request"""
+    name: str = Field(..., min_length=1, max_length=100)
+    database_type: str = Field(..., description="Database type")
+    connection_params: Dict[str, Any] = Field(..., description="Connection parameters, stored encrypted")
+    shared: bool = Field(default=False, description="Let every user query this connection")
+
+
+class ConnectionUpdateRequest(BaseModel):
+    """Saved connection update request"""
+    name: Optional[str] = Field(default=None, min_length=1, max_length=100)
+    connection_params: Optional[Dict[str, Any]] = None
+    shared: Optional[bool] = None
+
+
+@router.post("/connections", status_code=201)
+async def create_connection(
+    request: ConnectionCreateRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Save a connection
+    
+    The connection is tested once and its parameters are stored encrypted.
+    Its connection pool, schema cache and column profile are warmed in the
+    background; pass the returned connection_id instead of
+    connection_params in later requests.
+    """
+    logger.info(f"Registering {request.database_type} connection for user {current_user.id}")
+    
+    try:
+        return await registry.register(
+            current_user.id,
+            request.name,
+            request.database_type,
+            request.connection_params,
+            request.shared
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/connections")
+async def list_connections(
+    current_user: User = Depends(get_current_user)
+):
+    """List saved connections owned by or shared with the user"""
+    return {
+        "connections": [registry.public(record) for record in await registry.list(current_user.id)]
+    }
+
+
+@router.get("/connections/{connection_id}")
+async def get_connection(
+    connection_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get a saved connection, without credentials"""
+    try:
+        return registry.public(await registry.get(connection_id, current_user.id))
+    except ConnectionNotFound:
+        raise HTTPException(status_code=404, detail="Connection not found")
+
+
+@router.patch("/connections/{connection_id}")
+async def update_connection(
+    connection_id: str,
+    request: ConnectionUpdateRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Rename, share or change the parameters of a saved connection"""
+    try:
+        return await registry.update(
+            connection_id,
+            current_user.id,
+            name=request.name,
+            connection_params=request.connection_params,
+            shared=request.shared
+        )
+    except ConnectionNotFound:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.delete("/connections/{connection_id}", status_code=204)
+async def delete_connection(
+    connection_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Delete a saved connection and close its pool"""
+    try:
+        await registry.delete(connection_id, current_user.id)
+    except ConnectionNotFound:
+        raise HTTPException(status_code=404, detail="Connection not found")
+
+
 @router.post("/test-connection")
 async def test_connection(
     request: ConnectionTestRequest,
     current_user: User = Depends(get_current_user)
 ):
     """Test database connection"""
-    logger.info(f"Testing connection to {request.database_type}")
-    
-    result = await db_manager.test_connection(
+    database_type, connection_params = await resolve_connection(
         request.database_type,
-        request.connection_params
+        request.connection_params,
+        request.connection_id,
+        current_user
     )
+    logger.info(f"Testing connection to {database_type}")
+    
+    result = await db_manager.test_connection(database_type, connection_params)
     
     if result["status"] == "error":
         raise HTTPException(status_code=400, detail=result["message"])
@@ -62,16 +168,23 @@ async def get_schema(
     current_user: User = Depends(get_current_user)
 ):
     """Get database schema"""
-    logger.info(f"Fetching schema for {request.database_type}")
+    database_type, connection_params = await resolve_connection(
+        request.database_type,
+        request.connection_params,
+        request.connection_id,
+        current_user
+    )
+    logger.info(f"Fetching schema for {database_type}")
     
     try:
-        schema = await db_manager.get_schema(
-            request.database_type,
-            request.connection_params
-        )
+        # Saved connections are served from the schema cache
+        if request.connection_id:
+            schema = await registry.schema_cache.get_schema(database_type, connection_params)
+        else:
+            schema = await db_manager.get_schema(database_type, connection_params)
         
         return {
-            "database_type": request.database_type,
+            "database_type": database_type,
             "schema": schema
         }
     except Exception as e:
@@ -85,21 +198,27 @@ async def get_sample_data(
     current_user: User = Depends(get_current_user)
 ):
     """Get sample data from a table"""
+    database_type, connection_params = await resolve_connection(
+        request.database_type,
+        request.connection_params,
+        request.connection_id,
+        current_user
+    )
     logger.info(f"Fetching sample data from {request.table_name}")
     
     try:
         data = await db_manager.get_sample_data(
-            request.database_type,
-            request.connection_params,
+            database_type,
+            connection_params,
             request.table_name,
             request.limit
         )
         
-        return {
+        return ORJSONResponse({
             "table_name": request.table_name,
             "row_count": len(data),
             "data": data
-        }
+        })
     except Exception as e:
         logger.error(f"Error fetching sample data: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -2,57 +2,70 @@
 Insights endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
 
 from app.api.deps import get_current_user
+from app.api.v1.endpoints.chat import registry, templates
 from app.models.user import User
+from app.services.connection_registry import ConnectionNotFound
+from app.services.template_precomputer import INSIGHT_TEMPLATES
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 @router.get("/templates")
-async def get_insight_templates(current_user: User = Depends(get_current_user)):
-    """Get predefined insight templates"""
+async def get_insight_templates(
+    connection_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get predefined insight templates
+    
+    With a saved connection_id, each template also lists when its answers
+    were precomputed for that connection and whether they are stale.
+    """
+    if connection_id is None:
+        return {"templates": INSIGHT_TEMPLATES}
+    
+    try:
+        status = await templates.status(connection_id, current_user.id)
+    except ConnectionNotFound:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    
     return {
         "templates": [
-            {
-                "id": "revenue_analysis",
-                "name": "Revenue Analysis",
-                "description": "Analyze revenue trends and patterns",
-                "queries": [
-                    "What is the total revenue by month?",
-                    "Which products generate the most revenue?",
-                    "Show revenue growth rate over time"
-                ]
-            },
-            {
-                "id": "customer_analysis",
-                "name": "Customer Analysis",
-                "description": "Understand customer behavior and segments",
-                "queries": [
-                    "Who are the top 10 customers by revenue?",
-                    "What is the customer retention rate?",
-                    "Show customer acquisition trends"
-                ]
-            },
-            {
-                "id": "performance_metrics",
-                "name": "Performance Metrics",
-                "description": "Key performance indicators and metrics",
-                "queries": [
-                    "What are the key performance metrics?",
-                    "Show conversion rates over time",
-                    "Compare performance across regions"
-                ]
-            }
+            {**template, "precomputed": {query: status[query] for query in template["queries"]}}
+            for template in INSIGHT_TEMPLATES
         ]
     }
 
 
+@router.post("/templates/precompute", status_code=202)
+async def precompute_insight_templates(
+    connection_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """Recompute the template answers for a saved connection now, outside the off-peak window"""
+    try:
+        await registry.get(connection_id, current_user.id)
+    except ConnectionNotFound:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    
+    background_tasks.add_task(templates.precompute, [connection_id], True)
+    return {"message": "Template precomputation started", "connection_id": connection_id}
+
+
+@router.get("/templates/stats")
+async def get_template_stats(current_user: User = Depends(get_current_user)):
+    """Precomputed template answers served, computed and failed"""
+    return templates.stats()
+
+
 @router.get("/sample-queries")
 async def get_sample_queries():
     """Get sample natural language queries"""
@@ -2,14 +2,22 @@
 Query history endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 import logging
 
+import pandas as pd
+
 from app.api.deps import get_current_user
+from app.api.v1.endpoints.chat import agent, history, resolve_connection
 from app.models.user import User
+from app.core.config import settings
+from app.services.database_manager import NON_STREAMING_DATABASES
+from app.services.query_cancellation import CancellationToken
+from app.services.result_export import validate_export, content_type, export_batches
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -67,3 +75,97 @@ async def delete_query(
     
     # TODO: Delete from database
     return {"message": "Query deleted successfully"}
+
+
+@router.get("/{query_id}/export")
+async def export_query_results(
+    query_id: str,
+    export_format: str = Query("csv", alias="format", description="csv, parquet or arrow"),
+    compression: Optional[str] = Query(None, description="gzip or zstd"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream the full result of a query as a file
+    
+    The query's SQL is re-executed with a server-side cursor and written
+    out batch by batch, so memory stays constant however many rows are
+    exported. The ID is the query_id in the chat response metadata.
+    
+    MongoDB, BigQuery, Cassandra and DynamoDB cannot stream and export
+    at most MAX_RESULT_ROWS rows; their responses carry an
+    X-Export-Truncated header that is "true" when that cap was reached.
+    """
+    entry = history.get(query_id, current_user.id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Query not found, run it again to export its results")
+    if not entry["sql_query"] or entry["data_source"] != "database":
+        raise HTTPException(status_code=400, detail="Only results queried from a database can be exported")
+    
+    try:
+        validate_export(export_format, compression)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    database_type, connection_params = await resolve_connection(
+        entry["database_type"],
+        entry["connection_params"] or {},
+        entry["connection_id"],
+        current_user
+    )
+    
+    logger.info(f"Exporting query {query_id} as {export_format} for user {current_user.id}")
+    
+    media_type, extension = content_type(export_format, compression)
+    headers = {
+        "Content-Disposition": f'attachment; filename="query-{query_id}.{extension}"',
+        # The file is already encoded as requested, keep GZipMiddleware out
+        "Content-Encoding": "identity"
+    }
+    cancel_token = CancellationToken()
+    
+    if database_type in NON_STREAMING_DATABASES:
+        # The capped result is fetched before responding, so a cut-off
+        # file can be flagged in the headers
+        try:
+            rows = await agent.db_manager.execute_query(
+                entry["sql_query"],
+                database_type,
+                connection_params,
+                timeout=settings.EXPORT_QUERY_TIMEOUT,
+                cancel_token=cancel_token
+            )
+        except Exception as e:
+            logger.error(f"Error exporting query {query_id}: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+        
+        truncated = len(rows) >= settings.MAX_RESULT_ROWS
+        if truncated:
+            logger.warning(f"Export of query {query_id} truncated at {settings.MAX_RESULT_ROWS} rows")
+        headers["X-Export-Truncated"] = "true" if truncated else "false"
+        
+        async def fetched():
+            if rows:
+                yield pd.DataFrame(rows)
+        
+        batches = fetched()
+    else:
+        batches = agent.db_manager.stream_query(
+            entry["sql_query"],
+            database_type,
+            connection_params,
+            batch_size=settings.EXPORT_BATCH_ROWS,
+            max_rows=settings.EXPORT_MAX_ROWS,
+            timeout=settings.EXPORT_QUERY_TIMEOUT,
+            cancel_token=cancel_token
+        )
+    
+    async def stream():
+        try:
+            async for chunk in export_batches(batches, export_format, compression):
+                yield chunk
+        finally:
+            # Stops the database query if the client went away or the export failed
+            cancel_token.cancel("export stopped")
+            await batches.aclose()
+    
+    return StreamingResponse(stream(), media_type=media_type, headers=headers)
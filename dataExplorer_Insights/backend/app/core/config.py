@@ -3,7 +3,7 @@ Application configuration using Pydantic settings
 """
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 import secrets
 
@@ -42,6 +42,21 @@ class Settings(BaseSettings):
     ANTHROPIC_API_KEY: Optional[str] = None
     ANTHROPIC_MODEL: str = "claude-3-opus-20240229"
     
+    # LLM Gateway
+    LLM_BACKEND: str = "auto"  # auto, openai, anthropic or fake (offline load testing)
+    ENABLE_LLM_CACHE: bool = True
+    LLM_CACHE_TTL: int = 86400
+    LLM_CACHE_MAX_ENTRIES: int = 1000  # in-memory responses per gateway
+    LLM_MAX_CONCURRENCY: int = 8  # concurrent calls per provider
+    LLM_MAX_CONCURRENCY_BY_PROVIDER: Dict[str, int] = {}
+    LLM_MAX_RETRIES: int = 4
+    LLM_RETRY_BASE_DELAY: float = 1.0  # seconds, doubled per retry with full jitter
+    LLM_RETRY_MAX_DELAY: float = 20.0
+    LLM_FAKE_LATENCY_MS: float = 800.0
+    LLM_FAKE_RATE_LIMIT_RATE: float = 0.0  # fraction of fake calls failing with 429
+    LLM_FAKE_SQL: str = "SELECT * FROM {table} LIMIT 100"
+    LLM_FAKE_SEED: Optional[int] = None  # fixed seed for reproducible latency and failures
+    
     # Database Configuration
     # PostgreSQL
     POSTGRES_HOST: Optional[str] = None
@@ -67,6 +82,9 @@ class Settings(BaseSettings):
     # MongoDB
     MONGODB_URI: Optional[str] = None
     MONGODB_DB: Optional[str] = None
+    MONGODB_BOUNDED_EXECUTION: bool = True  # safety $limit, batchSize, allowDiskUse and maxTimeMS
+    MONGODB_BATCH_SIZE: int = 1000
+    MONGODB_ALLOW_DISK_USE: bool = True
     
     # Redis Configuration
     REDIS_HOST: str = "localhost"
@@ -89,6 +107,122 @@ class Settings(BaseSettings):
     MAX_RESULT_ROWS: int = 10000
     ENABLE_QUERY_CACHING: bool = True
     
+    # Follow-up Workspace (local drill-down over previous results)
+    ENABLE_FOLLOWUP_WORKSPACE: bool = True
+    WORKSPACE_MAX_RESULTS: int = 5  # result sets kept per session
+    WORKSPACE_MAX_SESSIONS: int = 200
+    WORKSPACE_MEMORY_LIMIT: str = "512MB"  # spill to disk beyond this
+    WORKSPACE_DIR: str = "/tmp/datainsights_workspace"
+    
+    # Federated Queries (fan-out across connections)
+    FEDERATED_MAX_TARGETS: int = 16
+    FEDERATED_TARGET_TIMEOUT: int = 60  # seconds per target
+    
+    # Approximate Analytics (table sampling)
+    APPROXIMATE_SAMPLE_PERCENT: float = 1.0
+    APPROXIMATE_CONFIDENCE_LEVEL: float = 0.95
+    MAX_CONFIDENCE_INTERVAL_ROWS: int = 100
+    
+    # Chart Data Preparation
+    CHART_MAX_POINTS: int = 500  # per series
+    CHART_HISTOGRAM_BINS: int = 30
+    CHART_MAX_CATEGORIES: int = 20
+    
+    # Admission Control (agent run concurrency)
+    ADMISSION_MAX_CONCURRENT: int = 8  # agent runs across all users
+    ADMISSION_MAX_PER_USER: int = 2
+    ADMISSION_MAX_QUEUE: int = 50
+    ADMISSION_QUEUE_TIMEOUT: int = 30  # seconds queued before a 429
+    ADMISSION_USER_WEIGHTS: Dict[str, float] = {}  # fair-share weight by user id, default 1.0
+    
+    # Background Jobs
+    JOB_WORKERS: int = 4
+    JOB_MAX_PENDING: int = 100
+    JOB_MAX_PENDING_PER_USER: int = 10
+    JOB_RESULT_TTL: int = 3600  # seconds finished jobs are kept
+    
+    # Prompt Schema Encoding
+    SCHEMA_FORMAT: str = "compact"  # verbose or compact
+    SCHEMA_FORMAT_BY_MODEL: Dict[str, str] = {}  # model name prefix -> format
+    SCHEMA_CACHE_TTL: int = 600  # seconds
+    
+    # Column Profiling (background statistics per connection)
+    ENABLE_COLUMN_PROFILING: bool = True
+    PROFILE_SAMPLE_ROWS: int = 10000  # rows sampled per table
+    PROFILE_MAX_TABLES: int = 50
+    PROFILE_TOP_K: int = 10
+    PROFILE_HLL_PRECISION: int = 12  # 4096 registers, ~1.6% error
+    PROFILE_QUERY_TIMEOUT: int = 30  # seconds per profiling query
+    PROFILE_REFRESH_INTERVAL: int = 3600  # seconds before a table is re-checked
+    PROFILE_CHECK_INTERVAL: int = 60  # seconds between refresh attempts
+    PROFILE_CACHE_TTL: int = 604800  # 7 days
+    PROFILE_HINT_MAX_DISTINCT: int = 25  # list values for text columns up to this
+    PROFILE_MAX_HINTS: int = 60  # hint lines added to prompts
+    
+    # Incremental Refresh
+    ENABLE_INCREMENTAL_REFRESH: bool = True
+    INCREMENTAL_RETENTION_TTL: int = 604800  # keep refreshable results for 7 days
+    
+    # Streaming Analysis
+    ENABLE_STREAMING_ANALYSIS: bool = True  # full-result statistics when results hit MAX_RESULT_ROWS
+    STREAM_BATCH_ROWS: int = 50000
+    STREAM_MAX_ROWS: int = 10000000
+    STREAM_ANALYSIS_WORKERS: int = 4
+    
+    # Insight Prompts
+    INSIGHT_PROMPT_TOKEN_BUDGET: int = 1500  # tokens for the analysis summary
+    INSIGHT_PROMPT_SAMPLE_ROWS: int = 5
+    
+    # WebSockets
+    WS_SEND_QUEUE_SIZE: int = 256  # messages buffered per connection
+    WS_SLOW_CLIENT_POLICY: str = "drop_oldest"  # drop_oldest or close
+    WS_SEND_TIMEOUT: float = 10.0
+    WS_HEARTBEAT_INTERVAL: int = 20
+    WS_HEARTBEAT_TIMEOUT: int = 60  # silence before a connection is pruned
+    
+    # Saved Connections
+    CONNECTION_ENCRYPTION_KEY: str = ""  # Fernet key; derived from SECRET_KEY when empty
+    CONNECTION_REGISTRY_TTL: int = 7776000  # 90 days in Redis, renewed on update
+    CONNECTION_POOL_SIZE: int = 5
+    CONNECTION_POOL_MAX_OVERFLOW: int = 10
+    CONNECTION_POOL_RECYCLE: int = 1800  # seconds
+    CONNECTION_WARM_CONNECTIONS: int = 2  # pooled connections opened on registration
+    
+    # Result Export
+    QUERY_HISTORY_SIZE: int = 1000  # recent queries kept per worker for export
+    EXPORT_BATCH_ROWS: int = 50000
+    EXPORT_MAX_ROWS: int = 50000000
+    EXPORT_QUERY_TIMEOUT: int = 3600  # seconds
+    EXPORT_GZIP_LEVEL: int = 6
+    EXPORT_ZSTD_LEVEL: int = 3
+    
+    # Template Precomputation
+    ENABLE_TEMPLATE_PRECOMPUTE: bool = True
+    TEMPLATE_PRECOMPUTE_HOURS: str = "1-5"  # off-peak UTC hours, start-end inclusive
+    TEMPLATE_PRECOMPUTE_CHECK_INTERVAL: int = 600  # seconds between scheduler checks
+    TEMPLATE_PRECOMPUTE_MAX_ACTIVE: int = 2  # pause while more queries are running
+    TEMPLATE_REFRESH_INTERVAL: int = 86400  # recompute results older than this
+    TEMPLATE_STALE_AFTER: int = 172800  # results older than this are flagged stale
+    TEMPLATE_RESULT_TTL: int = 604800  # 7 days in Redis
+    
+    # Time Series Analysis
+    TIME_SERIES_MIN_POINTS: int = 8
+    TIME_SERIES_MAX_POINTS: int = 1000000  # periods after resampling; coarser frequencies beyond
+    TIME_SERIES_MAX_SERIES: int = 10  # (time, value) column pairs analyzed per result
+    TIME_SERIES_SIGNIFICANCE: float = 0.05  # p-value for a significant trend
+    TIME_SERIES_ANOMALY_WINDOW: int = 30  # periods in the rolling z-score window
+    TIME_SERIES_ANOMALY_Z: float = 3.0
+    TIME_SERIES_MAX_ANOMALIES: int = 10  # anomalies listed per series
+    TIME_SERIES_MAX_CHANGE_POINTS: int = 3
+    
+    # Authentication Cache
+    USER_CACHE_TTL: int = 60  # seconds a user record is served from memory
+    USER_CACHE_SIZE: int = 10000
+    AUTH_CLAIMS_CACHE_SIZE: int = 10000  # decoded tokens kept in memory
+    TOKEN_REVOCATION_SYNC_INTERVAL: int = 30  # seconds between revocation filter syncs
+    TOKEN_REVOCATION_CAPACITY: int = 100000  # revocations the filter is sized for
+    TOKEN_REVOCATION_ERROR_RATE: float = 0.001  # filter false positives, checked in Redis
+    
     # AI Agent Configuration
     AGENT_MAX_ITERATIONS: int = 10
     AGENT_VERBOSE: bool = True
@@ -0,0 +1,181 @@
+"""
+JSON serialization for query results
+One coercion layer for driver and analysis types (Decimal, datetime,
+NumPy and pandas scalars, BSON ObjectId, bytes) used by API responses and
+the cache, with orjson for speed when it is installed.
+"""
+
+from typing import Any, Dict, Iterable, Iterator
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from uuid import UUID
+import base64
+import json
+import logging
+import math
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.warning("orjson not available, falling back to the standard json encoder")
+
+try:
+    from bson import ObjectId, Decimal128
+    BSON_AVAILABLE = True
+except ImportError:
+    BSON_AVAILABLE = False
+
+_ORJSON_OPTIONS = (
+    orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if ORJSON_AVAILABLE else 0
+)
+
+
+def _coerce_scalar(value: Any, keep_datetimes: bool = False) -> Any:
+    """Convert one non-native value to a JSON-friendly Python value"""
+    if isinstance(value, Decimal):
+        return float(value) if value.is_finite() else None
+    if isinstance(value, (np.integer, np.bool_)):
+        return value.item()
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else value.item()
+    if isinstance(value, float):
+        return None if math.isnan(value) or math.isinf(value) else value
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, np.datetime64):
+        value = pd.Timestamp(value).to_pydatetime()
+    if isinstance(value, (datetime, date, time)):
+        return value if keep_datetimes else value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, pd.Timedelta):
+        return value.total_seconds()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    if BSON_AVAILABLE and isinstance(value, ObjectId):
+        return str(value)
+    if BSON_AVAILABLE and isinstance(value, Decimal128):
+        return _coerce_scalar(value.to_decimal())
+    if isinstance(value, np.ndarray):
+        return [to_jsonable(item, keep_datetimes) for item in value.tolist()]
+    return value
+
+
+def to_jsonable(value: Any, keep_datetimes: bool = False) -> Any:
+    """
+    Recursively convert a value to JSON-compatible Python types
+    
+    Args:
+        value: Rows, dictionaries, lists or scalars from drivers and pandas
+        keep_datetimes: Leave datetime values as objects (for further
+            analysis) instead of ISO strings
+    
+    Returns:
+        The converted value
+    """
+    if isinstance(value, dict):
+        return {
+            key if isinstance(key, str) else str(_coerce_scalar(key)): to_jsonable(item, keep_datetimes)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [to_jsonable(item, keep_datetimes) for item in value]
+    if isinstance(value, (str, int, bool)) or value is None:
+        return value
+    if hasattr(value, "model_dump"):
+        return to_jsonable(value.model_dump(), keep_datetimes)
+    return _coerce_scalar(value, keep_datetimes)
+
+
+# Values returned as they are by jsonable_rows (floats are checked for NaN)
+_NATIVE_TYPES = frozenset((str, int, bool, type(None)))
+
+# Direct conversions for the driver types most rows hold
+_CONVERTERS = {Decimal: _coerce_scalar}
+if BSON_AVAILABLE:
+    _CONVERTERS[ObjectId] = str
+    _CONVERTERS[Decimal128] = lambda value: _coerce_scalar(value.to_decimal())
+
+
+def _convert_row(row: Dict[Any, Any], keep_datetimes: bool) -> Dict[str, Any]:
+    """Convert one row, dispatching on each value's exact type"""
+    converted = {}
+    for key, value in row.items():
+        if not isinstance(key, str):
+            key = str(_coerce_scalar(key))
+        kind = type(value)
+        if kind in _NATIVE_TYPES or (kind is datetime and keep_datetimes):
+            converted[key] = value
+        elif kind is float:
+            converted[key] = value if math.isfinite(value) else None
+        elif kind is dict:
+            converted[key] = _convert_row(value, keep_datetimes)
+        elif kind in _CONVERTERS:
+            converted[key] = _CONVERTERS[kind](value)
+        else:
+            converted[key] = to_jsonable(value, keep_datetimes)
+    return converted
+
+
+def jsonable_rows(rows: Iterable[Dict[str, Any]], keep_datetimes: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Convert result rows one at a time, as a cursor yields them
+    
+    Same conversion as to_jsonable, dispatching on exact value types so
+    native values and common driver types skip the isinstance chain.
+    
+    Args:
+        rows: Row dictionaries, e.g. a driver cursor
+        keep_datetimes: Leave datetime values as objects
+    
+    Yields:
+        Converted rows
+    """
+    for row in rows:
+        yield _convert_row(row, keep_datetimes)
+
+
+def _orjson_default(value: Any) -> Any:
+    """orjson hook for types it does not serialize natively"""
+    coerced = _coerce_scalar(value)
+    if coerced is not value:
+        return coerced
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    # Unknown driver types are rendered as text rather than failing the response
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize to JSON bytes; NaN and infinity become null"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=_orjson_default, option=_ORJSON_OPTIONS)
+    return json.dumps(to_jsonable(value), default=str, ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON bytes or text"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with the shared serializer"""
+    
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        """Serialize the response body"""
+        return dumps(content)
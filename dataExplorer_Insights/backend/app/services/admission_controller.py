@@ -0,0 +1,218 @@
+"""
+Admission Controller - Fair-share concurrency limits for agent runs
+Caps concurrent runs globally and per user, and orders queued requests
+with weighted fair queuing so one busy user cannot starve the others
+"""
+
+from typing import Dict, Any, Optional
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import math
+import time
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted"""
+    
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Waiter:
+    """A queued request"""
+    user_id: str
+    tag: float
+    enqueued_at: float
+    future: asyncio.Future = field(repr=False)
+
+
+class AdmissionController:
+    """Global and per-user concurrency caps with weighted fair queuing"""
+    
+    def __init__(
+        self,
+        max_concurrent: int = None,
+        max_per_user: int = None,
+        max_queue: int = None,
+        queue_timeout: float = None,
+        user_weights: Dict[str, float] = None
+    ):
+        """Initialize with limits from settings unless given"""
+        self.max_concurrent = max_concurrent or settings.ADMISSION_MAX_CONCURRENT
+        self.max_per_user = max_per_user or settings.ADMISSION_MAX_PER_USER
+        self.max_queue = max_queue or settings.ADMISSION_MAX_QUEUE
+        self.queue_timeout = queue_timeout or settings.ADMISSION_QUEUE_TIMEOUT
+        self.user_weights = user_weights if user_weights is not None else settings.ADMISSION_USER_WEIGHTS
+        
+        self._active: Dict[str, int] = defaultdict(int)
+        self._total_active = 0
+        self._queues: Dict[str, deque] = defaultdict(deque)
+        self._queued = 0
+        
+        # Virtual clock for fair queuing: each request finishes 1/weight
+        # after its user's previous request or the current virtual time
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+        
+        self._wait_times = deque(maxlen=1000)
+        self._service_times = deque(maxlen=1000)
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+    
+    def weight(self, user_id: str) -> float:
+        """Fair-share weight of a user"""
+        return max(float(self.user_weights.get(str(user_id), 1.0)), 0.01)
+    
+    def retry_after(self) -> int:
+        """Estimated seconds until a new request could be admitted"""
+        average = float(np.mean(self._service_times)) if self._service_times else 1.0
+        return max(1, math.ceil(average * (self._queued + 1) / self.max_concurrent))
+    
+    @asynccontextmanager
+    async def slot(self, user_id: Any, timeout: Optional[float] = -1):
+        """
+        Hold an execution slot for the duration of the block
+        
+        Args:
+            user_id: User the work runs for
+            timeout: Seconds to wait in the queue, None to wait indefinitely
+                (defaults to ADMISSION_QUEUE_TIMEOUT)
+        
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out
+        """
+        user_id = str(user_id)
+        await self.acquire(user_id, self.queue_timeout if timeout == -1 else timeout)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(user_id, time.monotonic() - start)
+    
+    async def acquire(self, user_id: str, timeout: Optional[float] = None) -> float:
+        """
+        Wait for an execution slot
+        
+        Args:
+            user_id: User the work runs for
+            timeout: Seconds to wait in the queue, None to wait indefinitely
+                (such waiters are never rejected for a full queue)
+        
+        Returns:
+            Seconds spent queued
+        """
+        if timeout is not None and self._queued >= self.max_queue:
+            self._rejected += 1
+            raise AdmissionRejected("Too many queued requests", self.retry_after())
+        
+        tag = max(self._virtual_time, self._last_finish.get(user_id, 0.0)) + 1.0 / self.weight(user_id)
+        self._last_finish[user_id] = tag
+        
+        waiter = _Waiter(
+            user_id=user_id,
+            tag=tag,
+            enqueued_at=time.monotonic(),
+            future=asyncio.get_running_loop().create_future()
+        )
+        self._queues[user_id].append(waiter)
+        self._queued += 1
+        self._dispatch()
+        
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                self._remove(waiter)
+                self._timed_out += 1
+                raise AdmissionRejected("Timed out waiting for an execution slot", self.retry_after())
+        except asyncio.CancelledError:
+            # Caller went away: give back the slot or leave the queue
+            if waiter.future.done():
+                self.release(user_id)
+            else:
+                self._remove(waiter)
+            raise
+        
+        wait = time.monotonic() - waiter.enqueued_at
+        if wait > 0.1:
+            logger.info(f"User {user_id} admitted after {wait:.2f}s in queue")
+        return wait
+    
+    def release(self, user_id: str, service_time: Optional[float] = None):
+        """Return a slot and admit the next queued request"""
+        self._active[user_id] -= 1
+        if self._active[user_id] <= 0:
+            del self._active[user_id]
+        self._total_active -= 1
+        
+        if service_time is not None:
+            self._service_times.append(service_time)
+        self._dispatch()
+    
+    def _remove(self, waiter: _Waiter):
+        """Drop a waiter that gave up"""
+        queue = self._queues.get(waiter.user_id)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._queues[waiter.user_id]
+    
+    def _dispatch(self):
+        """Admit queued requests in virtual finish order while slots are free"""
+        while self._total_active < self.max_concurrent and self._queued:
+            eligible = [
+                queue[0] for user_id, queue in self._queues.items()
+                if queue and self._active.get(user_id, 0) < self.max_per_user
+            ]
+            if not eligible:
+                return
+            
+            waiter = min(eligible, key=lambda w: w.tag)
+            self._queues[waiter.user_id].popleft()
+            if not self._queues[waiter.user_id]:
+                del self._queues[waiter.user_id]
+            self._queued -= 1
+            
+            self._active[waiter.user_id] += 1
+            self._total_active += 1
+            self._virtual_time = max(self._virtual_time, waiter.tag)
+            self._admitted += 1
+            self._wait_times.append(time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Concurrency and queue-time metrics"""
+        waits = np.array(self._wait_times) * 1000 if self._wait_times else np.zeros(1)
+        
+        return {
+            "active": self._total_active,
+            "queued": self._queued,
+            "max_concurrent": self.max_concurrent,
+            "max_per_user": self.max_per_user,
+            "max_queue": self.max_queue,
+            "active_by_user": dict(self._active),
+            "queued_by_user": {user_id: len(queue) for user_id, queue in self._queues.items()},
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "timed_out": self._timed_out,
+            "queue_time_ms": {
+                "mean": round(float(waits.mean()), 2),
+                "p50": round(float(np.percentile(waits, 50)), 2),
+                "p95": round(float(np.percentile(waits, 95)), 2),
+                "max": round(float(waits.max()), 2)
+            },
+            "mean_service_time_s": round(float(np.mean(self._service_times)), 3) if self._service_times else None
+        }
@@ -2,13 +2,14 @@
 Cache manager using Redis
 """
 
-from typing import Any, Optional
+from typing import Any, List, Optional
 import json
 import hashlib
 import logging
 from redis import asyncio as aioredis
 
 from app.core.config import settings
+from app.core.serialization import dumps, loads
 
 logger = logging.getLogger(__name__)
 
@@ -51,7 +52,7 @@ class CacheManager:
         try:
             value = await self.redis_client.get(key)
             if value:
-                return json.loads(value)
+                return loads(value)
         except Exception as e:
             logger.error(f"Cache get error: {str(e)}")
         
@@ -61,20 +62,24 @@ class CacheManager:
         self,
         key: str,
         value: Any,
-        ttl: int = None
+        ttl: int = None,
+        expire: bool = True
     ) -> bool:
-        """Set value in cache"""
+        """Set value in cache; with expire=False the key is kept until deleted"""
         await self._ensure_initialized()
         
         if not self.redis_client:
             return False
         
         try:
+            if not expire:
+                await self.redis_client.set(key, dumps(value))
+                return True
             ttl = ttl or settings.REDIS_CACHE_TTL
             await self.redis_client.setex(
                 key,
                 ttl,
-                json.dumps(value)
+                dumps(value)
             )
             return True
         except Exception as e:
@@ -95,6 +100,116 @@ class CacheManager:
             logger.error(f"Cache delete error: {str(e)}")
             return False
     
+    async def exists(self, key: str) -> Optional[bool]:
+        """Whether a key exists, None if Redis is unavailable"""
+        await self._ensure_initialized()
+        
+        if not self.redis_client:
+            return None
+        
+        try:
+            return bool(await self.redis_client.exists(key))
+        except Exception as e:
+            logger.error(f"Cache exists error: {str(e)}")
+            return None
+    
+    async def incr(self, key: str) -> Optional[int]:
+        """Increment a counter, returning the new value"""
+        await self._ensure_initialized()
+        
+        if not self.redis_client:
+            return None
+        
+        try:
+            return int(await self.redis_client.incr(key))
+        except Exception as e:
+            logger.error(f"Cache incr error: {str(e)}")
+            return None
+    
+    async def set_if_absent(self, key: str, value: Any, ttl: int) -> Optional[bool]:
+        """Set a value only if the key does not exist (SET NX), None if Redis is unavailable"""
+        await self._ensure_initialized()
+        
+        if not self.redis_client:
+            return None
+        
+        try:
+            return bool(await self.redis_client.set(key, dumps(value), nx=True, ex=ttl))
+        except Exception as e:
+            logger.error(f"Cache set_if_absent error: {str(e)}")
+            return None
+    
+    async def sadd(self, key: str, member: str, ttl: int = None) -> bool:
+        """Add a member to a set, refreshing the set's expiry when ttl is given"""
+        await self._ensure_initialized()
+        
+        if not self.redis_client:
+            return False
+        
+        try:
+            await self.redis_client.sadd(key, member)
+            if ttl:
+                await self.redis_client.expire(key, ttl)
+            return True
+        except Exception as e:
+            logger.error(f"Cache sadd error: {str(e)}")
+            return False
+    
+    async def srem(self, key: str, member: str) -> bool:
+        """Remove a member from a set"""
+        await self._ensure_initialized()
+        
+        if not self.redis_client:
+            return False
+        
+        try:
+            await self.redis_client.srem(key, member)
+            return True
+        except Exception as e:
+            logger.error(f"Cache srem error: {str(e)}")
+            return False
+    
+    async def smembers(self, key: str) -> Optional[List[str]]:
+        """Members of a set, None if Redis is unavailable"""
+        await self._ensure_initialized()
+        
+        if not self.redis_client:
+            return None
+        
+        try:
+            return sorted(await self.redis_client.smembers(key))
+        except Exception as e:
+            logger.error(f"Cache smembers error: {str(e)}")
+            return None
+    
+    async def zadd(self, key: str, member: str, score: float) -> bool:
+        """Add a member to a sorted set"""
+        await self._ensure_initialized()
+        
+        if not self.redis_client:
+            return False
+        
+        try:
+            await self.redis_client.zadd(key, {member: score})
+            return True
+        except Exception as e:
+            logger.error(f"Cache zadd error: {str(e)}")
+            return False
+    
+    async def zrangebyscore(self, key: str, min_score: float) -> Optional[List[str]]:
+        """Members of a sorted set scored at least min_score, after removing the rest"""
+        await self._ensure_initialized()
+        
+        if not self.redis_client:
+            return None
+        
+        try:
+            await self.redis_client.zremrangebyscore(key, "-inf", f"({min_score}")
+            return await self.redis_client.zrangebyscore(key, min_score, "+inf")
+        except Exception as e:
+            logger.error(f"Cache zrangebyscore error: {str(e)}")
+            return None
+    
     async def clear(self) -> bool:
         """Clear all cache"""
         await self._ensure_initialized()
@@ -0,0 +1,223 @@
+"""
+Chart Data Builder - Prepare ready-to-render series for visualizations
+Downsamples line charts with largest-triangle-three-buckets, pre-bins
+histograms and pre-aggregates categorical charts so the frontend receives
+a bounded number of points instead of the raw result set
+"""
+
+from typing import Dict, List, Any, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Select point indices with the largest-triangle-three-buckets algorithm
+    
+    Args:
+        x: Monotonic x values as floats
+        y: y values as floats
+        threshold: Number of points to keep
+    
+    Returns:
+        Sorted indices of the selected points
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    
+    # Bucket boundaries for the n - 2 interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    previous = 0
+    
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        
+        # Average of the next bucket is the third triangle vertex
+        next_start = end
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    
+    return selected
+
+
+def _to_json_values(values: pd.Series) -> List[Any]:
+    """Convert a series to JSON-friendly python values"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return [v.isoformat() if pd.notnull(v) else None for v in values]
+    return [
+        None if pd.isnull(v) else (v.item() if hasattr(v, "item") else v)
+        for v in values
+    ]
+
+
+class ChartDataBuilder:
+    """Build bounded, pre-aggregated series for visualization configs"""
+    
+    def __init__(
+        self,
+        max_points: int = None,
+        histogram_bins: int = None,
+        max_categories: int = None
+    ):
+        """Initialize with point caps"""
+        self.max_points = max_points or settings.CHART_MAX_POINTS
+        self.histogram_bins = histogram_bins or settings.CHART_HISTOGRAM_BINS
+        self.max_categories = max_categories or settings.CHART_MAX_CATEGORIES
+    
+    def build(self, df: pd.DataFrame, recommendation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Prepare the data for one visualization recommendation
+        
+        Args:
+            df: Query results
+            recommendation: Visualization config from recommend_visualizations
+        
+        Returns:
+            Render-ready data, or None for unknown chart types
+        """
+        builders = {
+            "line": self.line_series,
+            "histogram": self.histogram,
+            "bar": self.grouped,
+            "pie": self.grouped,
+            "heatmap": self.correlation_matrix,
+            "scatter": self.scatter,
+            "box": self.box_summary
+        }
+        builder = builders.get(recommendation["type"])
+        if builder is None:
+            return None
+        
+        try:
+            return builder(df, recommendation)
+        except Exception as e:
+            logger.warning(f"Could not prepare {recommendation['type']} chart data: {str(e)}")
+            return None
+    
+    def line_series(self, df: pd.DataFrame, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Sort by x and downsample with LTTB"""
+        data = df[[config["x_axis"], config["y_axis"]]].dropna().sort_values(config["x_axis"])
+        x_values = data[config["x_axis"]]
+        
+        if pd.api.types.is_datetime64_any_dtype(x_values):
+            x_numeric = x_values.astype("int64").to_numpy(dtype=float)
+        else:
+            x_numeric = pd.to_numeric(x_values, errors="coerce").to_numpy(dtype=float)
+        y_numeric = pd.to_numeric(data[config["y_axis"]], errors="coerce").to_numpy(dtype=float)
+        
+        indices = lttb_indices(x_numeric, y_numeric, self.max_points)
+        sampled = data.iloc[indices]
+        
+        return {
+            "x": _to_json_values(sampled[config["x_axis"]]),
+            "y": _to_json_values(sampled[config["y_axis"]]),
+            "original_points": len(data),
+            "downsampled": len(indices) < len(data)
+        }
+    
+    def histogram(self, df: pd.DataFrame, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Pre-bin a numeric column"""
+        values = pd.to_numeric(df[config["column"]], errors="coerce").dropna().to_numpy()
+        bins = min(self.histogram_bins, max(len(np.unique(values)), 1))
+        counts, edges = np.histogram(values, bins=bins)
+        
+        return {
+            "bin_edges": edges.tolist(),
+            "counts": counts.tolist(),
+            "total": int(len(values))
+        }
+    
+    def grouped(self, df: pd.DataFrame, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Sum a value per category, folding the tail into 'Other'"""
+        category = config.get("x_axis") or config["category"]
+        value = config.get("y_axis") or config["value"]
+        
+        totals = (
+            df.groupby(category, dropna=False)[value]
+            .sum()
+            .sort_values(ascending=False)
+        )
+        limit = min(self.max_categories, self.max_points)
+        head, tail = totals.head(limit), totals.iloc[limit:]
+        
+        labels = [str(label) for label in head.index]
+        values = _to_json_values(head)
+        if len(tail):
+            labels.append("Other")
+            values.append(float(tail.sum()))
+        
+        return {
+            "labels": labels,
+            "values": values,
+            "aggregation": "sum",
+            "category_count": int(len(totals))
+        }
+    
+    def correlation_matrix(self, df: pd.DataFrame, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Precompute the correlation matrix for the heatmap"""
+        columns = config["columns"]
+        matrix = df[columns].corr().round(4)
+        
+        return {
+            "columns": columns,
+            "matrix": [
+                [None if pd.isnull(v) else float(v) for v in row]
+                for row in matrix.to_numpy()
+            ]
+        }
+    
+    def scatter(self, df: pd.DataFrame, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Deterministically sample points for the scatter plot"""
+        data = df[[config["x_axis"], config["y_axis"]]].dropna()
+        original_points = len(data)
+        if original_points > self.max_points:
+            data = data.sample(n=self.max_points, random_state=0).sort_index()
+        
+        return {
+            "x": _to_json_values(data[config["x_axis"]]),
+            "y": _to_json_values(data[config["y_axis"]]),
+            "original_points": original_points,
+            "downsampled": len(data) < original_points
+        }
+    
+    def box_summary(self, df: pd.DataFrame, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Five-number summaries with a capped list of outliers"""
+        summaries = {}
+        
+        for col in config["columns"]:
+            values = pd.to_numeric(df[col], errors="coerce").dropna()
+            q1, median, q3 = values.quantile([0.25, 0.5, 0.75])
+            iqr = q3 - q1
+            low, high = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+            outliers = values[(values < low) | (values > high)]
+            
+            summaries[col] = {
+                "min": float(values[values >= low].min()),
+                "q1": float(q1),
+                "median": float(median),
+                "q3": float(q3),
+                "max": float(values[values <= high].max()),
+                "outliers": outliers.head(self.max_points).astype(float).tolist(),
+                "outlier_count": int(len(outliers))
+            }
+        
+        return {"series": summaries}
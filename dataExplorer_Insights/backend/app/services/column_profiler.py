@@ -0,0 +1,347 @@
+"""
+Column Profiler - Background per-column statistics from bounded samples
+Computes row counts, HyperLogLog distinct estimates, min/max, top-k values
+and null fractions per table, persists them with the schema cache and
+refreshes them incrementally. The profile feeds value hints into SQL
+generation prompts and cardinality into chart selection without extra
+round trips at query time.
+"""
+
+from typing import Dict, List, Any, Optional
+import asyncio
+import logging
+import re
+import time
+
+import pandas as pd
+
+from app.core.config import settings
+from app.services.database_manager import DatabaseManager
+from app.services.schema_cache import SchemaCache, NON_SQL_DATABASES
+from app.services.sketches import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+# Weight of the previous profile when blending with a fresh sample
+_HISTORY_WEIGHT = 0.5
+
+# Identifier columns whose ranges are not useful as hints
+_KEY_COLUMN = re.compile(r"(^id|_id|Id|ID)$")
+
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def _json_value(value: Any) -> Any:
+    """Convert a pandas/numpy scalar to a JSON-friendly value"""
+    if value is None or (not isinstance(value, str) and pd.isnull(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value.item() if hasattr(value, "item") else value
+
+
+def _column_kind(values: pd.Series) -> str:
+    """Classify a sampled column"""
+    if pd.api.types.is_bool_dtype(values):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(values):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return "datetime"
+    return "text"
+
+
+def _bound(first: Any, second: Any, pick) -> Any:
+    """Combine two optional bounds with min or max"""
+    candidates = [value for value in (first, second) if value is not None]
+    if not candidates:
+        return None
+    try:
+        return pick(candidates)
+    except TypeError:
+        return second
+
+
+def _hint_value(value: Any) -> str:
+    """Shorten a range bound for prompts"""
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    if isinstance(value, str) and value.endswith("T00:00:00"):
+        return value[:10]
+    return str(value)
+
+
+class ColumnProfiler:
+    """Profile columns of SQL tables in the background"""
+    
+    def __init__(self, db_manager: DatabaseManager, schema_cache: SchemaCache):
+        """Initialize with the database manager and schema cache"""
+        self.db_manager = db_manager
+        self.schema_cache = schema_cache
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._last_checked: Dict[str, float] = {}
+    
+    @staticmethod
+    def supports(database_type: str) -> bool:
+        """Whether profiling is available for a database type"""
+        return database_type not in NON_SQL_DATABASES
+    
+    def schedule(
+        self,
+        database_type: str,
+        connection_params: Dict[str, Any]
+    ) -> Optional[asyncio.Task]:
+        """
+        Start a background refresh unless one is running or ran recently
+        
+        Args:
+            database_type: Type of database
+            connection_params: Connection parameters
+        
+        Returns:
+            The refresh task, or None if nothing was started
+        """
+        if not self.supports(database_type):
+            return None
+        
+        key = SchemaCache.connection_key(database_type, connection_params)
+        running = self._tasks.get(key)
+        if running and not running.done():
+            return None
+        if time.time() - self._last_checked.get(key, 0.0) < settings.PROFILE_CHECK_INTERVAL:
+            return None
+        
+        self._last_checked[key] = time.time()
+        task = asyncio.create_task(self._refresh_safely(database_type, connection_params))
+        self._tasks[key] = task
+        return task
+    
+    async def _refresh_safely(self, database_type: str, connection_params: Dict[str, Any]):
+        """Background wrapper that never raises"""
+        try:
+            await self.refresh(database_type, connection_params)
+        except Exception as e:
+            logger.warning(f"Column profiling failed for {database_type}: {str(e)}")
+    
+    async def refresh(
+        self,
+        database_type: str,
+        connection_params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Re-profile tables whose profile is older than the refresh interval
+        
+        Tables whose row count has not changed keep their statistics and are
+        only re-counted; changed tables are re-sampled and merged into the
+        previous profile.
+        
+        Returns:
+            The updated profile
+        """
+        tables = await self.schema_cache.get_tables(database_type, connection_params)
+        profile = await self.schema_cache.get_profile(database_type, connection_params) or {"tables": {}}
+        now = time.time()
+        refreshed = 0
+        
+        for table in tables[:settings.PROFILE_MAX_TABLES]:
+            previous = profile["tables"].get(table["name"])
+            if previous and now - previous["profiled_at"] < settings.PROFILE_REFRESH_INTERVAL:
+                continue
+            
+            try:
+                profile["tables"][table["name"]] = await self._profile_table(
+                    database_type,
+                    connection_params,
+                    table["name"],
+                    previous
+                )
+                refreshed += 1
+            except Exception as e:
+                logger.warning(f"Could not profile table {table['name']}: {str(e)}")
+        
+        if refreshed:
+            profile["updated_at"] = now
+            await self.schema_cache.set_profile(database_type, connection_params, profile)
+            logger.info(f"Profiled {refreshed} tables for {database_type}")
+        return profile
+    
+    async def _profile_table(
+        self,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        table_name: str,
+        previous: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Sample one table and compute its column statistics"""
+        sample = await self.db_manager.sample_table(
+            database_type,
+            connection_params,
+            table_name,
+            settings.PROFILE_SAMPLE_ROWS,
+            timeout=settings.PROFILE_QUERY_TIMEOUT,
+            skip_if_row_count=previous["row_count"] if previous else None
+        )
+        
+        if sample["rows"] is None:
+            # Unchanged row count: keep the statistics, reset the clock
+            return {**previous, "profiled_at": time.time()}
+        
+        df = pd.DataFrame(sample["rows"], columns=sample["columns"])
+        previous_columns = previous["columns"] if previous else {}
+        
+        # Sketching is CPU-bound, keep it off the event loop
+        columns = await asyncio.to_thread(
+            lambda: {
+                col: self.profile_column(df[col], sample["row_count"], previous_columns.get(col))
+                for col in df.columns
+            }
+        )
+        
+        return {
+            "row_count": sample["row_count"],
+            "sampled": sample["sampled"] or len(df) < sample["row_count"],
+            "sample_rows": len(df),
+            "profiled_at": time.time(),
+            "columns": columns
+        }
+    
+    @staticmethod
+    def profile_column(
+        values: pd.Series,
+        row_count: int,
+        previous: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Compute statistics for one sampled column
+        
+        Args:
+            values: Sampled values
+            row_count: Rows in the full table
+            previous: Previous statistics to merge with
+        
+        Returns:
+            Column statistics
+        """
+        sample_size = len(values)
+        non_null = values.dropna()
+        kind = _column_kind(non_null) if len(non_null) else (previous or {}).get("kind", "text")
+        
+        if kind == "text" and len(non_null) and _ISO_DATE.match(str(non_null.iloc[0])):
+            # ISO date strings (e.g. SQLite) are profiled as datetimes
+            parsed = pd.to_datetime(non_null, errors="coerce", format="ISO8601")
+            if parsed.notna().mean() > 0.95:
+                non_null, kind = parsed.dropna(), "datetime"
+        
+        sketch = HyperLogLog(settings.PROFILE_HLL_PRECISION)
+        sketch.add(non_null)
+        if previous and previous.get("hll"):
+            sketch.merge(HyperLogLog.from_dict(previous["hll"]))
+        
+        null_fraction = 1 - len(non_null) / sample_size if sample_size else 0.0
+        counts = non_null.astype(str).value_counts()
+        nearly_unique = len(non_null) > 0 and counts.size / len(non_null) > 0.95
+        top_values = {} if nearly_unique else {
+            str(value): count / sample_size
+            for value, count in counts.head(settings.PROFILE_TOP_K).items()
+        }
+        low, high = (non_null.min(), non_null.max()) if kind != "text" and len(non_null) else (None, None)
+        
+        if previous:
+            # Blend with the previous profile so refreshes converge over time
+            weight = _HISTORY_WEIGHT
+            null_fraction = weight * previous["null_fraction"] + (1 - weight) * null_fraction
+            blended = {item["value"]: weight * item["fraction"] for item in previous["top_values"]}
+            for value, fraction in top_values.items():
+                blended[value] = blended.get(value, 0.0) + (1 - weight) * fraction
+            top_values = dict(sorted(blended.items(), key=lambda item: -item[1])[:settings.PROFILE_TOP_K])
+            low = _bound(previous.get("min"), _json_value(low), min)
+            high = _bound(previous.get("max"), _json_value(high), max)
+        
+        distinct = sketch.estimate()
+        if sample_size < row_count and nearly_unique:
+            # Nearly unique in the sample: assume unique in the full table
+            distinct = max(distinct, int(row_count * (1 - null_fraction)))
+        
+        return {
+            "kind": kind,
+            "null_fraction": round(null_fraction, 4),
+            "distinct_estimate": distinct,
+            "min": _json_value(low),
+            "max": _json_value(high),
+            "top_values": [
+                {"value": value, "fraction": round(fraction, 4)}
+                for value, fraction in top_values.items()
+            ],
+            "hll": sketch.to_dict()
+        }
+
+
+def columns_for_query(profile: Optional[Dict[str, Any]], sql_query: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Column statistics for the tables a query reads
+    
+    Args:
+        profile: Connection profile
+        sql_query: Executed SQL query
+    
+    Returns:
+        Column name to statistics; the first table mentioned wins on clashes
+    """
+    if not profile or not sql_query:
+        return {}
+    
+    columns: Dict[str, Dict[str, Any]] = {}
+    for table_name, table in profile["tables"].items():
+        if re.search(rf"\b{re.escape(table_name)}\b", sql_query, re.IGNORECASE):
+            for col, stats in table["columns"].items():
+                columns.setdefault(col, stats)
+    return columns
+
+
+def prompt_hints(
+    profile: Optional[Dict[str, Any]],
+    entities: Optional[List[str]] = None
+) -> str:
+    """
+    Render compact column value hints for SQL generation prompts
+    
+    Low-cardinality text columns list their most common values so filters use
+    real values; numeric and date columns show their range. Tables whose names
+    or columns match the query entities come first, and the output is capped
+    at PROFILE_MAX_HINTS lines.
+    
+    Args:
+        profile: Connection profile
+        entities: Entities identified in the user query
+    
+    Returns:
+        Hint block, or an empty string
+    """
+    if not profile or not profile.get("tables"):
+        return ""
+    
+    terms = [term.lower() for term in entities or [] if term]
+    
+    def relevance(item) -> int:
+        name, table = item
+        text = " ".join([name] + list(table["columns"])).lower()
+        return -sum(term in text for term in terms)
+    
+    lines, empty = [], []
+    for table_name, table in sorted(profile["tables"].items(), key=relevance):
+        if table["row_count"] == 0:
+            empty.append(table_name)
+            continue
+        for col, stats in table["columns"].items():
+            if stats["kind"] == "text" and 0 < stats["distinct_estimate"] <= settings.PROFILE_HINT_MAX_DISTINCT:
+                values = ", ".join(f"'{item['value']}'" for item in stats["top_values"])
+                lines.append(f"{table_name}.{col}: {values}")
+            elif stats["kind"] in ("numeric", "datetime") and stats["min"] is not None and not _KEY_COLUMN.search(col):
+                lines.append(f"{table_name}.{col}: {_hint_value(stats['min'])}..{_hint_value(stats['max'])}")
+    
+    lines = lines[:settings.PROFILE_MAX_HINTS]
+    if empty:
+        lines.append(f"empty tables: {', '.join(empty)}")
+    if not lines:
+        return ""
+    return "\n".join(["-- Column values (sampled):"] + lines)
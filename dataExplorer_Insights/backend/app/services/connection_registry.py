@@ -0,0 +1,344 @@
+"""
+Connection Registry - Saved database connections referenced by ID
+Connection parameters are validated once, encrypted with Fernet and kept
+in memory and Redis. Requests then carry only a connection ID, cache keys
+stay free of credentials, and every user of a connection shares its
+pooled engine. Registration warms the pool, schema cache and column
+profile in the background so the first query is already fast.
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime
+import asyncio
+import base64
+import hashlib
+import logging
+import time
+import uuid
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from app.core.config import settings
+from app.core.serialization import dumps, loads
+from app.services.cache_manager import CacheManager
+from app.services.database_manager import DatabaseManager
+from app.services.schema_cache import SchemaCache, NON_SQL_DATABASES
+from app.services.column_profiler import ColumnProfiler
+
+logger = logging.getLogger(__name__)
+
+# Parameters never returned by the API
+SECRET_FIELDS = (
+    "password",
+    "uri",
+    "credentials_json",
+    "aws_secret_access_key",
+    "private_key",
+    "token"
+)
+
+# Redis set of saved connection IDs, updated with SADD/SREM so workers
+# saving at the same time do not overwrite each other's entries
+_INDEX_KEY = "saved_connection_ids"
+
+
+class ConnectionNotFound(KeyError):
+    """Raised for unknown connections and connections the user may not use"""
+
+
+class ConnectionRegistry:
+    """Register, encrypt, resolve and warm saved connections"""
+    
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        schema_cache: SchemaCache,
+        column_profiler: Optional[ColumnProfiler] = None,
+        cache: Optional[CacheManager] = None,
+        encryption_key: Optional[str] = None
+    ):
+        """
+        Initialize the registry
+        
+        Args:
+            db_manager: Database manager whose pools serve the connections
+            schema_cache: Schema cache warmed on registration
+            column_profiler: Profiler warmed on registration, if enabled
+            cache: Redis cache persisting the connections
+            encryption_key: Fernet key, defaults to CONNECTION_ENCRYPTION_KEY
+        """
+        self.db_manager = db_manager
+        self.schema_cache = schema_cache
+        self.column_profiler = column_profiler
+        self.cache = cache or CacheManager()
+        self._fernet = Fernet(self._key(encryption_key))
+        self._connections: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._index_loaded = False
+    
+    @staticmethod
+    def _key(encryption_key: Optional[str]) -> bytes:
+        """Fernet key from settings, or derived from SECRET_KEY"""
+        key = encryption_key or settings.CONNECTION_ENCRYPTION_KEY
+        if key:
+            return key.encode()
+        logger.warning("CONNECTION_ENCRYPTION_KEY not set, deriving the key from SECRET_KEY")
+        return base64.urlsafe_b64encode(hashlib.sha256(settings.SECRET_KEY.encode()).digest())
+    
+    def _encrypt(self, connection_params: Dict[str, Any]) -> str:
+        """Encrypted connection parameters"""
+        return self._fernet.encrypt(dumps(connection_params)).decode()
+    
+    def _decrypt(self, token: str) -> Dict[str, Any]:
+        """Decrypted connection parameters"""
+        try:
+            return loads(self._fernet.decrypt(token.encode()))
+        except InvalidToken:
+            raise ValueError("Saved connection cannot be decrypted, the encryption key has changed")
+    
+    @staticmethod
+    def _masked(connection_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Parameters with secrets replaced"""
+        return {
+            key: "********" if key in SECRET_FIELDS and value else value
+            for key, value in connection_params.items()
+        }
+    
+    def public(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """API view of a saved connection, without credentials"""
+        return {
+            "connection_id": record["connection_id"],
+            "name": record["name"],
+            "database_type": record["database_type"],
+            "owner_id": record["owner_id"],
+            "shared": record["shared"],
+            "connection_params": self._masked(self._decrypt(record["params"])),
+            "created_at": record["created_at"],
+            "updated_at": record["updated_at"],
+            "warm": record.get("warm")
+        }
+    
+    async def _save(self, record: Dict[str, Any]):
+        """Write a connection to memory and Redis"""
+        self._connections[record["connection_id"]] = record
+        stored = {key: value for key, value in record.items() if key != "warm"}
+        await self.cache.set(f"saved_connection:{record['connection_id']}", stored, ttl=settings.CONNECTION_REGISTRY_TTL)
+        await self.cache.sadd(_INDEX_KEY, record["connection_id"], ttl=settings.CONNECTION_REGISTRY_TTL)
+    
+    async def _lookup(self, connection_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a connection from Redis, falling back to memory
+        
+        Redis holds the current version of a connection; when another
+        worker has changed it, this worker's pool and cached schema for the
+        old version are dropped. A connection missing from a reachable Redis
+        was deleted or expired and is forgotten here as well; memory is only
+        used while Redis is unavailable.
+        """
+        known = self._connections.get(connection_id)
+        key = f"saved_connection:{connection_id}"
+        record = await self.cache.get(key)
+        if record is None:
+            if known is not None and await self.cache.exists(key) is False:
+                logger.info(f"Connection {connection_id} was deleted or expired, forgetting it")
+                await self._forget_state(known)
+                self._connections.pop(connection_id, None)
+                return None
+            return known
+        if known is not None:
+            if known["updated_at"] == record["updated_at"]:
+                return known
+            logger.info(f"Connection {connection_id} changed on another worker, reloading it")
+            await self._forget_state(known)
+        self._connections[connection_id] = record
+        return record
+    
+    async def _load_index(self):
+        """Load connections saved by other workers or before a restart"""
+        if self._index_loaded:
+            return
+        for connection_id in await self.cache.smembers(_INDEX_KEY) or []:
+            if await self._lookup(connection_id) is None:
+                await self.cache.srem(_INDEX_KEY, connection_id)
+        self._index_loaded = True
+    
+    @staticmethod
+    def _allowed(record: Dict[str, Any], user_id: Any) -> bool:
+        """Owners and, for shared connections, every user may use a connection"""
+        return record["owner_id"] == user_id or record["shared"]
+    
+    async def get(self, connection_id: str, user_id: Any) -> Dict[str, Any]:
+        """
+        Get a connection the user may use
+        
+        Raises:
+            ConnectionNotFound: Unknown connection or not accessible
+        """
+        record = await self._lookup(connection_id)
+        if record is None or not self._allowed(record, user_id):
+            raise ConnectionNotFound(connection_id)
+        return record
+    
+    async def list(self, user_id: Any) -> List[Dict[str, Any]]:
+        """Connections the user owns or that are shared"""
+        await self._load_index()
+        return [
+            record for record in self._connections.values()
+            if self._allowed(record, user_id)
+        ]
+    
+    async def all(self) -> List[Dict[str, Any]]:
+        """Every saved connection, for background work such as precomputation"""
+        await self._load_index()
+        return list(self._connections.values())
+    
+    async def resolve(self, connection_id: str, user_id: Any) -> Tuple[str, Dict[str, Any]]:
+        """
+        Database type and decrypted parameters of a connection
+        
+        The parameters include the connection_id, which selects the shared
+        pool in DatabaseManager and the credential-free schema cache key,
+        and the connection_version (updated_at) that keys everything cached
+        for the connection, so results of earlier parameters are not reused.
+        """
+        record = await self.get(connection_id, user_id)
+        return record["database_type"], self._resolved_params(record)
+    
+    def _resolved_params(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Decrypted parameters with the connection ID and version"""
+        return {
+            **self._decrypt(record["params"]),
+            "connection_id": record["connection_id"],
+            "connection_version": record["updated_at"]
+        }
+    
+    async def _validate(self, database_type: str, connection_params: Dict[str, Any]):
+        """Test the connection once, at registration"""
+        result = await self.db_manager.test_connection(database_type, connection_params)
+        if result["status"] == "error":
+            raise ValueError(result["message"])
+    
+    async def register(
+        self,
+        user_id: Any,
+        name: str,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        shared: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Validate and save a connection, then warm it in the background
+        
+        Returns:
+            The saved connection without credentials
+        
+        Raises:
+            ValueError: The connection test failed
+        """
+        await self._validate(database_type, connection_params)
+        
+        now = datetime.utcnow().isoformat()
+        record = {
+            "connection_id": str(uuid.uuid4()),
+            "name": name,
+            "database_type": database_type,
+            "owner_id": user_id,
+            "shared": shared,
+            "params": self._encrypt(connection_params),
+            "created_at": now,
+            "updated_at": now
+        }
+        await self._save(record)
+        logger.info(f"Registered {database_type} connection {record['connection_id']} for user {user_id}")
+        
+        self.warm(record["connection_id"])
+        return self.public(record)
+    
+    async def update(
+        self,
+        connection_id: str,
+        user_id: Any,
+        name: Optional[str] = None,
+        connection_params: Optional[Dict[str, Any]] = None,
+        shared: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Rename, share or change the parameters of an owned connection"""
+        record = await self.get(connection_id, user_id)
+        if record["owner_id"] != user_id:
+            raise ConnectionNotFound(connection_id)
+        
+        if connection_params is not None:
+            await self._validate(record["database_type"], connection_params)
+            await self._forget_state(record)
+            record["params"] = self._encrypt(connection_params)
+        if name is not None:
+            record["name"] = name
+        if shared is not None:
+            record["shared"] = shared
+        record["updated_at"] = datetime.utcnow().isoformat()
+        await self._save(record)
+        
+        if connection_params is not None:
+            self.warm(connection_id)
+        return self.public(record)
+    
+    async def delete(self, connection_id: str, user_id: Any):
+        """Delete an owned connection and close its pool"""
+        record = await self.get(connection_id, user_id)
+        if record["owner_id"] != user_id:
+            raise ConnectionNotFound(connection_id)
+        
+        await self._forget_state(record)
+        self._connections.pop(connection_id, None)
+        await self.cache.delete(f"saved_connection:{connection_id}")
+        await self.cache.srem(_INDEX_KEY, connection_id)
+        logger.info(f"Deleted connection {connection_id}")
+    
+    async def _forget_state(self, record: Dict[str, Any]):
+        """Stop warming, close the pool and drop the cached schema and profile"""
+        task = self._tasks.pop(record["connection_id"], None)
+        if task is not None:
+            task.cancel()
+        self.db_manager.dispose_pool(record["connection_id"])
+        await self.schema_cache.invalidate(
+            record["database_type"],
+            {"connection_id": record["connection_id"], "connection_version": record["updated_at"]}
+        )
+    
+    def warm(self, connection_id: str) -> Optional[asyncio.Task]:
+        """Start warming a connection unless it is already being warmed"""
+        running = self._tasks.get(connection_id)
+        if running is not None and not running.done():
+            return None
+        if connection_id in self._connections:
+            self._connections[connection_id]["warm"] = {"status": "pending"}
+        task = asyncio.create_task(self._warm(connection_id))
+        self._tasks[connection_id] = task
+        return task
+    
+    async def _warm(self, connection_id: str):
+        """Open pooled connections, cache the schema and profile the columns"""
+        record = self._connections.get(connection_id)
+        if record is None:
+            return
+        
+        started = time.perf_counter()
+        record["warm"] = {"status": "running"}
+        database_type = record["database_type"]
+        connection_params = self._resolved_params(record)
+        
+        try:
+            await self.db_manager.warm_pool(database_type, connection_params)
+            if database_type in NON_SQL_DATABASES:
+                await self.schema_cache.get_schema(database_type, connection_params)
+            else:
+                await self.schema_cache.get_tables(database_type, connection_params)
+            if self.column_profiler is not None and self.column_profiler.supports(database_type):
+                await self.column_profiler.refresh(database_type, connection_params)
+            record["warm"] = {"status": "ready", "seconds": round(time.perf_counter() - started, 3)}
+            logger.info(f"Warmed connection {connection_id} in {record['warm']['seconds']}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Warming connection {connection_id} failed: {str(e)}")
+            record["warm"] = {"status": "failed", "error": str(e)}
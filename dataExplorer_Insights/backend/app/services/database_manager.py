@@ -4,16 +4,26 @@ Supports PostgreSQL, MySQL, SQL Server, SQLite, MongoDB, Snowflake,
 Redshift, BigQuery, Oracle, Cassandra, DynamoDB, DB2, MariaDB
 """
 
-from typing import Dict, List, Any, Optional
-from sqlalchemy import create_engine, text, inspect
+from typing import Dict, List, Any, Optional, AsyncIterator
+from contextlib import ExitStack
+from sqlalchemy import create_engine, event, text, inspect, select, func, literal_column
+from sqlalchemy import table as sql_table
 from sqlalchemy.pool import NullPool
 from pymongo import MongoClient
 import pandas as pd
 import logging
 from contextlib import contextmanager
+import asyncio
 import json
+import queue
+import threading
+import time
 
 from app.core.config import settings
+from app.core.serialization import to_jsonable, jsonable_rows
+from app.services.query_cancellation import CancellationToken, QueryCancelledError
+from app.services.schema_encoder import render_schema
+from app.services.query_sampler import QuerySampler
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +73,98 @@ except ImportError:
     logger.warning("Boto3 (DynamoDB) not available")
 
 
+# Stages after which documents no longer have (only) the collection's
+# fields: projecting the collection spec would drop joined, added or
+# unwound fields the pipeline produced
+_SHAPING_STAGES = (
+    "$project", "$group", "$replaceRoot", "$replaceWith", "$count",
+    "$bucket", "$bucketAuto", "$facet", "$sortByCount",
+    "$lookup", "$graphLookup", "$addFields", "$set", "$unset", "$unwind"
+)
+
+# Stages that must stay last in a pipeline
+_WRITE_STAGES = ("$out", "$merge")
+
+# Databases whose drivers cannot stream; stream_query yields their regular
+# result, capped at MAX_RESULT_ROWS
+NON_STREAMING_DATABASES = ("mongodb", "bigquery", "cassandra", "dynamodb")
+
+
+def bound_pipeline(
+    stages: List[Dict[str, Any]],
+    fields: Optional[List[str]],
+    max_rows: int
+) -> List[Dict[str, Any]]:
+    """
+    Bound an aggregation pipeline's result on the server
+    
+    Appends a $project of the requested fields when the pipeline returns
+    whole documents, and a $limit unless the pipeline already ends with a
+    tighter one. Pipelines ending in $out or $merge are left unchanged.
+    
+    Args:
+        stages: Aggregation stages
+        fields: Fields the answer needs, from the pipeline's collection spec
+        max_rows: Result row cap
+    
+    Returns:
+        Bounded stages
+    """
+    stages = list(stages)
+    if stages and any(stage in stages[-1] for stage in _WRITE_STAGES):
+        return stages
+    
+    shaped = any(name in _SHAPING_STAGES for stage in stages for name in stage)
+    if fields and not shaped:
+        projection = {field: 1 for field in fields}
+        if "_id" not in projection:
+            projection["_id"] = 0
+        stages.append({"$project": projection})
+    
+    limit = stages[-1].get("$limit") if stages else None
+    if not isinstance(limit, int) or limit > max_rows:
+        stages.append({"$limit": max_rows})
+    return stages
+
+
+# Pooled engines and clients of saved connections, shared by all managers
+_pooled_engines: Dict[str, Any] = {}
+_pooled_mongo_clients: Dict[str, Any] = {}
+_pool_lock = threading.Lock()
+
+# Statements undoing per-query session timeouts before a pooled connection is reused
+_SESSION_RESETS = {
+    "postgresql": "RESET statement_timeout",
+    "redshift": "RESET statement_timeout",
+    "mysql": "SET SESSION max_execution_time = DEFAULT",
+    "mariadb": "SET SESSION max_statement_time = DEFAULT",
+    "snowflake": "ALTER SESSION UNSET STATEMENT_TIMEOUT_IN_SECONDS"
+}
+
+
+def _session_reset(database_type: str):
+    """Pool checkin hook clearing the timeouts set by _apply_timeout"""
+    def reset(dbapi_connection, connection_record):
+        if dbapi_connection is None:
+            return
+        try:
+            if database_type == "sqlite":
+                dbapi_connection.set_progress_handler(None, 0)
+            elif database_type == "oracle":
+                dbapi_connection.call_timeout = 0
+            elif database_type in _SESSION_RESETS:
+                cursor = dbapi_connection.cursor()
+                cursor.execute(_SESSION_RESETS[database_type])
+                cursor.close()
+                dbapi_connection.commit()
+        except Exception as e:
+            # A connection that cannot be reset is not reused
+            logger.warning(f"Could not reset pooled {database_type} connection: {str(e)}")
+            connection_record.invalidate(e)
+    
+    return reset
+
+
 class DatabaseManager:
     """Manage connections and queries across multiple database types"""
     
@@ -110,14 +212,112 @@ class DatabaseManager:
         else:
             raise ValueError(f"Unsupported database type: {database_type}")
     
+    def _pooled_engine(
+        self,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        connect_args: Optional[Dict[str, Any]] = None
+    ):
+        """Shared pooled engine of a saved connection"""
+        key = (
+            f"{connection_params['connection_id']}:{connection_params.get('connection_version')}:"
+            f"{json.dumps(connect_args or {}, sort_keys=True, default=str)}"
+        )
+        with _pool_lock:
+            engine = _pooled_engines.get(key)
+            if engine is None:
+                # SQLite picks its own pool class without size options
+                options = {} if database_type == "sqlite" else {
+                    "pool_size": settings.CONNECTION_POOL_SIZE,
+                    "max_overflow": settings.CONNECTION_POOL_MAX_OVERFLOW
+                }
+                engine = create_engine(
+                    self._get_connection_string(database_type, connection_params),
+                    pool_pre_ping=True,
+                    pool_recycle=settings.CONNECTION_POOL_RECYCLE,
+                    echo=settings.DEBUG,
+                    connect_args=connect_args or {},
+                    **options
+                )
+                event.listen(engine, "checkin", _session_reset(database_type))
+                _pooled_engines[key] = engine
+                logger.info(f"Created connection pool for saved connection {connection_params['connection_id']}")
+            return engine
+    
+    def _pooled_mongo_client(self, connection_params: Dict[str, Any]) -> MongoClient:
+        """Shared client (with its own pool) of a saved MongoDB connection"""
+        key = f"{connection_params['connection_id']}:{connection_params.get('connection_version')}"
+        with _pool_lock:
+            client = _pooled_mongo_clients.get(key)
+            if client is None:
+                client = MongoClient(connection_params.get("uri") or settings.MONGODB_URI)
+                _pooled_mongo_clients[key] = client
+            return client
+    
+    def dispose_pool(self, connection_id: str):
+        """Close the pooled engines and clients of a saved connection"""
+        with _pool_lock:
+            engines = [
+                _pooled_engines.pop(key) for key in list(_pooled_engines)
+                if key.startswith(f"{connection_id}:")
+            ]
+            clients = [
+                _pooled_mongo_clients.pop(key) for key in list(_pooled_mongo_clients)
+                if key.startswith(f"{connection_id}:")
+            ]
+        for engine in engines:
+            engine.dispose()
+        for client in clients:
+            client.close()
+    
+    def _warm_pool(self, database_type: str, connection_params: Dict[str, Any], connections: int):
+        """Open pooled connections so the first queries skip the handshake"""
+        if database_type == "mongodb":
+            with self.get_connection(database_type, connection_params) as client:
+                client.admin.command("ping")
+            return
+        
+        # Hold them all at once so the pool ends up with several idle connections
+        with ExitStack() as stack:
+            for _ in range(connections):
+                stack.enter_context(self.get_connection(database_type, connection_params))
+    
+    async def warm_pool(
+        self,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        connections: int = None
+    ):
+        """
+        Open connections of a saved connection's pool ahead of use
+        
+        Args:
+            database_type: Type of database
+            connection_params: Resolved parameters including connection_id
+            connections: Number of connections, defaults to the configured count
+        """
+        if database_type in ("bigquery", "cassandra", "dynamodb"):
+            return
+        await asyncio.to_thread(
+            self._warm_pool,
+            database_type,
+            connection_params,
+            connections or settings.CONNECTION_WARM_CONNECTIONS
+        )
+    
     @contextmanager
     def get_connection(
         self,
         database_type: str,
-        connection_params: Dict[str, Any]
+        connection_params: Dict[str, Any],
+        connect_args: Optional[Dict[str, Any]] = None
     ):
         """Get database connection context manager"""
-        if database_type == "mongodb":
+        if database_type == "mongodb" and connection_params.get("connection_id"):
+            # Saved connections keep their client and its pool
+            yield self._pooled_mongo_client(connection_params)
+        
+        elif database_type == "mongodb":
             # MongoDB connection
             uri = connection_params.get("uri") or settings.MONGODB_URI
             client = MongoClient(uri)
@@ -194,6 +394,12 @@ class DatabaseManager:
             finally:
                 pass  # DynamoDB resource doesn't need explicit cleanup
         
+        elif connection_params.get("connection_id"):
+            # Saved connections reuse a shared pool
+            engine = self._pooled_engine(database_type, connection_params, connect_args)
+            with engine.connect() as conn:
+                yield conn
+        
         else:
             # SQL database connection (PostgreSQL, MySQL, SQL Server, SQLite, Oracle, DB2, Snowflake, Redshift)
             conn_string = self._get_connection_string(database_type, connection_params)
@@ -202,7 +408,8 @@ class DatabaseManager:
             engine = create_engine(
                 conn_string,
                 poolclass=NullPool,
-                echo=settings.DEBUG
+                echo=settings.DEBUG,
+                connect_args=connect_args or {}
             )
             
             try:
@@ -214,7 +421,8 @@ class DatabaseManager:
     async def get_schema(
         self,
         database_type: str,
-        connection_params: Dict[str, Any]
+        connection_params: Dict[str, Any],
+        schema_format: str = "verbose"
     ) -> str:
         """
         Get database schema as a formatted string
@@ -222,6 +430,7 @@ class DatabaseManager:
         Args:
             database_type: Type of database
             connection_params: Connection parameters
+            schema_format: "verbose" or "compact" rendering for SQL databases
             
         Returns:
             Formatted schema description
@@ -237,64 +446,70 @@ class DatabaseManager:
         elif database_type == "dynamodb":
             return await self._get_dynamodb_schema(connection_params)
         else:
-            return await self._get_sql_schema(database_type, connection_params)
+            return await self._get_sql_schema(database_type, connection_params, schema_format)
     
-    async def _get_sql_schema(
+    async def get_sql_tables(
         self,
         database_type: str,
         connection_params: Dict[str, Any]
-    ) -> str:
-        """Get SQL database schema"""
+    ) -> List[Dict[str, Any]]:
+        """
+        Collect table metadata from a SQL database
+        
+        Args:
+            database_type: Type of database
+            connection_params: Connection parameters
+            
+        Returns:
+            Tables with name, columns, primary_key, foreign_keys and indexes
+        """
         with self.get_connection(database_type, connection_params) as conn:
             inspector = inspect(conn.engine)
-            
-            schema_parts = []
+            tables = []
             
             # Get all tables
-            tables = inspector.get_table_names()
-            
-            for table in tables:
-                schema_parts.append(f"\nTable: {table}")
-                
-                # Get columns
-                columns = inspector.get_columns(table)
-                schema_parts.append("Columns:")
-                
-                for col in columns:
-                    col_type = str(col['type'])
-                    nullable = "NULL" if col['nullable'] else "NOT NULL"
-                    schema_parts.append(
-                        f"  - {col['name']}: {col_type} {nullable}"
-                    )
-                
-                # Get primary keys
+            for table in inspector.get_table_names():
                 pk = inspector.get_pk_constraint(table)
-                if pk and pk.get('constrained_columns'):
-                    schema_parts.append(
-                        f"Primary Key: {', '.join(pk['constrained_columns'])}"
-                    )
-                
-                # Get foreign keys
-                fks = inspector.get_foreign_keys(table)
-                if fks:
-                    schema_parts.append("Foreign Keys:")
-                    for fk in fks:
-                        schema_parts.append(
-                            f"  - {', '.join(fk['constrained_columns'])} -> "
-                            f"{fk['referred_table']}.{', '.join(fk['referred_columns'])}"
-                        )
-                
-                # Get indexes
-                indexes = inspector.get_indexes(table)
-                if indexes:
-                    schema_parts.append("Indexes:")
-                    for idx in indexes:
-                        unique = "UNIQUE" if idx['unique'] else ""
-                        schema_parts.append(
-                            f"  - {idx['name']}: {', '.join(idx['column_names'])} {unique}"
-                        )
+                tables.append({
+                    "name": table,
+                    "columns": [
+                        {
+                            "name": col['name'],
+                            "type": str(col['type']),
+                            "nullable": bool(col['nullable'])
+                        }
+                        for col in inspector.get_columns(table)
+                    ],
+                    "primary_key": list(pk.get('constrained_columns') or []) if pk else [],
+                    "foreign_keys": [
+                        {
+                            "constrained_columns": list(fk['constrained_columns']),
+                            "referred_table": fk['referred_table'],
+                            "referred_columns": list(fk['referred_columns'])
+                        }
+                        for fk in inspector.get_foreign_keys(table)
+                    ],
+                    "indexes": [
+                        {
+                            "name": idx['name'],
+                            "column_names": [name for name in idx['column_names'] if name],
+                            "unique": bool(idx['unique'])
+                        }
+                        for idx in inspector.get_indexes(table)
+                    ]
+                })
             
-            return "\n".join(schema_parts)
+            return tables
+    
+    async def _get_sql_schema(
+        self,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        schema_format: str = "verbose"
+    ) -> str:
+        """Get SQL database schema"""
+        tables = await self.get_sql_tables(database_type, connection_params)
+        return render_schema(tables, schema_format)
     
     async def _get_mongodb_schema(
         self,
@@ -432,7 +647,8 @@ class DatabaseManager:
         sql_query: str,
         database_type: str,
         connection_params: Dict[str, Any],
-        timeout: int = None
+        timeout: int = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> List[Dict[str, Any]]:
         """
         Execute SQL query and return results
@@ -442,6 +658,7 @@ class DatabaseManager:
             database_type: Type of database
             connection_params: Connection parameters
             timeout: Query timeout in seconds
+            cancel_token: Token that aborts the query server-side when cancelled
             
         Returns:
             List of result rows as dictionaries
@@ -449,9 +666,9 @@ class DatabaseManager:
         logger.info(f"Executing query on {database_type}")
         
         if database_type == "mongodb":
-            return await self._execute_mongodb_query(sql_query, connection_params)
+            return await self._execute_mongodb_query(sql_query, connection_params, timeout, cancel_token)
         elif database_type == "bigquery":
-            return await self._execute_bigquery_query(sql_query, connection_params, timeout)
+            return await self._execute_bigquery_query(sql_query, connection_params, timeout, cancel_token)
         elif database_type == "cassandra":
             return await self._execute_cassandra_query(sql_query, connection_params)
         elif database_type == "dynamodb":
@@ -461,97 +678,407 @@ class DatabaseManager:
                 sql_query,
                 database_type,
                 connection_params,
-                timeout
+                timeout,
+                cancel_token
             )
     
-    async def _execute_sql_query(
+    def _apply_timeout(
+        self,
+        conn,
+        database_type: str,
+        timeout: int,
+        cancel_token: Optional[CancellationToken] = None
+    ):
+        """Apply a server-side statement timeout for the dialect"""
+        if database_type in ("postgresql", "redshift"):
+            conn.execute(text(f"SET statement_timeout = {timeout * 1000}"))
+        elif database_type == "mysql":
+            conn.execute(text(f"SET SESSION max_execution_time = {timeout * 1000}"))
+        elif database_type == "mariadb":
+            conn.execute(text(f"SET SESSION max_statement_time = {timeout}"))
+        elif database_type == "snowflake":
+            conn.execute(text(f"ALTER SESSION SET STATEMENT_TIMEOUT_IN_SECONDS = {timeout}"))
+        elif database_type == "oracle":
+            # Round-trip timeout in milliseconds (python-oracledb)
+            conn.connection.dbapi_connection.call_timeout = timeout * 1000
+        elif database_type == "sqlite":
+            # Progress handler aborts the statement once the deadline passes
+            deadline = time.monotonic() + timeout
+            conn.connection.dbapi_connection.set_progress_handler(
+                lambda: int(
+                    time.monotonic() > deadline
+                    or bool(cancel_token and cancel_token.is_cancelled)
+                ),
+                10000
+            )
+        # mssql: enforced through the pymssql connect timeout
+    
+    def _cancel_handle(
+        self,
+        conn,
+        database_type: str,
+        connection_params: Dict[str, Any]
+    ):
+        """Build a callback that cancels the statement running on this connection"""
+        dbapi_connection = conn.connection.dbapi_connection
+        
+        if database_type in ("postgresql", "redshift"):
+            pid = conn.execute(text("SELECT pg_backend_pid()")).scalar()
+            statement = f"SELECT pg_cancel_backend({int(pid)})"
+        elif database_type in ("mysql", "mariadb"):
+            connection_id = conn.execute(text("SELECT CONNECTION_ID()")).scalar()
+            statement = f"KILL QUERY {int(connection_id)}"
+        elif database_type == "snowflake":
+            session_id = dbapi_connection.session_id
+            statement = f"SELECT SYSTEM$CANCEL_ALL_QUERIES({int(session_id)})"
+        elif database_type == "mssql":
+            # pymssql exposes cancel() on the underlying _mssql connection
+            return getattr(dbapi_connection, "_conn", dbapi_connection).cancel
+        elif database_type == "oracle":
+            return dbapi_connection.cancel
+        elif database_type == "sqlite":
+            return dbapi_connection.interrupt
+        else:
+            return None
+        
+        def cancel():
+            # Cancel from a separate session, the query's own is busy
+            with self.get_connection(database_type, connection_params) as cancel_conn:
+                cancel_conn.execute(text(statement))
+            logger.info(f"Cancelled running {database_type} query")
+        
+        return cancel
+    
+    def _run_sql_query(
         self,
         sql_query: str,
         database_type: str,
         connection_params: Dict[str, Any],
-        timeout: int = None
+        timeout: int,
+        cancel_token: Optional[CancellationToken] = None
     ) -> List[Dict[str, Any]]:
-        """Execute SQL query"""
-        timeout = timeout or settings.MAX_QUERY_TIMEOUT
+        """Execute SQL query on the calling (worker) thread"""
+        connect_args = {"timeout": timeout} if database_type == "mssql" else None
         
-        with self.get_connection(database_type, connection_params) as conn:
+        with self.get_connection(database_type, connection_params, connect_args) as conn:
             # Set query timeout
-            if database_type == "postgresql":
-                conn.execute(text(f"SET statement_timeout = {timeout * 1000}"))
-            elif database_type == "mysql":
-                conn.execute(text(f"SET SESSION max_execution_time = {timeout * 1000}"))
-            
-            # Execute query
-            result = conn.execute(text(sql_query))
+            self._apply_timeout(conn, database_type, timeout, cancel_token)
             
-            # Convert to list of dicts
-            columns = result.keys()
-            rows = []
+            unregister = lambda: None
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+                cancel = self._cancel_handle(conn, database_type, connection_params)
+                if cancel is not None:
+                    unregister = cancel_token.register(cancel)
             
-            for row in result.fetchmany(settings.MAX_RESULT_ROWS):
-                rows.append(dict(zip(columns, row)))
+            try:
+                # Execute query
+                result = conn.execute(text(sql_query))
+                
+                # Convert to list of dicts
+                columns = result.keys()
+                rows = []
+                
+                for row in result.fetchmany(settings.MAX_RESULT_ROWS):
+                    rows.append(dict(zip(columns, row)))
+            except Exception:
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    raise QueryCancelledError(cancel_token.reason or "cancelled")
+                raise
+            finally:
+                unregister()
             
             logger.info(f"Query executed successfully, {len(rows)} rows returned")
             return rows
     
-    async def _execute_mongodb_query(
+    async def _execute_sql_query(
+        self,
+        sql_query: str,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        timeout: int = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute SQL query in a worker thread so it can be cancelled"""
+        timeout = timeout or settings.MAX_QUERY_TIMEOUT
+        
+        return await asyncio.to_thread(
+            self._run_sql_query,
+            sql_query,
+            database_type,
+            connection_params,
+            timeout,
+            cancel_token
+        )
+    
+    def _produce_batches(
+        self,
+        sql_query: str,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        batch_size: int,
+        max_rows: Optional[int],
+        timeout: int,
+        cancel_token: Optional[CancellationToken],
+        batches: queue.Queue,
+        stopped: threading.Event
+    ):
+        """Fetch result batches on a worker thread into a bounded queue"""
+        def put(item) -> bool:
+            # Block while the consumer is busy, give up once it has stopped
+            while not stopped.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        try:
+            connect_args = {"timeout": timeout} if database_type == "mssql" else None
+            
+            with self.get_connection(database_type, connection_params, connect_args) as conn:
+                self._apply_timeout(conn, database_type, timeout, cancel_token)
+                
+                unregister = lambda: None
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                    cancel = self._cancel_handle(conn, database_type, connection_params)
+                    if cancel is not None:
+                        unregister = cancel_token.register(cancel)
+                
+                try:
+                    # Server-side cursor where the driver supports it
+                    result = conn.execution_options(stream_results=True).execute(text(sql_query))
+                    columns = list(result.keys())
+                    fetched = 0
+                    
+                    while max_rows is None or fetched < max_rows:
+                        size = batch_size if max_rows is None else min(batch_size, max_rows - fetched)
+                        rows = result.fetchmany(size)
+                        if not rows or not put(pd.DataFrame.from_records(rows, columns=columns)):
+                            break
+                        fetched += len(rows)
+                    result.close()
+                except Exception:
+                    if cancel_token is not None and cancel_token.is_cancelled:
+                        raise QueryCancelledError(cancel_token.reason or "cancelled")
+                    raise
+                finally:
+                    unregister()
+            
+            logger.info(f"Streamed {fetched} rows in batches of {batch_size}")
+            put(None)
+        except Exception as e:
+            put(e)
+    
+    async def stream_query(
+        self,
+        sql_query: str,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        batch_size: int = None,
+        max_rows: Optional[int] = None,
+        timeout: int = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> AsyncIterator[pd.DataFrame]:
+        """
+        Execute a query and yield its result as DataFrame batches
+        
+        Rows are fetched on a worker thread at most two batches ahead of the
+        consumer, so memory is bounded by the batch size rather than the
+        result size. NON_STREAMING_DATABASES yield their regular result,
+        capped at MAX_RESULT_ROWS, as a single batch.
+        
+        Args:
+            sql_query: SQL query to execute
+            database_type: Type of database
+            connection_params: Connection parameters
+            batch_size: Rows per batch (defaults to STREAM_BATCH_ROWS)
+            max_rows: Stop after this many rows
+            timeout: Query timeout in seconds
+            cancel_token: Token that aborts the query server-side when cancelled
+        
+        Yields:
+            Record batches
+        """
+        if database_type in NON_STREAMING_DATABASES:
+            rows = await self.execute_query(sql_query, database_type, connection_params, timeout, cancel_token)
+            if rows:
+                yield pd.DataFrame(rows)
+            return
+        
+        batches: queue.Queue = queue.Queue(maxsize=2)
+        stopped = threading.Event()
+        producer = threading.Thread(
+            target=self._produce_batches,
+            args=(
+                sql_query,
+                database_type,
+                connection_params,
+                batch_size or settings.STREAM_BATCH_ROWS,
+                max_rows,
+                timeout or settings.MAX_QUERY_TIMEOUT,
+                cancel_token,
+                batches,
+                stopped
+            ),
+            daemon=True
+        )
+        producer.start()
+        
+        def take():
+            # Poll so the executor thread is released once the stream stops,
+            # including when this consumer is cancelled while waiting
+            while not stopped.is_set():
+                try:
+                    return batches.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return None
+        
+        try:
+            while True:
+                item = await asyncio.to_thread(take)
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+    
+    def _run_mongodb_query(
         self,
         query: str,
-        connection_params: Dict[str, Any]
+        connection_params: Dict[str, Any],
+        timeout: int,
+        cancel_token: Optional[CancellationToken] = None
     ) -> List[Dict[str, Any]]:
-        """Execute MongoDB aggregation pipeline"""
-        import json
+        """Execute a MongoDB aggregation pipeline on the calling (worker) thread"""
+        # Parse the query as JSON (should be aggregation pipeline)
+        try:
+            pipeline = json.loads(query)
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid MongoDB query format: {str(e)}")
+            raise ValueError("MongoDB query must be valid JSON aggregation pipeline")
+        
+        spec = pipeline[0] if pipeline and isinstance(pipeline[0], dict) else {}
+        collection_name = spec.get("collection", "")
+        if not collection_name:
+            raise ValueError("Collection name not specified in query")
         
         with self.get_connection("mongodb", connection_params) as client:
             db_name = connection_params.get("database") or settings.MONGODB_DB
-            db = client[db_name]
+            collection = client[db_name][collection_name]
             
-            # Parse the query as JSON (should be aggregation pipeline)
-            try:
-                pipeline = json.loads(query)
-                collection_name = pipeline[0].get("collection", "")
-                
-                if not collection_name:
-                    raise ValueError("Collection name not specified in query")
-                
-                collection = db[collection_name]
-                results = list(collection.aggregate(pipeline[1:]))
-                
-                # Convert ObjectId to string
-                for result in results:
-                    if "_id" in result:
-                        result["_id"] = str(result["_id"])
-                
+            if not settings.MONGODB_BOUNDED_EXECUTION:
+                # ObjectId, Decimal128 and binary values become JSON types
+                results = to_jsonable(list(collection.aggregate(pipeline[1:])), keep_datetimes=True)
                 logger.info(f"MongoDB query executed, {len(results)} documents returned")
                 return results
-            except json.JSONDecodeError as e:
-                logger.error(f"Invalid MongoDB query format: {str(e)}")
-                raise ValueError("MongoDB query must be valid JSON aggregation pipeline")
+            
+            stages = bound_pipeline(pipeline[1:], spec.get("fields"), settings.MAX_RESULT_ROWS)
+            cursor = collection.aggregate(
+                stages,
+                allowDiskUse=settings.MONGODB_ALLOW_DISK_USE,
+                batchSize=settings.MONGODB_BATCH_SIZE,
+                maxTimeMS=timeout * 1000
+            )
+            
+            unregister = lambda: None
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+                unregister = cancel_token.register(cursor.close)
+            
+            try:
+                # Documents are converted batch by batch as the cursor fetches them
+                results = list(jsonable_rows(cursor, keep_datetimes=True))
+            except Exception:
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    raise QueryCancelledError(cancel_token.reason or "cancelled")
+                raise
+            finally:
+                unregister()
+                cursor.close()
+            
+            if cancel_token is not None and cancel_token.is_cancelled:
+                raise QueryCancelledError(cancel_token.reason or "cancelled")
+        
+        logger.info(f"MongoDB query executed, {len(results)} documents returned")
+        return results
     
-    async def _execute_bigquery_query(
+    async def _execute_mongodb_query(
         self,
-        sql_query: str,
+        query: str,
         connection_params: Dict[str, Any],
-        timeout: int = None
+        timeout: int = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> List[Dict[str, Any]]:
-        """Execute BigQuery query"""
+        """Execute MongoDB aggregation pipeline in a worker thread"""
         timeout = timeout or settings.MAX_QUERY_TIMEOUT
         
+        return await asyncio.to_thread(
+            self._run_mongodb_query,
+            query,
+            connection_params,
+            timeout,
+            cancel_token
+        )
+    
+    def _run_bigquery_query(
+        self,
+        sql_query: str,
+        connection_params: Dict[str, Any],
+        timeout: int,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute BigQuery query on the calling (worker) thread"""
         with self.get_connection("bigquery", connection_params) as client:
-            # Execute query with timeout
-            query_job = client.query(sql_query, timeout=timeout)
+            # Execute query with a server-side job timeout
+            job_config = bigquery.QueryJobConfig(job_timeout_ms=timeout * 1000)
+            query_job = client.query(sql_query, job_config=job_config, timeout=timeout)
             
-            # Wait for results
-            results = query_job.result(max_results=settings.MAX_RESULT_ROWS)
+            unregister = lambda: None
+            if cancel_token is not None:
+                unregister = cancel_token.register(query_job.cancel)
             
-            # Convert to list of dicts
-            rows = []
-            for row in results:
-                rows.append(dict(row.items()))
+            try:
+                # Wait for results
+                results = query_job.result(max_results=settings.MAX_RESULT_ROWS, timeout=timeout)
+                
+                # Convert to list of dicts
+                rows = []
+                for row in results:
+                    rows.append(dict(row.items()))
+            except Exception:
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    raise QueryCancelledError(cancel_token.reason or "cancelled")
+                raise
+            finally:
+                unregister()
             
             logger.info(f"BigQuery query executed, {len(rows)} rows returned")
             return rows
     
+    async def _execute_bigquery_query(
+        self,
+        sql_query: str,
+        connection_params: Dict[str, Any],
+        timeout: int = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute BigQuery query in a worker thread so it can be cancelled"""
+        timeout = timeout or settings.MAX_QUERY_TIMEOUT
+        
+        return await asyncio.to_thread(
+            self._run_bigquery_query,
+            sql_query,
+            connection_params,
+            timeout,
+            cancel_token
+        )
+    
     async def _execute_cassandra_query(
         self,
         cql_query: str,
@@ -606,6 +1133,86 @@ class DatabaseManager:
             except json.JSONDecodeError:
                 raise ValueError("Invalid JSON format for DynamoDB query")
     
+    def _run_sample_table(
+        self,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        table_name: str,
+        sample_rows: int,
+        timeout: int,
+        skip_if_row_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Count a table and read a bounded sample on the calling (worker) thread"""
+        with self.get_connection(database_type, connection_params) as conn:
+            self._apply_timeout(conn, database_type, timeout)
+            
+            # Compile through SQLAlchemy for dialect-correct quoting and limits
+            source = sql_table(table_name)
+            row_count = conn.execute(select(func.count()).select_from(source)).scalar() or 0
+            if row_count == skip_if_row_count:
+                return {"row_count": int(row_count), "columns": [], "rows": None, "sampled": False}
+            
+            query = select(literal_column("*")).select_from(source)
+            sampled = False
+            if row_count > sample_rows and QuerySampler.supports(database_type):
+                # Oversample slightly so the capped read still fills up
+                percent = min(100.0, 150.0 * sample_rows / row_count)
+                plan = QuerySampler().rewrite(
+                    str(query.compile(dialect=conn.dialect)),
+                    database_type,
+                    float(f"{percent:.4g}")
+                )
+                if plan:
+                    query = text(plan["sql"])
+                    sampled = True
+            if not sampled:
+                query = query.limit(sample_rows)
+            
+            result = conn.execute(query)
+            columns = list(result.keys())
+            rows = [dict(zip(columns, row)) for row in result.fetchmany(sample_rows)]
+            
+            return {
+                "row_count": int(row_count),
+                "columns": columns,
+                "rows": rows,
+                "sampled": sampled
+            }
+    
+    async def sample_table(
+        self,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        table_name: str,
+        sample_rows: int,
+        timeout: int = None,
+        skip_if_row_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Count a table and read a bounded random sample of its rows
+        
+        Args:
+            database_type: Type of SQL database
+            connection_params: Connection parameters
+            table_name: Table to sample
+            sample_rows: Maximum number of rows to read
+            timeout: Statement timeout in seconds
+            skip_if_row_count: Skip the sample read (rows is None) when the
+                table still has this many rows
+            
+        Returns:
+            Row count, column names, sampled rows and whether table sampling was used
+        """
+        return await asyncio.to_thread(
+            self._run_sample_table,
+            database_type,
+            connection_params,
+            table_name,
+            sample_rows,
+            timeout or settings.MAX_QUERY_TIMEOUT,
+            skip_if_row_count
+        )
+    
     async def test_connection(
         self,
         database_type: str,
@@ -653,13 +1260,7 @@ class DatabaseManager:
                 db = client[db_name]
                 collection = db[table_name]
                 
-                results = list(collection.find().limit(limit))
-                
-                for result in results:
-                    if "_id" in result:
-                        result["_id"] = str(result["_id"])
-                
-                return results
+                return to_jsonable(list(collection.find().limit(limit)), keep_datetimes=True)
         else:
             query = f"SELECT * FROM {table_name} LIMIT {limit}"
             return await self._execute_sql_query(
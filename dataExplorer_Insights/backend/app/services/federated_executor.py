@@ -0,0 +1,318 @@
+"""
+Federated Executor - Fan a query out to multiple connections concurrently
+Partial results are unioned as each target finishes and re-aggregated locally
+"""
+
+from typing import Dict, List, Any, Optional
+import asyncio
+import logging
+import re
+import time
+
+import pandas as pd
+
+from app.core.config import settings
+from app.services.database_manager import DatabaseManager
+from app.services.query_cancellation import CancellationToken
+from app.services.sql_parser import parse_select_columns, parse_order_by, parse_limit, strip_limit
+
+logger = logging.getLogger(__name__)
+
+# How partial aggregates combine across targets
+_MERGE_FUNCTIONS = {
+    "SUM": "sum",
+    "COUNT": "sum",
+    "MIN": "min",
+    "MAX": "max"
+}
+
+
+class ResultMerger:
+    """Union partial results from several targets and re-aggregate them"""
+    
+    def __init__(self, sql_query: str):
+        """Derive the merge plan from the outer select list"""
+        self.columns = parse_select_columns(sql_query)
+        self.limit = parse_limit(sql_query)
+        self.aggregates = {
+            col["alias"]: col for col in self.columns if col["aggregate"]
+        }
+        self.group_keys = [
+            col["alias"] for col in self.columns if not col["aggregate"] and col["mergeable"]
+        ]
+        # Expressions over aggregates, e.g. SUM(a) / COUNT(*), have no merge rule
+        self.unmergeable = [
+            col["alias"] for col in self.columns if not col["mergeable"]
+        ]
+        self.warnings: List[str] = []
+        self._partials: List[pd.DataFrame] = []
+        # Result column names of the first target, keyed by select-list alias
+        self._output_names: Optional[Dict[str, str]] = None
+        
+        order_by = self._resolve_order(parse_order_by(sql_query))
+        self.order_resolved = order_by is not None
+        self.order_by = order_by or []
+        if not self.order_resolved:
+            self.warnings.append(
+                "ORDER BY could not be matched to the selected columns, rows are not "
+                "re-sorted across targets" + (
+                    f" and the top {self.limit} is approximate" if self.limit is not None else ""
+                )
+            )
+        
+        # Weight AVG merges by a COUNT column of the same query when present
+        self.count_column = next(
+            (alias for alias, col in self.aggregates.items()
+             if col["aggregate"] == "COUNT" and not col["distinct"]),
+            None
+        )
+    
+    @staticmethod
+    def _normalise(expression: str) -> str:
+        """Compare expressions without whitespace or case differences"""
+        return re.sub(r"\s+", "", expression).upper()
+    
+    def _resolve_order(self, order_by: List[tuple]) -> Optional[List[tuple]]:
+        """
+        Map ORDER BY items to select-list aliases
+        
+        Items may be aliases, ordinals, selected expressions or qualified
+        column names. Returns None when any item is not in the select list,
+        since the merged rows cannot then be sorted by it.
+        """
+        by_name = {}
+        for col in self.columns:
+            by_name.setdefault(self._normalise(col["expression"]), col["alias"])
+            if re.fullmatch(r"[\w\"`\[\].]+", col["expression"]):
+                by_name.setdefault(self._normalise(col["expression"].split(".")[-1].strip("\"`[]")), col["alias"])
+        for col in self.columns:
+            by_name[self._normalise(col["alias"])] = col["alias"]
+        
+        resolved = []
+        for item, ascending in order_by:
+            if item.isdigit() and 1 <= int(item) <= len(self.columns):
+                alias = self.columns[int(item) - 1]["alias"]
+            else:
+                alias = by_name.get(self._normalise(item))
+            if alias is None:
+                return None
+            resolved.append((alias, ascending))
+        return resolved
+    
+    @property
+    def is_aggregate(self) -> bool:
+        """Whether the partial results need re-aggregation"""
+        return bool(self.aggregates)
+    
+    @property
+    def approximate(self) -> bool:
+        """Whether the merged top N may differ from the query's top N"""
+        return self.limit is not None and not self.order_resolved
+    
+    def target_sql(self, sql_query: str) -> str:
+        """
+        Query to run on each target
+        
+        Grouped results are re-aggregated and limited locally, so targets
+        return every group: a group outside one target's top N can still
+        make the merged top N. The LIMIT stays when the merged groups cannot
+        be ranked by the query's ORDER BY.
+        """
+        if self.is_aggregate and self.group_keys and self.limit is not None and self.order_resolved:
+            return strip_limit(sql_query)
+        return sql_query
+    
+    def add(self, source: str, rows: List[Dict[str, Any]]):
+        """Add one target's partial result as soon as it arrives"""
+        if not rows:
+            return
+        
+        df = pd.DataFrame(rows)
+        if len(df.columns) == len(self.columns):
+            # Drivers name unaliased expressions differently (count, COUNT(*),
+            # f0_), so columns are matched to the select list by position
+            aliases = [col["alias"] for col in self.columns]
+            if self._output_names is None:
+                self._output_names = dict(zip(aliases, df.columns))
+            df.columns = aliases
+        if not self.is_aggregate:
+            df["_source"] = source
+        self._partials.append(df)
+    
+    def _reaggregate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Combine partial aggregates into final values"""
+        keys = [key for key in self.group_keys if key in df.columns]
+        agg_spec = {}
+        
+        for alias, col in self.aggregates.items():
+            if alias not in df.columns:
+                continue
+            if col["distinct"]:
+                self.warnings.append(
+                    f"{alias}: distinct counts cannot be merged exactly, summed as an upper bound"
+                )
+            if col["aggregate"] == "AVG":
+                if self.count_column and self.count_column in df.columns:
+                    df[f"__weighted_{alias}"] = df[alias] * df[self.count_column]
+                    agg_spec[f"__weighted_{alias}"] = "sum"
+                else:
+                    self.warnings.append(
+                        f"{alias}: averages merged without row counts, result is unweighted"
+                    )
+                    agg_spec[alias] = "mean"
+                continue
+            agg_spec[alias] = _MERGE_FUNCTIONS.get(col["aggregate"], "sum")
+        
+        if not agg_spec:
+            raise ValueError("Partial results do not contain the aggregate columns of the query")
+        
+        if keys:
+            merged = df.groupby(keys, dropna=False, sort=False).agg(agg_spec).reset_index()
+        else:
+            merged = df.agg(agg_spec).to_frame().T
+        
+        for alias, col in self.aggregates.items():
+            weighted = f"__weighted_{alias}"
+            if weighted in merged.columns:
+                merged[alias] = merged[weighted] / merged[self.count_column].where(
+                    merged[self.count_column] != 0
+                )
+                merged = merged.drop(columns=[weighted])
+        
+        ordered = [col["alias"] for col in self.columns if col["alias"] in merged.columns]
+        return merged[ordered]
+    
+    def result(self) -> List[Dict[str, Any]]:
+        """Final merged rows with the query's ORDER BY and LIMIT reapplied"""
+        if not self._partials:
+            return []
+        
+        df = pd.concat(self._partials, ignore_index=True)
+        if self.is_aggregate:
+            df = self._reaggregate(df)
+        
+        order = [(col, asc) for col, asc in self.order_by if col in df.columns]
+        if order:
+            df = df.sort_values(
+                by=[col for col, _ in order],
+                ascending=[asc for _, asc in order]
+            )
+        
+        limit = min(self.limit or settings.MAX_RESULT_ROWS, settings.MAX_RESULT_ROWS)
+        df = df.head(limit)
+        if self._output_names:
+            df = df.rename(columns=self._output_names)
+        
+        return df.astype(object).where(pd.notnull(df), None).to_dict(orient="records")
+
+
+class FederatedExecutor:
+    """Execute the same query on many connections concurrently"""
+    
+    def __init__(self, db_manager: DatabaseManager):
+        """Initialize with the shared database manager"""
+        self.db_manager = db_manager
+    
+    def _run_target(
+        self,
+        sql_query: str,
+        target: Dict[str, Any],
+        timeout: int,
+        cancel_token: CancellationToken
+    ) -> List[Dict[str, Any]]:
+        """Run one target's query in a worker thread with its own event loop"""
+        return asyncio.run(
+            self.db_manager.execute_query(
+                sql_query=sql_query,
+                database_type=target["database_type"],
+                connection_params=target["connection_params"],
+                timeout=timeout,
+                cancel_token=cancel_token
+            )
+        )
+    
+    async def _execute_target(
+        self,
+        sql_query: str,
+        target: Dict[str, Any],
+        timeout: int
+    ) -> Dict[str, Any]:
+        """Execute on a single target and report its status"""
+        start = time.perf_counter()
+        status = {"name": target["name"], "database_type": target["database_type"]}
+        cancel_token = CancellationToken()
+        
+        try:
+            rows = await asyncio.wait_for(
+                asyncio.to_thread(self._run_target, sql_query, target, timeout, cancel_token),
+                timeout=timeout
+            )
+            status.update({"status": "success", "rows": rows, "row_count": len(rows)})
+        except asyncio.TimeoutError:
+            # Stop the abandoned query on the server as well
+            cancel_token.cancel("federated target timed out")
+            logger.warning(f"Federated target {target['name']} timed out after {timeout}s")
+            status.update({"status": "timeout", "rows": [], "row_count": 0})
+        except Exception as e:
+            logger.error(f"Federated target {target['name']} failed: {str(e)}")
+            status.update({"status": "error", "error": str(e), "rows": [], "row_count": 0})
+        
+        status["execution_time"] = round(time.perf_counter() - start, 3)
+        return status
+    
+    async def execute(
+        self,
+        sql_by_dialect: Dict[str, str],
+        targets: List[Dict[str, Any]],
+        timeout: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute on all targets concurrently and merge the partial results
+        
+        Args:
+            sql_by_dialect: SQL query per database type
+            targets: Targets with name, database_type and connection_params
+            timeout: Per-target timeout in seconds
+        
+        Returns:
+            Merged rows, per-target status and merge warnings
+        """
+        timeout = timeout or settings.FEDERATED_TARGET_TIMEOUT
+        logger.info(f"Fanning out query to {len(targets)} targets")
+        
+        primary_sql = sql_by_dialect[targets[0]["database_type"]]
+        merger = ResultMerger(primary_sql)
+        if merger.unmergeable:
+            raise ValueError(
+                f"Cannot merge {', '.join(merger.unmergeable)} across targets; "
+                "select the underlying aggregates separately"
+            )
+        
+        tasks = [
+            asyncio.create_task(
+                self._execute_target(
+                    merger.target_sql(sql_by_dialect[target["database_type"]]),
+                    target,
+                    timeout
+                )
+            )
+            for target in targets
+        ]
+        
+        target_status = []
+        for completed in asyncio.as_completed(tasks):
+            status = await completed
+            merger.add(status["name"], status.pop("rows"))
+            target_status.append(status)
+        
+        succeeded = [status for status in target_status if status["status"] == "success"]
+        if not succeeded:
+            raise RuntimeError("Query failed on all federated targets")
+        
+        return {
+            "rows": merger.result(),
+            "targets": target_status,
+            "reaggregated": merger.is_aggregate,
+            "approximate": merger.approximate,
+            "warnings": sorted(set(merger.warnings))
+        }
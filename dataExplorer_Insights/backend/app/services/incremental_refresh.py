@@ -0,0 +1,575 @@
+"""
+Incremental Refresh - Watermark-based refresh of cached time-series results
+Queries over a monotonically increasing date or id column keep a columnar
+copy of their result and a watermark. When the cached response expires only
+rows past the watermark are fetched, merged into the stored result, and the
+statistics are updated from mergeable aggregates instead of a full recompute.
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timedelta
+import json
+import logging
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.serialization import dumps, loads
+from app.services.cache_manager import CacheManager
+from app.services.database_manager import DatabaseManager
+from app.services.insights_analyzer import InsightsAnalyzer
+from app.services.query_cancellation import CancellationToken
+from app.services.schema_cache import NON_SQL_DATABASES
+from app.services.streaming_analyzer import Moments
+from app.services.sql_parser import (
+    get_clause,
+    parse_limit,
+    parse_order_by,
+    parse_select_columns,
+    split_top_level,
+    top_level_clauses
+)
+
+logger = logging.getLogger(__name__)
+
+# Functions that floor a date column to a bucket start
+_TRUNCATION_FUNCTIONS = (
+    "DATE", "DATETIME", "DATE_TRUNC", "DATETRUNC", "TIMESTAMP_TRUNC", "TRUNC",
+    "CAST", "CONVERT", "STRFTIME", "DATE_FORMAT", "TO_CHAR", "TO_DATE"
+)
+
+# Truncations that take a format string
+_FORMAT_FUNCTIONS = ("STRFTIME", "DATE_FORMAT", "TO_CHAR")
+
+# Format strings that keep buckets in ISO order (no week or day-of-year numbers)
+_ISO_FORMAT = re.compile(r"^(%Y|%m|%d|%H|%M|%S|%i|%s|YYYY|MM|DD|HH24|MI|SS|[-: T])+$")
+
+# Date parts and type names that appear as bare words in truncation calls
+_NON_COLUMN_WORDS = {
+    "AS", "YEAR", "QUARTER", "MONTH", "WEEK", "DAY", "HOUR", "MINUTE", "SECOND",
+    "DATE", "DATETIME", "TIMESTAMP", "VARCHAR", "NVARCHAR", "CHAR", "TEXT"
+}
+
+# Column names that grow with inserts
+_MONOTONIC_NAME = re.compile(r"(^id$|_at$|_on$|date|time|day|created)", re.IGNORECASE)
+
+# Windows relative to the current time move between refreshes
+_RELATIVE_TIME = re.compile(
+    r"\b(CURRENT_DATE|CURRENT_TIMESTAMP|NOW|GETDATE|SYSDATE|SYSDATETIME|TODAY)\b|'now'",
+    re.IGNORECASE
+)
+
+_IDENTIFIER = re.compile(r'"[^"]+"|`[^`]+`|\[[^\]]+\]|[A-Za-z_][\w$]*(?:\.(?:"[^"]+"|`[^`]+`|\[[^\]]+\]|[A-Za-z_][\w$]*))*')
+
+
+def normalize_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convert result rows to JSON-safe values"""
+    return loads(dumps(rows))
+
+
+def _source_column(expression: str) -> Optional[str]:
+    """Column a plain or date-truncated select expression reads"""
+    expression = expression.strip()
+    if _IDENTIFIER.fullmatch(expression):
+        return expression
+    
+    match = re.match(r"(\w+)\s*\((.*)\)$", expression, re.DOTALL)
+    if not match or match.group(1).upper() not in _TRUNCATION_FUNCTIONS:
+        return None
+    
+    function, body = match.group(1).upper(), match.group(2)
+    if function in _FORMAT_FUNCTIONS and not all(
+        _ISO_FORMAT.match(literal) for literal in re.findall(r"'([^']*)'", body)
+    ):
+        return None
+    body = re.sub(r"'[^']*'|\b\d+\b", " ", body)
+    
+    candidates = {
+        token.group(0)
+        for token in _IDENTIFIER.finditer(body)
+        if token.group(0).upper() not in _NON_COLUMN_WORDS
+        and not body[token.end():].lstrip().startswith("(")
+    }
+    return candidates.pop() if len(candidates) == 1 else None
+
+
+def _parse_keys(values: pd.Series, kind: str) -> pd.Series:
+    """Parse watermark column values for comparison"""
+    if kind == "numeric":
+        return pd.to_numeric(values, errors="coerce")
+    return pd.to_datetime(values.astype(str), errors="coerce", format="ISO8601")
+
+
+def _key_kind(values: pd.Series) -> Optional[str]:
+    """Classify a candidate watermark column, None if unusable"""
+    values = values.dropna()
+    if values.empty:
+        return None
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return "numeric"
+    if _parse_keys(values, "datetime").notna().all():
+        return "datetime"
+    return None
+
+
+def _literal(value: Any, kind: str) -> str:
+    """SQL literal for a watermark value"""
+    if kind == "numeric":
+        return repr(int(value)) if float(value).is_integer() else repr(float(value))
+    stamp = pd.Timestamp(value)
+    if stamp == stamp.normalize():
+        return f"'{stamp.strftime('%Y-%m-%d')}'"
+    return f"'{stamp.strftime('%Y-%m-%d %H:%M:%S')}'"
+
+
+def _with_predicate(sql: str, predicate: str) -> str:
+    """Add a predicate to the outer WHERE clause"""
+    clauses = top_level_clauses(sql)
+    
+    for index, (name, _, end) in enumerate(clauses):
+        if name == "WHERE":
+            stop = clauses[index + 1][1] if index + 1 < len(clauses) else len(sql)
+            return f"{sql[:end]} {predicate} AND ({sql[end:stop].strip()}) {sql[stop:]}".rstrip()
+    
+    for name, start, _ in clauses:
+        if name in ("GROUP BY", "HAVING", "ORDER BY", "WINDOW", "QUALIFY"):
+            return f"{sql[:start].rstrip()} WHERE {predicate} {sql[start:]}"
+    return f"{sql} WHERE {predicate}"
+
+
+def plan_refresh(sql_query: Optional[str], rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Detect the watermark column of a query
+    
+    Grouped queries qualify when a group key is a date or a date truncation;
+    the last bucket and anything after it are re-aggregated. Row queries
+    qualify when they select a date or id column; rows from the watermark
+    on are re-fetched. Queries with LIMIT, set operations, window functions
+    or truncated results always run in full.
+    
+    Args:
+        sql_query: Executed SQL query
+        rows: Normalized result rows
+    
+    Returns:
+        Refresh plan, or None if the query cannot be refreshed incrementally
+    """
+    if not sql_query or not rows or len(rows) >= settings.MAX_RESULT_ROWS:
+        return None
+    
+    sql = sql_query.strip().rstrip(";")
+    if not re.match(r"\s*SELECT\b", sql, re.IGNORECASE) or re.search(r"\bOVER\s*\(", sql, re.IGNORECASE):
+        return None
+    clause_names = {name for name, _, _ in top_level_clauses(sql)}
+    if clause_names & {"UNION", "OFFSET", "FETCH"} or parse_limit(sql) is not None:
+        return None
+    
+    df = pd.DataFrame(rows)
+    columns = parse_select_columns(sql)
+    group_by = get_clause(sql, "GROUP BY")
+    candidates: List[Tuple[str, str]] = []
+    
+    if group_by:
+        group_keys = [key.strip().lower() for key in split_top_level(group_by)]
+        for position, column in enumerate(columns, start=1):
+            if column["aggregate"] is None and (
+                column["expression"].lower() in group_keys
+                or column["alias"].lower() in group_keys
+                or str(position) in group_keys
+            ):
+                candidates.append((column["alias"], column["expression"]))
+        mode = "groups"
+    else:
+        if any(column["aggregate"] or not column["mergeable"] for column in columns):
+            return None
+        by_alias = {column["alias"]: column["expression"] for column in columns}
+        names = [name for name, _ in parse_order_by(sql)] + list(by_alias)
+        for name in dict.fromkeys(names):
+            expression = by_alias.get(name)
+            if _MONOTONIC_NAME.search(name):
+                candidates.append((name, expression if expression and expression != "*" else name))
+        mode = "rows"
+    
+    relative = bool(_RELATIVE_TIME.search(get_clause(sql, "WHERE") or ""))
+    for alias, expression in candidates:
+        if alias not in df.columns:
+            continue
+        source = _source_column(expression)
+        kind = _key_kind(df[alias])
+        if source is None or kind is None:
+            continue
+        if mode == "groups" and kind != "datetime" or relative and kind != "datetime":
+            continue
+        if df[alias].isna().any():
+            continue
+        return {
+            "sql": sql,
+            "mode": mode,
+            "column": alias,
+            "source": source,
+            "kind": kind,
+            "relative": relative,
+            "order": parse_order_by(sql)
+        }
+    return None
+
+
+class MergeableStats:
+    """
+    Per-column aggregates that support adding and removing rows
+    
+    Numeric columns keep Welford moments, min and max; text columns keep
+    value counts. Min and max are re-read from the merged data
+    only when a removed row held the current extreme.
+    """
+    
+    def __init__(self, numeric: Dict[str, Dict[str, Any]] = None, categorical: Dict[str, Dict[str, Any]] = None):
+        """Initialize from serialized aggregates"""
+        self.numeric = numeric or {}
+        self.categorical = categorical or {}
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "MergeableStats":
+        """Aggregate a result frame"""
+        stats = cls(
+            numeric={
+                col: {"moments": Moments().to_dict(), "min": None, "max": None, "null_count": 0}
+                for col in df.select_dtypes(include=[np.number]).columns
+            },
+            categorical={
+                col: {"counts": {}, "null_count": 0}
+                for col in df.select_dtypes(include=["object"]).columns
+            }
+        )
+        stats.add(df)
+        return stats
+    
+    def add(self, df: pd.DataFrame):
+        """Add rows"""
+        self._update(df, 1)
+    
+    def remove(self, df: pd.DataFrame):
+        """Remove rows that were previously added"""
+        self._update(df, -1)
+    
+    def _update(self, df: pd.DataFrame, sign: int):
+        """Apply rows with the given sign"""
+        if df.empty:
+            return
+        
+        for col, agg in self.numeric.items():
+            values = pd.to_numeric(df[col], errors="coerce") if col in df.columns else pd.Series(dtype=float)
+            present = values.dropna()
+            moments, delta = Moments.from_dict(agg["moments"]), Moments.from_values(present.to_numpy())
+            agg["moments"] = (moments.merge(delta) if sign > 0 else moments.subtract(delta)).to_dict()
+            agg["null_count"] += sign * int(values.isna().sum())
+            if present.empty:
+                continue
+            low, high = float(present.min()), float(present.max())
+            if sign > 0:
+                agg["min"] = low if agg["min"] is None else min(agg["min"], low)
+                agg["max"] = high if agg["max"] is None else max(agg["max"], high)
+            else:
+                # The extreme may be gone; re-read it from the merged data
+                if agg["min"] is not None and low <= agg["min"]:
+                    agg["min"] = None
+                if agg["max"] is not None and high >= agg["max"]:
+                    agg["max"] = None
+        
+        for col, agg in self.categorical.items():
+            values = df[col] if col in df.columns else pd.Series(dtype=object)
+            agg["null_count"] += sign * int(values.isna().sum())
+            counts = agg["counts"]
+            for value, count in values.dropna().astype(str).value_counts().items():
+                counts[value] = counts.get(value, 0) + sign * int(count)
+                if counts[value] <= 0:
+                    del counts[value]
+    
+    def statistics(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Statistics in the InsightsAnalyzer.analyze_data format
+        
+        Args:
+            df: Merged result, read for medians and removed extremes
+        
+        Returns:
+            Numeric and categorical statistics
+        """
+        statistics: Dict[str, Any] = {}
+        
+        if self.numeric:
+            statistics["numeric"] = {}
+            for col, agg in self.numeric.items():
+                values = pd.to_numeric(df[col], errors="coerce")
+                if agg["min"] is None or agg["max"] is None:
+                    agg["min"], agg["max"] = float(values.min()), float(values.max())
+                moments = Moments.from_dict(agg["moments"])
+                statistics["numeric"][col] = {
+                    "mean": moments.mean if moments.count else float("nan"),
+                    "median": float(values.median()),
+                    "std": moments.std,
+                    "min": agg["min"],
+                    "max": agg["max"],
+                    "sum": moments.sum,
+                    "null_count": agg["null_count"]
+                }
+        
+        if self.categorical:
+            statistics["categorical"] = {}
+            for col, agg in self.categorical.items():
+                counts = sorted(agg["counts"].items(), key=lambda item: -item[1])
+                statistics["categorical"][col] = {
+                    "unique_count": len(counts),
+                    "most_common": dict(counts[:5]),
+                    "null_count": agg["null_count"]
+                }
+        
+        return statistics
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for JSON persistence"""
+        return {"numeric": self.numeric, "categorical": self.categorical}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MergeableStats":
+        """Restore serialized aggregates"""
+        return cls(numeric=data["numeric"], categorical=data["categorical"])
+
+
+class IncrementalRefresher:
+    """Keep refreshable chat results and update them from their watermark"""
+    
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        insights_analyzer: InsightsAnalyzer,
+        cache: Optional[CacheManager] = None
+    ):
+        """Initialize with the database manager, analyzer and Redis cache"""
+        self.db_manager = db_manager
+        self.insights_analyzer = insights_analyzer
+        self.cache = cache or CacheManager()
+    
+    @staticmethod
+    def _state_key(cache_key: str) -> str:
+        """Redis key of the refresh state for a cached response"""
+        return f"incremental:{cache_key}"
+    
+    async def save(
+        self,
+        cache_key: str,
+        response: Dict[str, Any],
+        database_type: str,
+        connection_params: Dict[str, Any]
+    ) -> bool:
+        """
+        Keep a freshly computed response for incremental refresh
+        
+        Args:
+            cache_key: Chat cache key of the response
+            response: Chat response
+            database_type: Type of database
+            connection_params: Connection parameters
+        
+        Returns:
+            Whether the response can be refreshed incrementally
+        """
+        if not settings.ENABLE_INCREMENTAL_REFRESH or database_type in NON_SQL_DATABASES:
+            return False
+        metadata = response.get("metadata", {})
+        if metadata.get("data_source", "database") != "database" or metadata.get("approximate"):
+            return False
+        
+        try:
+            rows = normalize_rows(response["results"])
+            plan = plan_refresh(response.get("sql_query"), rows)
+            if plan is None:
+                return False
+            
+            df = pd.DataFrame(rows)
+            state = {
+                "plan": plan,
+                "watermark": _parse_keys(df[plan["column"]], plan["kind"]).max().item()
+                if plan["kind"] == "numeric" else
+                _parse_keys(df[plan["column"]], plan["kind"]).max().isoformat(),
+                "data": {col: df[col].tolist() for col in df.columns},
+                "stats": MergeableStats.from_frame(df).to_dict(),
+                "response": {**response, "results": []},
+                "refreshed_at": time.time(),
+                "refresh_count": 0
+            }
+            await self.cache.set(self._state_key(cache_key), state, ttl=settings.INCREMENTAL_RETENTION_TTL)
+            logger.info(f"Result kept for incremental refresh on {plan['source']} ({plan['mode']})")
+            return True
+        except Exception as e:
+            logger.warning(f"Could not keep result for incremental refresh: {str(e)}")
+            return False
+    
+    async def refresh(
+        self,
+        cache_key: str,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Refresh an expired response from its watermark
+        
+        Args:
+            cache_key: Chat cache key of the response
+            database_type: Type of database
+            connection_params: Connection parameters
+            cancel_token: Token that aborts the delta query
+        
+        Returns:
+            Updated chat response, or None if the query has to run in full
+        """
+        if not settings.ENABLE_INCREMENTAL_REFRESH:
+            return None
+        state = await self.cache.get(self._state_key(cache_key))
+        if state is None:
+            return None
+        
+        plan = state["plan"]
+        old = pd.DataFrame(state["data"])
+        keys = _parse_keys(old[plan["column"]], plan["kind"])
+        watermark = pd.Timestamp(state["watermark"]) if plan["kind"] == "datetime" else state["watermark"]
+        
+        stale = keys >= watermark
+        predicate = f"{plan['source']} >= {_literal(watermark, plan['kind'])}"
+        
+        if plan["relative"]:
+            head = self._window_head(keys, plan["mode"], time.time() - state["refreshed_at"])
+            if head is None or head >= watermark:
+                return None
+            # Re-read rows the moved window start may have cut
+            stale |= keys < head
+            predicate = f"({predicate} OR {plan['source']} < {_literal(head, plan['kind'])})"
+        
+        delta_sql = _with_predicate(plan["sql"], predicate)
+        logger.info(f"Incremental refresh from {plan['column']} >= {state['watermark']}")
+        
+        try:
+            delta_rows = await self.db_manager.execute_query(
+                delta_sql,
+                database_type,
+                connection_params,
+                cancel_token=cancel_token
+            )
+        except Exception as e:
+            if cancel_token is not None and cancel_token.is_cancelled:
+                raise
+            logger.warning(f"Incremental refresh failed, running in full: {str(e)}")
+            return None
+        
+        delta = pd.DataFrame(normalize_rows(delta_rows), columns=old.columns)
+        kept = old[~stale]
+        merged = pd.concat([kept, delta], ignore_index=True)
+        if len(merged) >= settings.MAX_RESULT_ROWS or merged[plan["column"]].isna().any():
+            await self.cache.delete(self._state_key(cache_key))
+            return None
+        merged = self._sort(merged, plan)
+        
+        stats = MergeableStats.from_dict(state["stats"])
+        stats.remove(old[stale])
+        stats.add(delta)
+        
+        merged_keys = _parse_keys(merged[plan["column"]], plan["kind"])
+        state.update({
+            "watermark": merged_keys.max().item() if plan["kind"] == "numeric" else merged_keys.max().isoformat(),
+            "data": {col: merged[col].tolist() for col in merged.columns},
+            "stats": stats.to_dict(),
+            "refreshed_at": time.time(),
+            "refresh_count": state["refresh_count"] + 1
+        })
+        
+        response = await self._build_response(state, merged, stats, new_rows=len(delta), replaced_rows=int(stale.sum()))
+        state["response"] = {**response, "results": []}
+        await self.cache.set(self._state_key(cache_key), state, ttl=settings.INCREMENTAL_RETENTION_TTL)
+        return response
+    
+    @staticmethod
+    def _window_head(keys: pd.Series, mode: str, elapsed: float) -> Optional[Any]:
+        """
+        Boundary below which a moving time window may have changed the result
+        
+        The window start moved by the elapsed time. For rows that is at most
+        the old minimum plus elapsed; for buckets it is the first bucket start
+        at or after the second bucket plus elapsed, so no bucket is split.
+        """
+        ordered = keys.drop_duplicates().sort_values()
+        shift = timedelta(seconds=elapsed)
+        if mode == "rows":
+            return ordered.iloc[0] + shift
+        if len(ordered) < 2:
+            return None
+        later = ordered[ordered >= ordered.iloc[1] + shift]
+        return later.iloc[0] if len(later) else None
+    
+    @staticmethod
+    def _sort(df: pd.DataFrame, plan: Dict[str, Any]) -> pd.DataFrame:
+        """Restore the query's ORDER BY, or watermark order"""
+        order = [(col, ascending) for col, ascending in plan["order"] if col in df.columns]
+        if not order:
+            order = [(plan["column"], True)]
+        
+        sort_keys = {
+            col: _parse_keys(df[col], plan["kind"]) if col == plan["column"] else df[col]
+            for col, _ in order
+        }
+        sorted_index = pd.DataFrame(sort_keys).sort_values(
+            by=[col for col, _ in order],
+            ascending=[ascending for _, ascending in order],
+            kind="stable"
+        ).index
+        return df.loc[sorted_index].reset_index(drop=True)
+    
+    async def _build_response(
+        self,
+        state: Dict[str, Any],
+        merged: pd.DataFrame,
+        stats: MergeableStats,
+        new_rows: int,
+        replaced_rows: int
+    ) -> Dict[str, Any]:
+        """Assemble the refreshed chat response"""
+        previous = state["response"]
+        insights = dict(previous.get("insights", {}))
+        records = json.loads(merged.to_json(orient="records"))
+        
+        # Patterns read the merged frame with the original column types
+        frame = merged.copy()
+        for col, dtype in insights.get("data_types", {}).items():
+            if col in frame.columns and dtype.startswith("datetime64"):
+                frame[col] = pd.to_datetime(frame[col], errors="coerce", format="ISO8601")
+        
+        insights.update({
+            "row_count": len(merged),
+            "statistics": stats.statistics(merged),
+            "patterns": await self.insights_analyzer._detect_patterns(frame, previous.get("intent"))
+        })
+        visualizations = await self.insights_analyzer.recommend_visualizations(data=records, insights=insights)
+        
+        plan = state["plan"]
+        return {
+            **previous,
+            "results": records,
+            "insights": insights,
+            "visualizations": visualizations,
+            "metadata": {
+                **previous.get("metadata", {}),
+                "rows_returned": len(records),
+                "incremental_refresh": {
+                    "watermark_column": plan["column"],
+                    "watermark": state["watermark"],
+                    "new_rows": new_rows,
+                    "replaced_rows": replaced_rows,
+                    "refresh_count": state["refresh_count"],
+                    "refreshed_at": datetime.utcnow().isoformat()
+                }
+            },
+            "cached": False
+        }
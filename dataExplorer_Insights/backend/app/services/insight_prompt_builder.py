@@ -0,0 +1,238 @@
+"""
+Insight Prompt Builder - Compact, token-budgeted analysis summaries
+Ranks analysis facts by salience (strong trends, anomalies, correlations,
+then per-column statistics and sample rows), renders them as compact
+pipe-separated text and keeps the result within a token budget measured
+with the local tokenizer.
+"""
+
+from typing import Dict, List, Any, Optional
+from dataclasses import dataclass
+import math
+import re
+
+from app.core.config import settings
+from app.services.token_counter import count_tokens
+
+# Sections in rendering order, with their header lines
+_SECTIONS = {
+    "trends": "TRENDS",
+    "anomalies": "ANOMALIES",
+    "correlations": "CORRELATIONS",
+    "time_series": "TIME SERIES (column by time|frequency|seasonality|shifts|anomalies)",
+    "numeric": "NUMERIC (column|mean|median|std|min|max|sum|nulls)",
+    "categorical": "CATEGORICAL (column|unique|top values)",
+    "sample": "SAMPLE ROWS"
+}
+
+_MAX_CELL_CHARS = 32
+
+_MAX_ANOMALY_LINES = 5
+
+_MIN_SEASONALITY = 0.3
+
+
+@dataclass
+class _Fact:
+    """One line of the summary"""
+    score: float
+    section: str
+    text: str
+    tokens: int = 0
+
+
+def _fmt(value: Any) -> str:
+    """Short rendering of a statistic"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "-"
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() and abs(value) < 1e12 else f"{value:.4g}"
+    return _cell(value)
+
+
+def _cell(value: Any) -> str:
+    """Value for a table cell, truncated and without separators"""
+    text = str(value).replace("|", "/").replace("\n", " ")
+    return text if len(text) <= _MAX_CELL_CHARS else text[:_MAX_CELL_CHARS - 1] + "~"
+
+
+class InsightPromptBuilder:
+    """Summarize an analysis for the insights prompt within a token budget"""
+    
+    def __init__(self, token_budget: int = None, model: str = "gpt-4"):
+        """Initialize with the token budget and the model used for counting"""
+        self.token_budget = token_budget or settings.INSIGHT_PROMPT_TOKEN_BUDGET
+        self.model = model
+    
+    def _tokens(self, text: str) -> int:
+        """Tokens of a line including its newline"""
+        return count_tokens(text + "\n", self.model)
+    
+    def build(
+        self,
+        analysis: Dict[str, Any],
+        data: List[Dict[str, Any]],
+        user_query: str,
+        token_budget: Optional[int] = None
+    ) -> str:
+        """
+        Render the most salient facts of an analysis
+        
+        Args:
+            analysis: Output of InsightsAnalyzer.analyze_data or analyze_stream
+            data: Result rows, the first few are used as samples
+            user_query: Original user query, columns it mentions rank higher
+            token_budget: Overrides the configured budget
+        
+        Returns:
+            Compact text summary
+        """
+        budget = token_budget or self.token_budget
+        header = self._header(analysis)
+        remaining = budget - self._tokens(header)
+        
+        facts = self._facts(analysis, data, user_query)
+        for fact in facts:
+            fact.tokens = self._tokens(fact.text)
+        
+        # Greedy by salience; a section's header is paid with its first line
+        chosen: List[_Fact] = []
+        opened = set()
+        for fact in sorted(facts, key=lambda item: -item.score):
+            cost = fact.tokens + (0 if fact.section in opened else self._tokens(_SECTIONS[fact.section]))
+            if cost > remaining:
+                continue
+            chosen.append(fact)
+            opened.add(fact.section)
+            remaining -= cost
+        
+        lines = [header]
+        omitted = len(facts) - len(chosen)
+        for section, title in _SECTIONS.items():
+            # Within a section keep the salience order
+            section_facts = [fact for fact in chosen if fact.section == section]
+            if section_facts:
+                lines.append(title)
+                lines.extend(fact.text for fact in section_facts)
+        if omitted:
+            lines.append(f"({omitted} lower-ranked facts omitted)")
+        return "\n".join(lines)
+    
+    @staticmethod
+    def _header(analysis: Dict[str, Any]) -> str:
+        """Result size line, always included"""
+        header = f"rows={analysis.get('row_count', 0)} columns={analysis.get('column_count', 0)}"
+        if analysis.get("analyzed_rows"):
+            header += f" statistics_over_rows={analysis['analyzed_rows']}"
+        intervals = analysis.get("confidence_intervals")
+        if intervals:
+            header += (
+                f" approximate: {intervals.get('sample_percent')}% sample,"
+                f" {int(intervals.get('confidence', 0) * 100)}% confidence intervals"
+            )
+        return header
+    
+    def _facts(
+        self,
+        analysis: Dict[str, Any],
+        data: List[Dict[str, Any]],
+        user_query: str
+    ) -> List[_Fact]:
+        """Candidate lines with salience scores"""
+        facts: List[_Fact] = []
+        patterns = analysis.get("patterns", {})
+        statistics = analysis.get("statistics", {})
+        
+        query_words = set(re.findall(r"\w+", user_query.lower()))
+        pattern_columns = {
+            item.get(key)
+            for group in ("trends", "correlations")
+            for item in patterns.get(group, [])
+            for key in ("column", "column1", "column2")
+        }
+        
+        def column_score(col: str, position: int) -> float:
+            words = set(re.findall(r"\w+", str(col).lower().replace("_", " ")))
+            return (
+                1.0
+                + (0.5 if words & query_words else 0.0)
+                + (0.3 if col in pattern_columns else 0.0)
+                - position * 0.001
+            )
+        
+        for trend in patterns.get("trends", []):
+            facts.append(_Fact(
+                3.0 + trend["strength"],
+                "trends",
+                f"{_cell(trend['column'])}: {trend['direction']}, strength {trend['strength']:.2f}"
+            ))
+        
+        # About 0.7% of normally distributed values fall outside the IQR
+        # fences, so small shares only matter for the columns that lead
+        anomalies = sorted(patterns.get("anomalies", []), key=lambda item: -item["percentage"])
+        for anomaly in anomalies[:_MAX_ANOMALY_LINES]:
+            facts.append(_Fact(
+                1.0 + min(anomaly["percentage"] / 5, 2.0),
+                "anomalies",
+                f"{_cell(anomaly['column'])}: {anomaly['count']} outliers ({anomaly['percentage']:.1f}%)"
+            ))
+        if len(anomalies) > _MAX_ANOMALY_LINES:
+            others = ", ".join(
+                f"{_cell(anomaly['column'])} {anomaly['percentage']:.1f}%"
+                for anomaly in anomalies[_MAX_ANOMALY_LINES:]
+            )
+            facts.append(_Fact(0.95, "anomalies", f"others: {others}"))
+        
+        for correlation in patterns.get("correlations", []):
+            facts.append(_Fact(
+                2.0 + abs(correlation["correlation"]),
+                "correlations",
+                f"{_cell(correlation['column1'])}~{_cell(correlation['column2'])}: "
+                f"{correlation['correlation']:.2f} {correlation['strength']}"
+            ))
+        
+        for series in patterns.get("time_series", []):
+            # Weak seasonality is noise; series with nothing else to report are skipped
+            seasonality = series.get("seasonality") or {}
+            strength = seasonality.get("strength") or 0.0
+            season = f"period {seasonality['period']} strength {strength:.2f}" if strength >= _MIN_SEASONALITY else "-"
+            shifts = ", ".join(
+                f"{point['at'][:10]} {_fmt(point['before'])}->{_fmt(point['after'])}"
+                for point in series["change_points"]
+            )
+            if season == "-" and not shifts and not series["anomalies"]["count"]:
+                continue
+            facts.append(_Fact(
+                2.0 + max(strength if season != "-" else 0.0, 0.5 if shifts else 0.0),
+                "time_series",
+                f"{_cell(series['column'])} by {_cell(series['time_column'])}|{series['frequency']}|"
+                f"{season}|{shifts or '-'}|{series['anomalies']['count']}"
+            ))
+        
+        for position, (col, stats) in enumerate(statistics.get("numeric", {}).items()):
+            values = [stats.get(key) for key in ("mean", "median", "std", "min", "max", "sum", "null_count")]
+            facts.append(_Fact(
+                column_score(col, position),
+                "numeric",
+                "|".join([_cell(col)] + [_fmt(value) for value in values])
+            ))
+        
+        for position, (col, stats) in enumerate(statistics.get("categorical", {}).items()):
+            top = ", ".join(f"{_cell(value)}:{count}" for value, count in list(stats.get("most_common", {}).items())[:3])
+            facts.append(_Fact(
+                column_score(col, position) - 0.1,
+                "categorical",
+                f"{_cell(col)}|{stats.get('unique_count')}|{top}"
+            ))
+        
+        if data:
+            columns = list(data[0])
+            facts.append(_Fact(0.9, "sample", "|".join(_cell(col) for col in columns)))
+            for index, row in enumerate(data[:settings.INSIGHT_PROMPT_SAMPLE_ROWS]):
+                facts.append(_Fact(
+                    0.89 - index * 0.01,
+                    "sample",
+                    "|".join(_fmt(row.get(col)) for col in columns)
+                ))
+        
+        return facts
@@ -3,14 +3,22 @@ Insights Analyzer - Generate insights and recommendations from data
 Uses LLM to create natural language insights and visualization recommendations
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, AsyncIterator
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
 import pandas as pd
 import numpy as np
 import logging
-import json
+import asyncio
+from statistics import NormalDist
+
+from app.core.config import settings
+from app.services.llm_gateway import LLMGateway
+from app.services.insight_prompt_builder import InsightPromptBuilder
+from app.services.query_sampler import SAMPLE_ROWS_COLUMN
+from app.services.chart_data import ChartDataBuilder
+from app.services.streaming_analyzer import StreamingSummary, column_kinds
+from app.services.time_series import analyze_frame
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +26,11 @@ logger = logging.getLogger(__name__)
 class InsightsAnalyzer:
     """Analyze data and generate insights using LLM"""
     
-    def __init__(self, llm: ChatOpenAI):
-        """Initialize with LLM instance"""
+    def __init__(self, llm: LLMGateway):
+        """Initialize with the LLM gateway"""
         self.llm = llm
+        self.chart_data = ChartDataBuilder()
+        self.prompt_builder = InsightPromptBuilder(model=getattr(llm, "model_name", "gpt-4"))
     
     async def analyze_data(
         self,
@@ -95,6 +105,52 @@ class InsightsAnalyzer:
         logger.info("Statistical analysis completed")
         return analysis
     
+    async def analyze_stream(
+        self,
+        batches: AsyncIterator[pd.DataFrame],
+        intent: Optional[str] = None,
+        workers: int = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze a result of any size from record batches
+        
+        Each batch is summarized on a worker thread into mergeable sketches
+        and folded into a running summary, so memory stays constant and up
+        to `workers` batches are processed in parallel.
+        
+        Args:
+            batches: Record batches, e.g. from DatabaseManager.stream_query()
+            intent: Query intent classification
+            workers: Batches summarized concurrently
+            
+        Returns:
+            Statistical analysis in the analyze_data format
+        """
+        workers = workers or settings.STREAM_ANALYSIS_WORKERS
+        summary = StreamingSummary()
+        kinds = None
+        pending = set()
+        
+        try:
+            async for batch in batches:
+                if kinds is None:
+                    kinds = column_kinds(batch)
+                pending.add(asyncio.create_task(asyncio.to_thread(StreamingSummary.from_frame, batch, kinds)))
+                if len(pending) >= workers:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        summary.merge(task.result())
+            
+            for partial in await asyncio.gather(*pending):
+                summary.merge(partial)
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        analysis = summary.analysis()
+        logger.info(f"Streaming analysis completed over {summary.row_count} rows in {summary.batches} batches")
+        return analysis
+    
     async def _detect_patterns(
         self,
         df: pd.DataFrame,
@@ -104,30 +160,24 @@ class InsightsAnalyzer:
         patterns = {
             "trends": [],
             "anomalies": [],
-            "correlations": []
+            "correlations": [],
+            "time_series": []
         }
         
-        # Detect trends in time series data
-        date_cols = df.select_dtypes(include=["datetime64"]).columns
-        if len(date_cols) > 0:
-            for date_col in date_cols:
-                # Sort by date and check for trends
-                df_sorted = df.sort_values(date_col)
-                numeric_cols = df_sorted.select_dtypes(include=[np.number]).columns
-                
-                for num_col in numeric_cols:
-                    # Simple trend detection using correlation with index
-                    correlation = df_sorted[num_col].corr(
-                        pd.Series(range(len(df_sorted)))
-                    )
-                    
-                    if abs(correlation) > 0.7:
-                        trend_direction = "increasing" if correlation > 0 else "decreasing"
-                        patterns["trends"].append({
-                            "column": num_col,
-                            "direction": trend_direction,
-                            "strength": abs(correlation)
-                        })
+        # Detect trends in time series data, with date columns of any dtype
+        # resampled to a regular frequency (runs off the event loop)
+        patterns["time_series"] = await asyncio.to_thread(analyze_frame, df)
+        for series in patterns["time_series"]:
+            trend = series["trend"]
+            if trend["significant"] and abs(trend["r"]) > 0.7:
+                patterns["trends"].append({
+                    "column": series["column"],
+                    "direction": trend["direction"],
+                    "strength": abs(trend["r"]),
+                    "time_column": series["time_column"],
+                    "p_value": trend["p_value"],
+                    "slope_per_period": trend["slope_per_period"]
+                })
         
         # Detect outliers using IQR method
         numeric_cols = df.select_dtypes(include=[np.number]).columns
@@ -166,6 +216,93 @@ class InsightsAnalyzer:
         
         return patterns
     
+    async def compute_confidence_intervals(
+        self,
+        data: List[Dict[str, Any]],
+        sampling: Dict[str, Any],
+        confidence: float = None
+    ) -> Dict[str, Any]:
+        """
+        Compute confidence intervals for results of a sampled query
+        
+        Scaled SUM and COUNT estimates use the Horvitz-Thompson variance
+        under Bernoulli sampling, (1 - p) / p^2 times the sampled sum of
+        squares (the count itself for COUNT); for raw sampled rows the mean of
+        each numeric column gets a normal-approximation interval. Block
+        samples get no intervals, as their rows are not independent.
+        
+        Args:
+            data: Unscaled rows returned by the sampled query
+            sampling: Sampling plan from QuerySampler.rewrite()
+            confidence: Confidence level (defaults to APPROXIMATE_CONFIDENCE_LEVEL)
+            
+        Returns:
+            Confidence intervals keyed by column
+        """
+        confidence = confidence or settings.APPROXIMATE_CONFIDENCE_LEVEL
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        fraction = sampling["fraction"]
+        factor = 1.0 / fraction
+        
+        intervals = {
+            "confidence": confidence,
+            "sample_percent": sampling["sample_percent"],
+            "estimates": {},
+            "means": {}
+        }
+        
+        if not data:
+            return intervals
+        
+        if not sampling.get("row_level", True):
+            intervals["note"] = "Block sampling; row-level confidence intervals do not apply"
+            return intervals
+        
+        df = pd.DataFrame(data)
+        
+        if sampling["is_aggregate"] and SAMPLE_ROWS_COLUMN in df.columns:
+            square_columns = sampling.get("square_columns", {})
+            
+            for col, aggregate in sampling["scaled_columns"].items():
+                if col not in df.columns:
+                    continue
+                if aggregate == "COUNT":
+                    # Counted rows contribute 1, so their squares sum to the count
+                    squares = pd.to_numeric(df[col], errors="coerce")
+                elif square_columns.get(col) in df.columns:
+                    squares = pd.to_numeric(df[square_columns[col]], errors="coerce")
+                else:
+                    continue
+                estimate = (pd.to_numeric(df[col], errors="coerce") * factor).head(
+                    settings.MAX_CONFIDENCE_INTERVAL_ROWS
+                )
+                margin = z * np.sqrt((1 - fraction) * squares.clip(lower=0)) * factor
+                intervals["estimates"][col] = [
+                    {
+                        "estimate": float(value),
+                        "lower": float(value - err),
+                        "upper": float(value + err),
+                        "relative_error": float(err / abs(value)) if value else None
+                    }
+                    for value, err in zip(estimate, margin)
+                    if pd.notnull(value) and pd.notnull(err)
+                ]
+        elif not sampling["is_aggregate"]:
+            for col in df.select_dtypes(include=[np.number]).columns:
+                values = df[col].dropna()
+                if len(values) < 2:
+                    continue
+                margin = z * float(values.std()) / np.sqrt(len(values))
+                mean = float(values.mean())
+                intervals["means"][col] = {
+                    "estimate": mean,
+                    "lower": mean - margin,
+                    "upper": mean + margin,
+                    "sample_size": int(len(values))
+                }
+        
+        return intervals
+    
     async def generate_insights(
         self,
         data: List[Dict[str, Any]],
@@ -185,11 +322,8 @@ class InsightsAnalyzer:
         """
         logger.info("Generating natural language insights")
         
-        # Prepare analysis summary for LLM
-        analysis_summary = json.dumps(analysis, indent=2)
-        
-        # Prepare sample data
-        sample_data = json.dumps(data[:5], indent=2) if data else "[]"
+        # Most salient facts and sample rows, within the prompt token budget
+        analysis_summary = self.prompt_builder.build(analysis, data, user_query)
         
         system_prompt = """You are an expert data analyst. Your task is to generate clear, 
 actionable insights from data analysis results. 
@@ -206,12 +340,9 @@ Use business-friendly language, avoiding technical jargon when possible."""
 
         user_prompt = f"""User Query: {user_query}
 
-Statistical Analysis:
+Statistical Analysis (compact, most salient facts first; tables are pipe-separated):
 {analysis_summary}
 
-Sample Data (first 5 rows):
-{sample_data}
-
 Generate insightful analysis and recommendations:"""
 
         prompt = ChatPromptTemplate.from_messages([
@@ -228,7 +359,8 @@ Generate insightful analysis and recommendations:"""
     async def recommend_visualizations(
         self,
         data: List[Dict[str, Any]],
-        insights: Dict[str, Any]
+        insights: Dict[str, Any],
+        column_profile: Optional[Dict[str, Dict[str, Any]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Recommend appropriate visualizations for the data
@@ -236,9 +368,10 @@ Generate insightful analysis and recommendations:"""
         Args:
             data: Query results
             insights: Analysis insights
+            column_profile: Profiled statistics of the source columns, by name
             
         Returns:
-            List of visualization configurations
+            List of visualization configurations with render-ready data
         """
         logger.info("Recommending visualizations")
         
@@ -278,8 +411,14 @@ Generate insightful analysis and recommendations:"""
         
         # 3. Categorical comparison
         if categorical_cols and numeric_cols:
-            # Check cardinality
+            # Check cardinality of the result itself; when the rows are only a
+            # sample or the first rows of a larger result, the profiled
+            # distinct count of the source column bounds what is missing
             unique_count = df[categorical_cols[0]].nunique()
+            profiled = (column_profile or {}).get(categorical_cols[0])
+            sampled = "confidence_intervals" in insights or len(df) >= settings.MAX_RESULT_ROWS
+            if sampled and profiled is not None:
+                unique_count = max(unique_count, profiled["distinct_estimate"])
             
             if unique_count <= 10:
                 recommendations.append({
@@ -338,6 +477,10 @@ Generate insightful analysis and recommendations:"""
         # Sort by priority
         recommendations.sort(key=lambda x: x["priority"])
         
+        # Attach downsampled / pre-aggregated series capped at CHART_MAX_POINTS
+        for recommendation in recommendations:
+            recommendation["data"] = self.chart_data.build(df, recommendation)
+        
         logger.info(f"Generated {len(recommendations)} visualization recommendations")
         return recommendations
     
@@ -0,0 +1,289 @@
+"""
+Job Queue - Run long agent analyses in the background
+Jobs are executed by a fixed worker pool that goes through the admission
+controller, so background work shares the same fair-share limits as
+interactive requests. Workers take jobs from per-user queues in turn and
+skip users already at their per-user slot cap, so one user's backlog
+cannot tie up the pool. Status changes and the agent's per-step progress
+are reported to an optional listener, e.g. for WebSocket push.
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Awaitable, Tuple
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime
+import asyncio
+import logging
+import time
+import uuid
+
+from app.core.config import settings
+from app.services.admission_controller import AdmissionController
+from app.services.query_cancellation import CancellationToken
+
+logger = logging.getLogger(__name__)
+
+# Called by a job with a stage name and details as its work progresses
+ProgressCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+JobFunction = Callable[[CancellationToken, ProgressCallback], Awaitable[Dict[str, Any]]]
+
+# Receives the job record and an event dictionary
+JobListener = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[None]]
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are pending"""
+
+
+class JobQueue:
+    """Bounded background job queue served by a worker pool"""
+    
+    def __init__(
+        self,
+        admission: AdmissionController,
+        workers: int = None,
+        max_pending: int = None,
+        result_ttl: int = None,
+        listener: Optional[JobListener] = None,
+        max_pending_per_user: int = None
+    ):
+        """Initialize; workers start with the first submitted job"""
+        self.admission = admission
+        self.listener = listener
+        self.worker_count = workers or settings.JOB_WORKERS
+        self.max_pending = max_pending or settings.JOB_MAX_PENDING
+        self.max_pending_per_user = max_pending_per_user or settings.JOB_MAX_PENDING_PER_USER
+        self.result_ttl = result_ttl or settings.JOB_RESULT_TTL
+        
+        # Queued job ids per user, users in round-robin order
+        self._pending: "OrderedDict[str, deque]" = OrderedDict()
+        self._running: Dict[str, int] = defaultdict(int)
+        self._changed: Optional[asyncio.Condition] = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._functions: Dict[str, JobFunction] = {}
+        self._tokens: Dict[str, CancellationToken] = {}
+    
+    def _ensure_workers(self):
+        """Start the worker pool on the running event loop"""
+        if self._workers:
+            return
+        
+        self._changed = asyncio.Condition()
+        self._workers = [
+            asyncio.create_task(self._worker(index))
+            for index in range(self.worker_count)
+        ]
+        logger.info(f"Started {self.worker_count} job workers")
+    
+    def _prune(self):
+        """Forget finished jobs older than the result TTL"""
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] and job["finished_at"].timestamp() < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+    
+    async def submit(
+        self,
+        user_id: Any,
+        function: JobFunction,
+        description: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Queue a job
+        
+        Args:
+            user_id: Owner of the job
+            function: Coroutine function called with a cancellation token
+                and a progress callback
+            description: Short label, e.g. the user's question
+        
+        Returns:
+            The job record
+        """
+        self._ensure_workers()
+        self._prune()
+        
+        user_key = str(user_id)
+        if self._pending_count() >= self.max_pending:
+            raise JobQueueFull(f"More than {self.max_pending} jobs pending")
+        if len(self._pending.get(user_key, ())) >= self.max_pending_per_user:
+            raise JobQueueFull(f"More than {self.max_pending_per_user} jobs pending for this user")
+        
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "user_id": user_id,
+            "description": description,
+            "status": "queued",
+            "created_at": datetime.utcnow(),
+            "started_at": None,
+            "finished_at": None,
+            "queue_time": None,
+            "result": None,
+            "error": None
+        }
+        self._jobs[job_id] = job
+        self._functions[job_id] = function
+        self._tokens[job_id] = CancellationToken()
+        
+        async with self._changed:
+            self._pending.setdefault(user_key, deque()).append(job_id)
+            self._changed.notify()
+        logger.info(f"Queued job {job_id} for user {user_id}")
+        await self._notify(job, "status")
+        return job
+    
+    def _pending_count(self) -> int:
+        """Number of queued jobs across users"""
+        return sum(len(jobs) for jobs in self._pending.values())
+    
+    async def _notify(self, job: Dict[str, Any], event: str, **details):
+        """Report a job event to the listener; listener errors are only logged"""
+        if self.listener is None:
+            return
+        try:
+            await self.listener(job, {
+                "type": f"job.{event}",
+                "job_id": job["job_id"],
+                "status": job["status"],
+                **details
+            })
+        except Exception as e:
+            logger.warning(f"Job listener failed for {job['job_id']}: {str(e)}")
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record"""
+        return self._jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job"""
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] not in ("queued", "running"):
+            return False
+        
+        token = self._tokens.get(job_id)
+        if token is not None:
+            token.cancel("job cancelled")
+        if job["status"] == "queued":
+            job["status"] = "cancelled"
+            job["finished_at"] = datetime.utcnow()
+            # Free the pending place right away; the job never reaches a worker
+            jobs = self._pending.get(str(job["user_id"]))
+            if jobs is not None and job_id in jobs:
+                jobs.remove(job_id)
+                if not jobs:
+                    del self._pending[str(job["user_id"])]
+                self._functions.pop(job_id, None)
+                self._tokens.pop(job_id, None)
+            asyncio.get_running_loop().create_task(self._notify(job, "status"))
+        return True
+    
+    def _take(self) -> Optional[Tuple[str, str]]:
+        """
+        Next (user, job id) in round-robin order
+        
+        Users whose jobs already hold ADMISSION_MAX_PER_USER slots are
+        skipped, so no worker waits on a single user's cap while other
+        users have work queued.
+        """
+        for user_key in list(self._pending):
+            if self._running[user_key] >= self.admission.max_per_user:
+                continue
+            jobs = self._pending.pop(user_key)
+            job_id = jobs.popleft()
+            if jobs:
+                self._pending[user_key] = jobs
+            self._running[user_key] += 1
+            return user_key, job_id
+        return None
+    
+    async def _worker(self, index: int):
+        """Take jobs from the per-user queues and run them under admission control"""
+        while True:
+            async with self._changed:
+                taken = self._take()
+                while taken is None:
+                    await self._changed.wait()
+                    taken = self._take()
+            user_key, job_id = taken
+            
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job worker {index} failed on {job_id}: {str(e)}")
+            finally:
+                async with self._changed:
+                    self._running[user_key] -= 1
+                    if not self._running[user_key]:
+                        del self._running[user_key]
+                    self._changed.notify_all()
+    
+    async def _run(self, job_id: str):
+        """Run one job and record its outcome"""
+        job = self._jobs.get(job_id)
+        function = self._functions.pop(job_id, None)
+        token = self._tokens.get(job_id)
+        
+        try:
+            if job is None or token.is_cancelled:
+                return
+            
+            # Background jobs wait for a slot instead of being rejected
+            async with self.admission.slot(job["user_id"], timeout=None):
+                if token.is_cancelled:
+                    return
+                job["status"] = "running"
+                job["started_at"] = datetime.utcnow()
+                job["queue_time"] = round((job["started_at"] - job["created_at"]).total_seconds(), 3)
+                await self._notify(job, "status", queue_time=job["queue_time"])
+                
+                async def progress(stage: str, details: Dict[str, Any]):
+                    await self._notify(job, "progress", stage=stage, **details)
+                
+                try:
+                    job["result"] = await function(token, progress)
+                    job["status"] = "cancelled" if token.is_cancelled else "completed"
+                except Exception as e:
+                    logger.error(f"Job {job_id} failed: {str(e)}")
+                    job["status"] = "failed"
+                    job["error"] = str(e)
+                finally:
+                    job["finished_at"] = datetime.utcnow()
+                await self._notify(job, "status", error=job["error"])
+        except Exception as e:
+            # Failed before the job ran, e.g. rejected by admission control
+            logger.error(f"Job {job_id} could not run: {str(e)}")
+            if job["status"] in ("queued", "running"):
+                job["status"] = "failed"
+                job["error"] = str(e)
+                job["finished_at"] = datetime.utcnow()
+                await self._notify(job, "status", error=job["error"])
+        finally:
+            self._tokens.pop(job_id, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status"""
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        
+        return {
+            "workers": len(self._workers),
+            "pending": self._pending_count(),
+            "running": sum(self._running.values()),
+            "jobs": counts
+        }
+    
+    async def shutdown(self):
+        """Stop the workers and cancel running jobs"""
+        for token in self._tokens.values():
+            token.cancel("shutdown")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Job workers stopped")
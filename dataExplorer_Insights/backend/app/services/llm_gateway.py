@@ -0,0 +1,343 @@
+"""
+LLM Gateway - Shared access point for chat model calls
+Adds a content-hash response cache (memory and Redis), single-flight
+deduplication of identical in-flight prompts, a per-provider concurrency
+cap, jittered retries on rate limits, and token and latency accounting.
+A fake backend simulates the provider for offline load testing.
+"""
+
+from typing import Dict, List, Any, Optional
+from collections import OrderedDict, deque
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+
+from langchain.schema import AIMessage, BaseMessage
+
+from app.core.config import settings
+from app.services.cache_manager import CacheManager
+from app.services.token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Concurrency limits are shared by every gateway using the same provider
+_provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+# Exception names raised by provider SDKs for transient failures
+_RETRYABLE_ERRORS = (
+    "RateLimitError",
+    "APITimeoutError",
+    "APIConnectionError",
+    "InternalServerError",
+    "ServiceUnavailableError",
+    "OverloadedError",
+    "FakeRateLimitError"
+)
+
+
+def _provider_semaphore(provider: str) -> asyncio.Semaphore:
+    """Get the concurrency cap for a provider"""
+    if provider not in _provider_semaphores:
+        limit = settings.LLM_MAX_CONCURRENCY_BY_PROVIDER.get(provider, settings.LLM_MAX_CONCURRENCY)
+        _provider_semaphores[provider] = asyncio.Semaphore(limit)
+    return _provider_semaphores[provider]
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """HTTP status of a provider error, if any"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an LLM error is transient (rate limit, overload, timeout)"""
+    status = _status_code(error)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return type(error).__name__ in _RETRYABLE_ERRORS or isinstance(error, asyncio.TimeoutError)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Delay requested by the provider's Retry-After header"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class FakeRateLimitError(Exception):
+    """Simulated provider rate limit"""
+    
+    status_code = 429
+
+
+class FakeChatModel:
+    """
+    Offline stand-in for a chat model
+    
+    Sleeps for a configurable latency and returns well-formed answers for
+    the agent's prompts: an intent JSON object, a SQL query over the first
+    table in the schema, the unchanged query for optimization, and a short
+    narrative for insights.
+    """
+    
+    def __init__(
+        self,
+        latency_ms: float = None,
+        rate_limit_rate: float = None,
+        sql_template: str = None,
+        seed: Optional[int] = None
+    ):
+        """Initialize with latency, simulated rate-limit probability and a random seed"""
+        self.latency_ms = settings.LLM_FAKE_LATENCY_MS if latency_ms is None else latency_ms
+        self.rate_limit_rate = settings.LLM_FAKE_RATE_LIMIT_RATE if rate_limit_rate is None else rate_limit_rate
+        self.sql_template = sql_template or settings.LLM_FAKE_SQL
+        # A fixed seed makes latencies and simulated failures reproducible
+        self._random = random.Random(settings.LLM_FAKE_SEED if seed is None else seed)
+    
+    def _answer(self, system: str, human: str) -> str:
+        """Canned answer for a prompt"""
+        if "query intentions" in system:
+            return json.dumps({"intent": "metrics", "entities": [], "filters": [], "time_range": None})
+        if "SQL query optimizer" in system:
+            match = re.search(r"Original Query:\n(.*?)\n\nSchema:", system, re.DOTALL)
+            return match.group(1) if match else "SELECT 1 AS value"
+        if "SQL generator" in system:
+            match = re.search(r"^Table: (\S+)|^(\w+)\(", system, re.MULTILINE)
+            table = next((name for name in match.groups() if name), None) if match else None
+            return self.sql_template.format(table=table) if table else "SELECT 1 AS value"
+        return (
+            "- The query returned results consistent with recent activity.\n"
+            "- No unusual patterns stand out in this sample.\n"
+            "- Recommendation: monitor the leading categories over time."
+        )
+    
+    async def ainvoke(self, messages: List[BaseMessage]) -> AIMessage:
+        """Simulate a chat completion"""
+        # Uniform jitter of +/-25% around the mean latency
+        await asyncio.sleep(self.latency_ms * self._random.uniform(0.75, 1.25) / 1000)
+        if self._random.random() < self.rate_limit_rate:
+            raise FakeRateLimitError("Simulated rate limit")
+        
+        system = "\n".join(m.content for m in messages if m.type == "system")
+        human = "\n".join(m.content for m in messages if m.type == "human")
+        content = self._answer(system, human)
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": count_tokens(system + human),
+                "output_tokens": count_tokens(content),
+                "total_tokens": count_tokens(system + human) + count_tokens(content)
+            }
+        )
+
+
+class LLMGateway:
+    """Cache, deduplicate, throttle and retry chat model calls"""
+    
+    def __init__(
+        self,
+        llm: Any,
+        provider: str,
+        model_name: str,
+        cache: Optional[CacheManager] = None
+    ):
+        """
+        Initialize the gateway
+        
+        Args:
+            llm: Chat model with an async ainvoke(messages) method
+            provider: Provider name, used for the shared concurrency cap
+            model_name: Model name, part of the cache key
+            cache: Redis cache for responses
+        """
+        self.llm = llm
+        self.provider = provider
+        self.model_name = model_name
+        self.cache = cache or CacheManager()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._latencies: deque = deque(maxlen=1000)
+        self._counters = {
+            "calls": 0,
+            "provider_calls": 0,
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "deduplicated": 0,
+            "retries": 0,
+            "errors": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "saved_tokens": 0
+        }
+    
+    def cache_key(self, messages: List[BaseMessage]) -> str:
+        """Content hash of the model, sampling settings and messages"""
+        payload = json.dumps(
+            [
+                self.provider,
+                self.model_name,
+                getattr(self.llm, "temperature", None),
+                [[message.type, message.content] for message in messages]
+            ],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    async def ainvoke(self, messages: List[BaseMessage], use_cache: bool = True) -> AIMessage:
+        """
+        Call the model through the gateway
+        
+        Args:
+            messages: Chat messages
+            use_cache: Whether to serve and store cached responses
+        
+        Returns:
+            The model's message
+        """
+        self._counters["calls"] += 1
+        use_cache = use_cache and settings.ENABLE_LLM_CACHE
+        key = self.cache_key(messages)
+        
+        if use_cache:
+            cached = await self._cached(key)
+            if cached is not None:
+                self._counters["saved_tokens"] += cached["prompt_tokens"] + cached["completion_tokens"]
+                return AIMessage(content=cached["content"])
+        
+        # Identical prompts already in flight share one provider call
+        pending = self._inflight.get(key)
+        while pending is not None:
+            self._counters["deduplicated"] += 1
+            try:
+                return AIMessage(content=(await asyncio.shield(pending))["content"])
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller making the provider call was cancelled; the
+                # first waiter to get here makes it instead
+                pending = self._inflight.get(key)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            entry = await self._invoke(messages)
+            future.set_result(entry)
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so waiter-less failures are not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                # Cancelled mid-call; waiters must not hang on the future
+                future.cancel()
+        
+        if use_cache:
+            self._remember(key, entry)
+            await self.cache.set(f"llm:{key}", entry, ttl=settings.LLM_CACHE_TTL)
+        return AIMessage(content=entry["content"])
+    
+    async def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a response in memory, then Redis"""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self._counters["memory_hits"] += 1
+            return entry
+        
+        entry = await self.cache.get(f"llm:{key}")
+        if entry is not None:
+            self._remember(key, entry)
+            self._counters["redis_hits"] += 1
+        return entry
+    
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        """Store a response in the in-memory LRU"""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > settings.LLM_CACHE_MAX_ENTRIES:
+            self._memory.popitem(last=False)
+    
+    async def _invoke(self, messages: List[BaseMessage]) -> Dict[str, Any]:
+        """Call the provider under its concurrency cap, retrying transient errors"""
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                async with _provider_semaphore(self.provider):
+                    started = time.perf_counter()
+                    response = await self.llm.ainvoke(messages)
+            except Exception as e:
+                if attempt >= settings.LLM_MAX_RETRIES or not is_retryable(e):
+                    self._counters["errors"] += 1
+                    raise
+                
+                # Full jitter backoff, at least what the provider asked for
+                delay = random.uniform(0, min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * 2 ** attempt))
+                delay = max(delay, _retry_after(e) or 0.0)
+                attempt += 1
+                self._counters["retries"] += 1
+                logger.warning(f"LLM call failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            
+            latency = time.perf_counter() - started
+            self._latencies.append(latency)
+            self._counters["provider_calls"] += 1
+            
+            prompt_tokens, completion_tokens = self._usage(messages, response)
+            self._counters["prompt_tokens"] += prompt_tokens
+            self._counters["completion_tokens"] += completion_tokens
+            return {
+                "content": response.content,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens
+            }
+    
+    def _usage(self, messages: List[BaseMessage], response: Any) -> tuple:
+        """Prompt and completion tokens reported by the provider, or counted locally"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage")
+        if token_usage:
+            return token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+        
+        prompt = "\n".join(str(message.content) for message in messages)
+        return count_tokens(prompt, self.model_name), count_tokens(str(response.content), self.model_name)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Call, cache, retry, token and latency metrics"""
+        latencies = sorted(self._latencies)
+        
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+        
+        hits = self._counters["memory_hits"] + self._counters["redis_hits"]
+        return {
+            "provider": self.provider,
+            "model": self.model_name,
+            **self._counters,
+            "cache_hit_rate": round(hits / self._counters["calls"], 4) if self._counters["calls"] else 0.0,
+            "in_flight": len(self._inflight),
+            "cached_entries": len(self._memory),
+            "latency_ms": {
+                "mean": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1] * 1000, 1) if latencies else None
+            }
+        }
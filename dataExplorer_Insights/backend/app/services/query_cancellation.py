@@ -0,0 +1,107 @@
+"""
+Cooperative cancellation for agent runs and in-flight database queries
+"""
+
+from typing import Callable, List, Optional
+import asyncio
+import logging
+import threading
+
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCancelledError(Exception):
+    """Raised when a query or agent run was cancelled"""
+
+
+class CancellationToken:
+    """
+    Thread-safe cancellation flag with cancel callbacks
+    
+    Database drivers register callbacks that abort their running statement;
+    the callbacks run on a background thread so cancelling never blocks the
+    event loop.
+    """
+    
+    def __init__(self):
+        """Initialize an uncancelled token"""
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+    
+    @property
+    def is_cancelled(self) -> bool:
+        """Whether cancellation was requested"""
+        return self._event.is_set()
+    
+    def cancel(self, reason: str = "cancelled"):
+        """Request cancellation and fire the registered callbacks"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks)
+        
+        logger.info(f"Cancellation requested: {reason}")
+        if callbacks:
+            threading.Thread(
+                target=self._run_callbacks,
+                args=(callbacks,),
+                daemon=True
+            ).start()
+    
+    @staticmethod
+    def _run_callbacks(callbacks: List[Callable[[], None]]):
+        """Run cancel callbacks, isolating failures"""
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Cancel callback failed: {str(e)}")
+    
+    def register(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Register a callback to run on cancellation
+        
+        Args:
+            callback: Function that aborts the running operation
+        
+        Returns:
+            Function that unregisters the callback
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                
+                def unregister():
+                    with self._lock:
+                        if callback in self._callbacks:
+                            self._callbacks.remove(callback)
+                
+                return unregister
+        
+        # Already cancelled: abort immediately
+        self._run_callbacks([callback])
+        return lambda: None
+    
+    def raise_if_cancelled(self):
+        """Raise QueryCancelledError if cancellation was requested"""
+        if self.is_cancelled:
+            raise QueryCancelledError(self.reason or "cancelled")
+
+
+async def watch_disconnect(
+    request: Request,
+    token: CancellationToken,
+    interval: float = 0.5
+):
+    """Cancel the token when the HTTP client disconnects"""
+    while not token.is_cancelled:
+        if await request.is_disconnected():
+            token.cancel("client disconnected")
+            return
+        await asyncio.sleep(interval)
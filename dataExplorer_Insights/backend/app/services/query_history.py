@@ -0,0 +1,79 @@
+"""
+Query History - Recent queries of each user, kept for result exports
+Chat responses carry a query ID. Exports look the query up here and
+re-execute its SQL with a server-side cursor instead of reading the
+row-capped JSON result. Entries live in process memory, bounded by
+QUERY_HISTORY_SIZE, so ad-hoc connection parameters never reach Redis;
+saved connections are stored by ID and resolved again on export.
+"""
+
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+from datetime import datetime
+import logging
+import uuid
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryHistory:
+    """Bounded, per-user record of executed queries"""
+    
+    def __init__(self, max_entries: int = None):
+        """
+        Initialize the history
+        
+        Args:
+            max_entries: Queries kept, oldest first out (defaults to QUERY_HISTORY_SIZE)
+        """
+        self.max_entries = max_entries or settings.QUERY_HISTORY_SIZE
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    
+    def record(
+        self,
+        user_id: Any,
+        response: Dict[str, Any],
+        database_type: str,
+        connection_params: Dict[str, Any],
+        connection_id: Optional[str] = None
+    ) -> str:
+        """
+        Record the query behind a chat response
+        
+        Args:
+            user_id: User who ran the query
+            response: Chat response (query, sql_query and metadata are used)
+            database_type: Type of database
+            connection_params: Connection parameters, not kept for saved connections
+            connection_id: Saved connection ID
+        
+        Returns:
+            Query ID
+        """
+        query_id = uuid.uuid4().hex
+        metadata = response.get("metadata") or {}
+        self._entries[query_id] = {
+            "query_id": query_id,
+            "user_id": user_id,
+            "query": response.get("query"),
+            "sql_query": response.get("sql_query"),
+            "database_type": database_type,
+            "connection_id": connection_id,
+            "connection_params": None if connection_id else connection_params,
+            "data_source": metadata.get("data_source", "database"),
+            "rows_returned": metadata.get("rows_returned"),
+            "created_at": datetime.utcnow().isoformat()
+        }
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return query_id
+    
+    def get(self, query_id: str, user_id: Any) -> Optional[Dict[str, Any]]:
+        """A query recorded for the user, or None if unknown or evicted"""
+        entry = self._entries.get(query_id)
+        if entry is None or entry["user_id"] != user_id:
+            return None
+        return entry
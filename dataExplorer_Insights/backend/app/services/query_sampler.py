@@ -0,0 +1,193 @@
+"""
+Query Sampler - Rewrite queries to run on a sample of the base table
+Used by the approximate analytics mode for exploratory questions on very
+large tables; aggregates are scaled back up to full-table estimates
+"""
+
+from typing import Dict, List, Any, Optional
+import re
+import logging
+
+from app.services.sql_parser import parse_select_columns, top_level_clauses
+
+logger = logging.getLogger(__name__)
+
+# Helper column carrying the number of sampled rows behind each aggregate row
+SAMPLE_ROWS_COLUMN = "__sample_rows"
+
+# Prefix of helper columns carrying the sum of squares behind a sampled SUM
+SUM_SQUARES_PREFIX = "__sum_squares_"
+
+# Dialects with native sampling clauses placed after the table reference
+_NATIVE_SAMPLING = {
+    "postgresql": "TABLESAMPLE BERNOULLI ({percent})",
+    "snowflake": "TABLESAMPLE BERNOULLI ({percent})",
+    "bigquery": "TABLESAMPLE SYSTEM ({percent} PERCENT)",
+    "mssql": "TABLESAMPLE ({percent} PERCENT)",
+    "db2": "TABLESAMPLE BERNOULLI ({percent})"
+}
+
+# Native clauses that sample whole pages or blocks; rows within a block are
+# correlated, so row-level confidence intervals do not apply
+_BLOCK_SAMPLING = {"bigquery", "mssql"}
+
+# Dialects without native sampling use a random filter in a derived table
+_RANDOM_FILTER = {
+    "redshift": "RANDOM() < {fraction}",
+    "sqlite": "(ABS(RANDOM()) % 1000000) < {per_million}",
+    "mysql": "RAND() < {fraction}",
+    "mariadb": "RAND() < {fraction}"
+}
+
+_TABLE_REFERENCE = re.compile(
+    r"([\w\"`\[\]]+(?:\.[\w\"`\[\]]+)*)"
+    r"(\s+(?:AS\s+)?(?!(?:WHERE|GROUP|ORDER|LIMIT|OFFSET|FETCH|JOIN|INNER|LEFT|RIGHT|FULL|CROSS|NATURAL|ON|HAVING|UNION|QUALIFY|WINDOW)\b)(\w+))?",
+    re.IGNORECASE
+)
+
+
+class QuerySampler:
+    """Rewrite SQL to sample the base table and scale aggregates"""
+    
+    @staticmethod
+    def supports(database_type: str) -> bool:
+        """Whether approximate mode is available for a database type"""
+        return database_type in _NATIVE_SAMPLING or database_type in _RANDOM_FILTER or database_type == "oracle"
+    
+    def rewrite(
+        self,
+        sql_query: str,
+        database_type: str,
+        sample_percent: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Rewrite a query to read a sample of its base table
+        
+        Args:
+            sql_query: Generated SQL query
+            database_type: Type of database
+            sample_percent: Percentage of the base table to sample
+        
+        Returns:
+            Sampling plan with the rewritten SQL, or None if not applicable
+        """
+        if not self.supports(database_type):
+            logger.info(f"Approximate mode not supported for {database_type}")
+            return None
+        
+        sql = sql_query.strip().rstrip(";")
+        clauses = top_level_clauses(sql)
+        from_clause = next((clause for clause in clauses if clause[0] == "FROM"), None)
+        if from_clause is None:
+            return None
+        
+        _, from_start, position = from_clause
+        while position < len(sql) and sql[position].isspace():
+            position += 1
+        if sql[position:position + 1] == "(":
+            # Derived tables as the base relation are left untouched
+            return None
+        
+        match = _TABLE_REFERENCE.match(sql, position)
+        if match is None:
+            return None
+        
+        table, alias = match.group(1), match.group(3)
+        sampled = self._sample_reference(table, alias, database_type, sample_percent)
+        sql = sql[:match.start()] + sampled + sql[match.end():]
+        
+        columns = parse_select_columns(sql_query)
+        scaled_columns = {
+            col["alias"]: col["aggregate"] for col in columns
+            if col["aggregate"] in ("SUM", "COUNT") and not col["distinct"]
+        }
+        is_aggregate = any(col["aggregate"] or not col["mergeable"] for col in columns)
+        
+        square_columns = {}
+        if is_aggregate:
+            # Carry the sampled row count, and the sum of squares behind each
+            # scaled SUM, per group for confidence intervals
+            helpers = [f"COUNT(*) AS {SAMPLE_ROWS_COLUMN}"]
+            for col in columns:
+                if scaled_columns.get(col["alias"]) != "SUM":
+                    continue
+                argument = col["expression"][col["expression"].index("(") + 1:-1].strip()
+                square_columns[col["alias"]] = f"{SUM_SQUARES_PREFIX}{len(square_columns)}"
+                helpers.append(
+                    f"SUM(({argument}) * 1.0 * ({argument})) AS {square_columns[col['alias']]}"
+                )
+            sql = sql[:from_start].rstrip() + ", " + ", ".join(helpers) + " " + sql[from_start:]
+        
+        return {
+            "sql": sql,
+            "sample_percent": sample_percent,
+            "fraction": sample_percent / 100.0,
+            "method": "native" if database_type in _NATIVE_SAMPLING or database_type == "oracle" else "random_filter",
+            "base_table": table,
+            "scaled_columns": scaled_columns,
+            "square_columns": square_columns,
+            "row_level": database_type not in _BLOCK_SAMPLING,
+            "is_aggregate": is_aggregate,
+            "unscaled_columns": [
+                col["alias"] for col in columns
+                if col["aggregate"] == "COUNT" and col["distinct"]
+            ]
+        }
+    
+    @staticmethod
+    def _sample_reference(
+        table: str,
+        alias: Optional[str],
+        database_type: str,
+        sample_percent: float
+    ) -> str:
+        """Build the sampled table reference for a dialect"""
+        percent = f"{sample_percent:g}"
+        fraction = sample_percent / 100.0
+        
+        if database_type == "oracle":
+            # Oracle places SAMPLE before the alias
+            return f"{table} SAMPLE ({percent})" + (f" {alias}" if alias else "")
+        
+        if database_type in _NATIVE_SAMPLING:
+            reference = f"{table} AS {alias}" if alias else table
+            return f"{reference} " + _NATIVE_SAMPLING[database_type].format(percent=percent)
+        
+        condition = _RANDOM_FILTER[database_type].format(
+            fraction=fraction,
+            per_million=int(fraction * 1000000)
+        )
+        alias = alias or table.split(".")[-1].strip("\"`[]")
+        return f"(SELECT * FROM {table} WHERE {condition}) AS {alias}"
+    
+    @staticmethod
+    def scale_results(
+        rows: List[Dict[str, Any]],
+        plan: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Scale sampled SUM and COUNT values to full-table estimates
+        
+        Args:
+            rows: Rows returned by the sampled query
+            plan: Sampling plan from rewrite()
+        
+        Returns:
+            Rows with scaled aggregates and the helper column removed
+        """
+        factor = 1.0 / plan["fraction"]
+        scaled = []
+        
+        for row in rows:
+            row = dict(row)
+            row.pop(SAMPLE_ROWS_COLUMN, None)
+            for helper in plan.get("square_columns", {}).values():
+                row.pop(helper, None)
+            for col, aggregate in plan["scaled_columns"].items():
+                if row.get(col) is None:
+                    continue
+                estimate = float(row[col]) * factor
+                row[col] = round(estimate) if aggregate == "COUNT" else estimate
+            scaled.append(row)
+        
+        return scaled
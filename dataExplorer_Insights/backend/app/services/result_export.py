@@ -0,0 +1,264 @@
+"""
+Result Export - Stream query results as CSV, Parquet or Arrow
+Record batches from a server-side cursor are encoded, and optionally
+compressed, one at a time, so an export holds a single batch in memory
+whatever the size of the result. CSV and Arrow streams are wrapped in
+gzip or zstd; Parquet compresses its column chunks with the same codec
+so the file stays readable by any Parquet reader.
+"""
+
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+import logging
+import zlib
+
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Optional dependencies
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Format: (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows")
+}
+
+# Stream compression: (media type, file extension)
+COMPRESSIONS = {
+    "gzip": ("application/gzip", "gz"),
+    "zstd": ("application/zstd", "zst")
+}
+
+
+def validate_export(export_format: str, compression: Optional[str]):
+    """
+    Check that a format and compression can be produced
+    
+    Raises:
+        ValueError: Unknown format or compression, or its library is missing
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format '{export_format}', use one of: {', '.join(EXPORT_FORMATS)}")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Unsupported compression '{compression}', use one of: {', '.join(COMPRESSIONS)}")
+    if export_format != "csv" and not PYARROW_AVAILABLE:
+        raise ValueError(f"{export_format} export requires pyarrow")
+    if compression == "zstd" and not ZSTD_AVAILABLE and export_format != "parquet":
+        raise ValueError("zstd compression requires zstandard")
+
+
+def content_type(export_format: str, compression: Optional[str]) -> Tuple[str, str]:
+    """Media type and file extension of an export"""
+    media_type, extension = EXPORT_FORMATS[export_format]
+    if compression and export_format != "parquet":
+        media_type, suffix = COMPRESSIONS[compression]
+        extension = f"{extension}.{suffix}"
+    return media_type, extension
+
+
+class _Sink:
+    """Write-only file handing out the bytes written since the last drain"""
+    
+    def __init__(self):
+        """Initialize the sink"""
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+    
+    def write(self, data) -> int:
+        """Buffer written bytes"""
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        """Total bytes written, which Parquet uses for its footer offsets"""
+        return self._position
+    
+    def flush(self):
+        """Nothing to flush, bytes are handed out by drain"""
+    
+    def close(self):
+        """Mark the sink closed"""
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        """Bytes written since the last drain"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class _CsvEncoder:
+    """CSV with a header before the first batch"""
+    
+    def __init__(self, compression: Optional[str]):
+        """Initialize the encoder"""
+        self._header = True
+    
+    def encode(self, batch: pd.DataFrame) -> bytes:
+        """Encode one batch"""
+        data = batch.to_csv(index=False, header=self._header).encode("utf-8")
+        self._header = False
+        return data
+    
+    def close(self) -> bytes:
+        """Nothing follows the last row"""
+        return b""
+
+
+class _ArrowEncoder:
+    """Arrow tables written with the schema of the first batch, widened to hold later ones"""
+    
+    def __init__(self, compression: Optional[str]):
+        """Initialize the encoder"""
+        self.compression = compression
+        self._sink = _Sink()
+        self._schema = None
+        self._writer = None
+    
+    @staticmethod
+    def _batch_schema(table: "pa.Table") -> "pa.Schema":
+        """
+        Schema of the first batch, with all-null columns typed as strings
+        
+        Decimal precision is inferred from the values in a batch, so decimal
+        columns get the widest decimal128 precision at the batch's scale.
+        """
+        fields = []
+        for field in table.schema:
+            if pa.types.is_null(field.type):
+                field = field.with_type(pa.string())
+            elif pa.types.is_decimal(field.type):
+                field = field.with_type(pa.decimal128(38, min(field.type.scale, 38)))
+            fields.append(field)
+        return pa.schema(fields).remove_metadata()
+    
+    def _conform(self, table: "pa.Table") -> "pa.Table":
+        """Cast a batch to the export schema"""
+        columns = []
+        for column, field in zip(table.columns, self._schema):
+            if (
+                pa.types.is_decimal(field.type)
+                and pa.types.is_decimal(column.type)
+                and column.type.scale > field.type.scale
+            ):
+                # More decimal places than the first batch had; round like SQL ROUND
+                column = pc.round(column, ndigits=field.type.scale, round_mode="half_towards_infinity")
+            columns.append(column.cast(field.type))
+        return pa.Table.from_arrays(columns, schema=self._schema)
+    
+    def _open(self, schema: "pa.Schema"):
+        """Create the format's writer"""
+        raise NotImplementedError
+    
+    def encode(self, batch: pd.DataFrame) -> bytes:
+        """Encode one batch"""
+        table = pa.Table.from_pandas(batch, preserve_index=False)
+        if self._writer is None:
+            self._schema = self._batch_schema(table)
+            self._writer = self._open(self._schema)
+        self._writer.write_table(self._conform(table))
+        return self._sink.drain()
+    
+    def close(self) -> bytes:
+        """Write the footer or end-of-stream marker"""
+        if self._writer is not None:
+            self._writer.close()
+        return self._sink.drain()
+
+
+class _ParquetEncoder(_ArrowEncoder):
+    """Parquet file with one row group per batch"""
+    
+    def _open(self, schema: "pa.Schema"):
+        """Create the Parquet writer"""
+        return pq.ParquetWriter(self._sink, schema, compression=self.compression or "snappy")
+
+
+class _ArrowStreamEncoder(_ArrowEncoder):
+    """Arrow IPC stream with one record batch per batch"""
+    
+    def _open(self, schema: "pa.Schema"):
+        """Create the IPC stream writer"""
+        return pa.ipc.new_stream(self._sink, schema)
+
+
+_ENCODERS = {
+    "csv": _CsvEncoder,
+    "parquet": _ParquetEncoder,
+    "arrow": _ArrowStreamEncoder
+}
+
+
+def _compressor(compression: Optional[str]):
+    """Streaming compressor with compress() and flush(), or None"""
+    if compression == "gzip":
+        # wbits 31 writes a gzip header and trailer
+        return zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=settings.EXPORT_ZSTD_LEVEL).compressobj()
+    return None
+
+
+async def export_batches(
+    batches: AsyncIterator[pd.DataFrame],
+    export_format: str,
+    compression: Optional[str] = None,
+    stats: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[bytes]:
+    """
+    Encode record batches into an export stream
+    
+    An empty result produces an empty file.
+    
+    Args:
+        batches: Result batches, e.g. from DatabaseManager.stream_query
+        export_format: "csv", "parquet" or "arrow"
+        compression: "gzip", "zstd" or None
+        stats: Dictionary updated with the rows and bytes written
+    
+    Yields:
+        Chunks of the export file
+    """
+    validate_export(export_format, compression)
+    encoder = _ENCODERS[export_format](compression)
+    compressor = _compressor(compression) if export_format != "parquet" else None
+    stats = stats if stats is not None else {}
+    stats.update(rows=0, bytes=0)
+    
+    def output(data: bytes, final: bool = False) -> bytes:
+        if compressor is not None:
+            data = compressor.compress(data)
+            if final:
+                data += compressor.flush()
+        stats["bytes"] += len(data)
+        return data
+    
+    async for batch in batches:
+        data = output(encoder.encode(batch))
+        stats["rows"] += len(batch)
+        if data:
+            yield data
+    
+    data = output(encoder.close(), final=True)
+    if data:
+        yield data
+    logger.info(f"Exported {stats['rows']} rows as {export_format} ({stats['bytes']} bytes, {compression or 'uncompressed'})")
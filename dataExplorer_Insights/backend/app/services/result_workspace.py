@@ -0,0 +1,339 @@
+"""
+Result Workspace - Local follow-up engine over previous query results
+Keeps the last N result sets per session in an embedded DuckDB database
+(SQLite fallback) so drill-down questions can be answered locally
+"""
+
+from typing import Dict, List, Any, Optional
+from collections import OrderedDict
+from decimal import Decimal
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+    logger.warning("DuckDB not available, follow-up workspace will use SQLite")
+
+# Authorizer actions a follow-up query may perform on the SQLite fallback:
+# read the stored results and call functions, nothing else
+_SQLITE_READ_ONLY = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION}
+
+
+def _read_only_authorizer(action, arg1, arg2, database, trigger):
+    """sqlite3 authorizer that denies everything but reads"""
+    if action in _SQLITE_READ_ONLY:
+        return sqlite3.SQLITE_OK
+    return sqlite3.SQLITE_DENY
+
+
+class _SessionWorkspace:
+    """Embedded database and result catalog for a single session"""
+    
+    def __init__(self, session_key: str, directory: str):
+        self.directory = os.path.join(directory, session_key)
+        os.makedirs(self.directory, exist_ok=True)
+        self.results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.counter = 0
+        self.lock = threading.Lock()
+        self.closed = False
+        
+        if DUCKDB_AVAILABLE:
+            # In-memory database that spills to the session directory once
+            # the memory limit is reached
+            self.connection = duckdb.connect(database=":memory:")
+            self.connection.execute(f"SET memory_limit = '{settings.WORKSPACE_MEMORY_LIMIT}'")
+            self.connection.execute(f"SET temp_directory = '{self.directory}'")
+            # Generated SQL may only read the stored results: no files, URLs
+            # or extensions, and no way to lift these settings again
+            self.connection.execute("SET enable_external_access = false")
+            self.connection.execute("SET lock_configuration = true")
+        else:
+            # File-backed SQLite keeps large results on disk
+            self.connection = sqlite3.connect(
+                os.path.join(self.directory, "workspace.sqlite"),
+                check_same_thread=False
+            )
+    
+    def execute(self, sql_query: str):
+        """Run generated SQL read-only; callers hold the session lock"""
+        if DUCKDB_AVAILABLE:
+            return self.connection.execute(sql_query)
+        
+        self.connection.set_authorizer(_read_only_authorizer)
+        try:
+            return self.connection.execute(sql_query)
+        finally:
+            self.connection.set_authorizer(None)
+    
+    def close(self):
+        """Close the connection and remove spilled files once queries finish"""
+        with self.lock:
+            self.closed = True
+            try:
+                self.connection.close()
+            finally:
+                shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class ResultWorkspace:
+    """Hold recent result sets per session and answer follow-ups against them"""
+    
+    def __init__(
+        self,
+        max_results: int = None,
+        max_sessions: int = None,
+        directory: str = None
+    ):
+        """Initialize the workspace"""
+        self.max_results = max_results or settings.WORKSPACE_MAX_RESULTS
+        self.max_sessions = max_sessions or settings.WORKSPACE_MAX_SESSIONS
+        self.directory = directory or settings.WORKSPACE_DIR
+        self.sessions: "OrderedDict[str, _SessionWorkspace]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @property
+    def dialect(self) -> str:
+        """SQL dialect of the local engine"""
+        return "duckdb" if DUCKDB_AVAILABLE else "sqlite"
+    
+    @staticmethod
+    def workspace_key(
+        user_id: Optional[Any],
+        connection: Any,
+        session_id: Optional[str]
+    ) -> Optional[str]:
+        """
+        Workspace key of a conversation
+        
+        Session ids are chosen by the client, so a workspace belongs to the
+        user and connection as well: another user reusing the id, or a
+        follow-up asked against another connection, never sees its results.
+        
+        Args:
+            user_id: Owner of the conversation
+            connection: Saved connection ID or connection parameters
+            session_id: Client-supplied conversation session identifier
+        
+        Returns:
+            Key for the workspace methods, or None without a user or session
+        """
+        if not session_id or user_id is None:
+            return None
+        return json.dumps([str(user_id), connection, session_id], sort_keys=True, default=str)
+    
+    def _session_key(self, key: str) -> str:
+        """Filesystem-safe key for a workspace key"""
+        return hashlib.sha256(key.encode()).hexdigest()[:16]
+    
+    def _get_session(self, key: str, create: bool = False) -> Optional[_SessionWorkspace]:
+        """Look up (and optionally create) a session, evicting the least recent"""
+        evicted = []
+        with self._lock:
+            session = self.sessions.get(key)
+            if session is not None:
+                self.sessions.move_to_end(key)
+                return session
+            if not create:
+                return None
+            
+            session = _SessionWorkspace(self._session_key(key), self.directory)
+            self.sessions[key] = session
+            
+            while len(self.sessions) > self.max_sessions:
+                evicted.append(self.sessions.popitem(last=False)[1])
+        
+        # Closing waits for a running query on the evicted session, so it
+        # happens outside the registry lock
+        for old in evicted:
+            old.close()
+        
+        return session
+    
+    @staticmethod
+    def _prepare_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Build a DataFrame the embedded engines can ingest"""
+        df = pd.DataFrame(rows)
+        for col in df.select_dtypes(include=["object"]).columns:
+            if df[col].map(lambda v: isinstance(v, Decimal)).any():
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+            elif not df[col].map(lambda v: v is None or isinstance(v, str)).all():
+                df[col] = df[col].map(lambda v: v if v is None else str(v))
+        return df
+    
+    def store(
+        self,
+        key: str,
+        user_query: str,
+        sql_query: Optional[str],
+        rows: List[Dict[str, Any]]
+    ) -> Optional[str]:
+        """
+        Store a result set in the session workspace
+        
+        Args:
+            key: Workspace key from workspace_key
+            user_query: Question that produced the result
+            sql_query: SQL that produced the result
+            rows: Result rows
+        
+        Returns:
+            Name of the local table, or None if nothing was stored
+        """
+        if not rows:
+            return None
+        
+        session = self._get_session(key, create=True)
+        df = self._prepare_frame(rows)
+        
+        with session.lock:
+            if session.closed:
+                logger.info("Follow-up workspace was evicted, result not stored")
+                return None
+            session.counter += 1
+            table_name = f"result_{session.counter}"
+            
+            if DUCKDB_AVAILABLE:
+                session.connection.register("_incoming", df)
+                session.connection.execute(f"CREATE TABLE {table_name} AS SELECT * FROM _incoming")
+                session.connection.unregister("_incoming")
+                session.connection.execute(
+                    f"CREATE OR REPLACE VIEW last_result AS SELECT * FROM {table_name}"
+                )
+            else:
+                df.to_sql(table_name, session.connection, index=False)
+                session.connection.execute("DROP VIEW IF EXISTS last_result")
+                session.connection.execute(
+                    f"CREATE VIEW last_result AS SELECT * FROM {table_name}"
+                )
+                session.connection.commit()
+            
+            session.results[table_name] = {
+                "user_query": user_query,
+                "sql_query": sql_query,
+                "columns": {col: str(dtype) for col, dtype in df.dtypes.items()},
+                "row_count": len(df)
+            }
+            
+            while len(session.results) > self.max_results:
+                evicted, _ = session.results.popitem(last=False)
+                session.connection.execute(f"DROP TABLE IF EXISTS {evicted}")
+        
+        logger.info(f"Stored {len(df)} rows as {table_name} in follow-up workspace")
+        return table_name
+    
+    def has_results(self, key: Optional[str]) -> bool:
+        """Whether the session has any stored result sets"""
+        if not key:
+            return False
+        session = self._get_session(key)
+        return bool(session and session.results)
+    
+    @staticmethod
+    def _normalise(term: str) -> str:
+        """Normalise an entity or column name for matching"""
+        term = re.sub(r"[^a-z0-9]+", "_", str(term).lower()).strip("_")
+        return term[:-1] if term.endswith("s") and len(term) > 3 else term
+    
+    def find_covering_result(
+        self,
+        key: Optional[str],
+        terms: List[str]
+    ) -> Optional[str]:
+        """
+        Find the most recent result set whose columns cover every term
+        
+        Args:
+            key: Workspace key from workspace_key
+            terms: Entities the follow-up question refers to
+        
+        Returns:
+            Table name of the covering result, or None
+        """
+        if not self.has_results(key) or not terms:
+            return None
+        
+        session = self._get_session(key)
+        wanted = [self._normalise(term) for term in terms if self._normalise(term)]
+        if not wanted:
+            return None
+        
+        for table_name in reversed(session.results):
+            columns = [self._normalise(col) for col in session.results[table_name]["columns"]]
+            if all(
+                any(
+                    term == col or (len(term) >= 3 and (term in col or col in term))
+                    for col in columns
+                )
+                for term in wanted
+            ):
+                return table_name
+        
+        return None
+    
+    def describe(self, key: str) -> str:
+        """Describe the session's local tables in the schema prompt format"""
+        session = self._get_session(key)
+        if session is None:
+            return ""
+        
+        schema_parts = []
+        for table_name, meta in reversed(session.results.items()):
+            schema_parts.append(f"\nTable: {table_name}")
+            schema_parts.append(f"Source question: {meta['user_query']}")
+            schema_parts.append(f"Rows: {meta['row_count']}")
+            schema_parts.append("Columns:")
+            for col, dtype in meta["columns"].items():
+                schema_parts.append(f"  - {col}: {dtype}")
+        
+        schema_parts.append("\nView: last_result (alias of the most recent table)")
+        return "\n".join(schema_parts)
+    
+    def execute(self, key: str, sql_query: str) -> List[Dict[str, Any]]:
+        """
+        Execute SQL against the session workspace
+        
+        Args:
+            key: Workspace key from workspace_key
+            sql_query: SQL in the workspace dialect
+        
+        Returns:
+            List of result rows as dictionaries
+        """
+        session = self._get_session(key)
+        if session is None:
+            raise ValueError("No workspace for this session")
+        
+        with session.lock:
+            if session.closed:
+                raise ValueError("No workspace for this session")
+            cursor = session.execute(sql_query)
+            columns = [desc[0] for desc in cursor.description]
+            rows = [
+                dict(zip(columns, row))
+                for row in cursor.fetchmany(settings.MAX_RESULT_ROWS)
+            ]
+        
+        logger.info(f"Workspace query executed, {len(rows)} rows returned")
+        return rows
+    
+    def drop_session(self, key: str):
+        """Discard a session's workspace"""
+        with self._lock:
+            session = self.sessions.pop(key, None)
+        if session is not None:
+            session.close()
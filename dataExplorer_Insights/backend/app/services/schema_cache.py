@@ -0,0 +1,135 @@
+"""
+Schema Cache - Keep schema metadata and column profiles per connection
+Entries live in memory and are persisted to Redis so they survive restarts
+and are shared between workers
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import json
+import hashlib
+import logging
+import time
+
+from app.core.config import settings
+from app.services.cache_manager import CacheManager
+from app.services.database_manager import DatabaseManager
+from app.services.schema_encoder import render_schema
+
+logger = logging.getLogger(__name__)
+
+# Databases whose schema is not introspected through SQLAlchemy
+NON_SQL_DATABASES = ("mongodb", "bigquery", "cassandra", "dynamodb")
+
+
+class SchemaCache:
+    """Cache schema metadata and column profiles per connection"""
+    
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        cache: Optional[CacheManager] = None,
+        ttl: int = None
+    ):
+        """Initialize with the database manager and optional Redis cache"""
+        self.db_manager = db_manager
+        self.cache = cache or CacheManager()
+        self.ttl = ttl or settings.SCHEMA_CACHE_TTL
+        self._memory: Dict[str, Tuple[float, Any]] = {}
+    
+    @staticmethod
+    def connection_key(database_type: str, connection_params: Dict[str, Any]) -> str:
+        """
+        Stable key identifying a connection
+        
+        Saved connections are keyed by ID and version rather than
+        credentials, so a change of host or database starts a new entry.
+        """
+        if connection_params.get("connection_id"):
+            key = f"connection:{connection_params['connection_id']}"
+            if connection_params.get("connection_version"):
+                key = f"{key}:{connection_params['connection_version']}"
+            return key
+        key_data = json.dumps([database_type, connection_params], sort_keys=True, default=str)
+        return hashlib.sha256(key_data.encode()).hexdigest()
+    
+    async def _load(self, kind: str, key: str) -> Optional[Any]:
+        """Read an entry from memory, then Redis"""
+        entry = self._memory.get(f"{kind}:{key}")
+        if entry and entry[0] > time.time():
+            return entry[1]
+        
+        value = await self.cache.get(f"{kind}:{key}")
+        if value is not None:
+            self._memory[f"{kind}:{key}"] = (time.time() + self.ttl, value)
+        return value
+    
+    async def _store(self, kind: str, key: str, value: Any, ttl: int):
+        """Write an entry to memory and Redis"""
+        self._memory[f"{kind}:{key}"] = (time.time() + ttl, value)
+        await self.cache.set(f"{kind}:{key}", value, ttl=ttl)
+    
+    async def get_tables(
+        self,
+        database_type: str,
+        connection_params: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Get SQL table metadata, introspecting on a cache miss
+        
+        Args:
+            database_type: Type of SQL database
+            connection_params: Connection parameters
+        
+        Returns:
+            Tables with name, columns, primary_key, foreign_keys and indexes
+        """
+        key = self.connection_key(database_type, connection_params)
+        tables = await self._load("schema", key)
+        if tables is None:
+            tables = await self.db_manager.get_sql_tables(database_type, connection_params)
+            await self._store("schema", key, tables, self.ttl)
+            logger.info(f"Cached schema for {database_type} ({len(tables)} tables)")
+        return tables
+    
+    async def get_schema(
+        self,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        schema_format: str = "verbose"
+    ) -> str:
+        """Get the rendered schema for prompts"""
+        if database_type in NON_SQL_DATABASES:
+            key = self.connection_key(database_type, connection_params)
+            schema = await self._load("schema_text", key)
+            if schema is None:
+                schema = await self.db_manager.get_schema(database_type, connection_params)
+                await self._store("schema_text", key, schema, self.ttl)
+            return schema
+        
+        tables = await self.get_tables(database_type, connection_params)
+        return render_schema(tables, schema_format)
+    
+    async def get_profile(
+        self,
+        database_type: str,
+        connection_params: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Get the persisted column profile, if any"""
+        return await self._load("profile", self.connection_key(database_type, connection_params))
+    
+    async def set_profile(
+        self,
+        database_type: str,
+        connection_params: Dict[str, Any],
+        profile: Dict[str, Any]
+    ):
+        """Persist the column profile"""
+        key = self.connection_key(database_type, connection_params)
+        await self._store("profile", key, profile, settings.PROFILE_CACHE_TTL)
+    
+    async def invalidate(self, database_type: str, connection_params: Dict[str, Any]):
+        """Drop the cached schema and column profile, e.g. after DDL changes"""
+        key = self.connection_key(database_type, connection_params)
+        for kind in ("schema", "schema_text", "profile"):
+            self._memory.pop(f"{kind}:{key}", None)
+            await self.cache.delete(f"{kind}:{key}")
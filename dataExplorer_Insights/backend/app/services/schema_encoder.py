@@ -0,0 +1,181 @@
+"""
+Schema Encoder - Render table metadata for LLM prompts
+The verbose format lists every column, key and index on its own line; the
+compact format packs each table into a DDL-like one-liner with abbreviated
+types and inline key markers, using far fewer prompt tokens
+"""
+
+from typing import Dict, List, Any, Optional
+import re
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_FORMATS = ("verbose", "compact")
+
+COMPACT_LEGEND = (
+    "-- table(column type; ! = NOT NULL, PK = primary key, "
+    "->t.c = foreign key) idx/uniq = indexes"
+)
+
+# Ordered (pattern, abbreviation) pairs matched against the upper-cased type
+_TYPE_ABBREVIATIONS = [
+    (r"^BIGINT|^INT8|^BIGSERIAL", "bigint"),
+    (r"^(SMALL|TINY|MEDIUM)?INT(EGER|[0-9]+)?\b|^SERIAL", "int"),
+    (r"^(N)?(VAR)?CHAR|^CHARACTER|^STRING|^VARCHAR2|^NVARCHAR2", "str"),
+    (r"^(LONG|MEDIUM|TINY|N)?TEXT|^CLOB|^NCLOB", "text"),
+    (r"^NUMERIC|^DECIMAL|^NUMBER|^MONEY", "dec"),
+    (r"^FLOAT|^REAL|^DOUBLE", "float"),
+    (r"^BOOL|^BIT$", "bool"),
+    (r"^TIMESTAMP.*WITH TIME ZONE|^TIMESTAMPTZ|^DATETIMEOFFSET|^TIMESTAMP_TZ", "tstz"),
+    (r"^TIMESTAMP|^DATETIME|^SMALLDATETIME", "ts"),
+    (r"^DATE", "date"),
+    (r"^TIME", "time"),
+    (r"^INTERVAL", "interval"),
+    (r"^JSON|^VARIANT|^OBJECT", "json"),
+    (r"^UUID|^UNIQUEIDENTIFIER", "uuid"),
+    (r"^BLOB|^BYTEA|^(VAR)?BINARY|^RAW|^IMAGE", "bytes")
+]
+
+
+def abbreviate_type(type_name: str) -> str:
+    """Abbreviate a SQL column type, dropping lengths and collations"""
+    upper = type_name.strip().upper()
+    suffix = "[]" if upper.endswith("[]") or upper.startswith("ARRAY") else ""
+    upper = re.sub(r"^ARRAY\s*[<(]?|[>)]?\[\]$", "", upper).strip()
+    
+    for pattern, abbreviation in _TYPE_ABBREVIATIONS:
+        if re.match(pattern, upper):
+            return abbreviation + suffix
+    
+    base = re.split(r"[\s(]", upper, maxsplit=1)[0]
+    return (base.lower() or "any") + suffix
+
+
+def render_verbose(tables: List[Dict[str, Any]]) -> str:
+    """Render table metadata as the original multi-line description"""
+    schema_parts = []
+    
+    for table in tables:
+        schema_parts.append(f"\nTable: {table['name']}")
+        
+        # Columns
+        schema_parts.append("Columns:")
+        for col in table["columns"]:
+            nullable = "NULL" if col["nullable"] else "NOT NULL"
+            schema_parts.append(f"  - {col['name']}: {col['type']} {nullable}")
+        
+        # Primary key
+        if table["primary_key"]:
+            schema_parts.append(f"Primary Key: {', '.join(table['primary_key'])}")
+        
+        # Foreign keys
+        if table["foreign_keys"]:
+            schema_parts.append("Foreign Keys:")
+            for fk in table["foreign_keys"]:
+                schema_parts.append(
+                    f"  - {', '.join(fk['constrained_columns'])} -> "
+                    f"{fk['referred_table']}.{', '.join(fk['referred_columns'])}"
+                )
+        
+        # Indexes
+        if table["indexes"]:
+            schema_parts.append("Indexes:")
+            for idx in table["indexes"]:
+                unique = "UNIQUE" if idx["unique"] else ""
+                schema_parts.append(
+                    f"  - {idx['name']}: {', '.join(idx['column_names'])} {unique}"
+                )
+    
+    return "\n".join(schema_parts)
+
+
+def _render_compact_table(table: Dict[str, Any]) -> str:
+    """Render one table as a DDL-like one-liner"""
+    primary_key = table["primary_key"]
+    single_fks = {
+        fk["constrained_columns"][0]: f"{fk['referred_table']}.{fk['referred_columns'][0]}"
+        for fk in table["foreign_keys"]
+        if len(fk["constrained_columns"]) == 1 and fk["referred_columns"]
+    }
+    
+    columns = []
+    for col in table["columns"]:
+        parts = [col["name"], abbreviate_type(col["type"]) + ("" if col["nullable"] else "!")]
+        if len(primary_key) == 1 and col["name"] == primary_key[0]:
+            # Primary keys are implicitly NOT NULL
+            parts[1] = parts[1].rstrip("!")
+            parts.append("PK")
+        if col["name"] in single_fks:
+            parts.append(f"->{single_fks[col['name']]}")
+        columns.append(" ".join(parts))
+    
+    if len(primary_key) > 1:
+        columns.append(f"PK({','.join(primary_key)})")
+    for fk in table["foreign_keys"]:
+        if len(fk["constrained_columns"]) > 1:
+            columns.append(
+                f"({','.join(fk['constrained_columns'])})"
+                f"->{fk['referred_table']}({','.join(fk['referred_columns'])})"
+            )
+    
+    line = f"{table['name']}({', '.join(columns)})"
+    
+    # Indexes that merely repeat the primary key add nothing
+    indexes = [
+        idx for idx in table["indexes"]
+        if idx["column_names"] and list(idx["column_names"]) != list(primary_key)
+    ]
+    plain = [",".join(idx["column_names"]) for idx in indexes if not idx["unique"]]
+    unique = [",".join(idx["column_names"]) for idx in indexes if idx["unique"]]
+    if plain:
+        line += f" idx({'; '.join(plain)})"
+    if unique:
+        line += f" uniq({'; '.join(unique)})"
+    
+    return line
+
+
+def render_compact(tables: List[Dict[str, Any]]) -> str:
+    """Render table metadata as one line per table"""
+    return "\n".join([COMPACT_LEGEND] + [_render_compact_table(table) for table in tables])
+
+
+def render_schema(tables: List[Dict[str, Any]], schema_format: str = "verbose") -> str:
+    """
+    Render table metadata in the requested format
+    
+    Args:
+        tables: Tables with name, columns, primary_key, foreign_keys and indexes
+        schema_format: "verbose" or "compact"
+    
+    Returns:
+        Schema description for prompts
+    """
+    if schema_format == "compact":
+        return render_compact(tables)
+    return render_verbose(tables)
+
+
+def resolve_schema_format(model: Optional[str] = None) -> str:
+    """
+    Pick the schema format for a model
+    
+    SCHEMA_FORMAT_BY_MODEL maps model name prefixes to a format; the longest
+    matching prefix wins, otherwise SCHEMA_FORMAT applies.
+    """
+    schema_format = settings.SCHEMA_FORMAT
+    if model:
+        matches = [
+            prefix for prefix in settings.SCHEMA_FORMAT_BY_MODEL
+            if model.startswith(prefix)
+        ]
+        if matches:
+            schema_format = settings.SCHEMA_FORMAT_BY_MODEL[max(matches, key=len)]
+    
+    if schema_format not in SCHEMA_FORMATS:
+        logger.warning(f"Unknown schema format {schema_format}, using verbose")
+        return "verbose"
+    return schema_format
@@ -0,0 +1,232 @@
+"""
+Mergeable probabilistic sketches for column statistics
+"""
+
+from typing import Dict, List, Any, Optional
+import base64
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def _leading_zeros(values: np.ndarray) -> np.ndarray:
+    """Count leading zero bits of uint64 values"""
+    values = values.copy()
+    zeros = np.zeros(len(values), dtype=np.uint8)
+    
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = values < (np.uint64(1) << np.uint64(64 - shift))
+        zeros[mask] += shift
+        values[mask] <<= np.uint64(shift)
+    
+    zeros[values == 0] += 1
+    return zeros
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """Hash a series to uint64, consistently across processes"""
+    return pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy(dtype=np.uint64)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-count sketch"""
+    
+    def __init__(self, precision: int = 12):
+        """Initialize with 2^precision registers"""
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+    
+    def add(self, values: pd.Series):
+        """Add non-null values"""
+        values = values.dropna()
+        if values.empty:
+            return
+        
+        hashes = hash_values(values)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        remainder = hashes << np.uint64(self.precision)
+        rank = np.minimum(_leading_zeros(remainder) + 1, 64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+    
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Union with another sketch of the same precision"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+    
+    def estimate(self) -> int:
+        """Estimated number of distinct values"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.power(2.0, -self.registers.astype(np.float64))))
+        
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and empty:
+            # Linear counting is more accurate for small cardinalities
+            return int(round(m * math.log(m / empty)))
+        return int(round(raw))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for JSON persistence"""
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(self.registers.tobytes()).decode("ascii")
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        """Restore a serialized sketch"""
+        sketch = cls(data["precision"])
+        sketch.registers = np.frombuffer(
+            base64.b64decode(data["registers"]),
+            dtype=np.uint8
+        ).copy()
+        return sketch
+
+
+class TDigest:
+    """Merging t-digest for streaming quantiles"""
+    
+    def __init__(self, compression: int = 100):
+        """Initialize with the compression (about compression / 2 centroids)"""
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+    
+    @property
+    def count(self) -> float:
+        """Total weight added"""
+        return float(self.weights.sum())
+    
+    def add(self, values: np.ndarray):
+        """Add numeric values, ignoring NaN"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))])
+        )
+    
+    def merge(self, other: "TDigest") -> "TDigest":
+        """Combine with another digest"""
+        if not len(other.means):
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights])
+        )
+        return self
+    
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        """Merge sorted points into centroids spanning at most one k-unit each"""
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+        
+        # k1 scale function: small centroids at the tails, large in the middle
+        q = (np.cumsum(weights) - weights / 2) / weights.sum()
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q - 1)
+        groups = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, np.diff(groups) != 0])
+        
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+    
+    def _cumulative(self) -> np.ndarray:
+        """Cumulative weight at each centroid center"""
+        return np.cumsum(self.weights) - self.weights / 2
+    
+    def quantile(self, q: float) -> float:
+        """Estimated value at quantile q (0..1)"""
+        if not len(self.means):
+            return math.nan
+        total = self.count
+        return float(np.interp(
+            q * total,
+            np.r_[0.0, self._cumulative(), total],
+            np.r_[self.min, self.means, self.max]
+        ))
+    
+    def cdf(self, value: float) -> float:
+        """Estimated fraction of values at or below value"""
+        if not len(self.means):
+            return math.nan
+        total = self.count
+        return float(np.interp(
+            value,
+            np.r_[self.min, self.means, self.max],
+            np.r_[0.0, self._cumulative(), total]
+        ) / total)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for JSON persistence"""
+        return {
+            "compression": self.compression,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+            "min": self.min,
+            "max": self.max
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TDigest":
+        """Restore a serialized digest"""
+        digest = cls(data["compression"])
+        digest.means = np.asarray(data["means"], dtype=np.float64)
+        digest.weights = np.asarray(data["weights"], dtype=np.float64)
+        digest.min, digest.max = data["min"], data["max"]
+        return digest
+
+
+class CountMinSketch:
+    """Count-min sketch for approximate value frequencies"""
+    
+    def __init__(self, width: int = 2048, depth: int = 4):
+        """Initialize a depth x width counter table"""
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+    
+    def _indexes(self, values: pd.Series) -> List[np.ndarray]:
+        """Counter index per row, derived from one 64-bit hash"""
+        hashes = hash_values(values)
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = (hashes >> np.uint64(32)) | np.uint64(1)
+        return [
+            ((low + np.uint64(row) * high) % np.uint64(self.width)).astype(np.int64)
+            for row in range(self.depth)
+        ]
+    
+    def add(self, values: pd.Series, counts: Optional[np.ndarray] = None):
+        """Add values, optionally with pre-aggregated counts"""
+        if values.empty:
+            return
+        counts = np.ones(len(values), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        for row, index in enumerate(self._indexes(values)):
+            np.add.at(self.table[row], index, counts)
+    
+    def estimate(self, values: pd.Series) -> np.ndarray:
+        """Estimated count per value (never below the true count)"""
+        if values.empty:
+            return np.zeros(0, dtype=np.int64)
+        return np.min(
+            [self.table[row, index] for row, index in enumerate(self._indexes(values))],
+            axis=0
+        )
+    
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        """Add another sketch of the same shape"""
+        if other.table.shape != self.table.shape:
+            raise ValueError("Cannot merge count-min sketches of different shape")
+        self.table += other.table
+        return self
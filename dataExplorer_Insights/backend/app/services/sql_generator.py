@@ -6,17 +6,39 @@ Converts natural language to SQL queries for various databases
 from typing import Dict, Any, Optional
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
 import logging
 
+from app.services.llm_gateway import LLMGateway
+
 logger = logging.getLogger(__name__)
 
+try:
+    import sqlglot
+    SQLGLOT_AVAILABLE = True
+except ImportError:
+    SQLGLOT_AVAILABLE = False
+    logger.warning("sqlglot not available, SQL will be regenerated per dialect")
+
+# Database types mapped to sqlglot dialect names
+SQLGLOT_DIALECTS = {
+    "postgresql": "postgres",
+    "mysql": "mysql",
+    "mariadb": "mysql",
+    "mssql": "tsql",
+    "sqlite": "sqlite",
+    "snowflake": "snowflake",
+    "redshift": "redshift",
+    "bigquery": "bigquery",
+    "oracle": "oracle",
+    "duckdb": "duckdb"
+}
+
 
 class SQLGenerator:
     """Generate SQL from natural language using LLM"""
     
-    def __init__(self, llm: ChatOpenAI):
-        """Initialize with LLM instance"""
+    def __init__(self, llm: LLMGateway):
+        """Initialize with the LLM gateway"""
         self.llm = llm
         
         # Database-specific SQL dialects
@@ -26,14 +48,18 @@ class SQLGenerator:
             "mariadb": "Use MariaDB (MySQL-compatible) syntax with LIMIT for pagination",
             "mssql": "Use SQL Server syntax with TOP or OFFSET-FETCH for pagination",
             "sqlite": "Use SQLite syntax with LIMIT for pagination",
-            "mongodb": "Generate MongoDB aggregation pipeline (JSON format)",
+            "mongodb": (
+                "Generate MongoDB aggregation pipeline (JSON format) as a JSON array whose first element is "
+                '{"collection": "<name>", "fields": ["<fields the answer needs>"]} followed by the pipeline stages'
+            ),
             "snowflake": "Use Snowflake SQL syntax with LIMIT for pagination, supports QUALIFY and advanced analytics",
             "redshift": "Use Amazon Redshift (PostgreSQL-compatible) syntax with LIMIT for pagination",
             "bigquery": "Use Google BigQuery Standard SQL syntax with LIMIT for pagination",
             "oracle": "Use Oracle SQL syntax with ROWNUM or FETCH FIRST for pagination",
             "db2": "Use IBM DB2 syntax with FETCH FIRST for pagination",
             "cassandra": "Generate Cassandra CQL (not SQL) - use SELECT with LIMIT and ALLOW FILTERING sparingly",
-            "dynamodb": "Generate DynamoDB query JSON format with TableName, KeyConditionExpression, or FilterExpression"
+            "dynamodb": "Generate DynamoDB query JSON format with TableName, KeyConditionExpression, or FilterExpression",
+            "duckdb": "Use DuckDB SQL syntax with LIMIT for pagination"
         }
     
     async def generate(
@@ -220,3 +246,37 @@ Return the optimized SQL query with comments explaining optimizations:"""
         
         logger.info(f"Optimized SQL: {optimized_query}")
         return optimized_query
+    
+    def transpile(
+        self,
+        sql_query: str,
+        source_type: str,
+        target_type: str
+    ) -> Optional[str]:
+        """
+        Transpile SQL between dialects without an LLM call
+        
+        Args:
+            sql_query: SQL query in the source dialect
+            source_type: Source database type
+            target_type: Target database type
+            
+        Returns:
+            Transpiled SQL, or None if the dialects are not supported
+        """
+        if source_type == target_type:
+            return sql_query
+        
+        if not SQLGLOT_AVAILABLE:
+            return None
+        
+        source = SQLGLOT_DIALECTS.get(source_type)
+        target = SQLGLOT_DIALECTS.get(target_type)
+        if not source or not target:
+            return None
+        
+        try:
+            return sqlglot.transpile(sql_query, read=source, write=target)[0]
+        except sqlglot.errors.ParseError as e:
+            logger.warning(f"Could not transpile SQL from {source_type} to {target_type}: {str(e)}")
+            return None
@@ -0,0 +1,219 @@
+"""
+Lightweight SQL parsing helpers
+Extracts the select list, ORDER BY and LIMIT clauses of generated
+queries so results can be post-processed locally
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import re
+
+AGGREGATE_FUNCTIONS = ("SUM", "COUNT", "MIN", "MAX", "AVG")
+
+_IDENTIFIER = r"[\w\"`\[\]]+(\.[\w\"`\[\]]+)*"
+
+_CLAUSE_KEYWORDS = r"\b(FROM|WHERE|GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT|OFFSET|FETCH|QUALIFY|UNION|WINDOW)\b"
+
+
+def _strip_quotes(identifier: str) -> str:
+    """Remove identifier quoting"""
+    identifier = identifier.strip()
+    if len(identifier) >= 2 and identifier[0] in "\"`[" and identifier[-1] in "\"`]":
+        return identifier[1:-1]
+    return identifier
+
+
+def split_top_level(text: str, separator: str = ",") -> List[str]:
+    """Split on a separator that is not nested in parentheses or quotes"""
+    parts, depth, quote, current = [], 0, None, []
+    
+    for char in text:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"', "`"):
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+
+def top_level_clauses(sql: str) -> List[Tuple[str, int, int]]:
+    """Locate top-level clause keywords as (keyword, start, end) tuples"""
+    clauses, depth, quote = [], 0, None
+    upper = sql.upper()
+    i = 0
+    
+    while i < len(sql):
+        char = sql[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"', "`"):
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0 and (i == 0 or not (sql[i - 1].isalnum() or sql[i - 1] == "_")):
+            match = re.match(_CLAUSE_KEYWORDS, upper[i:])
+            if match:
+                keyword = re.sub(r"\s+", " ", match.group(1))
+                clauses.append((keyword, i, i + len(match.group(0))))
+                i += len(match.group(0))
+                continue
+        i += 1
+    
+    return clauses
+
+
+def get_clause(sql: str, keyword: str) -> Optional[str]:
+    """Return the body of the first top-level clause with the given keyword"""
+    sql = sql.strip().rstrip(";")
+    clauses = top_level_clauses(sql)
+    
+    for index, (name, _, end) in enumerate(clauses):
+        if name == keyword:
+            stop = clauses[index + 1][1] if index + 1 < len(clauses) else len(sql)
+            return sql[end:stop].strip()
+    return None
+
+
+def _is_single_call(expression: str) -> bool:
+    """Whether an expression is one function call, e.g. SUM(a) but not SUM(a)/COUNT(*)"""
+    match = re.match(r"\w+\s*\(", expression)
+    if not match or not expression.endswith(")"):
+        return False
+    
+    depth, quote = 0, None
+    for index in range(match.end() - 1, len(expression)):
+        char = expression[index]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"', "`"):
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return index == len(expression) - 1
+    return False
+
+
+def parse_select_columns(sql: str) -> List[Dict[str, Any]]:
+    """
+    Parse the outer select list
+    
+    Args:
+        sql: SQL query
+    
+    Returns:
+        List of {"expression", "alias", "aggregate", "distinct", "mergeable"}
+        dictionaries; "aggregate" is set only when the whole expression is a
+        single aggregate call, and expressions that combine aggregates
+        (e.g. SUM(a) / COUNT(*)) are not mergeable across partial results
+    """
+    sql = sql.strip().rstrip(";")
+    match = re.match(r"\s*SELECT\s+(DISTINCT\s+)?(TOP\s+\d+\s+)?", sql, re.IGNORECASE)
+    if not match:
+        return []
+    
+    clauses = top_level_clauses(sql)
+    from_positions = [start for name, start, _ in clauses if name == "FROM"]
+    end = from_positions[0] if from_positions else len(sql)
+    select_list = sql[match.end():end]
+    
+    columns = []
+    for item in split_top_level(select_list):
+        alias_match = re.match(r"(.+?)\s+(?:AS\s+)?([\w\"`\[\]]+)$", item, re.IGNORECASE | re.DOTALL)
+        if alias_match and not alias_match.group(1).rstrip().endswith((".", "(")):
+            expression, alias = alias_match.group(1).strip(), _strip_quotes(alias_match.group(2))
+        else:
+            expression = item.strip()
+            alias = _strip_quotes(expression.split(".")[-1]) if re.fullmatch(_IDENTIFIER, expression) else expression
+        
+        aggregate_match = re.match(
+            rf"({'|'.join(AGGREGATE_FUNCTIONS)})\s*\(\s*(DISTINCT\s+)?",
+            expression,
+            re.IGNORECASE
+        )
+        if aggregate_match and not _is_single_call(expression):
+            aggregate_match = None
+        contains_aggregate = re.search(
+            rf"\b({'|'.join(AGGREGATE_FUNCTIONS)})\s*\(",
+            expression,
+            re.IGNORECASE
+        )
+        columns.append({
+            "expression": expression,
+            "alias": alias,
+            "aggregate": aggregate_match.group(1).upper() if aggregate_match else None,
+            "distinct": bool(aggregate_match and aggregate_match.group(2)),
+            "mergeable": bool(aggregate_match or not contains_aggregate)
+        })
+    
+    return columns
+
+
+def parse_order_by(sql: str) -> List[Tuple[str, bool]]:
+    """
+    Parse the outer ORDER BY clause into (column, ascending) pairs
+    
+    Column references are returned without table qualifier or quoting;
+    ordinals and expressions such as SUM(o.amount) are returned as written.
+    """
+    clause = get_clause(sql, "ORDER BY")
+    if not clause:
+        return []
+    
+    order = []
+    for item in split_top_level(clause):
+        parts = item.split()
+        ascending = not (len(parts) > 1 and parts[-1].upper() == "DESC")
+        if len(parts) > 1 and parts[-1].upper() in ("ASC", "DESC"):
+            item = " ".join(parts[:-1])
+        if re.fullmatch(_IDENTIFIER, item):
+            item = _strip_quotes(item.split(".")[-1])
+        order.append((item, ascending))
+    return order
+
+
+def parse_limit(sql: str) -> Optional[int]:
+    """Parse the outer LIMIT (or TOP / FETCH FIRST) row count"""
+    clause = get_clause(sql, "LIMIT")
+    if clause:
+        match = re.match(r"(\d+)", clause)
+        return int(match.group(1)) if match else None
+    
+    match = re.match(r"\s*SELECT\s+(?:DISTINCT\s+)?TOP\s+(\d+)", sql, re.IGNORECASE)
+    if match:
+        return int(match.group(1))
+    
+    match = re.search(r"FETCH\s+FIRST\s+(\d+)\s+ROWS?\s+ONLY\s*;?\s*$", sql, re.IGNORECASE)
+    return int(match.group(1)) if match else None
+
+
+def strip_limit(sql: str) -> str:
+    """Remove the outer LIMIT (or TOP / FETCH FIRST) row count"""
+    sql = sql.strip().rstrip(";")
+    clauses = top_level_clauses(sql)
+    
+    for index, (name, start, _) in enumerate(clauses):
+        if name == "LIMIT":
+            stop = clauses[index + 1][1] if index + 1 < len(clauses) else len(sql)
+            sql = f"{sql[:start].rstrip()} {sql[stop:].lstrip()}".strip()
+            break
+    
+    sql = re.sub(r"^(\s*SELECT\s+(?:DISTINCT\s+)?)TOP\s+\d+\s+", r"\1", sql, flags=re.IGNORECASE)
+    return re.sub(r"\s*FETCH\s+FIRST\s+\d+\s+ROWS?\s+ONLY\s*$", "", sql, flags=re.IGNORECASE)
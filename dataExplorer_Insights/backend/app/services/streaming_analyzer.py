@@ -0,0 +1,344 @@
+"""
+Streaming Analyzer - Constant-memory statistics over record batches
+Numeric columns keep Welford moments and a t-digest, text columns a
+count-min sketch with heavy-hitter candidates and a HyperLogLog, and
+numeric pairs keep co-moments for correlations. Every summary merges, so
+batches can be summarized in parallel and combined, and the statistics
+cover the whole result instead of the first MAX_RESULT_ROWS rows.
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import math
+
+import numpy as np
+import pandas as pd
+
+from app.services.sketches import CountMinSketch, HyperLogLog, TDigest
+
+# Heavy-hitter candidates kept per text column
+_TOP_CANDIDATES = 50
+
+# Same thresholds as InsightsAnalyzer._detect_patterns
+_TREND_THRESHOLD = 0.7
+_CORRELATION_THRESHOLD = 0.7
+
+
+class Moments:
+    """Welford count, mean and sum of squared deviations"""
+    
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        """Initialize from existing moments"""
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+    
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> "Moments":
+        """Moments of an array, ignoring NaN"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return cls()
+        mean = float(values.mean())
+        return cls(len(values), mean, float(((values - mean) ** 2).sum()))
+    
+    def merge(self, other: "Moments") -> "Moments":
+        """Combine with moments of disjoint data (Chan et al.)"""
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        return self
+    
+    def subtract(self, other: "Moments") -> "Moments":
+        """Remove moments of data that was previously merged"""
+        if not other.count:
+            return self
+        count = self.count - other.count
+        if count <= 0:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return self
+        mean = (self.mean * self.count - other.mean * other.count) / count
+        delta = other.mean - mean
+        self.m2 = max(self.m2 - other.m2 - delta * delta * count * other.count / self.count, 0.0)
+        self.mean, self.count = mean, count
+        return self
+    
+    @property
+    def sum(self) -> float:
+        """Sum of the values"""
+        return self.mean * self.count
+    
+    @property
+    def std(self) -> float:
+        """Sample standard deviation"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for JSON persistence"""
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Moments":
+        """Restore serialized moments"""
+        return cls(data["count"], data["mean"], data["m2"])
+
+
+class CoMoments:
+    """Running co-moments of a column pair for Pearson correlation"""
+    
+    def __init__(self):
+        """Initialize empty"""
+        self.count = 0
+        self.mean_x = self.mean_y = 0.0
+        self.m2_x = self.m2_y = self.c_xy = 0.0
+    
+    @classmethod
+    def from_values(cls, x: np.ndarray, y: np.ndarray) -> "CoMoments":
+        """Co-moments over rows where both values are present"""
+        both = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[both], y[both]
+        moments = cls()
+        if len(x):
+            moments.count = len(x)
+            moments.mean_x, moments.mean_y = float(x.mean()), float(y.mean())
+            dx, dy = x - moments.mean_x, y - moments.mean_y
+            moments.m2_x, moments.m2_y = float((dx * dx).sum()), float((dy * dy).sum())
+            moments.c_xy = float((dx * dy).sum())
+        return moments
+    
+    def merge(self, other: "CoMoments") -> "CoMoments":
+        """Combine with co-moments of disjoint rows"""
+        if not other.count:
+            return self
+        count = self.count + other.count
+        dx, dy = other.mean_x - self.mean_x, other.mean_y - self.mean_y
+        factor = self.count * other.count / count
+        self.c_xy += other.c_xy + dx * dy * factor
+        self.m2_x += other.m2_x + dx * dx * factor
+        self.m2_y += other.m2_y + dy * dy * factor
+        self.mean_x += dx * other.count / count
+        self.mean_y += dy * other.count / count
+        self.count = count
+        return self
+    
+    @property
+    def correlation(self) -> float:
+        """Pearson correlation, NaN when undefined"""
+        denominator = math.sqrt(self.m2_x * self.m2_y)
+        return self.c_xy / denominator if self.count > 1 and denominator > 0 else math.nan
+
+
+def column_kinds(df: pd.DataFrame) -> Dict[str, str]:
+    """Classify columns the way analyze_data does"""
+    kinds = {}
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            kinds[col] = "other"
+        elif pd.api.types.is_numeric_dtype(dtype):
+            kinds[col] = "numeric"
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            kinds[col] = "datetime"
+        elif dtype == object:
+            kinds[col] = "categorical"
+        else:
+            kinds[col] = "other"
+    return kinds
+
+
+class StreamingSummary:
+    """Mergeable summary of a query result"""
+    
+    def __init__(self, kinds: Optional[Dict[str, str]] = None, data_types: Optional[Dict[str, str]] = None):
+        """Initialize an empty summary for the given column kinds"""
+        self.kinds = kinds or {}
+        self.data_types = data_types or {}
+        self.row_count = 0
+        self.batches = 0
+        self.numeric: Dict[str, Dict[str, Any]] = {}
+        self.categorical: Dict[str, Dict[str, Any]] = {}
+        self.pairs: Dict[Tuple[str, str], CoMoments] = {}
+        self.trends: Dict[Tuple[str, str], CoMoments] = {}
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, kinds: Optional[Dict[str, str]] = None) -> "StreamingSummary":
+        """
+        Summarize one batch
+        
+        Args:
+            df: Record batch
+            kinds: Column kinds fixed by the first batch, so an all-null
+                batch does not change a column's type
+        
+        Returns:
+            Summary of the batch
+        """
+        kinds = kinds or column_kinds(df)
+        summary = cls(kinds, {col: str(dtype) for col, dtype in df.dtypes.items()})
+        summary.row_count = len(df)
+        summary.batches = 1
+        
+        numeric_cols = [col for col, kind in kinds.items() if kind == "numeric" and col in df.columns]
+        arrays = {col: pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64) for col in numeric_cols}
+        
+        for col, values in arrays.items():
+            digest = TDigest()
+            digest.add(values)
+            present = values[~np.isnan(values)]
+            summary.numeric[col] = {
+                "moments": Moments.from_values(present),
+                "digest": digest,
+                "min": float(present.min()) if len(present) else math.inf,
+                "max": float(present.max()) if len(present) else -math.inf,
+                "null_count": int(len(values) - len(present))
+            }
+        
+        for col in (col for col, kind in kinds.items() if kind == "categorical" and col in df.columns):
+            values = df[col].dropna().astype(str)
+            counts = values.value_counts()
+            sketch = CountMinSketch()
+            sketch.add(pd.Series(counts.index), counts.to_numpy())
+            distinct = HyperLogLog()
+            distinct.add(pd.Series(counts.index))
+            summary.categorical[col] = {
+                "sketch": sketch,
+                "distinct": distinct,
+                "candidates": counts.head(_TOP_CANDIDATES).to_dict(),
+                "null_count": int(len(df) - len(values))
+            }
+        
+        for i, first in enumerate(numeric_cols):
+            for second in numeric_cols[i + 1:]:
+                summary.pairs[(first, second)] = CoMoments.from_values(arrays[first], arrays[second])
+        
+        for date_col in (col for col, kind in kinds.items() if kind == "datetime" and col in df.columns):
+            stamps = pd.to_datetime(df[date_col], errors="coerce")
+            seconds = np.where(stamps.isna(), np.nan, stamps.astype("int64") / 1e9)
+            for col, values in arrays.items():
+                summary.trends[(date_col, col)] = CoMoments.from_values(seconds, values)
+        
+        return summary
+    
+    def merge(self, other: "StreamingSummary") -> "StreamingSummary":
+        """Combine with the summary of other rows"""
+        if not self.kinds:
+            self.kinds, self.data_types = dict(other.kinds), dict(other.data_types)
+        self.row_count += other.row_count
+        self.batches += other.batches
+        
+        for col, stats in other.numeric.items():
+            mine = self.numeric.get(col)
+            if mine is None:
+                self.numeric[col] = stats
+                continue
+            mine["moments"].merge(stats["moments"])
+            mine["digest"].merge(stats["digest"])
+            mine["min"] = min(mine["min"], stats["min"])
+            mine["max"] = max(mine["max"], stats["max"])
+            mine["null_count"] += stats["null_count"]
+        
+        for col, stats in other.categorical.items():
+            mine = self.categorical.get(col)
+            if mine is None:
+                self.categorical[col] = stats
+                continue
+            mine["sketch"].merge(stats["sketch"])
+            mine["distinct"].merge(stats["distinct"])
+            mine["null_count"] += stats["null_count"]
+            
+            # Re-rank the union of candidates by their merged estimates
+            candidates = pd.Series(list(dict.fromkeys([*mine["candidates"], *stats["candidates"]])))
+            estimates = pd.Series(mine["sketch"].estimate(candidates), index=candidates.to_numpy())
+            mine["candidates"] = estimates.sort_values(ascending=False, kind="stable").head(_TOP_CANDIDATES).to_dict()
+        
+        for target, source in ((self.pairs, other.pairs), (self.trends, other.trends)):
+            for key, moments in source.items():
+                if key in target:
+                    target[key].merge(moments)
+                else:
+                    target[key] = moments
+        
+        return self
+    
+    def analysis(self) -> Dict[str, Any]:
+        """
+        Statistics and patterns in the InsightsAnalyzer.analyze_data format
+        
+        Medians, quartiles, distinct counts, top values and outlier counts are
+        sketch estimates; counts, sums, means, deviations, extremes and
+        correlations are exact up to floating point.
+        """
+        analysis = {
+            "row_count": self.row_count,
+            "column_count": len(self.kinds),
+            "columns": list(self.kinds),
+            "data_types": self.data_types,
+            "statistics": {},
+            "patterns": {"trends": [], "anomalies": [], "correlations": []}
+        }
+        
+        if self.numeric:
+            analysis["statistics"]["numeric"] = {}
+        for col, stats in self.numeric.items():
+            moments, digest = stats["moments"], stats["digest"]
+            q1, q3 = digest.quantile(0.25), digest.quantile(0.75)
+            analysis["statistics"]["numeric"][col] = {
+                "mean": moments.mean if moments.count else math.nan,
+                "median": digest.quantile(0.5),
+                "std": moments.std,
+                "min": stats["min"] if moments.count else math.nan,
+                "max": stats["max"] if moments.count else math.nan,
+                "sum": moments.sum,
+                "null_count": stats["null_count"],
+                "q1": q1,
+                "q3": q3
+            }
+            
+            if moments.count:
+                iqr = q3 - q1
+                outside = digest.cdf(q1 - 1.5 * iqr) + 1 - digest.cdf(q3 + 1.5 * iqr)
+                outliers = int(round(outside * moments.count)) if iqr > 0 else 0
+                if outliers > 0:
+                    analysis["patterns"]["anomalies"].append({
+                        "column": col,
+                        "count": outliers,
+                        "percentage": outliers / self.row_count * 100
+                    })
+        
+        if self.categorical:
+            analysis["statistics"]["categorical"] = {}
+        for col, stats in self.categorical.items():
+            top = sorted(stats["candidates"].items(), key=lambda item: -item[1])[:5]
+            analysis["statistics"]["categorical"][col] = {
+                "unique_count": stats["distinct"].estimate(),
+                "most_common": {value: int(count) for value, count in top},
+                "null_count": stats["null_count"]
+            }
+        
+        for (_, col), moments in self.trends.items():
+            correlation = moments.correlation
+            if abs(correlation) > _TREND_THRESHOLD:
+                analysis["patterns"]["trends"].append({
+                    "column": col,
+                    "direction": "increasing" if correlation > 0 else "decreasing",
+                    "strength": abs(correlation)
+                })
+        
+        for (first, second), moments in self.pairs.items():
+            correlation = moments.correlation
+            if abs(correlation) > _CORRELATION_THRESHOLD:
+                analysis["patterns"]["correlations"].append({
+                    "column1": first,
+                    "column2": second,
+                    "correlation": correlation,
+                    "strength": "strong" if abs(correlation) > 0.9 else "moderate"
+                })
+        
+        analysis["streaming"] = {
+            "batches": self.batches,
+            "approximate": ["median", "q1", "q3", "unique_count", "most_common", "anomalies"]
+        }
+        return analysis
@@ -0,0 +1,369 @@
+"""
+Template Precomputer - Off-peak precomputation of insight template answers
+The insight templates are fixed questions users click all day. A scheduler
+runs them through the agent for every saved connection during the off-peak
+window, and template clicks are answered from the stored responses in
+milliseconds, with a freshness indicator. Results are invalidated when the
+connection changes; a click on a template that has no stored result runs
+live and stores its answer for the next click.
+"""
+
+from typing import Dict, List, Any, Optional, Iterable
+from datetime import datetime
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import time
+
+from app.core.config import settings
+from app.agents.database_insights_agent import DatabaseInsightsAgent
+from app.services.admission_controller import AdmissionController, AdmissionRejected
+from app.services.cache_manager import CacheManager
+from app.services.connection_registry import ConnectionRegistry, ConnectionNotFound
+from app.services.query_cancellation import CancellationToken
+
+logger = logging.getLogger(__name__)
+
+INSIGHT_TEMPLATES = [
+    {
+        "id": "revenue_analysis",
+        "name": "Revenue Analysis",
+        "description": "Analyze revenue trends and patterns",
+        "queries": [
+            "What is the total revenue by month?",
+            "Which products generate the most revenue?",
+            "Show revenue growth rate over time"
+        ]
+    },
+    {
+        "id": "customer_analysis",
+        "name": "Customer Analysis",
+        "description": "Understand customer behavior and segments",
+        "queries": [
+            "Who are the top 10 customers by revenue?",
+            "What is the customer retention rate?",
+            "Show customer acquisition trends"
+        ]
+    },
+    {
+        "id": "performance_metrics",
+        "name": "Performance Metrics",
+        "description": "Key performance indicators and metrics",
+        "queries": [
+            "What are the key performance metrics?",
+            "Show conversion rates over time",
+            "Compare performance across regions"
+        ]
+    }
+]
+
+# Admission controller user the precomputation queries run as
+_SYSTEM_USER = "template-precompute"
+
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and trailing punctuation insensitive form of a question"""
+    return " ".join(query.lower().split()).rstrip("?.! ")
+
+
+TEMPLATE_QUERIES = {
+    normalize_query(query): query
+    for template in INSIGHT_TEMPLATES
+    for query in template["queries"]
+}
+
+
+def is_template_query(query: str) -> bool:
+    """Whether a question is one of the template questions"""
+    return normalize_query(query) in TEMPLATE_QUERIES
+
+
+def parse_hours(hours: str) -> List[int]:
+    """
+    UTC hours of an off-peak window such as "1-5", or "22-3" across midnight
+    
+    Args:
+        hours: Start and end hour, inclusive
+    
+    Returns:
+        Hours in the window
+    """
+    start, _, end = hours.partition("-")
+    start, end = int(start), int(end or start)
+    if start <= end:
+        return list(range(start, end + 1))
+    return list(range(start, 24)) + list(range(0, end + 1))
+
+
+class TemplatePrecomputer:
+    """Precompute, store and serve insight template answers per saved connection"""
+    
+    def __init__(
+        self,
+        agent: DatabaseInsightsAgent,
+        registry: ConnectionRegistry,
+        admission: AdmissionController,
+        cache: Optional[CacheManager] = None
+    ):
+        """
+        Initialize the precomputer
+        
+        Args:
+            agent: Agent that answers the template questions
+            registry: Saved connections the templates are computed for
+            admission: Admission controller the precomputation queries go through
+            cache: Redis cache persisting the results
+        """
+        self.agent = agent
+        self.registry = registry
+        self.admission = admission
+        self.cache = cache or CacheManager()
+        self.off_peak_hours = parse_hours(settings.TEMPLATE_PRECOMPUTE_HOURS)
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._scheduler: Optional[asyncio.Task] = None
+        self._running = asyncio.Lock()
+        self._counters = {"served": 0, "computed": 0, "failed": 0, "passes": 0}
+    
+    @staticmethod
+    def _key(connection_id: str, query: str) -> str:
+        """Cache key of a template answer"""
+        digest = hashlib.md5(normalize_query(query).encode()).hexdigest()
+        return f"template_result:{connection_id}:{digest}"
+    
+    async def _entry(self, record: Dict[str, Any], query: str) -> Optional[Dict[str, Any]]:
+        """Stored answer for the connection's current parameters, from memory or Redis"""
+        key = self._key(record["connection_id"], query)
+        entry = self._results.get(key)
+        if entry is None:
+            entry = await self.cache.get(key)
+            if entry is not None:
+                self._results[key] = entry
+        
+        # Answers computed before the connection was changed are discarded
+        if entry is not None and entry["connection_updated_at"] != record["updated_at"]:
+            self._results.pop(key, None)
+            return None
+        return entry
+    
+    @staticmethod
+    def freshness(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """When an answer was computed and whether it is stale"""
+        age = time.time() - entry["computed_ts"]
+        return {
+            "computed_at": entry["computed_at"],
+            "age_seconds": int(age),
+            "stale": age > settings.TEMPLATE_STALE_AFTER
+        }
+    
+    async def lookup(self, connection_id: str, query: str, user_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Stored answer to a template question
+        
+        Args:
+            connection_id: Saved connection
+            query: Question as asked
+            user_id: Requesting user, who must be allowed to use the connection
+        
+        Returns:
+            Chat response with metadata.precomputed, or None
+        """
+        if not is_template_query(query):
+            return None
+        try:
+            record = await self.registry.get(connection_id, user_id)
+        except ConnectionNotFound:
+            return None
+        
+        entry = await self._entry(record, query)
+        if entry is None:
+            return None
+        
+        self._counters["served"] += 1
+        response = entry["response"]
+        return {
+            **response,
+            "query": query,
+            "metadata": {**response.get("metadata", {}), "precomputed": self.freshness(entry)},
+            "cached": True
+        }
+    
+    async def save(self, connection_id: str, query: str, response: Dict[str, Any], user_id: Any):
+        """Store the answer to a template question"""
+        if not is_template_query(query):
+            return
+        try:
+            record = await self.registry.get(connection_id, user_id)
+        except ConnectionNotFound:
+            return
+        await self._save(record, query, response)
+    
+    async def _save(self, record: Dict[str, Any], query: str, response: Dict[str, Any], duration: float = None):
+        """Write an answer to memory and Redis"""
+        key = self._key(record["connection_id"], query)
+        entry = {
+            "connection_id": record["connection_id"],
+            "connection_updated_at": record["updated_at"],
+            "query": query,
+            "response": {**response, "cached": False},
+            "computed_at": datetime.utcnow().isoformat(),
+            "computed_ts": time.time(),
+            "duration": duration
+        }
+        self._results[key] = entry
+        await self.cache.set(key, entry, ttl=settings.TEMPLATE_RESULT_TTL)
+    
+    async def status(self, connection_id: str, user_id: Any) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Freshness of every template answer for a connection (None if not computed)"""
+        record = await self.registry.get(connection_id, user_id)
+        status = {}
+        for query in TEMPLATE_QUERIES.values():
+            entry = await self._entry(record, query)
+            status[query] = self.freshness(entry) if entry is not None else None
+        return status
+    
+    def busy(self) -> bool:
+        """Whether interactive load is too high to precompute"""
+        stats = self.admission.stats()
+        return stats["active"] + stats["queued"] > settings.TEMPLATE_PRECOMPUTE_MAX_ACTIVE
+    
+    def off_peak(self, now: Optional[datetime] = None) -> bool:
+        """Whether the current UTC hour is in the off-peak window"""
+        return (now or datetime.utcnow()).hour in self.off_peak_hours
+    
+    async def _claim(self, connection_id: str) -> bool:
+        """
+        Claim a connection for this pass, so workers sharing Redis do not
+        precompute it concurrently; the claim expires before the next check
+        """
+        claimed = await self.cache.set_if_absent(
+            f"template_lock:{connection_id}",
+            f"{socket.gethostname()}:{os.getpid()}",
+            ttl=settings.TEMPLATE_PRECOMPUTE_CHECK_INTERVAL
+        )
+        # Without Redis this process is the only one computing
+        return claimed is not False
+    
+    async def _compute(self, record: Dict[str, Any], query: str) -> bool:
+        """Run one template question for a connection and store the answer"""
+        connection_id = record["connection_id"]
+        cancel_token = CancellationToken()
+        try:
+            database_type, connection_params = await self.registry.resolve(connection_id, record["owner_id"])
+            async with self.admission.slot(_SYSTEM_USER):
+                started = time.perf_counter()
+                result = await self.agent.run(
+                    user_query=query,
+                    database_type=database_type,
+                    connection_params=connection_params,
+                    cancel_token=cancel_token
+                )
+                duration = round(time.perf_counter() - started, 3)
+        except asyncio.CancelledError:
+            cancel_token.cancel("precomputation stopped")
+            raise
+        except (AdmissionRejected, ConnectionNotFound, ValueError) as e:
+            logger.info(f"Skipped template '{query}' for connection {connection_id}: {str(e)}")
+            return False
+        
+        if "error" in result:
+            logger.warning(f"Template '{query}' failed for connection {connection_id}: {result['error']}")
+            self._counters["failed"] += 1
+            return False
+        
+        response = {
+            "query": result["query"],
+            "intent": result.get("intent"),
+            "sql_query": result.get("sql_query"),
+            "results": result.get("results", []),
+            "insights": result.get("insights", {}),
+            "visualizations": result.get("visualizations", []),
+            "metadata": result.get("metadata", {})
+        }
+        await self._save(record, query, response, duration)
+        self._counters["computed"] += 1
+        logger.info(f"Precomputed template '{query}' for connection {connection_id} in {duration}s")
+        return True
+    
+    async def precompute(self, connection_ids: Optional[Iterable[str]] = None, force: bool = False) -> Dict[str, int]:
+        """
+        Compute the template answers that are missing or older than TEMPLATE_REFRESH_INTERVAL
+        
+        A scheduled pass stops early once interactive load exceeds
+        TEMPLATE_PRECOMPUTE_MAX_ACTIVE and resumes at the next check.
+        
+        Args:
+            connection_ids: Connections to compute, defaults to all saved connections
+            force: Recompute fresh answers and ignore the load check
+        
+        Returns:
+            Counts of computed, fresh, failed and deferred answers, and of
+            connections skipped because another worker claimed them
+        """
+        summary = {"computed": 0, "fresh": 0, "failed": 0, "deferred": 0, "claimed_elsewhere": 0}
+        records = await self.registry.all()
+        if connection_ids is not None:
+            wanted = set(connection_ids)
+            records = [record for record in records if record["connection_id"] in wanted]
+        
+        async with self._running:
+            for record in records:
+                if not await self._claim(record["connection_id"]):
+                    summary["claimed_elsewhere"] += 1
+                    continue
+                for query in TEMPLATE_QUERIES.values():
+                    entry = await self._entry(record, query)
+                    if (
+                        not force
+                        and entry is not None
+                        and time.time() - entry["computed_ts"] < settings.TEMPLATE_REFRESH_INTERVAL
+                    ):
+                        summary["fresh"] += 1
+                    elif not force and self.busy():
+                        summary["deferred"] += 1
+                    elif await self._compute(record, query):
+                        summary["computed"] += 1
+                    else:
+                        summary["failed"] += 1
+        
+        self._counters["passes"] += 1
+        logger.info(f"Template precomputation pass: {summary}")
+        return summary
+    
+    async def _scheduler_loop(self):
+        """Run a precomputation pass at every check inside the off-peak window"""
+        while True:
+            await asyncio.sleep(settings.TEMPLATE_PRECOMPUTE_CHECK_INTERVAL)
+            if not self.off_peak():
+                continue
+            try:
+                await self.precompute()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Template precomputation failed: {str(e)}", exc_info=True)
+    
+    def start(self):
+        """Start the scheduler"""
+        if not settings.ENABLE_TEMPLATE_PRECOMPUTE:
+            return
+        if self._scheduler is None or self._scheduler.done():
+            self._scheduler = asyncio.create_task(self._scheduler_loop())
+            logger.info(f"Template precomputation scheduled for UTC hours {settings.TEMPLATE_PRECOMPUTE_HOURS}")
+    
+    async def stop(self):
+        """Stop the scheduler and any running pass"""
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            await asyncio.gather(self._scheduler, return_exceptions=True)
+            self._scheduler = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Served, computed and failed answers"""
+        return {
+            "stored": len(self._results),
+            "scheduled": self._scheduler is not None and not self._scheduler.done(),
+            "off_peak_hours": settings.TEMPLATE_PRECOMPUTE_HOURS,
+            **self._counters
+        }
@@ -0,0 +1,484 @@
+"""
+Time Series - Vectorized trend, anomaly, seasonality and change-point analysis
+Temporal columns are recognized whatever their dtype (datetime64, date
+objects or the date strings most drivers return), values are resampled to
+a regular frequency, and every statistic is computed over the whole series
+at once with NumPy: OLS slope with an autocorrelation-adjusted p-value,
+rolling z-score anomalies, seasonal strength and mean-shift change points.
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+from statistics import NormalDist
+import logging
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Resampling frequencies: (pandas alias, approximate seconds, season length)
+FREQUENCIES = [
+    ("min", 60, 1440),
+    ("h", 3600, 24),
+    ("D", 86400, 7),
+    ("W", 604800, 52),
+    ("MS", 2629746, 12),
+    ("QS", 7889238, 4),
+    ("YS", 31556952, None)
+]
+
+# Values inspected before a text column is parsed in full
+_PARSE_SAMPLE = 50
+
+# Share of values that must parse for a column to count as temporal
+_PARSE_MIN_SHARE = 0.9
+
+# Text that looks like a date or time rather than a number or a label
+_DATE_LIKE = r"\d[-/:.T ]\d|\d{4}|[A-Za-z]{3} \d"
+
+# Degrees of freedom above which the t distribution is taken as normal
+_NORMAL_DOF = 200
+
+# Identifier columns are not measures
+_ID_NAME = re.compile(r"(^|_)id$", re.IGNORECASE)
+
+
+def parse_temporal(values: pd.Series) -> Optional[pd.Series]:
+    """
+    Parse a column as timestamps if it holds dates
+    
+    Args:
+        values: Column of datetime64, date objects or date strings
+    
+    Returns:
+        Naive UTC datetime64 series, or None if the column is not temporal
+    """
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        parsed = values
+    elif values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+        sample = values.dropna().head(_PARSE_SAMPLE)
+        if sample.empty:
+            return None
+        text = sample.astype(str)
+        # Numbers stored as text are not dates
+        if text.str.fullmatch(r"[+-]?\d+(\.\d+)?").any() or not text.str.contains(_DATE_LIKE).all():
+            return None
+        if pd.to_datetime(sample, errors="coerce", utc=True, format="mixed").notna().mean() < _PARSE_MIN_SHARE:
+            return None
+        
+        # Drivers use one format per column, which pandas infers from the first value
+        parsed = pd.to_datetime(values, errors="coerce", utc=True)
+        present = values.notna().sum()
+        if parsed.notna().sum() < present * _PARSE_MIN_SHARE:
+            parsed = pd.to_datetime(values, errors="coerce", utc=True, format="mixed")
+            if parsed.notna().sum() < present * _PARSE_MIN_SHARE:
+                return None
+    else:
+        return None
+    
+    if getattr(parsed.dt, "tz", None) is not None:
+        parsed = parsed.dt.tz_convert("UTC").dt.tz_localize(None)
+    return parsed
+
+
+def temporal_columns(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    """Parsed timestamps of every temporal column"""
+    columns = {}
+    for col in df.columns:
+        parsed = parse_temporal(df[col])
+        if parsed is not None:
+            columns[col] = parsed
+    return columns
+
+
+def choose_frequency(index: pd.DatetimeIndex, max_points: int = None) -> Tuple[str, Optional[int]]:
+    """
+    Regular frequency closest to the typical spacing of the timestamps
+    
+    Coarser frequencies are used when the finest one would exceed
+    max_points periods.
+    
+    Returns:
+        Pandas frequency alias and its season length
+    """
+    max_points = max_points or settings.TIME_SERIES_MAX_POINTS
+    stamps = np.unique(index.asi8)
+    span = (stamps[-1] - stamps[0]) / 1e9 if len(stamps) > 1 else 0.0
+    spacing = float(np.median(np.diff(stamps))) / 1e9 if len(stamps) > 1 else 86400.0
+    
+    # Nearest frequency on a log scale
+    position = int(np.argmin([abs(math.log(max(spacing, 1.0) / seconds)) for _, seconds, _ in FREQUENCIES]))
+    while position < len(FREQUENCIES) - 1 and span / FREQUENCIES[position][1] > max_points:
+        position += 1
+    alias, _, season = FREQUENCIES[position]
+    return alias, season
+
+
+def resample_series(times: pd.Series, values: pd.Series, frequency: str) -> pd.Series:
+    """
+    Values on a regular time grid
+    
+    One value per timestamp (an aggregated result) is averaged per period
+    and gaps are interpolated. Repeated timestamps (event rows) are summed
+    per period, and periods without events are zero.
+    
+    Args:
+        times: Timestamps
+        values: Numeric values
+        frequency: Pandas frequency alias
+    
+    Returns:
+        Regularly spaced series
+    """
+    series = pd.Series(values.to_numpy(dtype=float), index=pd.DatetimeIndex(times.to_numpy()))
+    series = series.sort_index()
+    if series.index.has_duplicates:
+        return series.resample(frequency).sum()
+    return series.resample(frequency).mean().interpolate(limit_direction="both")
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    """Continued fraction of the incomplete beta function (modified Lentz)"""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        for numerator in (
+            m * (b - m) * x / ((a - 1.0 + m2) * (a + m2)),
+            -(a + m) * (a + b + m) * x / ((a + m2) * (a + 1.0 + m2))
+        ):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= d * c
+        if abs(d * c - 1.0) < 1e-14:
+            break
+    return result
+
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta function I_x(a, b)"""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)
+    )
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def t_test_p_value(t_stat: float, dof: float) -> float:
+    """Two-sided p-value of a t statistic"""
+    if not math.isfinite(t_stat):
+        return 0.0
+    if dof > _NORMAL_DOF:
+        return 2.0 * NormalDist().cdf(-abs(t_stat))
+    return _betainc(dof / 2.0, 0.5, dof / (dof + t_stat * t_stat))
+
+
+def linear_trend(y: np.ndarray) -> Dict[str, Any]:
+    """
+    OLS slope of a regularly spaced series and its significance
+    
+    The standard error is inflated by the lag-1 autocorrelation of the
+    residuals (effective sample size), since neighbouring periods of a
+    time series are rarely independent.
+    
+    Returns:
+        Slope per period, intercept, correlation, R squared and p-value
+    """
+    n = len(y)
+    t = np.arange(n, dtype=float) - (n - 1) / 2.0
+    centered = y - y.mean()
+    sxx = float(t @ t)
+    sxy = float(t @ centered)
+    syy = float(centered @ centered)
+    slope = sxy / sxx
+    correlation = sxy / math.sqrt(sxx * syy) if syy > 0 else 0.0
+    
+    residuals = centered - slope * t
+    rho = 0.0
+    if n > 3 and syy > 0:
+        denominator = float(residuals @ residuals)
+        rho = float(residuals[1:] @ residuals[:-1]) / denominator if denominator > 0 else 0.0
+    rho = min(max(rho, 0.0), 0.99)
+    dof = max((n - 2) * (1 - rho) / (1 + rho), 1.0)
+    
+    residual_variance = max(syy - slope * sxy, 0.0) / max(n - 2, 1)
+    stderr = math.sqrt(residual_variance / sxx * (1 + rho) / (1 - rho))
+    t_stat = slope / stderr if stderr > 0 else (math.inf if slope else 0.0)
+    p_value = t_test_p_value(t_stat, dof)
+    mean = float(y.mean())
+    
+    return {
+        "slope": slope,
+        "intercept": mean - slope * (n - 1) / 2.0,
+        "r": correlation,
+        "r_squared": correlation * correlation,
+        "p_value": p_value,
+        "significant": p_value < settings.TIME_SERIES_SIGNIFICANCE,
+        "direction": "increasing" if slope > 0 else "decreasing" if slope < 0 else "flat",
+        "change_percent": slope * (n - 1) / abs(mean) * 100 if mean else None
+    }
+
+
+def rolling_zscores(y: np.ndarray, window: int) -> np.ndarray:
+    """
+    Z-score of each point against the window of points before it
+    
+    Window sums come from cumulative sums, so the cost is linear in the
+    series length whatever the window. The first window points are NaN.
+    """
+    n = len(y)
+    scores = np.full(n, np.nan)
+    if n <= window or window < 2:
+        return scores
+    
+    centered = y - y.mean()
+    sums = np.concatenate(([0.0], np.cumsum(centered)))
+    squares = np.concatenate(([0.0], np.cumsum(centered * centered)))
+    window_sum = sums[window:n] - sums[:n - window]
+    window_squares = squares[window:n] - squares[:n - window]
+    
+    mean = window_sum / window
+    variance = np.maximum(window_squares / window - mean * mean, 0.0) * window / (window - 1)
+    std = np.sqrt(variance)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores[window:] = np.where(std > 0, (centered[window:] - mean) / std, np.nan)
+    return scores
+
+
+def seasonal_component(y: np.ndarray, period: Optional[int]) -> Optional[Tuple[np.ndarray, float]]:
+    """
+    Seasonal component and its strength, from 0 (none) to 1
+    
+    The series is detrended with a centered moving average of one period,
+    the seasonal component is the mean detrended value of each phase, and
+    the strength is 1 - Var(remainder) / Var(seasonal + remainder).
+    
+    Returns:
+        Seasonal offset of each phase (index % period) and the strength,
+        or None for series shorter than two periods
+    """
+    n = len(y)
+    if period is None or period < 2 or n < 2 * period:
+        return None
+    
+    sums = np.concatenate(([0.0], np.cumsum(y)))
+    average = (sums[period:] - sums[:-period]) / period
+    if period % 2 == 0:
+        # 2 x period moving average, centered on a period
+        average = (average[:-1] + average[1:]) / 2.0
+    offset = period // 2
+    detrended = y[offset:offset + len(average)] - average
+    
+    phase = np.arange(offset, offset + len(average)) % period
+    counts = np.bincount(phase, minlength=period)
+    seasonal = np.bincount(phase, weights=detrended, minlength=period) / np.maximum(counts, 1)
+    seasonal -= seasonal.mean()
+    remainder = detrended - seasonal[phase]
+    
+    total = float(detrended.var())
+    if total <= 0:
+        return seasonal, 0.0
+    return seasonal, max(0.0, 1.0 - float(remainder.var()) / total)
+
+
+def _best_split(values: np.ndarray, min_size: int) -> Tuple[int, float]:
+    """
+    Position of the level shift that most reduces the squared error of a
+    segment's linear fit, and the reduction
+    
+    For a shift starting at k the reduction is (r . d)^2 / |d'|^2, where r
+    are the residuals of the line, d the step indicator and d' its residual
+    on the line's regressors; both follow from suffix sums for every k.
+    """
+    n = len(values)
+    if n < 2 * min_size:
+        return -1, 0.0
+    t = np.arange(n, dtype=float) - (n - 1) / 2.0
+    stt = float(t @ t)
+    residuals = values - values.mean() - (float(t @ values) / stt) * t
+    
+    k = np.arange(min_size, n - min_size + 1)
+    m = n - k
+    residual_tail = np.cumsum(residuals[::-1])[::-1][k]
+    t_tail = np.cumsum(t[::-1])[::-1][k]
+    gain = residual_tail ** 2 / (m - m * m / n - t_tail ** 2 / stt)
+    best = int(np.argmax(gain))
+    return int(k[best]), float(gain[best])
+
+
+def _segment(y: np.ndarray, penalty: float, min_size: int, max_points: int) -> List[int]:
+    """Binary segmentation of the mean level, splits worth more than the penalty"""
+    points: List[int] = []
+    segments = [(0, len(y))]
+    while len(points) < max_points:
+        best = None
+        for start, end in segments:
+            split, gain = _best_split(y[start:end], min_size)
+            if split > 0 and gain > penalty and (best is None or gain > best[1]):
+                best = (start + split, gain, start, end)
+        if best is None:
+            break
+        position, _, start, end = best
+        points.append(position)
+        segments.remove((start, end))
+        segments.extend([(start, position), (position, end)])
+    return sorted(points)
+
+
+def change_points(y: np.ndarray, max_points: int = None) -> List[int]:
+    """
+    Positions where the level shifts, by binary segmentation
+    
+    Each segment is modelled as a line, so a steady trend is not cut into
+    steps. A split is kept when it reduces the squared error by more than
+    a BIC-style penalty of 3 log(n) noise variances, the noise variance
+    being estimated robustly from differences.
+    
+    Returns:
+        Sorted indices at which a new level starts
+    """
+    max_points = max_points if max_points is not None else settings.TIME_SERIES_MAX_CHANGE_POINTS
+    n = len(y)
+    min_size = max(5, n // 100)
+    if max_points <= 0 or n < 2 * min_size:
+        return []
+    
+    differences = np.diff(y)
+    sigma = float(np.median(np.abs(differences - np.median(differences)))) / 0.6745 / math.sqrt(2)
+    if sigma <= 0:
+        sigma = float(y.std()) or 1.0
+    penalty = 3.0 * math.log(n) * sigma * sigma
+    
+    return _segment(y, penalty, min_size, max_points)
+
+
+def analyze_series(times: pd.Series, values: pd.Series) -> Optional[Dict[str, Any]]:
+    """
+    Trend, anomalies, seasonality and change points of one series
+    
+    Args:
+        times: Parsed timestamps
+        values: Numeric values
+    
+    Returns:
+        Analysis with JSON-compatible values, or None for too few points
+    """
+    mask = (times.notna() & values.notna()).to_numpy()
+    if mask.sum() < settings.TIME_SERIES_MIN_POINTS:
+        return None
+    
+    times, values = times[mask], values[mask]
+    frequency, season = choose_frequency(pd.DatetimeIndex(times.to_numpy()))
+    series = resample_series(times, values, frequency)
+    y = series.to_numpy(dtype=float)
+    if len(y) < settings.TIME_SERIES_MIN_POINTS or not np.isfinite(y).all():
+        return None
+    index = series.index
+    
+    # Trend, anomalies and shifts are measured on the seasonally adjusted series
+    seasonal = seasonal_component(y, season)
+    adjusted = y
+    if seasonal is not None:
+        adjusted = y - seasonal[0][np.arange(len(y)) % season]
+    
+    trend = linear_trend(adjusted)
+    
+    window = min(settings.TIME_SERIES_ANOMALY_WINDOW, len(y) // 2)
+    scores = rolling_zscores(adjusted, window)
+    flagged = np.flatnonzero(np.abs(np.nan_to_num(scores)) > settings.TIME_SERIES_ANOMALY_Z)
+    top = flagged[np.argsort(-np.abs(scores[flagged]))[:settings.TIME_SERIES_MAX_ANOMALIES]]
+    
+    # Level on either side of a shift, from each segment's line at the shift
+    shifts = change_points(adjusted)
+    bounds = [0] + shifts + [len(y)]
+    lines = [np.polyfit(np.arange(start, end), adjusted[start:end], 1) for start, end in zip(bounds[:-1], bounds[1:])]
+    levels = [
+        (float(np.polyval(lines[i], position)), float(np.polyval(lines[i + 1], position)))
+        for i, position in enumerate(shifts)
+    ]
+    
+    return {
+        "frequency": frequency,
+        "points": len(y),
+        "start": index[0].isoformat(),
+        "end": index[-1].isoformat(),
+        "trend": {
+            "slope_per_period": trend["slope"],
+            "direction": trend["direction"],
+            "r": trend["r"],
+            "r_squared": trend["r_squared"],
+            "p_value": trend["p_value"],
+            "significant": trend["significant"],
+            "change_percent": trend["change_percent"]
+        },
+        "anomalies": {
+            "count": int(len(flagged)),
+            "window": window,
+            "points": [
+                {"at": index[i].isoformat(), "value": float(y[i]), "z": float(scores[i])}
+                for i in sorted(top)
+            ]
+        },
+        "seasonality": (
+            {"period": season, "strength": seasonal[1]}
+            if seasonal is not None else None
+        ),
+        "change_points": [
+            {
+                "at": index[position].isoformat(),
+                "before": levels[i][0],
+                "after": levels[i][1],
+                "change_percent": (levels[i][1] - levels[i][0]) / abs(levels[i][0]) * 100 if levels[i][0] else None
+            }
+            for i, position in enumerate(shifts)
+        ]
+    }
+
+
+def analyze_frame(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Analyze every numeric column against every temporal column
+    
+    Args:
+        df: Query result
+    
+    Returns:
+        One analysis per (temporal, numeric) column pair, at most
+        TIME_SERIES_MAX_SERIES
+    """
+    temporal = temporal_columns(df)
+    if not temporal:
+        return []
+    
+    numeric_cols = [
+        col for col in df.select_dtypes(include=[np.number]).columns
+        if col not in temporal
+        and not pd.api.types.is_bool_dtype(df[col].dtype)
+        and not _ID_NAME.search(str(col))
+    ]
+    results = []
+    for time_col, times in temporal.items():
+        for col in numeric_cols:
+            if len(results) >= settings.TIME_SERIES_MAX_SERIES:
+                return results
+            try:
+                analysis = analyze_series(times, df[col])
+            except Exception as e:
+                logger.warning(f"Time series analysis of {col} by {time_col} failed: {str(e)}")
+                continue
+            if analysis is not None:
+                results.append({"time_column": time_col, "column": col, **analysis})
+    return results
@@ -0,0 +1,52 @@
+"""
+Token counting for LLM prompts
+Uses tiktoken when available and falls back to a character estimate
+"""
+
+from functools import lru_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    logger.warning("tiktoken not available, token counts are estimated")
+
+# Average characters per token for English text and SQL
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=16)
+def _get_encoding(model: str):
+    """Get the tokenizer for a model, cl100k_base for unknown models"""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use and may be unreachable offline
+        logger.warning(f"Could not load tokenizer for {model}, estimating tokens: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """
+    Count the tokens a text uses in a prompt
+    
+    Args:
+        text: Prompt text
+        model: Model name used to pick the tokenizer
+    
+    Returns:
+        Number of tokens
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding(model) if TIKTOKEN_AVAILABLE else None
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return max(1, len(text) // _CHARS_PER_TOKEN)
@@ -0,0 +1,161 @@
+"""
+Token Revocation - Revoked JWTs checked through an in-process Bloom filter
+Revoked token IDs (the jti claim) are written to Redis with their expiry,
+in a sorted set every worker syncs into a Bloom filter. A token that is
+not in the filter is certainly not revoked, which answers nearly every
+request in microseconds; the rare filter hits are confirmed in Redis.
+Revocations made by other workers take effect within one sync interval.
+"""
+
+from typing import Dict, Any, Optional, Iterator
+import asyncio
+import hashlib
+import logging
+import math
+import time
+
+from app.core.config import settings
+from app.services.cache_manager import CacheManager
+
+logger = logging.getLogger(__name__)
+
+_INDEX_KEY = "revoked_tokens"
+
+
+class BloomFilter:
+    """Set membership with no false negatives and a bounded false positive rate"""
+    
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Initialize the filter
+        
+        Args:
+            capacity: Items the filter is sized for
+            error_rate: False positive rate at capacity
+        """
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, item: str) -> Iterator[int]:
+        """Bit positions of an item, by double hashing one digest"""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+    
+    def add(self, item: str):
+        """Add an item"""
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, item: str) -> bool:
+        """Whether an item may have been added"""
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenRevocationList:
+    """Revoke tokens and check revocations without a Redis round trip"""
+    
+    def __init__(self, cache: Optional[CacheManager] = None):
+        """
+        Initialize the revocation list
+        
+        Args:
+            cache: Redis cache holding the revocations of all workers
+        """
+        self.cache = cache or CacheManager()
+        self._filter = self._new_filter(0)
+        self._local: Dict[str, float] = {}
+        self._syncer: Optional[asyncio.Task] = None
+        self._synced_at: Optional[float] = None
+        self._counters = {"checks": 0, "filter_hits": 0, "revoked": 0}
+    
+    @staticmethod
+    def _new_filter(items: int) -> BloomFilter:
+        """Filter sized for the configured capacity, or twice the items beyond it"""
+        return BloomFilter(max(settings.TOKEN_REVOCATION_CAPACITY, 2 * items), settings.TOKEN_REVOCATION_ERROR_RATE)
+    
+    async def revoke(self, jti: str, expires_at: float):
+        """
+        Revoke a token until it expires
+        
+        Args:
+            jti: Token ID
+            expires_at: Expiry of the token (exp claim), after which it is rejected anyway
+        """
+        ttl = int(expires_at - time.time()) + 1
+        if ttl <= 0:
+            return
+        self._local[jti] = expires_at
+        self._filter.add(jti)
+        await self.cache.set(f"revoked_token:{jti}", True, ttl=ttl)
+        await self.cache.zadd(_INDEX_KEY, jti, expires_at)
+        logger.info(f"Revoked token {jti}")
+    
+    async def is_revoked(self, jti: str) -> bool:
+        """Whether a token is revoked; only filter hits reach Redis"""
+        self._counters["checks"] += 1
+        if jti not in self._filter:
+            return False
+        
+        self._counters["filter_hits"] += 1
+        if self._local.get(jti, 0) > time.time():
+            revoked = True
+        elif await self.cache.get(f"revoked_token:{jti}") is not None:
+            revoked = True
+        else:
+            # Without Redis a filter hit cannot be confirmed and is refused
+            revoked = self.cache.redis_client is None
+        if revoked:
+            self._counters["revoked"] += 1
+        return revoked
+    
+    async def sync(self):
+        """Rebuild the filter from the unexpired revocations in Redis"""
+        now = time.time()
+        self._local = {jti: expires_at for jti, expires_at in self._local.items() if expires_at > now}
+        members = await self.cache.zrangebyscore(_INDEX_KEY, now)
+        if members is None:
+            return
+        
+        revoked = set(members) | set(self._local)
+        bloom = self._new_filter(len(revoked))
+        for jti in revoked:
+            bloom.add(jti)
+        self._filter = bloom
+        self._synced_at = now
+    
+    async def _sync_loop(self):
+        """Sync at startup and every TOKEN_REVOCATION_SYNC_INTERVAL seconds"""
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Token revocation sync failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(settings.TOKEN_REVOCATION_SYNC_INTERVAL)
+    
+    def start(self):
+        """Start syncing"""
+        if self._syncer is None or self._syncer.done():
+            self._syncer = asyncio.create_task(self._sync_loop())
+    
+    async def stop(self):
+        """Stop syncing"""
+        if self._syncer is not None:
+            self._syncer.cancel()
+            await asyncio.gather(self._syncer, return_exceptions=True)
+            self._syncer = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Filter size and check counts"""
+        return {
+            "filter_items": self._filter.count,
+            "filter_bytes": (self._filter.size + 7) // 8,
+            "synced_at": self._synced_at,
+            **self._counters
+        }
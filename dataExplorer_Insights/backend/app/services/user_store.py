@@ -0,0 +1,160 @@
+"""
+User Store - User accounts in Redis with an in-process record cache
+Accounts are persisted in Redis like saved connections, with an email
+index for login. Authenticated requests read the user from a bounded
+in-memory cache whose entries expire after USER_CACHE_TTL seconds, so
+authorization costs a dictionary lookup instead of a Redis round trip;
+changes made through the store invalidate the cached record at once.
+"""
+
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+import logging
+import time
+
+from app.core.config import settings
+from app.models.user import User
+from app.services.cache_manager import CacheManager
+
+logger = logging.getLogger(__name__)
+
+_ID_KEY = "user_id_counter"
+
+
+class UserExists(ValueError):
+    """Raised when registering an email that already has an account"""
+
+
+class UserStore:
+    """Create, look up and cache user accounts"""
+    
+    def __init__(self, cache: Optional[CacheManager] = None, ttl: int = None, max_entries: int = None):
+        """
+        Initialize the store
+        
+        Args:
+            cache: Redis cache persisting the accounts
+            ttl: Seconds a user is served from memory (defaults to USER_CACHE_TTL)
+            max_entries: Users kept in memory, least recently used out (defaults to USER_CACHE_SIZE)
+        """
+        self.cache = cache or CacheManager()
+        self.ttl = ttl if ttl is not None else settings.USER_CACHE_TTL
+        self.max_entries = max_entries or settings.USER_CACHE_SIZE
+        self._users: "OrderedDict[int, Tuple[float, User]]" = OrderedDict()
+        self._records: Dict[int, Dict[str, Any]] = {}
+        self._next_id = 0
+        self._counters = {"hits": 0, "misses": 0}
+    
+    @staticmethod
+    def _normalize(email: str) -> str:
+        """Emails are matched case-insensitively"""
+        return email.strip().lower()
+    
+    @staticmethod
+    def _user(record: Dict[str, Any]) -> User:
+        """API view of an account, without the password hash"""
+        return User(
+            id=record["id"],
+            email=record["email"],
+            is_active=record["is_active"],
+            created_at=record["created_at"]
+        )
+    
+    def _remember(self, user: User):
+        """Cache a user, evicting the least recently used"""
+        self._users[user.id] = (time.monotonic() + self.ttl, user)
+        self._users.move_to_end(user.id)
+        while len(self._users) > self.max_entries:
+            self._users.popitem(last=False)
+    
+    def invalidate(self, user_id: int):
+        """Drop a cached user, e.g. after a change made by another worker"""
+        self._users.pop(user_id, None)
+    
+    async def _record(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Read an account from Redis, or process memory when Redis is unavailable"""
+        record = await self.cache.get(f"user:{user_id}")
+        return record if record is not None else self._records.get(user_id)
+    
+    async def _save(self, record: Dict[str, Any]):
+        """Write an account to memory and Redis"""
+        self._records[record["id"]] = record
+        # Accounts are permanent, unlike the cached data around them
+        await self.cache.set(f"user:{record['id']}", record, expire=False)
+        await self.cache.set(f"user_email:{record['email']}", record["id"], expire=False)
+        self.invalidate(record["id"])
+    
+    async def _allocate_id(self) -> int:
+        """Next user ID, shared through Redis when available"""
+        user_id = await self.cache.incr(_ID_KEY)
+        if user_id is None:
+            self._next_id = max([self._next_id, *self._records]) + 1
+            user_id = self._next_id
+        return user_id
+    
+    async def get(self, user_id: int) -> Optional[User]:
+        """
+        Get a user, from memory while the cached record is fresh
+        
+        Returns:
+            The user, or None for unknown IDs
+        """
+        cached = self._users.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            self._users.move_to_end(user_id)
+            self._counters["hits"] += 1
+            return cached[1]
+        
+        self._counters["misses"] += 1
+        record = await self._record(user_id)
+        if record is None:
+            self.invalidate(user_id)
+            return None
+        user = self._user(record)
+        self._remember(user)
+        return user
+    
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Account record, including the password hash, for login"""
+        email = self._normalize(email)
+        user_id = await self.cache.get(f"user_email:{email}")
+        if user_id is not None:
+            return await self._record(user_id)
+        return next((record for record in self._records.values() if record["email"] == email), None)
+    
+    async def create(self, email: str, hashed_password: str, name: Optional[str] = None) -> User:
+        """
+        Create an account
+        
+        Raises:
+            UserExists: The email is already registered
+        """
+        email = self._normalize(email)
+        if await self.get_by_email(email) is not None:
+            raise UserExists(email)
+        
+        record = {
+            "id": await self._allocate_id(),
+            "email": email,
+            "name": name,
+            "hashed_password": hashed_password,
+            "is_active": True,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        await self._save(record)
+        logger.info(f"Created user {record['id']}")
+        return self._user(record)
+    
+    async def set_active(self, user_id: int, is_active: bool) -> Optional[User]:
+        """Activate or deactivate an account; takes effect in this worker at once"""
+        record = await self._record(user_id)
+        if record is None:
+            return None
+        record["is_active"] = is_active
+        await self._save(record)
+        return self._user(record)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cached users and cache hits"""
+        return {"cached": len(self._users), "ttl": self.ttl, **self._counters}
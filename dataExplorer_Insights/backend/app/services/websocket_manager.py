@@ -1,41 +1,249 @@
 """
 WebSocket connection manager
+Each connection has a bounded send queue drained by its own sender task,
+so broadcasts never wait on a slow client. Full queues drop the oldest
+message or close the connection, heartbeats prune silent connections, and
+clients receive messages for the topics they subscribe to.
 """
 
 from fastapi import WebSocket
-from typing import Dict, List
+from typing import Dict, List, Any, Optional, Set, Union
+import asyncio
 import logging
+import time
+
+from app.core.config import settings
+from app.core.serialization import dumps
 
 logger = logging.getLogger(__name__)
 
+Message = Union[str, Dict[str, Any]]
+
+# Close codes: going away, policy violation, and try again later (client too slow)
+CLOSE_GOING_AWAY = 1001
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_TRY_AGAIN_LATER = 1013
+
+
+class _Connection:
+    """One client's socket, send queue and subscriptions"""
+
+    def __init__(self, websocket: WebSocket, client_id: str, user_id: Any, queue_size: int):
+        """Initialize the connection state"""
+        self.websocket = websocket
+        self.client_id = client_id
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.topics: Set[str] = set()
+        self.last_seen = time.monotonic()
+        self.sent = 0
+        self.dropped = 0
+        self.sender: Optional[asyncio.Task] = None
+
+
+def _encode(message: Message) -> str:
+    """Text frame for a message"""
+    if isinstance(message, str):
+        return message
+    return dumps(message).decode("utf-8")
+
 
 class ConnectionManager:
     """Manage WebSocket connections"""
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        queue_size: int = None,
+        slow_client_policy: str = None,
+        send_timeout: float = None,
+        heartbeat_interval: float = None,
+        heartbeat_timeout: float = None
+    ):
         """Initialize connection manager"""
-        self.active_connections: Dict[str, WebSocket] = {}
-    
-    async def connect(self, websocket: WebSocket, client_id: str):
-        """Connect a new WebSocket client"""
+        self.queue_size = queue_size or settings.WS_SEND_QUEUE_SIZE
+        self.slow_client_policy = slow_client_policy or settings.WS_SLOW_CLIENT_POLICY
+        self.send_timeout = send_timeout or settings.WS_SEND_TIMEOUT
+        self.heartbeat_interval = heartbeat_interval or settings.WS_HEARTBEAT_INTERVAL
+        self.heartbeat_timeout = heartbeat_timeout or settings.WS_HEARTBEAT_TIMEOUT
+
+        self.active_connections: Dict[str, _Connection] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._counters = {"dropped": 0, "closed_slow": 0, "pruned": 0, "send_errors": 0}
+
+    async def connect(self, websocket: WebSocket, client_id: str, user_id: Any = None) -> bool:
+        """
+        Connect a new WebSocket client
+
+        Returns:
+            False if the client ID belongs to another user's connection;
+            the new socket is then closed with a policy violation
+        """
+        # A reconnecting client replaces its previous socket, but only the
+        # user who owns it may take it over
+        previous = self.active_connections.get(client_id)
+        if previous is not None and previous.user_id is not None and previous.user_id != user_id:
+            logger.warning(f"Rejected takeover of client {client_id} by another user")
+            await websocket.close(code=CLOSE_POLICY_VIOLATION)
+            return False
+
         await websocket.accept()
-        self.active_connections[client_id] = websocket
+        if previous is not None:
+            await self._close(previous, CLOSE_GOING_AWAY)
+
+        connection = _Connection(websocket, client_id, user_id, self.queue_size)
+        connection.sender = asyncio.create_task(self._sender(connection))
+        self.active_connections[client_id] = connection
+
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._heartbeat_loop())
         logger.info(f"Client {client_id} connected. Total connections: {len(self.active_connections)}")
-    
-    def disconnect(self, client_id: str):
-        """Disconnect a WebSocket client"""
-        if client_id in self.active_connections:
+        return True
+
+    def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None):
+        """Disconnect a WebSocket client (only if it still uses the given socket)"""
+        connection = self.active_connections.get(client_id)
+        if connection is not None and (websocket is None or connection.websocket is websocket):
             del self.active_connections[client_id]
+            if connection.sender is not None and connection.sender is not asyncio.current_task():
+                connection.sender.cancel()
             logger.info(f"Client {client_id} disconnected. Total connections: {len(self.active_connections)}")
-    
-    async def send_personal_message(self, message: str, client_id: str):
+
+    async def _close(self, connection: _Connection, code: int):
+        """Remove a connection and close its socket"""
+        if self.active_connections.get(connection.client_id) is connection:
+            self.disconnect(connection.client_id)
+        elif connection.sender is not None and connection.sender is not asyncio.current_task():
+            connection.sender.cancel()
+        try:
+            await asyncio.wait_for(connection.websocket.close(code=code), timeout=self.send_timeout)
+        except Exception:
+            # The socket is already gone
+            pass
+
+    def touch(self, client_id: str):
+        """Record that a client is alive (any received message counts)"""
+        connection = self.active_connections.get(client_id)
+        if connection is not None:
+            connection.last_seen = time.monotonic()
+
+    def subscribe(self, client_id: str, topic: str) -> bool:
+        """Subscribe a client to a topic"""
+        connection = self.active_connections.get(client_id)
+        if connection is None:
+            return False
+        connection.topics.add(topic)
+        return True
+
+    def unsubscribe(self, client_id: str, topic: str):
+        """Unsubscribe a client from a topic"""
+        connection = self.active_connections.get(client_id)
+        if connection is not None:
+            connection.topics.discard(topic)
+
+    def _enqueue(self, connection: _Connection, text: str) -> bool:
+        """Queue a message without waiting, applying the slow-client policy"""
+        try:
+            connection.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if self.slow_client_policy == "close":
+            logger.warning(f"Closing slow client {connection.client_id}: send queue full")
+            self._counters["closed_slow"] += 1
+            self.disconnect(connection.client_id, connection.websocket)
+            asyncio.create_task(self._close(connection, CLOSE_TRY_AGAIN_LATER))
+            return False
+
+        connection.queue.get_nowait()
+        connection.queue.put_nowait(text)
+        connection.dropped += 1
+        self._counters["dropped"] += 1
+        return True
+
+    async def send_personal_message(self, message: Message, client_id: str) -> bool:
         """Send a personal message to a specific client"""
-        if client_id in self.active_connections:
-            websocket = self.active_connections[client_id]
-            await websocket.send_text(message)
-    
-    async def broadcast(self, message: str, exclude_client: str = None):
-        """Broadcast message to all connected clients"""
-        for client_id, websocket in self.active_connections.items():
-            if client_id != exclude_client:
-                await websocket.send_text(message)
+        connection = self.active_connections.get(client_id)
+        if connection is None:
+            return False
+        return self._enqueue(connection, _encode(message))
+
+    async def broadcast(self, message: Message, exclude_client: str = None) -> int:
+        """
+        Broadcast message to all connected clients
+
+        Returns:
+            Number of clients the message was queued for
+        """
+        text = _encode(message)
+        return sum(
+            self._enqueue(connection, text)
+            for client_id, connection in list(self.active_connections.items())
+            if client_id != exclude_client
+        )
+
+    async def publish(self, topics: Union[str, List[str]], message: Message) -> int:
+        """
+        Send a message to the subscribers of any of the topics, once each
+
+        Returns:
+            Number of clients the message was queued for
+        """
+        topics = {topics} if isinstance(topics, str) else set(topics)
+        text = _encode(message)
+        return sum(
+            self._enqueue(connection, text)
+            for connection in list(self.active_connections.values())
+            if connection.topics & topics
+        )
+
+    async def _sender(self, connection: _Connection):
+        """Drain one connection's queue; a failed or stuck send closes it"""
+        try:
+            while True:
+                text = await connection.queue.get()
+                await asyncio.wait_for(connection.websocket.send_text(text), timeout=self.send_timeout)
+                connection.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Send to client {connection.client_id} failed: {type(e).__name__} {str(e)}")
+            self._counters["send_errors"] += 1
+            await self._close(connection, CLOSE_GOING_AWAY)
+
+    async def _heartbeat_loop(self):
+        """Ping clients and prune the ones that stopped answering"""
+        while self.active_connections:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            for connection in list(self.active_connections.values()):
+                if now - connection.last_seen > self.heartbeat_timeout:
+                    logger.info(f"Pruning silent client {connection.client_id}")
+                    self._counters["pruned"] += 1
+                    await self._close(connection, CLOSE_GOING_AWAY)
+                else:
+                    self._enqueue(connection, _encode({"type": "ping"}))
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection, queue and delivery metrics"""
+        connections = list(self.active_connections.values())
+        return {
+            "connections": len(connections),
+            "subscriptions": sum(len(connection.topics) for connection in connections),
+            "queued": sum(connection.queue.qsize() for connection in connections),
+            "sent": sum(connection.sent for connection in connections),
+            **self._counters
+        }
+
+    async def shutdown(self):
+        """Stop the heartbeat and close every connection"""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+        await asyncio.gather(
+            *(self._close(connection, CLOSE_GOING_AWAY) for connection in list(self.active_connections.values())),
+            return_exceptions=True
+        )
+
+
+# Shared by the WebSocket endpoint and the services that publish events
+manager = ConnectionManager()
@@ -0,0 +1,356 @@
+"""
+Benchmark the DataInsights agent end to end without an LLM provider
+
+Generates SQLite fixtures (1k, 100k and 10M order rows by default, cached
+between runs), runs DatabaseInsightsAgent.run on the fake LLM backend with
+a fixed seed and latency, and reports per-node timings, peak memory and
+requests per second under concurrent load through the FastAPI app.
+
+Usage (from the backend directory):
+    python -m benchmarks.agent_pipeline --output results.json
+    python -m benchmarks.agent_pipeline --sizes 1k 100k --llm-latency-ms 50 --concurrency 16
+
+Settings such as ADMISSION_MAX_CONCURRENT are read from the environment as
+usual, so the load test can be run under different limits.
+"""
+
+from typing import Dict, List, Any, Optional
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.core.config import settings
+
+# SQL the fake LLM returns for each scenario; {table} is the fixture table
+SCENARIOS = {
+    "sample": "SELECT * FROM {table} LIMIT 1000",
+    "aggregate": (
+        "SELECT region, product, SUM(amount) AS revenue, COUNT(*) AS orders "
+        "FROM {table} GROUP BY region, product ORDER BY revenue DESC"
+    ),
+    "timeseries": (
+        "SELECT substr(ordered_at, 1, 10) AS day, SUM(amount) AS revenue, COUNT(*) AS orders "
+        "FROM {table} GROUP BY day ORDER BY day"
+    )
+}
+
+QUESTIONS = {
+    "sample": "Show me recent orders",
+    "aggregate": "What is the revenue by region and product?",
+    "timeseries": "How did daily revenue develop?"
+}
+
+REGIONS = np.array(["north", "south", "east", "west", "central"])
+PRODUCTS = np.array([f"product_{index:02d}" for index in range(40)])
+
+_FIXTURE_CHUNK = 500_000
+
+
+def parse_size(text: str) -> int:
+    """Row count from 1k / 100k / 10m notation"""
+    text = text.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+
+def build_fixture(directory: str, rows: int) -> str:
+    """
+    Create (or reuse) a SQLite database with an orders table
+    
+    Args:
+        directory: Directory the fixtures are cached in
+        rows: Number of order rows
+    
+    Returns:
+        Path of the database file
+    """
+    path = os.path.join(directory, f"orders_{rows}.db")
+    if os.path.exists(path):
+        return path
+    
+    os.makedirs(directory, exist_ok=True)
+    partial = path + ".partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+    
+    conn = sqlite3.connect(partial)
+    conn.executescript("""
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE orders (
+            id INTEGER PRIMARY KEY,
+            customer_id INTEGER NOT NULL,
+            region TEXT NOT NULL,
+            product TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            ordered_at TEXT NOT NULL
+        );
+    """)
+    
+    # Deterministic data: one seeded generator per chunk
+    start = np.datetime64("2022-01-01T00:00:00")
+    span_seconds = 3 * 365 * 24 * 3600
+    for offset in range(0, rows, _FIXTURE_CHUNK):
+        count = min(_FIXTURE_CHUNK, rows - offset)
+        rng = np.random.default_rng(offset)
+        ids = np.arange(offset + 1, offset + count + 1)
+        # Timestamps increase with the id and cover the whole span
+        seconds = (offset + np.arange(count)) * span_seconds // rows + rng.integers(0, 60, count)
+        ordered_at = np.datetime_as_string(start + seconds.astype("timedelta64[s]"), unit="s")
+        quantity = rng.integers(1, 10, count)
+        amount = np.round(rng.lognormal(3.5, 0.8, count) * quantity, 2)
+        conn.executemany(
+            "INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?)",
+            zip(
+                ids.tolist(),
+                rng.integers(1, max(rows // 20, 10), count).tolist(),
+                REGIONS[rng.integers(0, len(REGIONS), count)].tolist(),
+                PRODUCTS[rng.zipf(1.6, count) % len(PRODUCTS)].tolist(),
+                quantity.tolist(),
+                amount.tolist(),
+                np.char.replace(ordered_at, "T", " ").tolist()
+            )
+        )
+        conn.commit()
+    
+    conn.execute("CREATE INDEX ix_orders_ordered_at ON orders(ordered_at)")
+    conn.commit()
+    conn.close()
+    os.replace(partial, path)
+    return path
+
+
+def configure(args: argparse.Namespace):
+    """Point the app at the fake LLM; must run before the agent is created"""
+    settings.LLM_BACKEND = "fake"
+    settings.LLM_FAKE_LATENCY_MS = args.llm_latency_ms
+    settings.LLM_FAKE_RATE_LIMIT_RATE = args.llm_rate_limit_rate
+    settings.LLM_FAKE_SEED = args.seed
+    settings.ENABLE_LLM_CACHE = args.llm_cache
+    settings.RATE_LIMIT_ENABLED = False
+    # Request and agent logging would dominate the measured time
+    logging.disable(logging.INFO)
+
+
+async def run_once(agent: Any, database: str, scenario: str) -> Dict[str, Any]:
+    """One agent run with per-node timings"""
+    nodes: Dict[str, float] = {}
+    
+    async def progress(stage: str, details: Dict[str, Any]):
+        if details.get("phase") == "completed":
+            nodes[stage] = nodes.get(stage, 0.0) + details["elapsed_ms"]
+    
+    agent.llm.llm.sql_template = SCENARIOS[scenario]
+    started = time.perf_counter()
+    result = await agent.run(
+        user_query=QUESTIONS[scenario],
+        database_type="sqlite",
+        connection_params={"database": database},
+        progress=progress
+    )
+    return {
+        "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        "nodes": nodes,
+        "rows": len(result.get("results") or []),
+        "error": result.get("error")
+    }
+
+
+async def measure_scenario(
+    agent: Any,
+    database: str,
+    rows: int,
+    scenario: str,
+    repeat: int
+) -> Dict[str, Any]:
+    """Median timings over repeated runs and peak traced memory of one more run"""
+    runs = [await run_once(agent, database, scenario) for _ in range(repeat)]
+    
+    tracemalloc.start()
+    await run_once(agent, database, scenario)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    node_names = list(dict.fromkeys(name for run in runs for name in run["nodes"]))
+    return {
+        "fixture_rows": rows,
+        "scenario": scenario,
+        "runs": repeat,
+        "result_rows": runs[-1]["rows"],
+        "error": runs[-1]["error"],
+        "total_ms": {
+            "median": round(statistics.median(run["total_ms"] for run in runs), 1),
+            "min": min(run["total_ms"] for run in runs),
+            "max": max(run["total_ms"] for run in runs)
+        },
+        "nodes_ms": {
+            name: round(statistics.median(run["nodes"].get(name, 0.0) for run in runs), 1)
+            for name in node_names
+        },
+        "traced_peak_mb": round(peak / 1e6, 1)
+    }
+
+
+async def measure_load(
+    database: str,
+    scenario: str,
+    concurrency: int,
+    requests: int
+) -> Dict[str, Any]:
+    """
+    Requests per second through the FastAPI app
+    
+    Each concurrent client authenticates as its own user so that per-user
+    admission limits do not serialize the load.
+    """
+    import httpx
+    from main import app
+    from app.api.v1.endpoints.auth import create_access_token
+    from app.api.v1.endpoints.chat import agent
+    
+    agent.llm.llm.sql_template = SCENARIOS[scenario]
+    headers = [
+        {"Authorization": f"Bearer {create_access_token({'user_id': index + 1, 'email': f'bench{index + 1}@example.com'})}"}
+        for index in range(concurrency)
+    ]
+    body = {
+        "query": QUESTIONS[scenario],
+        "database_type": "sqlite",
+        "connection_params": {"database": database},
+        "use_cache": False
+    }
+    
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    remaining = iter(range(requests))
+    
+    async def client(http: httpx.AsyncClient, index: int):
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await http.post("/api/v1/chat/query", json=body, headers=headers[index])
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http, index) for index in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    
+    def percentile(p: float) -> Optional[float]:
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else None
+    
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": requests,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "rps": round(statuses.get(200, 0) / elapsed, 2) if elapsed else None,
+        "latency_ms": {"p50": percentile(0.50), "p95": percentile(0.95), "max": percentile(1.0)},
+        "llm": agent.llm.stats()
+    }
+
+
+def print_progress(args: argparse.Namespace, message: str):
+    """Report progress unless printing JSON"""
+    if not args.json:
+        print(message, flush=True)
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    """Build fixtures and run the single-run and load scenarios"""
+    configure(args)
+    from app.agents.database_insights_agent import DatabaseInsightsAgent
+    
+    fixtures = {}
+    for size in args.sizes:
+        rows = parse_size(size)
+        started = time.perf_counter()
+        fixtures[rows] = build_fixture(args.fixtures_dir, rows)
+        print_progress(args, f"fixture {size}: {time.perf_counter() - started:.1f}s")
+    
+    agent = DatabaseInsightsAgent()
+    runs = []
+    for rows, database in fixtures.items():
+        for scenario in args.scenarios:
+            runs.append(await measure_scenario(agent, database, rows, scenario, args.repeat))
+            print_progress(args, f"{rows} rows / {scenario}: {runs[-1]['total_ms']['median']}ms")
+    
+    load = None
+    if args.requests:
+        load_rows = parse_size(args.load_size)
+        database = fixtures.get(load_rows) or build_fixture(args.fixtures_dir, load_rows)
+        load = await measure_load(database, args.load_scenario, args.concurrency, args.requests)
+        load["fixture_rows"] = load_rows
+    
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_cache": args.llm_cache,
+            "seed": args.seed
+        },
+        "runs": runs,
+        "load": load,
+        # ru_maxrss is in KiB on Linux
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", default=["1k", "100k", "10m"], help="Fixture row counts")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario, the median is reported")
+    parser.add_argument("--fixtures-dir", default=os.path.join(tempfile.gettempdir(), "datainsights_benchmark"))
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="Mean fake LLM latency")
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0, help="Fraction of fake 429s")
+    parser.add_argument("--llm-cache", action="store_true", help="Keep the LLM response cache enabled")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients in the load test")
+    parser.add_argument("--requests", type=int, default=64, help="Load test requests, 0 to skip")
+    parser.add_argument("--load-size", default="100k", help="Fixture used by the load test")
+    parser.add_argument("--load-scenario", default="aggregate", choices=list(SCENARIOS))
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON results")
+    args = parser.parse_args()
+    
+    results = asyncio.run(main(args))
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'rows':>10}  {'scenario':<11}{'median':>9}{'peak MB':>9}  slowest nodes")
+        for r in results["runs"]:
+            slowest = sorted(r["nodes_ms"].items(), key=lambda item: -item[1])[:3]
+            print(
+                f"{r['fixture_rows']:>10}  {r['scenario']:<11}{r['total_ms']['median']:>8}ms"
+                f"{r['traced_peak_mb']:>9}  " + ", ".join(f"{name} {ms}ms" for name, ms in slowest)
+            )
+        if results["load"]:
+            load = results["load"]
+            print(
+                f"load: {load['requests']} requests, {load['concurrency']} clients, "
+                f"{load['rps']} req/s, p50 {load['latency_ms']['p50']}ms, "
+                f"p95 {load['latency_ms']['p95']}ms, statuses {load['statuses']}"
+            )
+        print(f"max RSS {results['max_rss_mb']} MB")
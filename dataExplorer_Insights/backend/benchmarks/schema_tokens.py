@@ -0,0 +1,207 @@
+"""
+Benchmark prompt tokens used by the verbose and compact schema formats
+
+Builds well-known sample schemas (TPC-H, Chinook, an e-commerce schema) in
+SQLite, or reads a live database, and reports the tokens each format uses
+on its own and inside the full SQL generation prompt.
+
+Usage (from the backend directory):
+    python -m benchmarks.schema_tokens
+    python -m benchmarks.schema_tokens --database-type postgresql \\
+        --connection '{"host": "localhost", "port": 5432, "user": "postgres", "password": "...", "database": "sales"}'
+"""
+
+from typing import Dict, List, Any
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+
+from app.services.database_manager import DatabaseManager
+from app.services.schema_encoder import render_schema
+from app.services.token_counter import count_tokens
+
+SAMPLE_SCHEMAS = {
+    "tpch": """
+        CREATE TABLE region (r_regionkey INTEGER PRIMARY KEY, r_name CHAR(25) NOT NULL, r_comment VARCHAR(152));
+        CREATE TABLE nation (n_nationkey INTEGER PRIMARY KEY, n_name CHAR(25) NOT NULL,
+            n_regionkey INTEGER NOT NULL REFERENCES region(r_regionkey), n_comment VARCHAR(152));
+        CREATE TABLE part (p_partkey INTEGER PRIMARY KEY, p_name VARCHAR(55) NOT NULL, p_mfgr CHAR(25) NOT NULL,
+            p_brand CHAR(10) NOT NULL, p_type VARCHAR(25) NOT NULL, p_size INTEGER NOT NULL,
+            p_container CHAR(10) NOT NULL, p_retailprice DECIMAL(15,2) NOT NULL, p_comment VARCHAR(23) NOT NULL);
+        CREATE TABLE supplier (s_suppkey INTEGER PRIMARY KEY, s_name CHAR(25) NOT NULL, s_address VARCHAR(40) NOT NULL,
+            s_nationkey INTEGER NOT NULL REFERENCES nation(n_nationkey), s_phone CHAR(15) NOT NULL,
+            s_acctbal DECIMAL(15,2) NOT NULL, s_comment VARCHAR(101) NOT NULL);
+        CREATE TABLE partsupp (ps_partkey INTEGER NOT NULL REFERENCES part(p_partkey),
+            ps_suppkey INTEGER NOT NULL REFERENCES supplier(s_suppkey), ps_availqty INTEGER NOT NULL,
+            ps_supplycost DECIMAL(15,2) NOT NULL, ps_comment VARCHAR(199) NOT NULL,
+            PRIMARY KEY (ps_partkey, ps_suppkey));
+        CREATE TABLE customer (c_custkey INTEGER PRIMARY KEY, c_name VARCHAR(25) NOT NULL, c_address VARCHAR(40) NOT NULL,
+            c_nationkey INTEGER NOT NULL REFERENCES nation(n_nationkey), c_phone CHAR(15) NOT NULL,
+            c_acctbal DECIMAL(15,2) NOT NULL, c_mktsegment CHAR(10) NOT NULL, c_comment VARCHAR(117) NOT NULL);
+        CREATE TABLE orders (o_orderkey INTEGER PRIMARY KEY, o_custkey INTEGER NOT NULL REFERENCES customer(c_custkey),
+            o_orderstatus CHAR(1) NOT NULL, o_totalprice DECIMAL(15,2) NOT NULL, o_orderdate DATE NOT NULL,
+            o_orderpriority CHAR(15) NOT NULL, o_clerk CHAR(15) NOT NULL, o_shippriority INTEGER NOT NULL,
+            o_comment VARCHAR(79) NOT NULL);
+        CREATE TABLE lineitem (l_orderkey INTEGER NOT NULL REFERENCES orders(o_orderkey), l_partkey INTEGER NOT NULL,
+            l_suppkey INTEGER NOT NULL, l_linenumber INTEGER NOT NULL, l_quantity DECIMAL(15,2) NOT NULL,
+            l_extendedprice DECIMAL(15,2) NOT NULL, l_discount DECIMAL(15,2) NOT NULL, l_tax DECIMAL(15,2) NOT NULL,
+            l_returnflag CHAR(1) NOT NULL, l_linestatus CHAR(1) NOT NULL, l_shipdate DATE NOT NULL,
+            l_commitdate DATE NOT NULL, l_receiptdate DATE NOT NULL, l_shipinstruct CHAR(25) NOT NULL,
+            l_shipmode CHAR(10) NOT NULL, l_comment VARCHAR(44) NOT NULL,
+            PRIMARY KEY (l_orderkey, l_linenumber),
+            FOREIGN KEY (l_partkey, l_suppkey) REFERENCES partsupp(ps_partkey, ps_suppkey));
+        CREATE INDEX idx_orders_date ON orders(o_orderdate);
+        CREATE INDEX idx_lineitem_ship ON lineitem(l_shipdate);
+        CREATE INDEX idx_customer_nation ON customer(c_nationkey);
+    """,
+    "chinook": """
+        CREATE TABLE Artist (ArtistId INTEGER PRIMARY KEY, Name NVARCHAR(120));
+        CREATE TABLE Album (AlbumId INTEGER PRIMARY KEY, Title NVARCHAR(160) NOT NULL,
+            ArtistId INTEGER NOT NULL REFERENCES Artist(ArtistId));
+        CREATE TABLE Genre (GenreId INTEGER PRIMARY KEY, Name NVARCHAR(120));
+        CREATE TABLE MediaType (MediaTypeId INTEGER PRIMARY KEY, Name NVARCHAR(120));
+        CREATE TABLE Track (TrackId INTEGER PRIMARY KEY, Name NVARCHAR(200) NOT NULL,
+            AlbumId INTEGER REFERENCES Album(AlbumId), MediaTypeId INTEGER NOT NULL REFERENCES MediaType(MediaTypeId),
+            GenreId INTEGER REFERENCES Genre(GenreId), Composer NVARCHAR(220), Milliseconds INTEGER NOT NULL,
+            Bytes INTEGER, UnitPrice NUMERIC(10,2) NOT NULL);
+        CREATE TABLE Employee (EmployeeId INTEGER PRIMARY KEY, LastName NVARCHAR(20) NOT NULL,
+            FirstName NVARCHAR(20) NOT NULL, Title NVARCHAR(30), ReportsTo INTEGER REFERENCES Employee(EmployeeId),
+            BirthDate DATETIME, HireDate DATETIME, Address NVARCHAR(70), City NVARCHAR(40), State NVARCHAR(40),
+            Country NVARCHAR(40), PostalCode NVARCHAR(10), Phone NVARCHAR(24), Fax NVARCHAR(24), Email NVARCHAR(60));
+        CREATE TABLE Customer (CustomerId INTEGER PRIMARY KEY, FirstName NVARCHAR(40) NOT NULL,
+            LastName NVARCHAR(20) NOT NULL, Company NVARCHAR(80), Address NVARCHAR(70), City NVARCHAR(40),
+            State NVARCHAR(40), Country NVARCHAR(40), PostalCode NVARCHAR(10), Phone NVARCHAR(24), Fax NVARCHAR(24),
+            Email NVARCHAR(60) NOT NULL, SupportRepId INTEGER REFERENCES Employee(EmployeeId));
+        CREATE TABLE Invoice (InvoiceId INTEGER PRIMARY KEY, CustomerId INTEGER NOT NULL REFERENCES Customer(CustomerId),
+            InvoiceDate DATETIME NOT NULL, BillingAddress NVARCHAR(70), BillingCity NVARCHAR(40),
+            BillingState NVARCHAR(40), BillingCountry NVARCHAR(40), BillingPostalCode NVARCHAR(10),
+            Total NUMERIC(10,2) NOT NULL);
+        CREATE TABLE InvoiceLine (InvoiceLineId INTEGER PRIMARY KEY, InvoiceId INTEGER NOT NULL REFERENCES Invoice(InvoiceId),
+            TrackId INTEGER NOT NULL REFERENCES Track(TrackId), UnitPrice NUMERIC(10,2) NOT NULL, Quantity INTEGER NOT NULL);
+        CREATE TABLE Playlist (PlaylistId INTEGER PRIMARY KEY, Name NVARCHAR(120));
+        CREATE TABLE PlaylistTrack (PlaylistId INTEGER NOT NULL REFERENCES Playlist(PlaylistId),
+            TrackId INTEGER NOT NULL REFERENCES Track(TrackId), PRIMARY KEY (PlaylistId, TrackId));
+        CREATE INDEX IFK_AlbumArtistId ON Album (ArtistId);
+        CREATE INDEX IFK_CustomerSupportRepId ON Customer (SupportRepId);
+        CREATE INDEX IFK_InvoiceCustomerId ON Invoice (CustomerId);
+        CREATE INDEX IFK_InvoiceLineInvoiceId ON InvoiceLine (InvoiceId);
+        CREATE INDEX IFK_InvoiceLineTrackId ON InvoiceLine (TrackId);
+        CREATE INDEX IFK_TrackAlbumId ON Track (AlbumId);
+        CREATE INDEX IFK_TrackGenreId ON Track (GenreId);
+        CREATE UNIQUE INDEX IX_CustomerEmail ON Customer (Email);
+    """,
+    "ecommerce": """
+        CREATE TABLE users (id BIGINT PRIMARY KEY, email VARCHAR(255) NOT NULL, name VARCHAR(255),
+            created_at TIMESTAMP NOT NULL, last_login_at TIMESTAMP, is_active BOOLEAN NOT NULL, metadata JSON);
+        CREATE TABLE categories (id INTEGER PRIMARY KEY, parent_id INTEGER REFERENCES categories(id),
+            name VARCHAR(100) NOT NULL, slug VARCHAR(100) NOT NULL);
+        CREATE TABLE products (id BIGINT PRIMARY KEY, category_id INTEGER NOT NULL REFERENCES categories(id),
+            sku VARCHAR(64) NOT NULL, name VARCHAR(255) NOT NULL, description TEXT, price NUMERIC(12,2) NOT NULL,
+            cost NUMERIC(12,2), weight_kg REAL, created_at TIMESTAMP NOT NULL, updated_at TIMESTAMP);
+        CREATE TABLE orders (id BIGINT PRIMARY KEY, user_id BIGINT NOT NULL REFERENCES users(id),
+            status VARCHAR(20) NOT NULL, subtotal NUMERIC(12,2) NOT NULL, tax NUMERIC(12,2) NOT NULL,
+            shipping NUMERIC(12,2) NOT NULL, total NUMERIC(12,2) NOT NULL, currency CHAR(3) NOT NULL,
+            placed_at TIMESTAMP NOT NULL, shipped_at TIMESTAMP, delivered_at TIMESTAMP);
+        CREATE TABLE order_items (id BIGINT PRIMARY KEY, order_id BIGINT NOT NULL REFERENCES orders(id),
+            product_id BIGINT NOT NULL REFERENCES products(id), quantity INTEGER NOT NULL,
+            unit_price NUMERIC(12,2) NOT NULL, discount NUMERIC(12,2));
+        CREATE TABLE payments (id BIGINT PRIMARY KEY, order_id BIGINT NOT NULL REFERENCES orders(id),
+            method VARCHAR(20) NOT NULL, amount NUMERIC(12,2) NOT NULL, status VARCHAR(20) NOT NULL,
+            processed_at TIMESTAMP);
+        CREATE TABLE reviews (id BIGINT PRIMARY KEY, product_id BIGINT NOT NULL REFERENCES products(id),
+            user_id BIGINT NOT NULL REFERENCES users(id), rating SMALLINT NOT NULL, body TEXT, created_at TIMESTAMP NOT NULL);
+        CREATE UNIQUE INDEX ux_users_email ON users(email);
+        CREATE UNIQUE INDEX ux_products_sku ON products(sku);
+        CREATE INDEX ix_orders_user ON orders(user_id, placed_at);
+        CREATE INDEX ix_orders_status ON orders(status);
+        CREATE INDEX ix_order_items_order ON order_items(order_id);
+        CREATE INDEX ix_reviews_product ON reviews(product_id);
+    """
+}
+
+# Fixed part of the SQL generation prompt around the schema
+PROMPT_TEMPLATE = """You are an expert SQL developer specializing in sqlite.
+Your task is to convert natural language questions into accurate SQL queries based on the provided database schema.
+
+Database Schema:
+{schema}
+
+User Question: What were the top 10 products by revenue last quarter?
+
+SQL Query:"""
+
+
+def _sample_database(ddl: str, directory: str, name: str) -> Dict[str, Any]:
+    """Create a SQLite database from DDL and return its connection params"""
+    path = os.path.join(directory, f"{name}.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(ddl)
+    conn.close()
+    return {"database": path}
+
+
+async def measure(
+    name: str,
+    database_type: str,
+    connection_params: Dict[str, Any],
+    model: str
+) -> Dict[str, Any]:
+    """Render one schema in both formats and count tokens"""
+    tables = await DatabaseManager().get_sql_tables(database_type, connection_params)
+    result = {"schema": name, "tables": len(tables), "columns": sum(len(t["columns"]) for t in tables)}
+    
+    for schema_format in ("verbose", "compact"):
+        rendered = render_schema(tables, schema_format)
+        result[schema_format] = {
+            "schema_tokens": count_tokens(rendered, model),
+            "prompt_tokens": count_tokens(PROMPT_TEMPLATE.format(schema=rendered), model),
+            "characters": len(rendered)
+        }
+    
+    for key in ("schema_tokens", "prompt_tokens"):
+        verbose, compact = result["verbose"][key], result["compact"][key]
+        result[f"{key}_reduction"] = round(1 - compact / verbose, 3) if verbose else 0.0
+    return result
+
+
+async def main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Run the benchmark over the sample schemas or a live database"""
+    if args.database_type:
+        return [await measure(
+            args.database_type,
+            args.database_type,
+            json.loads(args.connection),
+            args.model
+        )]
+    
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, ddl in SAMPLE_SCHEMAS.items():
+            params = _sample_database(ddl, directory, name)
+            results.append(await measure(name, "sqlite", params, args.model))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-type", help="Benchmark a live database instead of the samples")
+    parser.add_argument("--connection", default="{}", help="Connection params as JSON")
+    parser.add_argument("--model", default="gpt-4", help="Model whose tokenizer is used")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON results")
+    args = parser.parse_args()
+    
+    results = asyncio.run(main(args))
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'schema':<12}{'tables':>7}{'cols':>6}{'verbose':>10}{'compact':>10}{'saved':>8}{'prompt saved':>14}")
+        for r in results:
+            print(
+                f"{r['schema']:<12}{r['tables']:>7}{r['columns']:>6}"
+                f"{r['verbose']['schema_tokens']:>10}{r['compact']['schema_tokens']:>10}"
+                f"{r['schema_tokens_reduction']:>8.0%}{r['prompt_tokens_reduction']:>14.0%}"
+            )
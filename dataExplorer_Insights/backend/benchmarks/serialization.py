@@ -0,0 +1,155 @@
+"""
+Benchmark chat response serialization for large result sets
+
+Builds result rows typical of SQL and MongoDB drivers (Decimal, datetime,
+NumPy scalars, ObjectId) and times the previous response path (Pydantic
+ChatResponse, FastAPI's jsonable_encoder and json.dumps) against the
+shared serializer used by ORJSONResponse and the cache.
+
+Usage (from the backend directory):
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --rows 10000 100000 --repeat 5
+"""
+
+from typing import Dict, List, Any, Callable, Optional
+from datetime import datetime, timedelta
+from decimal import Decimal
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from app.core.serialization import ORJSON_AVAILABLE, BSON_AVAILABLE, dumps
+
+if BSON_AVAILABLE:
+    from bson import ObjectId
+
+
+class ChatResponse(BaseModel):
+    """Fields of the chat endpoint's response model"""
+    query: str
+    intent: Optional[str]
+    sql_query: Optional[str]
+    results: list
+    insights: Dict[str, Any]
+    visualizations: list
+    metadata: Dict[str, Any]
+    cached: bool = False
+
+
+def make_rows(count: int, kind: str) -> List[Dict[str, Any]]:
+    """
+    Result rows of the given kind
+    
+    Args:
+        count: Number of rows
+        kind: "sql" for DB-API values (Decimal, datetime), "mixed" to add
+            NumPy scalars and ObjectId as pandas and MongoDB produce them
+    
+    Returns:
+        List of row dictionaries
+    """
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    rows = []
+    for index in range(count):
+        row = {
+            "order_id": index,
+            "customer": f"customer_{rng.randrange(5000)}",
+            "status": rng.choice(("placed", "shipped", "delivered", "returned")),
+            "amount": Decimal(f"{rng.uniform(1, 5000):.2f}"),
+            "discount": Decimal(f"{rng.uniform(0, 0.3):.4f}"),
+            "placed_at": start + timedelta(minutes=index),
+            "quantity": rng.randrange(1, 20)
+        }
+        if kind == "mixed":
+            row["quantity"] = np.int64(row["quantity"])
+            row["score"] = np.float64(rng.random())
+            row["_id"] = ObjectId() if BSON_AVAILABLE else f"{index:024x}"
+        rows.append(row)
+    return rows
+
+
+def _response(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chat response around the rows"""
+    return {
+        "query": "Show recent orders",
+        "intent": "list",
+        "sql_query": "SELECT * FROM orders ORDER BY placed_at DESC",
+        "results": rows,
+        "insights": {"summary": "", "key_findings": [], "recommendations": []},
+        "visualizations": [],
+        "metadata": {"row_count": len(rows), "generated_at": datetime.utcnow()},
+        "cached": False
+    }
+
+
+def previous_path(payload: Dict[str, Any]) -> bytes:
+    """ChatResponse validation, jsonable_encoder and json.dumps"""
+    response = ChatResponse(**payload)
+    return json.dumps(jsonable_encoder(response)).encode("utf-8")
+
+
+def shared_serializer(payload: Dict[str, Any]) -> bytes:
+    """Plain dictionary through the shared serializer"""
+    return dumps(payload)
+
+
+def _time(encode: Callable[[Dict[str, Any]], bytes], payload: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """Best-of-N encoding time, or the error the encoder raised"""
+    best = None
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            size = len(encode(payload))
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {str(e)[:60]}"}
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {"ms": round(best * 1000, 1), "bytes": size}
+
+
+def main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Run the benchmark for every row count and row kind"""
+    results = []
+    for count in args.rows:
+        for kind in ("sql", "mixed"):
+            payload = _response(make_rows(count, kind))
+            previous = _time(previous_path, payload, args.repeat)
+            shared = _time(shared_serializer, payload, args.repeat)
+            result = {"rows": count, "kind": kind, "previous": previous, "shared": shared}
+            if "ms" in previous and "ms" in shared:
+                result["speedup"] = round(previous["ms"] / shared["ms"], 1) if shared["ms"] else None
+            results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="Result sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the best is reported")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON results")
+    args = parser.parse_args()
+    
+    results = main(args)
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"orjson: {'yes' if ORJSON_AVAILABLE else 'no (json fallback)'}")
+        print(f"{'rows':>8}  {'kind':<7}{'previous':>12}{'shared':>10}{'speedup':>9}{'MB':>7}")
+        for r in results:
+            previous = f"{r['previous']['ms']}ms" if "ms" in r["previous"] else "fails"
+            print(
+                f"{r['rows']:>8}  {r['kind']:<7}{previous:>12}{str(r['shared']['ms']) + 'ms':>10}"
+                f"{str(r['speedup']) + 'x' if r.get('speedup') else '-':>9}"
+                f"{r['shared']['bytes'] / 1e6:>7.1f}"
+            )
+        for r in results:
+            if "error" in r["previous"]:
+                print(f"previous path, {r['rows']} {r['kind']} rows: {r['previous']['error']}")
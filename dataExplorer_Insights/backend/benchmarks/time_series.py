@@ -0,0 +1,165 @@
+"""
+Benchmark the time-series analysis on series of up to a million points
+
+Builds minute-level series with a linear trend, daily seasonality, injected
+spikes and a level shift, with the timestamps either as datetime64 or as
+the ISO strings most drivers return, and times each stage of the analysis
+(parsing, resampling, trend, anomalies, seasonality, change points) as
+well as the whole of analyze_frame. Reports whether the trend, the shift
+and the spikes were found.
+
+Usage (from the backend directory):
+    python -m benchmarks.time_series
+    python -m benchmarks.time_series --points 100000 1000000 --repeat 3
+"""
+
+from typing import Dict, List, Any, Callable
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.time_series import (
+    parse_temporal,
+    choose_frequency,
+    resample_series,
+    linear_trend,
+    rolling_zscores,
+    seasonal_component,
+    change_points,
+    analyze_frame
+)
+
+# Injected into every series
+_SPIKES = 5
+_SHIFT = 25.0
+
+
+def make_frame(points: int, kind: str) -> pd.DataFrame:
+    """
+    Minute-level series with trend, daily seasonality, spikes and a shift
+    
+    Args:
+        points: Number of rows
+        kind: "datetime" for datetime64 timestamps, "string" for ISO strings
+    
+    Returns:
+        DataFrame with a "ts" and a "value" column, the spike timestamps
+        in attrs["spikes"]
+    """
+    rng = np.random.default_rng(42)
+    times = pd.date_range("2023-01-01", periods=points, freq="min")
+    minutes = np.arange(points)
+    values = (
+        100.0
+        + 20.0 * minutes / points
+        + 10.0 * np.sin(2 * np.pi * minutes / 1440)
+        + rng.normal(0, 2, points)
+    )
+    values[points * 2 // 3:] += _SHIFT
+    spikes = rng.choice(points, _SPIKES, replace=False)
+    values[spikes] += 300.0
+    
+    df = pd.DataFrame({
+        "ts": times.strftime("%Y-%m-%dT%H:%M:%S") if kind == "string" else times,
+        "value": values
+    })
+    df.attrs["spikes"] = {times[i].isoformat() for i in spikes}
+    return df
+
+
+def _time(run: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Best-of-N time and the last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {"ms": round(best * 1000, 1), "result": result}
+
+
+def stages(df: pd.DataFrame, repeat: int) -> Dict[str, float]:
+    """Time of each stage of analyze_series, in milliseconds"""
+    timings = {}
+    parsed = _time(lambda: parse_temporal(df["ts"]), repeat)
+    timings["parse"] = parsed["ms"]
+    times = parsed["result"]
+    
+    frequency, season = choose_frequency(pd.DatetimeIndex(times.to_numpy()))
+    resampled = _time(lambda: resample_series(times, df["value"], frequency), repeat)
+    timings["resample"] = resampled["ms"]
+    y = resampled["result"].to_numpy(dtype=float)
+    
+    seasonal = _time(lambda: seasonal_component(y, season), repeat)
+    timings["seasonality"] = seasonal["ms"]
+    adjusted = y
+    if seasonal["result"] is not None:
+        adjusted = y - seasonal["result"][0][np.arange(len(y)) % season]
+    
+    window = min(settings.TIME_SERIES_ANOMALY_WINDOW, len(y) // 2)
+    timings["trend"] = _time(lambda: linear_trend(adjusted), repeat)["ms"]
+    timings["anomalies"] = _time(lambda: rolling_zscores(adjusted, window), repeat)["ms"]
+    timings["change_points"] = _time(lambda: change_points(adjusted), repeat)["ms"]
+    return timings
+
+
+def main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Run the benchmark for every series length and timestamp kind"""
+    settings.TIME_SERIES_MAX_POINTS = max(settings.TIME_SERIES_MAX_POINTS, max(args.points))
+    results = []
+    for points in args.points:
+        for kind in ("datetime", "string"):
+            df = make_frame(points, kind)
+            total = _time(lambda: analyze_frame(df), args.repeat)
+            analysis = total["result"][0]
+            shifts = analysis["change_points"]
+            results.append({
+                "points": points,
+                "kind": kind,
+                "total_ms": total["ms"],
+                "stages_ms": stages(df, args.repeat),
+                "frequency": analysis["frequency"],
+                "resampled_points": analysis["points"],
+                "trend": analysis["trend"]["direction"] if analysis["trend"]["significant"] else "none",
+                "seasonality": analysis["seasonality"],
+                "shift_found": any(abs(shift["after"] - shift["before"] - _SHIFT) < _SHIFT / 2 for shift in shifts),
+                "change_points": len(shifts),
+                "anomalies": analysis["anomalies"]["count"],
+                "spikes_found": len(df.attrs["spikes"] & {point["at"] for point in analysis["anomalies"]["points"]})
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, nargs="+", default=[100000, 1000000], help="Series lengths")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the best is reported")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON results")
+    args = parser.parse_args()
+    
+    results = main(args)
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        names = list(results[0]["stages_ms"]) if results else []
+        print(f"{'points':>8}  {'kind':<9}{'total':>9}" + "".join(f"{name:>14}" for name in names))
+        for r in results:
+            print(
+                f"{r['points']:>8}  {r['kind']:<9}{str(r['total_ms']) + 'ms':>9}"
+                + "".join(f"{str(r['stages_ms'][name]) + 'ms':>14}" for name in names)
+            )
+        print()
+        for r in results:
+            season = r["seasonality"] or {}
+            print(
+                f"{r['points']:>8} {r['kind']:<9} {r['frequency']}x{r['resampled_points']}:"
+                f" trend {r['trend']}, seasonality {season.get('period')} ({season.get('strength', 0):.2f}),"
+                f" shift {'found' if r['shift_found'] else 'missed'} ({r['change_points']} change points),"
+                f" {r['anomalies']} anomalies, {r['spikes_found']}/{_SPIKES} spikes among the top"
+            )
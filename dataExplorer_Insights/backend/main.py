@@ -10,12 +10,16 @@ from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import uvicorn
 import logging
-from typing import List
+from typing import List, Optional
+import json
 
 from app.api.v1 import router as api_v1_router
 from app.core.config import settings
+from app.core.serialization import ORJSONResponse
 from app.core.middleware import RateLimitMiddleware, RequestLoggingMiddleware
-from app.services.websocket_manager import ConnectionManager
+from app.services.websocket_manager import manager
+from app.api.deps import user_from_token, revocations
+from app.models.user import User
 
 # Configure logging
 logging.basicConfig(
@@ -24,18 +28,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# WebSocket manager instance
-manager = ConnectionManager()
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     logger.info("Starting DataInsights AI application...")
     # Startup logic
+    from app.api.v1.endpoints.chat import job_queue, templates
+    templates.start()
+    revocations.start()
     yield
     # Shutdown logic
     logger.info("Shutting down DataInsights AI application...")
+    await templates.stop()
+    await revocations.stop()
+    await job_queue.shutdown()
+    await manager.shutdown()
 
 
 # Initialize FastAPI application
@@ -46,6 +53,7 @@ app = FastAPI(
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -56,9 +64,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Export-Truncated"],
 )
 app.add_middleware(GZipMiddleware, minimum_size=1000)
-app.add_middleware(RateLimitMiddleware, calls=100, period=60)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        calls=settings.RATE_LIMIT_CALLS,
+        period=settings.RATE_LIMIT_PERIOD
+    )
 app.add_middleware(RequestLoggingMiddleware)
 
 # Include routers
@@ -84,16 +98,63 @@ async def health_check():
     }
 
 
+def _may_subscribe(topic: str, user: Optional[User]) -> bool:
+    """Job and user topics are limited to their owner"""
+    if topic.startswith("user:"):
+        return user is not None and topic == f"user:{user.id}"
+    if topic.startswith("job:"):
+        from app.api.v1.endpoints.chat import job_queue
+        job = job_queue.get(topic[len("job:"):])
+        return user is not None and job is not None and job["user_id"] == user.id
+    return True
+
+
 @app.websocket("/ws/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, client_id: str):
-    """WebSocket endpoint for real-time updates"""
-    await manager.connect(websocket, client_id)
+async def websocket_endpoint(websocket: WebSocket, client_id: str, token: Optional[str] = None):
+    """
+    WebSocket endpoint for real-time updates
+    
+    Connect with ?token=<JWT> to receive status and progress events of your
+    background jobs (topic user:{user_id}). Clients send JSON commands
+    {"action": "subscribe" | "unsubscribe", "topic": "..."} and answer
+    {"type": "ping"} with {"action": "pong"}; any other text is broadcast.
+    """
+    user = None
+    if token:
+        try:
+            user = await user_from_token(token)
+        except HTTPException:
+            await websocket.close(code=1008)
+            return
+    
+    if not await manager.connect(websocket, client_id, user.id if user else None):
+        return
+    if user:
+        manager.subscribe(client_id, f"user:{user.id}")
     try:
         while True:
             data = await websocket.receive_text()
-            await manager.broadcast(f"Client {client_id}: {data}", client_id)
+            manager.touch(client_id)
+            
+            try:
+                command = json.loads(data)
+            except ValueError:
+                command = None
+            if not isinstance(command, dict) or "action" not in command:
+                await manager.broadcast(f"Client {client_id}: {data}", client_id)
+                continue
+            
+            action, topic = command["action"], str(command.get("topic", ""))
+            if action == "subscribe":
+                if topic and _may_subscribe(topic, user):
+                    manager.subscribe(client_id, topic)
+                    await manager.send_personal_message({"type": "subscribed", "topic": topic}, client_id)
+                else:
+                    await manager.send_personal_message({"type": "error", "detail": f"Cannot subscribe to {topic}"}, client_id)
+            elif action == "unsubscribe":
+                manager.unsubscribe(client_id, topic)
     except WebSocketDisconnect:
-        manager.disconnect(client_id)
+        manager.disconnect(client_id, websocket)
         await manager.broadcast(f"Client {client_id} left", client_id)
 
 
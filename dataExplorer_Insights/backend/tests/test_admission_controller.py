@@ -0,0 +1,89 @@
+"""Tests for fair-share admission control"""
+
+import asyncio
+
+import pytest
+
+from app.services.admission_controller import AdmissionController, AdmissionRejected
+
+
+def controller(**limits) -> AdmissionController:
+    """Admission controller with small limits and equal weights"""
+    options = {"max_concurrent": 1, "max_per_user": 1, "max_queue": 1, "queue_timeout": 5, "user_weights": {}}
+    return AdmissionController(**{**options, **limits})
+
+
+async def settle():
+    """Let queued callbacks and tasks run"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestAdmissionController:
+    def test_fair_share_between_users(self):
+        """A user with a backlog does not starve another user"""
+        async def run():
+            admission = controller(max_queue=10)
+            order = []
+
+            async def request(user_id, tag):
+                async with admission.slot(user_id):
+                    order.append(tag)
+                    await asyncio.sleep(0.01)
+
+            tasks = [asyncio.create_task(request("heavy", f"h{i}")) for i in range(3)]
+            await settle()
+            tasks.append(asyncio.create_task(request("light", "l0")))
+            await asyncio.gather(*tasks)
+            return order
+
+        assert asyncio.run(run()).index("l0") <= 2
+
+    def test_full_queue_rejects_requests_with_timeout(self):
+        """Interactive requests are rejected once the queue is full"""
+        async def run():
+            admission = controller()
+            async with admission.slot("a"):
+                waiting = asyncio.create_task(admission.acquire("b", timeout=5))
+                await settle()
+                with pytest.raises(AdmissionRejected):
+                    await admission.acquire("c", timeout=5)
+                waiting.cancel()
+            await asyncio.gather(waiting, return_exceptions=True)
+            return admission.stats()
+
+        stats = asyncio.run(run())
+        assert stats["rejected"] == 1
+        assert (stats["active"], stats["queued"]) == (0, 0)
+
+    def test_waiters_without_timeout_are_not_rejected(self):
+        """Background work waits for a slot even when the queue is full"""
+        async def run():
+            admission = controller()
+            async with admission.slot("a"):
+                first = asyncio.create_task(admission.acquire("b", timeout=5))
+                second = asyncio.create_task(admission.acquire("c", timeout=None))
+                await settle()
+                assert not second.done()
+            await first
+            admission.release("b")
+            await second
+            admission.release("c")
+            return admission.stats()
+
+        stats = asyncio.run(run())
+        assert stats["rejected"] == 0
+        assert stats["admitted"] == 3
+
+    def test_queue_timeout(self):
+        """A request that waits too long is rejected and leaves the queue"""
+        async def run():
+            admission = controller(max_queue=5)
+            async with admission.slot("a"):
+                with pytest.raises(AdmissionRejected):
+                    await admission.acquire("b", timeout=0.01)
+            return admission.stats()
+
+        stats = asyncio.run(run())
+        assert stats["timed_out"] == 1
+        assert stats["queued"] == 0
@@ -0,0 +1,35 @@
+"""Tests for LTTB downsampling of chart series"""
+
+import numpy as np
+import pytest
+
+from app.services.chart_data import lttb_indices
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(42)
+
+
+class TestLttb:
+    def test_keeps_endpoints_and_threshold(self, rng):
+        """Exactly threshold sorted indices, including both endpoints"""
+        x = np.arange(10000, dtype=float)
+        y = rng.normal(size=10000).cumsum()
+        indices = lttb_indices(x, y, 500)
+
+        assert len(indices) == 500
+        assert indices[0] == 0 and indices[-1] == 9999
+        assert (np.diff(indices) > 0).all()
+
+    def test_keeps_spikes(self):
+        """An isolated spike survives downsampling"""
+        x = np.arange(1000, dtype=float)
+        y = np.zeros(1000)
+        y[637] = 100.0
+        assert 637 in lttb_indices(x, y, 50)
+
+    def test_short_series_unchanged(self):
+        """Series at or below the threshold keep every point"""
+        x = np.arange(10, dtype=float)
+        assert lttb_indices(x, x, 20).tolist() == list(range(10))
@@ -0,0 +1,137 @@
+"""Tests for saved connections shared between workers through Redis"""
+
+import asyncio
+
+import pytest
+
+from app.services.connection_registry import ConnectionNotFound, ConnectionRegistry
+from app.services.schema_cache import SchemaCache
+
+
+class FakeRedis:
+    """The CacheManager methods the registry uses, backed by dictionaries"""
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ttl=None, expire=True):
+        self.values[key] = value
+        return True
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+        return True
+
+    async def exists(self, key):
+        return key in self.values
+
+    async def sadd(self, key, member, ttl=None):
+        self.sets.setdefault(key, set()).add(member)
+        return True
+
+    async def srem(self, key, member):
+        self.sets.get(key, set()).discard(member)
+        return True
+
+    async def smembers(self, key):
+        return sorted(self.sets.get(key, set()))
+
+
+class FakeDatabaseManager:
+    def __init__(self):
+        self.disposed = []
+
+    async def test_connection(self, database_type, connection_params):
+        return {"status": "success"}
+
+    async def warm_pool(self, database_type, connection_params):
+        pass
+
+    def dispose_pool(self, connection_id):
+        self.disposed.append(connection_id)
+
+
+class FakeSchemaCache:
+    def __init__(self):
+        self.invalidated = []
+
+    async def get_tables(self, database_type, connection_params):
+        return []
+
+    async def invalidate(self, database_type, connection_params):
+        self.invalidated.append(connection_params)
+
+
+def worker(redis):
+    """A registry as one API worker holds it"""
+    return ConnectionRegistry(
+        FakeDatabaseManager(),
+        FakeSchemaCache(),
+        cache=redis,
+        encryption_key="Zm9vYmFyYmF6cXV4Zm9vYmFyYmF6cXV4Zm9vYmFyYmE="
+    )
+
+
+PARAMS = {"host": "db", "database": "sales", "password": "secret"}
+
+
+class TestConnectionRegistry:
+    def test_concurrent_saves_keep_both_connections(self):
+        """Two workers registering at once both end up in the index"""
+        async def run():
+            redis = FakeRedis()
+            first, second = worker(redis), worker(redis)
+            await asyncio.gather(
+                first.register(1, "a", "postgresql", PARAMS),
+                second.register(1, "b", "postgresql", PARAMS)
+            )
+            return await worker(redis).list(1)
+
+        assert sorted(record["name"] for record in asyncio.run(run())) == ["a", "b"]
+
+    def test_deleted_connection_is_gone_on_other_workers(self):
+        """A worker that still holds a deleted connection stops serving it"""
+        async def run():
+            redis = FakeRedis()
+            first, second = worker(redis), worker(redis)
+            saved = await first.register(1, "a", "postgresql", PARAMS)
+            connection_id = saved["connection_id"]
+            await second.get(connection_id, 1)
+
+            await first.delete(connection_id, 1)
+            with pytest.raises(ConnectionNotFound):
+                await second.get(connection_id, 1)
+            return second, connection_id
+
+        second, connection_id = asyncio.run(run())
+        assert second.db_manager.disposed == [connection_id]
+        assert connection_id not in second._connections
+
+    def test_memory_is_used_while_redis_is_unavailable(self):
+        """Without Redis the worker keeps serving the connections it knows"""
+        class UnavailableRedis(FakeRedis):
+            async def get(self, key):
+                return None
+
+            async def exists(self, key):
+                return None
+
+        async def run():
+            registry = worker(UnavailableRedis())
+            saved = await registry.register(1, "a", "postgresql", PARAMS)
+            return await registry.get(saved["connection_id"], 1)
+
+        assert asyncio.run(run())["name"] == "a"
+
+
+class TestSchemaCacheKey:
+    def test_saved_connections_are_keyed_by_version(self):
+        """Schema and profile entries of a changed connection are not reused"""
+        old = SchemaCache.connection_key("postgresql", {"connection_id": "c1", "connection_version": "v1"})
+        new = SchemaCache.connection_key("postgresql", {"connection_id": "c1", "connection_version": "v2"})
+        assert old != new
+        assert "secret" not in SchemaCache.connection_key("postgresql", {"connection_id": "c1", **PARAMS})
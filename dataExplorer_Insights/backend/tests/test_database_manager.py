@@ -0,0 +1,33 @@
+"""Tests for bounding MongoDB aggregation pipelines"""
+
+import pytest
+
+from app.services.database_manager import bound_pipeline
+
+
+class TestBoundPipeline:
+    def test_projects_and_limits_whole_documents(self):
+        """Whole-document pipelines get the requested fields and the row cap"""
+        stages = bound_pipeline([{"$match": {"status": "A"}}], ["name", "total"], 100)
+        assert stages == [
+            {"$match": {"status": "A"}},
+            {"$project": {"name": 1, "total": 1, "_id": 0}},
+            {"$limit": 100}
+        ]
+
+    @pytest.mark.parametrize("stage", [
+        {"$group": {"_id": "$status", "n": {"$sum": 1}}},
+        {"$lookup": {"from": "items", "localField": "id", "foreignField": "order_id", "as": "items"}},
+        {"$addFields": {"margin": {"$subtract": ["$price", "$cost"]}}},
+        {"$set": {"margin": 1}},
+        {"$unwind": "$items"}
+    ])
+    def test_shaping_stages_are_not_projected(self, stage):
+        """Fields produced by the pipeline are not projected away"""
+        stages = bound_pipeline([stage], ["name"], 100)
+        assert stages == [stage, {"$limit": 100}]
+
+    def test_keeps_tighter_limit_and_write_stages(self):
+        """An existing smaller $limit is kept and $out pipelines are untouched"""
+        assert bound_pipeline([{"$limit": 5}], None, 100) == [{"$limit": 5}]
+        assert bound_pipeline([{"$match": {}}, {"$out": "copy"}], ["a"], 100) == [{"$match": {}}, {"$out": "copy"}]
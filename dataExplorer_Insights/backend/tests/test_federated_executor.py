@@ -0,0 +1,63 @@
+"""Tests for merging partial results of federated queries"""
+
+import pytest
+
+from app.services.federated_executor import ResultMerger
+
+
+def merge(sql, *partials):
+    """Merge partial results the way the targets would return them"""
+    merger = ResultMerger(sql)
+    for index, rows in enumerate(partials):
+        merger.add(f"target_{index}", rows)
+    return merger
+
+
+class TestResultMerger:
+    def test_grouped_top_n_is_limited_after_merging(self):
+        """Targets run without the LIMIT and the merged groups are ranked"""
+        sql = "SELECT region, SUM(sales) AS total FROM t GROUP BY region ORDER BY total DESC LIMIT 1"
+        assert "LIMIT" not in ResultMerger(sql).target_sql(sql)
+
+        merger = merge(
+            sql,
+            [{"region": "x", "total": 5}, {"region": "y", "total": 4}],
+            [{"region": "y", "total": 4}, {"region": "x", "total": 1}]
+        )
+        assert merger.result() == [{"region": "y", "total": 8}]
+
+    @pytest.mark.parametrize("order_by", ["SUM(o.amount) DESC", "sum(o.amount)  desc", "2 DESC"])
+    def test_order_by_expression_or_ordinal(self, order_by):
+        """ORDER BY an aggregate expression or ordinal ranks the merged groups"""
+        sql = f"SELECT region, SUM(o.amount) FROM o GROUP BY region ORDER BY {order_by} LIMIT 2"
+        assert "LIMIT" not in ResultMerger(sql).target_sql(sql)
+
+        merger = merge(
+            sql,
+            [{"region": "x", "sum": 1}, {"region": "y", "sum": 3}, {"region": "w", "sum": 30}],
+            [{"region": "x", "sum": 1}, {"region": "y", "sum": 2}, {"region": "w", "sum": 20}]
+        )
+        assert merger.result() == [{"region": "w", "sum": 50}, {"region": "y", "sum": 5}]
+        assert not merger.approximate
+
+    def test_unresolved_order_keeps_target_limit(self):
+        """An ORDER BY outside the select list keeps the LIMIT and is flagged"""
+        sql = "SELECT region, SUM(a) AS total FROM t GROUP BY region ORDER BY MAX(b) DESC LIMIT 1"
+        merger = ResultMerger(sql)
+        assert merger.target_sql(sql) == sql
+        assert merger.approximate
+        assert merger.warnings
+
+    def test_unaliased_aggregate(self):
+        """Aggregates are matched by position whatever the driver names them"""
+        merger = merge("SELECT COUNT(*) FROM t", [{"count": 3}], [{"count": 4}])
+        assert merger.result() == [{"count": 7}]
+
+        merger = merge("SELECT r, COUNT(*) FROM t GROUP BY r", [{"r": "a", "f0_": 1}], [{"r": "a", "f0_": 2}])
+        assert merger.result() == [{"r": "a", "f0_": 3}]
+
+    def test_unmergeable_columns(self):
+        """Ratios of aggregates are reported instead of being summed"""
+        merger = ResultMerger("SELECT r, SUM(a) / COUNT(*) AS ratio FROM t GROUP BY r")
+        assert merger.unmergeable == ["ratio"]
+        assert merger.group_keys == ["r"]
@@ -0,0 +1,27 @@
+"""Tests for visualization recommendations"""
+
+import asyncio
+
+from app.services.insights_analyzer import InsightsAnalyzer
+
+ROWS = [{"region": "north", "sales": 10}, {"region": "south", "sales": 7}]
+
+# The source column has far more values than the filtered result
+PROFILE = {"region": {"distinct_estimate": 500}}
+
+
+def chart_types(insights):
+    """Recommended chart types for ROWS"""
+    analyzer = InsightsAnalyzer(llm=None)
+    recommendations = asyncio.run(analyzer.recommend_visualizations(ROWS, insights, PROFILE))
+    return {recommendation["type"] for recommendation in recommendations}
+
+
+class TestRecommendVisualizations:
+    def test_cardinality_of_the_result(self):
+        """A filtered result is charted by its own distinct values"""
+        assert {"bar", "pie"} <= chart_types({})
+
+    def test_sampled_result_uses_the_profile(self):
+        """Sampled rows fall back to the profiled distinct count"""
+        assert not {"bar", "pie"} & chart_types({"confidence_intervals": {}})
@@ -0,0 +1,160 @@
+"""Tests for the background job queue"""
+
+import asyncio
+
+import pytest
+
+from app.services.admission_controller import AdmissionController, AdmissionRejected
+from app.services.job_queue import JobQueue, JobQueueFull
+
+
+def controller(**limits) -> AdmissionController:
+    """Admission controller with small limits and equal weights"""
+    options = {"max_concurrent": 1, "max_per_user": 1, "max_queue": 1, "queue_timeout": 5, "user_weights": {}}
+    return AdmissionController(**{**options, **limits})
+
+
+async def drain(queue: JobQueue):
+    """Wait until no job is queued or running"""
+    while queue.stats()["pending"] or queue.stats()["running"]:
+        await asyncio.sleep(0.001)
+
+
+class TestJobQueue:
+    def run_jobs(self, admission, *functions):
+        """Submit jobs, wait for the workers and return the job records"""
+        async def run():
+            events = []
+
+            async def listener(job, event):
+                events.append(event)
+
+            queue = JobQueue(admission, workers=1, max_pending=10, result_ttl=60, listener=listener)
+            jobs = [await queue.submit(1, function, "question") for function in functions]
+            await drain(queue)
+            await queue.shutdown()
+            return jobs, events
+
+        return asyncio.run(run())
+
+    def test_completed_job(self):
+        """A job moves from queued to running to completed with its result"""
+        async def function(token, progress):
+            await progress("execute_query", {"phase": "start"})
+            return {"answer": 42}
+
+        (job,), events = self.run_jobs(controller(), function)
+        assert job["status"] == "completed"
+        assert job["result"] == {"answer": 42}
+        assert job["queue_time"] is not None and job["finished_at"] is not None
+        assert [event["status"] for event in events if event["type"] == "job.status"] == [
+            "queued", "running", "completed"
+        ]
+        assert any(event["type"] == "job.progress" for event in events)
+
+    def test_failed_job(self):
+        """Exceptions are recorded on the job"""
+        async def function(token, progress):
+            raise RuntimeError("Query execution error")
+
+        (job,), _ = self.run_jobs(controller(), function)
+        assert (job["status"], job["error"]) == ("failed", "Query execution error")
+
+    def test_admission_failure_fails_the_job(self):
+        """A job that cannot get a slot is failed instead of staying queued"""
+        class Rejecting:
+            max_per_user = 1
+
+            def slot(self, user_id, timeout=-1):
+                raise AdmissionRejected("Too many queued requests", 1)
+
+        async def function(token, progress):
+            return {}
+
+        (job,), events = self.run_jobs(Rejecting(), function)
+        assert job["status"] == "failed"
+        assert job["error"] == "Too many queued requests"
+        assert job["finished_at"] is not None
+        assert events[-1]["status"] == "failed"
+
+    def test_cancel_queued_job(self):
+        """A job cancelled before it starts never runs and frees its place"""
+        async def run():
+            ran = []
+            gate = asyncio.Event()
+
+            async def blocking(token, progress):
+                await gate.wait()
+                return {}
+
+            async def function(token, progress):
+                ran.append(True)
+                return {}
+
+            queue = JobQueue(controller(), workers=1, max_pending=10, result_ttl=60)
+            await queue.submit(1, blocking)
+            await asyncio.sleep(0.01)
+            job = await queue.submit(1, function)
+            assert queue.cancel(job["job_id"])
+            assert queue.stats()["pending"] == 0
+            gate.set()
+            await drain(queue)
+            await queue.shutdown()
+            return job, ran
+
+        job, ran = asyncio.run(run())
+        assert job["status"] == "cancelled"
+        assert ran == []
+
+    def test_backlog_of_one_user_does_not_hold_the_workers(self):
+        """Workers skip a user at their slot cap and serve other users"""
+        async def run():
+            gate = asyncio.Event()
+            started = []
+
+            def job(tag):
+                async def function(token, progress):
+                    started.append(tag)
+                    if tag.startswith("heavy"):
+                        await gate.wait()
+                    return {}
+                return function
+
+            queue = JobQueue(controller(max_concurrent=4), workers=2, max_pending=10, result_ttl=60)
+            for index in range(3):
+                await queue.submit("heavy", job(f"heavy{index}"))
+            await queue.submit("light", job("light"))
+            await asyncio.sleep(0.05)
+            running = list(started)
+            gate.set()
+            await drain(queue)
+            await queue.shutdown()
+            return running, started
+
+        running, started = asyncio.run(run())
+        assert running == ["heavy0", "light"]
+        assert sorted(started) == ["heavy0", "heavy1", "heavy2", "light"]
+
+    def test_pending_jobs_are_capped_per_user(self):
+        """One user cannot fill the whole queue"""
+        async def run():
+            gate = asyncio.Event()
+
+            async def function(token, progress):
+                await gate.wait()
+                return {}
+
+            queue = JobQueue(controller(), workers=1, max_pending=10, result_ttl=60, max_pending_per_user=2)
+            await queue.submit("a", function)
+            await asyncio.sleep(0.01)
+            for _ in range(2):
+                await queue.submit("a", function)
+            with pytest.raises(JobQueueFull):
+                await queue.submit("a", function)
+            other = await queue.submit("b", function)
+            gate.set()
+            await drain(queue)
+            await queue.shutdown()
+            return other
+
+        assert asyncio.run(run())["status"] == "completed"
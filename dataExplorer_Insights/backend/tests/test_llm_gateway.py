@@ -0,0 +1,83 @@
+"""Tests for single-flight deduplication in the LLM gateway"""
+
+import asyncio
+import uuid
+
+from langchain.schema import AIMessage, HumanMessage
+
+from app.services.llm_gateway import LLMGateway
+
+
+class FakeLLM:
+    """Chat model that answers after a delay, counting its calls"""
+
+    def __init__(self, delay: float = 0.05, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        response = AIMessage(content=f"answer {self.calls}")
+        response.usage_metadata = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+        return response
+
+
+class TestLLMGatewaySingleFlight:
+    def gateway(self, llm: FakeLLM) -> LLMGateway:
+        # A provider name per test keeps the shared semaphores per event loop
+        return LLMGateway(llm, f"test-{uuid.uuid4()}", "fake-model", cache=object())
+
+    def test_identical_prompts_share_one_call(self):
+        """Concurrent identical prompts make one provider call"""
+        llm = FakeLLM()
+        gateway = self.gateway(llm)
+        messages = [HumanMessage(content="total revenue by month")]
+
+        async def run():
+            return await asyncio.gather(*(gateway.ainvoke(messages, use_cache=False) for _ in range(5)))
+
+        responses = asyncio.run(run())
+        assert llm.calls == 1
+        assert {response.content for response in responses} == {"answer 1"}
+        assert gateway._counters["deduplicated"] == 4
+
+    def test_cancelled_caller_does_not_strand_waiters(self):
+        """Waiters take over the call when the request making it is cancelled"""
+        llm = FakeLLM()
+        gateway = self.gateway(llm)
+        messages = [HumanMessage(content="top customers")]
+
+        async def run():
+            leader = asyncio.create_task(gateway.ainvoke(messages, use_cache=False))
+            await asyncio.sleep(0.01)
+            waiters = [asyncio.create_task(gateway.ainvoke(messages, use_cache=False)) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            responses = await asyncio.wait_for(asyncio.gather(*waiters), timeout=2)
+            return leader, responses
+
+        leader, responses = asyncio.run(run())
+        assert leader.cancelled()
+        assert {response.content for response in responses} == {"answer 2"}
+        assert llm.calls == 2
+        assert gateway._inflight == {}
+
+    def test_errors_reach_every_waiter(self):
+        """A failed call raises in every caller sharing it"""
+        llm = FakeLLM(error=ValueError("bad request"))
+        gateway = self.gateway(llm)
+        messages = [HumanMessage(content="conversion rates")]
+
+        async def run():
+            return await asyncio.gather(
+                *(gateway.ainvoke(messages, use_cache=False) for _ in range(3)),
+                return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(result, ValueError) for result in results)
+        assert llm.calls == 1
@@ -0,0 +1,116 @@
+"""Tests for the streaming CSV, Parquet and Arrow export encoders"""
+
+import asyncio
+import gzip
+import io
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from app.services.result_export import (
+    PYARROW_AVAILABLE,
+    ZSTD_AVAILABLE,
+    export_batches,
+    validate_export
+)
+
+requires_pyarrow = pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+
+
+def export(batches, export_format, compression=None):
+    """Run an export to completion, returning the file and the stats"""
+    async def frames():
+        for batch in batches:
+            yield batch
+
+    async def collect():
+        stats = {}
+        chunks = [chunk async for chunk in export_batches(frames(), export_format, compression, stats)]
+        return b"".join(chunks), stats
+
+    return asyncio.run(collect())
+
+
+BATCHES = [
+    pd.DataFrame({"id": [1, 2], "name": ["a", "b"]}),
+    pd.DataFrame({"id": [3], "name": ["c"]})
+]
+
+
+class TestValidateExport:
+    def test_rejects_unknown_format_and_compression(self):
+        """Unsupported formats and codecs raise ValueError"""
+        with pytest.raises(ValueError):
+            validate_export("xlsx", None)
+        with pytest.raises(ValueError):
+            validate_export("csv", "brotli")
+
+
+class TestCsvExport:
+    def test_single_header(self):
+        """The header is written once, before the first batch"""
+        data, stats = export(BATCHES, "csv")
+        assert data.decode() == "id,name\n1,a\n2,b\n3,c\n"
+        assert stats == {"rows": 3, "bytes": len(data)}
+
+    def test_gzip(self):
+        """The gzip stream decompresses to the plain CSV"""
+        data, _ = export(BATCHES, "csv", "gzip")
+        assert gzip.decompress(data).decode() == "id,name\n1,a\n2,b\n3,c\n"
+
+    @pytest.mark.skipif(not ZSTD_AVAILABLE, reason="zstandard not installed")
+    def test_zstd(self):
+        """The zstd stream decompresses to the plain CSV"""
+        import zstandard
+
+        data, _ = export(BATCHES, "csv", "zstd")
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+        assert reader.read().decode() == "id,name\n1,a\n2,b\n3,c\n"
+
+    def test_empty_result(self):
+        """No batches produce an empty file"""
+        assert export([], "csv") == (b"", {"rows": 0, "bytes": 0})
+
+
+@requires_pyarrow
+class TestArrowExport:
+    def read(self, data, export_format):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if export_format == "parquet":
+            return pq.read_table(io.BytesIO(data))
+        return pa.ipc.open_stream(data).read_all()
+
+    @pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+    def test_round_trip(self, export_format):
+        """All batches are readable as one table"""
+        data, stats = export(BATCHES, export_format)
+        assert self.read(data, export_format).to_pydict() == {"id": [1, 2, 3], "name": ["a", "b", "c"]}
+        assert stats["rows"] == 3
+
+    @pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+    def test_decimals_wider_than_first_batch(self, export_format):
+        """Later decimals with more digits fit the widened schema"""
+        batches = [
+            pd.DataFrame({"amount": [Decimal("1.25")]}),
+            pd.DataFrame({"amount": [Decimal("12345678.75"), None]}),
+            pd.DataFrame({"amount": [Decimal("0.125")]})
+        ]
+        table = self.read(export(batches, export_format)[0], export_format)
+        assert table.schema.field("amount").type.precision == 38
+        assert table.column("amount").to_pylist() == [
+            Decimal("1.25"), Decimal("12345678.75"), None, Decimal("0.13")
+        ]
+
+    @pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+    def test_null_first_batch_and_integer_nulls(self, export_format):
+        """All-null columns become strings and integers accept later nulls"""
+        batches = [
+            pd.DataFrame({"note": [None, None], "n": [1, 2]}),
+            pd.DataFrame({"note": ["x", None], "n": [None, 4]})
+        ]
+        table = self.read(export(batches, export_format)[0], export_format)
+        assert table.column("note").to_pylist() == [None, None, "x", None]
+        assert table.column("n").to_pylist() == [1, 2, None, 4]
@@ -0,0 +1,26 @@
+"""Tests for the compact schema encoding"""
+
+import pytest
+
+from app.services.schema_encoder import abbreviate_type
+
+
+class TestAbbreviateType:
+    @pytest.mark.parametrize("type_name, expected", [
+        ("INTEGER", "int"),
+        ("int4", "int"),
+        ("TINYINT(1)", "int"),
+        ("MEDIUMINT UNSIGNED", "int"),
+        ("BIGINT", "bigint"),
+        ("INTERVAL", "interval"),
+        ("interval day to second", "interval"),
+        ("VARCHAR(255)", "str"),
+        ("NUMERIC(12, 2)", "dec"),
+        ("TIMESTAMP WITH TIME ZONE", "tstz"),
+        ("TIMESTAMP", "ts"),
+        ("INTEGER[]", "int[]"),
+        ("POINT", "point")
+    ])
+    def test_abbreviations(self, type_name, expected):
+        """Types map to their short names, lengths dropped"""
+        assert abbreviate_type(type_name) == expected
@@ -0,0 +1,68 @@
+"""Tests for the HyperLogLog, t-digest and count-min sketches"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.sketches import CountMinSketch, HyperLogLog, TDigest
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(42)
+
+
+class TestSketches:
+    def test_hyperloglog_estimate_and_merge(self):
+        """Distinct counts are within a few percent, and merging is a union"""
+        left, right = HyperLogLog(), HyperLogLog()
+        left.add(pd.Series(range(0, 30000)))
+        right.add(pd.Series(range(20000, 50000)))
+        assert left.estimate() == pytest.approx(30000, rel=0.05)
+
+        left.merge(right)
+        assert left.estimate() == pytest.approx(50000, rel=0.05)
+        assert HyperLogLog.from_dict(left.to_dict()).estimate() == left.estimate()
+
+    def test_hyperloglog_small_cardinality(self):
+        """Small counts use linear counting and ignore nulls"""
+        sketch = HyperLogLog()
+        sketch.add(pd.Series(["a", "b", "c", "a", None]))
+        assert sketch.estimate() == 3
+
+    def test_hyperloglog_precision_mismatch(self):
+        """Sketches of different precision cannot be merged"""
+        with pytest.raises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+    def test_tdigest_quantiles(self, rng):
+        """Quantiles of merged digests are close to the exact quantiles"""
+        values = rng.exponential(10, 20000)
+        digest = TDigest()
+        for chunk in np.array_split(values, 5):
+            part = TDigest()
+            part.add(chunk)
+            digest.merge(part)
+
+        assert digest.count == pytest.approx(len(values))
+        for q in (0.1, 0.5, 0.9, 0.99):
+            assert digest.quantile(q) == pytest.approx(np.quantile(values, q), rel=0.05)
+        assert digest.cdf(float(np.median(values))) == pytest.approx(0.5, abs=0.02)
+
+    def test_count_min_never_underestimates(self, rng):
+        """Estimated frequencies are at least the true counts"""
+        values = pd.Series(rng.zipf(1.5, 5000) % 1000)
+        sketch = CountMinSketch(width=256, depth=4)
+        sketch.add(values)
+
+        counts = values.value_counts()
+        estimates = sketch.estimate(pd.Series(counts.index))
+        assert (estimates >= counts.to_numpy()).all()
+        assert estimates[0] == pytest.approx(counts.iloc[0], rel=0.05)
+
+    def test_count_min_merge(self):
+        """Merging adds the counters"""
+        left, right = CountMinSketch(), CountMinSketch()
+        left.add(pd.Series(["x", "y"]))
+        right.add(pd.Series(["x"]), counts=np.array([4]))
+        assert left.merge(right).estimate(pd.Series(["x", "y"])).tolist() == [5, 1]
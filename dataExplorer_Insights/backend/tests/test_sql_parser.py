@@ -0,0 +1,73 @@
+"""Tests for the select list, ORDER BY and LIMIT parsing helpers"""
+
+import pytest
+
+from app.services.sql_parser import (
+    parse_limit,
+    parse_order_by,
+    parse_select_columns,
+    split_top_level,
+    strip_limit
+)
+
+
+class TestSqlParser:
+    def test_split_top_level_ignores_nested_commas(self):
+        """Commas inside parentheses and quotes do not split"""
+        assert split_top_level("a, COALESCE(b, 0), 'x, y'") == ["a", "COALESCE(b, 0)", "'x, y'"]
+
+    def test_select_columns(self):
+        """Aliases, aggregates and DISTINCT are recognized"""
+        columns = parse_select_columns(
+            "SELECT region, SUM(sales) AS total, COUNT(DISTINCT customer_id) customers FROM orders GROUP BY region"
+        )
+        assert [col["alias"] for col in columns] == ["region", "total", "customers"]
+        assert [col["aggregate"] for col in columns] == [None, "SUM", "COUNT"]
+        assert [col["distinct"] for col in columns] == [False, False, True]
+        assert all(col["mergeable"] for col in columns)
+
+    def test_unaliased_columns(self):
+        """Qualified columns are named by the column, expressions by themselves"""
+        columns = parse_select_columns('SELECT o."region", SUM(o.amount) FROM o GROUP BY o."region"')
+        assert [col["alias"] for col in columns] == ["region", "SUM(o.amount)"]
+
+    @pytest.mark.parametrize("expression", [
+        "SUM(a) / COUNT(*)",
+        "MAX(x) + 1",
+        "COALESCE(SUM(z), 0)",
+        "SUM(a) - SUM(b)"
+    ])
+    def test_expressions_over_aggregates_are_not_mergeable(self, expression):
+        """Only a single aggregate call is classified as that aggregate"""
+        column = parse_select_columns(f"SELECT {expression} AS value FROM t")[0]
+        assert column["aggregate"] is None
+        assert column["mergeable"] is False
+
+    def test_aggregate_of_nested_call(self):
+        """A call inside the aggregate's argument is still one aggregate"""
+        column = parse_select_columns("SELECT SUM(ABS(amount)) AS total FROM t")[0]
+        assert column["aggregate"] == "SUM"
+        assert column["mergeable"] is True
+
+    def test_order_by_and_limit(self):
+        """ORDER BY directions and the row limit of each dialect"""
+        sql = "SELECT a, b FROM t ORDER BY t.a DESC, b LIMIT 10"
+        assert parse_order_by(sql) == [("a", False), ("b", True)]
+        assert parse_limit(sql) == 10
+        assert parse_limit("SELECT TOP 5 a FROM t") == 5
+        assert parse_limit("SELECT a FROM t ORDER BY a FETCH FIRST 3 ROWS ONLY") == 3
+        assert parse_limit("SELECT a FROM (SELECT a FROM t LIMIT 2) s") is None
+
+    def test_order_by_expressions_and_ordinals(self):
+        """Expressions and ordinals are returned as written"""
+        sql = 'SELECT a FROM t ORDER BY SUM(o.amount) DESC, 2, "t"."b" ASC'
+        assert parse_order_by(sql) == [("SUM(o.amount)", False), ("2", True), ("b", True)]
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT a, SUM(b) AS s FROM t GROUP BY a ORDER BY s DESC LIMIT 5",
+        "SELECT TOP 5 a, SUM(b) AS s FROM t GROUP BY a ORDER BY s DESC",
+        "SELECT a, SUM(b) AS s FROM t GROUP BY a ORDER BY s DESC FETCH FIRST 5 ROWS ONLY"
+    ])
+    def test_strip_limit(self, sql):
+        """The outer row limit is removed, the rest of the query kept"""
+        assert strip_limit(sql) == "SELECT a, SUM(b) AS s FROM t GROUP BY a ORDER BY s DESC"
@@ -0,0 +1,73 @@
+"""Tests for the mergeable moments used by streaming analysis"""
+
+import math
+
+import numpy as np
+import pytest
+
+from app.services.streaming_analyzer import CoMoments, Moments
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(42)
+
+
+class TestMoments:
+    def test_merge_matches_whole_array(self, rng):
+        """Merging the moments of chunks equals the moments of all values"""
+        values = rng.normal(10, 3, 1000)
+        merged = Moments()
+        for chunk in np.array_split(values, 7):
+            merged.merge(Moments.from_values(chunk))
+
+        assert merged.count == 1000
+        assert merged.mean == pytest.approx(values.mean())
+        assert merged.std == pytest.approx(values.std(ddof=1))
+        assert merged.sum == pytest.approx(values.sum())
+
+    def test_subtract_undoes_merge(self, rng):
+        """Removing a merged chunk restores the moments of the rest"""
+        values = rng.normal(0, 1, 500)
+        total = Moments.from_values(values)
+        total.subtract(Moments.from_values(values[400:]))
+
+        rest = Moments.from_values(values[:400])
+        assert total.count == rest.count
+        assert total.mean == pytest.approx(rest.mean)
+        assert total.m2 == pytest.approx(rest.m2)
+
+    def test_nan_and_empty(self):
+        """NaN is ignored and empty moments merge as a no-op"""
+        moments = Moments.from_values(np.array([1.0, np.nan, 3.0]))
+        assert (moments.count, moments.mean) == (2, 2.0)
+        assert Moments().merge(moments).mean == 2.0
+        assert Moments.from_values(np.array([5.0])).subtract(Moments.from_values(np.array([5.0]))).count == 0
+        assert math.isnan(Moments().std)
+
+    def test_serialization(self):
+        """to_dict and from_dict round-trip"""
+        moments = Moments.from_values(np.arange(10.0))
+        restored = Moments.from_dict(moments.to_dict())
+        assert (restored.count, restored.mean, restored.m2) == (moments.count, moments.mean, moments.m2)
+
+
+class TestCoMoments:
+    def test_merge_matches_pearson(self, rng):
+        """Merged co-moments give the correlation of all rows"""
+        x = rng.normal(size=900)
+        y = 0.6 * x + rng.normal(size=900)
+        y[::50] = np.nan
+
+        merged = CoMoments()
+        for xs, ys in zip(np.array_split(x, 4), np.array_split(y, 4)):
+            merged.merge(CoMoments.from_values(xs, ys))
+
+        both = ~np.isnan(y)
+        assert merged.count == both.sum()
+        assert merged.correlation == pytest.approx(np.corrcoef(x[both], y[both])[0, 1])
+
+    def test_constant_column_has_no_correlation(self):
+        """Correlation is NaN when a column does not vary"""
+        moments = CoMoments.from_values(np.arange(5.0), np.ones(5))
+        assert math.isnan(moments.correlation)
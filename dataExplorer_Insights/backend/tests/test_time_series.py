@@ -0,0 +1,70 @@
+"""Tests for trend, seasonality, anomaly and change-point analysis"""
+
+import math
+
+import numpy as np
+import pytest
+
+from app.services.time_series import (
+    change_points,
+    linear_trend,
+    rolling_zscores,
+    seasonal_component,
+    t_test_p_value
+)
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(42)
+
+
+class TestTimeSeries:
+    def test_increasing_trend(self, rng):
+        """A clear upward line is significant"""
+        y = np.arange(100, dtype=float) * 2 + rng.normal(0, 5, 100)
+        trend = linear_trend(y)
+        assert trend["direction"] == "increasing"
+        assert trend["slope"] == pytest.approx(2, rel=0.1)
+        assert trend["significant"]
+
+    def test_flat_trend(self):
+        """A constant series has a flat, insignificant trend"""
+        trend = linear_trend(np.full(30, 7.0))
+        assert trend["direction"] == "flat"
+        assert trend["slope"] == 0
+        assert not trend["significant"]
+
+    def test_t_test_p_value(self):
+        """Two-sided p-values of known t statistics"""
+        assert t_test_p_value(0.0, 10) == pytest.approx(1.0)
+        assert t_test_p_value(2.228, 10) == pytest.approx(0.05, abs=1e-3)
+        assert t_test_p_value(math.inf, 10) == 0.0
+
+    def test_rolling_zscores(self, rng):
+        """A spike stands out against the preceding window"""
+        y = rng.normal(0, 1, 200)
+        y[150] = 12.0
+        scores = rolling_zscores(y, 30)
+
+        assert np.isnan(scores[:30]).all()
+        assert scores[150] > 8
+        assert np.nanmax(np.abs(np.delete(scores, 150))) < 5
+
+    def test_seasonal_component(self, rng):
+        """A weekly cycle is recovered with high strength"""
+        pattern = np.array([0, 1, 2, 3, 2, 1, 0], dtype=float) * 10
+        y = np.tile(pattern, 20) + np.arange(140) * 0.5 + rng.normal(0, 1, 140)
+        seasonal, strength = seasonal_component(y, 7)
+
+        assert strength > 0.9
+        assert seasonal.argmax() == 3
+        assert seasonal_component(y[:10], 7) is None
+
+    def test_change_points(self, rng):
+        """A level shift is found near where it happens, a line is not cut"""
+        y = np.concatenate([np.zeros(100), np.full(100, 10.0)]) + rng.normal(0, 1, 200)
+        points = change_points(y)
+        assert points and abs(points[0] - 100) <= 2
+
+        assert change_points(np.arange(200, dtype=float) + rng.normal(0, 1, 200)) == []